@@ -1,40 +1,165 @@
 # app/api/endpoints.py
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from ..schemas.models import AnalysisResult
-from fastapi.responses import StreamingResponse
-from ..services.analysis_service import process_analysis_request, process_streaming_analysis
+import os
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends, Header
+from ..schemas.models import AnalysisResult, JobResult, TimeStatsResult
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from ..services.analysis_service import process_streaming_analysis
+from ..services.analysis_service import preprocess_uploads, run_analysis_upload, start_streaming_analysis
+from ..services.analysis_service import process_time_stats_request
+from ..services.analysis_service import submit_analysis_job, describe_job, follow_analysis_job
+from ..services.jobs import Job, JobQueueFull, get_job_manager
+from ..services.history_store import StoredHistoryNotFound, get_history_store
+from ..services.takeout import TakeoutArchiveError, spool_upload
+from ..services.constant import KEYWORD_MODE_LLM, KEYWORD_MODES, DEFAULT_TIMEZONE
+from ..services.time_stats import resolve_timezone
+from ..tracing import TRACE_MODES, TRACE_PROFILE, RequestTrace, profile_path
+from ..serialization import ModelResponse
 import json
 
 router = APIRouter()
 
-@router.post("/analysis/{analysis_id}", response_model=AnalysisResult)
+
+def timezone_query(
+        timezone: str = Query(
+            DEFAULT_TIMEZONE,
+            description="시간 통계 기준 시간대 (IANA 이름, 예: Asia/Seoul)"
+        )
+) -> str:
+    """timezone 쿼리 파라미터를 검증합니다. 알 수 없는 시간대면 400을 반환합니다."""
+    try:
+        resolve_timezone(timezone)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 시간대입니다: {timezone}"
+        )
+    return timezone
+
+
+def trace_mode(
+        trace: Optional[str] = Query(
+            None,
+            pattern=f"^({'|'.join(TRACE_MODES)})$",
+            description="trace 모드: timing(단계별 측정값을 마지막 trace 이벤트로 전송) 또는 profile(cProfile 결과도 저장)"
+        ),
+        x_analysis_trace: Optional[str] = Header(
+            None,
+            pattern=f"^({'|'.join(TRACE_MODES)})$",
+            description="trace 쿼리 파라미터와 같음 (쿼리가 우선)"
+        )
+) -> Optional[str]:
+    """trace 쿼리 파라미터 또는 X-Analysis-Trace 헤더. 둘 다 없으면 None"""
+    return trace or x_analysis_trace
+
+
+def history_hash_query(
+        history_hash: Optional[str] = Query(
+            None,
+            pattern="^[0-9a-f]{64}$",
+            description="이전 응답의 X-History-Hash. 파일을 다시 올리지 않고 저장된 시청 기록과 구독 정보로 분석"
+        )
+) -> Optional[str]:
+    """history_hash 쿼리 파라미터 (업로드 해시 형식만 허용)"""
+    return history_hash
+
+
+def check_history_source(
+        history_file: Optional[Any],
+        subscriptions_file: Optional[Any],
+        history_hash: Optional[str]
+) -> None:
+    """시청 기록 파일과 history_hash 중 정확히 하나가 주어졌는지 확인합니다. 아니면 400을 반환합니다."""
+    if history_hash is None and history_file is None:
+        raise HTTPException(
+            status_code=400,
+            detail="history_file 또는 history_hash가 필요합니다."
+        )
+    if history_hash is not None and (history_file is not None or subscriptions_file is not None):
+        raise HTTPException(
+            status_code=400,
+            detail="history_hash를 쓰면 저장된 시청 기록과 구독 정보로 분석하므로 파일을 함께 올릴 수 없습니다."
+        )
+
+
+def history_headers(upload_hash: Optional[str]) -> Dict[str, str]:
+    """저장된 시청 기록을 다시 참조할 수 있도록 업로드 해시를 알려주는 응답 헤더"""
+    if upload_hash is None or not get_history_store().enabled:
+        return {}
+    return {"X-History-Hash": upload_hash}
+
+
+def stored_history_not_found() -> HTTPException:
+    """history_hash로 참조한 기록이 저장소에 없을 때의 응답 (지워졌으면 파일을 다시 올려야 함)"""
+    return HTTPException(
+        status_code=404,
+        detail="저장된 시청 기록을 찾을 수 없습니다. 파일을 다시 업로드해 주세요."
+    )
+
+
+@router.post("/analysis/{analysis_id}", response_model=AnalysisResult, response_model_exclude_none=True)
 async def analyze_data(
         analysis_id: str,
-        history_file: UploadFile = File(...),
-        subscriptions_file: UploadFile = File(...)
+        history_file: UploadFile = File(
+            None,
+            description="시청 기록 (JSON, HTML, Takeout .zip/.tgz). history_hash로 저장된 기록을 참조하면 생략"
+        ),
+        subscriptions_file: UploadFile = File(
+            None,
+            description="구독 정보 (JSON 또는 CSV). 시청 기록으로 Takeout 압축 파일을 올리면 생략 가능"
+        ),
+        history_hash: Optional[str] = Depends(history_hash_query),
+        keyword_mode: str = Query(
+            KEYWORD_MODE_LLM,
+            pattern=f"^({'|'.join(KEYWORD_MODES)})$",
+            description="키워드 추출 방식: llm(LLM 추출) 또는 local(로컬 빈도 분석, 네트워크 호출 없음)"
+        ),
+        timezone: str = Depends(timezone_query),
+        approximate: bool = Query(
+            False,
+            description="채널 집계를 크기가 고정된 heavy-hitter 요약으로 근사 (채널 항목에 최대 과대 추정치 error 포함)"
+        ),
+        incremental: bool = Query(
+            False,
+            description="analysis_id별로 저장된 집계 상태에 지난 분석 이후의 새 기록만 더해 분석"
+        )
 ):
+    check_history_source(history_file, subscriptions_file, history_hash)
     try:
-        # JSON 파일 읽기 및 파싱
-        history_data = json.loads(await history_file.read())
-        subscriptions_data = json.loads(await subscriptions_file.read())
-        
-        # 분석 서비스 호출 (analysis_id 전달)
-        analysis_data = await process_analysis_request(
-            history_data, 
-            subscriptions_data,
-            analysis_id=analysis_id  # analysis_id 전달
+        # 업로드 파일 읽기 및 파싱 후 분석 서비스 호출 (analysis_id 전달)
+        # 시청 기록은 청크 단위 스트리밍 파싱, Takeout 압축 파일은 스트리밍 압축 해제
+        # history_hash가 주어지면 저장된 기록을 사용하고, 같은 업로드의 분석이 진행 중이면 그 결과를 함께 받음
+        uploads = await preprocess_uploads(
+            history_file, subscriptions_file, history_hash=history_hash, timezone=timezone
+        )
+        analysis_data = await run_analysis_upload(
+            uploads,
+            analysis_id=analysis_id,  # analysis_id 전달
+            keyword_mode=keyword_mode,
+            timezone=timezone,
+            approximate=approximate,
+            incremental=incremental
         )
         
-        return AnalysisResult(
+        # 응답 모델은 여기서 한 번만 검증하고 바로 직렬화 (response_model은 문서용)
+        return ModelResponse(AnalysisResult(
             status="success",
             data=analysis_data
-        )
+        ), headers=history_headers(uploads.upload_hash))
 
+    except StoredHistoryNotFound:
+        raise stored_history_not_found()
     except json.JSONDecodeError:
         raise HTTPException(
             status_code=400,
             detail="업로드된 파일 중 하나의 JSON 형식이 올바르지 않습니다."
         )
+    except TakeoutArchiveError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -44,32 +169,264 @@ async def analyze_data(
 @router.post("/analysis-stream/{analysis_id}")
 async def analyze_data_stream(
         analysis_id: str,
-        history_file: UploadFile = File(...),
-        subscriptions_file: UploadFile = File(...)
+        history_file: UploadFile = File(
+            None,
+            description="시청 기록 (JSON, HTML, Takeout .zip/.tgz). history_hash로 저장된 기록을 참조하면 생략"
+        ),
+        subscriptions_file: UploadFile = File(
+            None,
+            description="구독 정보 (JSON 또는 CSV). 시청 기록으로 Takeout 압축 파일을 올리면 생략 가능"
+        ),
+        history_hash: Optional[str] = Depends(history_hash_query),
+        keyword_mode: str = Query(
+            KEYWORD_MODE_LLM,
+            pattern=f"^({'|'.join(KEYWORD_MODES)})$",
+            description="키워드 추출 방식: llm(LLM 추출) 또는 local(로컬 빈도 분석, 네트워크 호출 없음)"
+        ),
+        timezone: str = Depends(timezone_query),
+        approximate: bool = Query(
+            False,
+            description="채널 집계를 크기가 고정된 heavy-hitter 요약으로 근사 (채널 항목에 최대 과대 추정치 error 포함)"
+        ),
+        incremental: bool = Query(
+            False,
+            description="analysis_id별로 저장된 집계 상태에 지난 분석 이후의 새 기록만 더해 분석"
+        ),
+        trace: Optional[str] = Depends(trace_mode)
 ):
+    check_history_source(history_file, subscriptions_file, history_hash)
     try:
-        # JSON 파일 읽기 및 파싱
-        history_data = json.loads(await history_file.read())
-        subscriptions_data = json.loads(await subscriptions_file.read())
+        request_trace = RequestTrace(profile=trace == TRACE_PROFILE).start() if trace else None
+        # 업로드 파일 읽기 및 파싱 (시청 기록은 청크 단위 스트리밍 파싱, Takeout 압축 파일은 스트리밍 압축 해제)
+        # 업로드 파일은 응답 스트리밍 전에 닫히므로 여기서 미리 읽어야 함
+        try:
+            uploads = await preprocess_uploads(
+                history_file, subscriptions_file, trace=request_trace, history_hash=history_hash, timezone=timezone
+            )
+        except BaseException:
+            if request_trace is not None:
+                request_trace.close()
+            raise
+
+        if request_trace is None:
+            # 스트리밍 분석 시작 (analysis_id 전달)
+            # 같은 업로드의 분석이 진행 중이면 그 분석의 이벤트를 처음부터 같이 받음
+            return StreamingResponse(
+                start_streaming_analysis(
+                    uploads,
+                    analysis_id=analysis_id,
+                    keyword_mode=keyword_mode,
+                    timezone=timezone,
+                    approximate=approximate,
+                    incremental=incremental
+                ),
+                media_type="application/json",
+                headers={"X-Content-Type-Options": "nosniff", **history_headers(uploads.upload_hash)}
+            )
+
+        # trace 모드는 이 요청의 실행을 측정하므로 진행 중인 분석과 합치지 않음
+        headers = {
+            "X-Content-Type-Options": "nosniff",
+            "X-Trace-Id": request_trace.request_id,
+            **history_headers(uploads.upload_hash)
+        }
+        # 스트리밍이 시작되기 전에 연결이 끊겨도 추적이 정리되도록 (close는 여러 번 호출해도 됨)
+        background = BackgroundTask(request_trace.close)
         
         # 스트리밍 서비스 호출 (analysis_id 전달)
         return StreamingResponse(
             process_streaming_analysis(
-                history_data, 
-                subscriptions_data,
-                analysis_id=analysis_id  # analysis_id 전달
+                uploads.history,
+                uploads.subscriptions,
+                analysis_id=analysis_id,  # analysis_id 전달
+                keyword_mode=keyword_mode,
+                timezone=timezone,
+                approximate=approximate,
+                incremental=incremental,
+                trace=request_trace
             ),
             media_type="application/json",
-            headers={"X-Content-Type-Options": "nosniff"}
+            headers=headers,
+            background=background
         )
         
+    except StoredHistoryNotFound:
+        raise stored_history_not_found()
     except json.JSONDecodeError:
         raise HTTPException(
             status_code=400,
             detail="업로드된 파일 중 하나의 JSON 형식이 올바르지 않습니다."
         )
+    except TakeoutArchiveError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/time-stats/{analysis_id}", response_model=TimeStatsResult, response_model_exclude_none=True)
+async def analyze_time_stats(
+        analysis_id: str,
+        history_file: UploadFile = File(
+            None,
+            description="시청 기록 (JSON, HTML, Takeout .zip/.tgz). history_hash로 저장된 기록을 참조하면 생략"
+        ),
+        history_hash: Optional[str] = Depends(history_hash_query),
+        timezone: str = Depends(timezone_query),
+        approximate: bool = Query(
+            False,
+            description="채널 집계를 크기가 고정된 heavy-hitter 요약으로 근사 (채널 항목에 최대 과대 추정치 error 포함)"
+        )
+):
+    check_history_source(history_file, None, history_hash)
+    try:
+        # 시청 기록만 파싱하고 LLM 호출 없이 시간 통계를 계산 (저장된 기록이 있으면 파싱 생략)
+        uploads = await preprocess_uploads(history_file, history_hash=history_hash, timezone=timezone)
+        time_stats_data = await process_time_stats_request(
+            uploads.history, timezone=timezone, approximate=approximate
+        )
+        
+        return ModelResponse(TimeStatsResult(
+            status="success",
+            data=time_stats_data
+        ), headers=history_headers(uploads.upload_hash))
+
+    except StoredHistoryNotFound:
+        raise stored_history_not_found()
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail="업로드된 시청 기록 파일의 JSON 형식이 올바르지 않습니다."
+        )
+    except TakeoutArchiveError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+@router.post("/jobs/{analysis_id}", response_model=JobResult, response_model_exclude_none=True, status_code=202)
+async def analyze_data_job(
+        analysis_id: str,
+        history_file: UploadFile = File(
+            None,
+            description="시청 기록 (JSON, HTML, Takeout .zip/.tgz). history_hash로 저장된 기록을 참조하면 생략"
+        ),
+        subscriptions_file: UploadFile = File(
+            None,
+            description="구독 정보 (JSON 또는 CSV). 시청 기록으로 Takeout 압축 파일을 올리면 생략 가능"
+        ),
+        history_hash: Optional[str] = Depends(history_hash_query),
+        keyword_mode: str = Query(
+            KEYWORD_MODE_LLM,
+            pattern=f"^({'|'.join(KEYWORD_MODES)})$",
+            description="키워드 추출 방식: llm(LLM 추출) 또는 local(로컬 빈도 분석, 네트워크 호출 없음)"
+        ),
+        timezone: str = Depends(timezone_query),
+        approximate: bool = Query(
+            False,
+            description="채널 집계를 크기가 고정된 heavy-hitter 요약으로 근사 (채널 항목에 최대 과대 추정치 error 포함)"
+        ),
+        incremental: bool = Query(
+            False,
+            description="analysis_id별로 저장된 집계 상태에 지난 분석 이후의 새 기록만 더해 분석"
+        )
+):
+    check_history_source(history_file, subscriptions_file, history_hash)
+    manager = get_job_manager()
+    try:
+        # 업로드를 읽기 전에 대기열 자리를 확보 (가득 찼으면 바로 429)
+        job = manager.reserve(analysis_id)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="대기 중인 분석 작업이 너무 많습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    spooled = []
+    try:
+        # 응답을 보내면 업로드 파일이 닫히므로 파싱하지 않고 임시 파일로만 옮긴 뒤 바로 응답
+        # (파싱은 워커가 작업을 시작할 때, 파싱 오류는 작업 실패로 알림)
+        for upload in (history_file, subscriptions_file):
+            spooled.append(await spool_upload(upload) if upload is not None else None)
+    except Exception as e:
+        manager.discard(job)
+        for upload in spooled:
+            if upload is not None:
+                upload.close()
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+    # 파싱과 분석은 워커 풀에서 실행되고, 결과는 /jobs/{job_id} 또는 /jobs/{job_id}/stream으로 조회
+    history_upload, subscriptions_upload = spooled
+    submit_analysis_job(
+        job,
+        history_upload,
+        subscriptions_upload,
+        history_hash=history_hash,
+        keyword_mode=keyword_mode,
+        timezone=timezone,
+        approximate=approximate,
+        incremental=incremental
+    )
+    return ModelResponse(JobResult(
+        status="success",
+        data=describe_job(job)
+    ), status_code=202, headers=history_headers(history_hash))
+
+
+def find_job(job_id: str) -> Job:
+    """job_id로 작업을 찾습니다. 없거나 보관 시간이 지났으면 404를 반환합니다."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"작업을 찾을 수 없습니다: {job_id}"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResult, response_model_exclude_none=True)
+async def get_analysis_job(job_id: str):
+    return ModelResponse(JobResult(
+        status="success",
+        data=describe_job(find_job(job_id))
+    ))
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_analysis_job(job_id: str):
+    # 지금까지의 결과를 처음부터 전송한 뒤 작업이 끝날 때까지 새 결과를 이어서 전송
+    return StreamingResponse(
+        follow_analysis_job(find_job(job_id)),
+        media_type="application/json",
+        headers={"X-Content-Type-Options": "nosniff"}
+    )
+
+
+@router.get("/traces/{request_id}/profile")
+async def get_trace_profile(request_id: str):
+    # trace=profile 요청의 cProfile 결과 (pstats 형식, python -m pstats 또는 snakeviz로 열기)
+    try:
+        path = profile_path(request_id)
+    except ValueError:
+        path = None
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=404,
+            detail=f"프로파일을 찾을 수 없습니다: {request_id}"
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{request_id}.prof")
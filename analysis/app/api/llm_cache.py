@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .. import metrics
+
+# 캐시 설정 (환경 변수로 조정)
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_DISK_ENTRIES", "100000"))
+
+
+class LLMCache:
+    """
+    LLM 응답 캐시 (내용 주소 기반).
+    모델, 시스템 프롬프트, 직렬화된 컨텍스트, 호출 파라미터의 해시를 키로 사용하며
+    메모리 LRU 계층과 SQLite 영속 계층 두 단계로 구성됩니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl: float = LLM_CACHE_TTL,
+        db_path: Optional[str] = LLM_CACHE_PATH,
+        max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        # key -> (만료 시각, 직렬화된 응답)
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            try:
+                self._db = self._open_db(db_path)
+            except sqlite3.Error as e:
+                self.logger.error(f"LLM 캐시 DB 열기 실패, 메모리 캐시만 사용: {e}")
+
+    @staticmethod
+    def _open_db(db_path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)")
+        return db
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """호출 파라미터(모델, 프롬프트, 컨텍스트 등)를 정규화된 JSON으로 직렬화한 SHA-256 해시"""
+        serialized = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """캐시된 응답을 반환합니다. 없거나 만료되었으면 None"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(value)
+            del self._memory[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key, now)
+            if row is not None:
+                expires_at, value = row
+                self._remember(key, expires_at, value)
+                self.disk_hits += 1
+                return json.loads(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """응답을 두 계층에 모두 저장합니다."""
+        serialized = json.dumps(value, ensure_ascii=False)
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, serialized)
+        if self._db is not None:
+            await asyncio.to_thread(self._db_set, key, serialized, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패 카운터와 현재 크기"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory)
+        }
+
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[0] <= now:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    return None
+                self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                return row
+        except sqlite3.Error as e:
+            self.logger.error(f"LLM 캐시 조회 실패: {e}")
+            return None
+
+    def _db_set(self, key: str, value: str, expires_at: float) -> None:
+        now = time.time()
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now)
+                )
+                # 만료 항목과 크기 한도를 넘는 오래된 항목 정리
+                self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"LLM 캐시 저장 실패: {e}")
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """프로세스 전체에서 공유하는 LLM 캐시. LLM_CACHE_ENABLED=0이면 None"""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+def _collect_cache_lookups() -> Dict[Tuple[str, ...], float]:
+    """llm_cache_lookups_total: 공유 캐시의 적중/실패 카운터를 수집 시점에 읽음"""
+    if _cache is None:
+        return {}
+    return {("memory_hit",): _cache.memory_hits, ("disk_hit",): _cache.disk_hits, ("miss",): _cache.misses}
+
+
+metrics.LLM_CACHE_LOOKUPS.set_function(_collect_cache_lookups)
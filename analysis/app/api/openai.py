@@ -1,13 +1,186 @@
+import asyncio
+import contextlib
 import json
 import os
 import logging
-from openai import OpenAI
-from typing import Dict, Any, Optional, Union
+import time
+from typing import Dict, Any, Optional, Union, AsyncIterator
+
+from .. import metrics, tracing
+from ..services.token_budget import estimate_tokens
+from .llm_cache import get_llm_cache
+from .rate_limit import QuotaLimiter
+from .resilience import (
+    DEGRADED_CIRCUIT_OPEN, DEGRADED_QUOTA_EXHAUSTED, DEGRADED_RATE_LIMITED, DEGRADED_UNAVAILABLE,
+    CircuitBreaker, LLMUnavailableError, parse_retry_after, retry_delay
+)
+
+# 프로세스 전체에서 공유하는 연결 풀 / 동시 호출 설정 (환경 변수로 조정)
+OPENAI_MAX_CONCURRENCY = int(os.environ.get("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RPM = float(os.environ.get("OPENAI_MAX_RPM", "0"))  # 프로세스 전체의 분당 요청 한도 (0이면 제한 없음)
+OPENAI_MAX_TPM = float(os.environ.get("OPENAI_MAX_TPM", "0"))  # 프로세스 전체의 분당 토큰 한도 (0이면 제한 없음)
+
+# 일시적인 실패(429, 5xx, 타임아웃, 연결 실패)의 재시도와 서킷 브레이커 설정
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "3"))  # 호출 하나의 최대 재시도 횟수
+OPENAI_RETRY_BASE_DELAY = float(os.environ.get("OPENAI_RETRY_BASE_DELAY", "0.5"))  # 첫 재시도 백오프(초), 이후 2배씩
+OPENAI_RETRY_MAX_DELAY = float(os.environ.get("OPENAI_RETRY_MAX_DELAY", "30"))  # 재시도 한 번의 최대 대기(초)
+OPENAI_CIRCUIT_FAILURES = int(os.environ.get("OPENAI_CIRCUIT_FAILURES", "5"))  # 서킷 브레이커를 여는 연속 실패 수
+OPENAI_CIRCUIT_COOLDOWN = float(os.environ.get("OPENAI_CIRCUIT_COOLDOWN", "30"))  # 열린 뒤 다시 확인할 때까지(초)
+
+# 토큰 한도 추정에 쓰는 출력 토큰 수 (max_tokens가 없는 호출)
+_DEFAULT_COMPLETION_TOKENS = 256
+
+# 비용 메트릭(llm_cost_usd_total)에 쓰는 모델별 가격: 100만 토큰당 USD (입력, 출력)
+# 날짜가 붙은 모델 이름은 가장 긴 접두사로 찾고, OPENAI_MODEL_PRICES(JSON)로 덮어쓰거나 추가할 수 있음
+OPENAI_MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    **{model: tuple(price) for model, price in json.loads(os.environ.get("OPENAI_MODEL_PRICES", "{}")).items()}
+}
+
+
+def model_price(model: str) -> Optional[tuple]:
+    """모델의 (입력, 출력) 100만 토큰당 가격. 모르는 모델이면 None"""
+    matches = [name for name in OPENAI_MODEL_PRICES if model == name or model.startswith(name + "-")]
+    return OPENAI_MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def record_usage(model: str, usage: Any) -> None:
+    """API 응답의 토큰 사용량을 메트릭(llm_tokens_total, llm_cost_usd_total)에 기록합니다."""
+    if usage is None:
+        return
+    prompt_tokens = usage.prompt_tokens or 0
+    completion_tokens = usage.completion_tokens or 0
+    metrics.LLM_TOKENS.inc(prompt_tokens, model=model, type="prompt")
+    metrics.LLM_TOKENS.inc(completion_tokens, model=model, type="completion")
+    price = model_price(model)
+    if price is not None:
+        metrics.LLM_COST.inc((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000, model=model)
+
+
+class _ClientPool:
+    """
+    이벤트 루프 하나에 묶인 AsyncOpenAI 클라이언트와 동시 호출 세마포어, 분당 요청/토큰 한도, 서킷 브레이커.
+    HTTP 연결은 만든 이벤트 루프에서만 닫을 수 있으므로, 루프가 끝날 때(asyncio.run 종료 시 남은 태스크 취소)
+    클라이언트를 닫는 태스크를 함께 띄워 둡니다. (벤치마크/배치처럼 asyncio.run을 여러 번 호출해도 연결이 남지 않도록)
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        # openai SDK와 httpx는 import 비용이 커서(수백 ms) 첫 LLM 호출 때 불러옴 (콜드 스타트 단축)
+        import httpx
+        from openai import AsyncOpenAI
+
+        self.loop = loop
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+            ),
+            timeout=OPENAI_TIMEOUT
+        )
+        self.client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            http_client=self.http_client,
+            timeout=OPENAI_TIMEOUT,
+            # 재시도는 공유 한도, 서킷 브레이커와 함께 OpenAIClient가 처리
+            max_retries=0
+        )
+        self.semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        self.limiter = QuotaLimiter(OPENAI_MAX_RPM, OPENAI_MAX_TPM)
+        self.breaker = CircuitBreaker(OPENAI_CIRCUIT_FAILURES, OPENAI_CIRCUIT_COOLDOWN)
+        self._closer = loop.create_task(self._close_on_shutdown())
+
+    async def _close_on_shutdown(self) -> None:
+        try:
+            await asyncio.Future()
+        finally:
+            await self.client.close()
+
+    async def close(self) -> None:
+        """클라이언트를 닫습니다. 풀을 만든 이벤트 루프에서 호출해야 합니다."""
+        self._closer.cancel()
+        await asyncio.gather(self._closer, return_exceptions=True)
+
+
+_pool: Optional[_ClientPool] = None
+
+
+def get_client_pool() -> _ClientPool:
+    """
+    현재 이벤트 루프의 공유 클라이언트 풀을 반환합니다. 없으면 새로 만듭니다.
+    모든 OpenAIClient가 같은 HTTP 연결 풀과 동시 호출 한도를 사용합니다.
+    이전 이벤트 루프의 풀은 그 루프가 끝날 때 이미 닫혔으므로 바로 교체합니다. (_ClientPool 참고)
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool.loop is not loop:
+        if _pool is not None and not _pool.loop.is_closed():
+            # 이전 루프가 아직 살아 있으면(다른 스레드의 루프 등) 그 루프에서 닫음
+            _pool.loop.call_soon_threadsafe(_pool._closer.cancel)
+        _pool = _ClientPool(loop)
+    return _pool
+
+
+async def close_client_pool() -> None:
+    """공유 HTTP 연결 풀을 닫습니다. (애플리케이션 종료 시 호출)"""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+# 끝난 API 호출의 결과 (llm_requests_total의 status 레이블)
+_CALL_SUCCESS = "success"
+_CALL_ERROR = "error"
+_CALL_CANCELLED = "cancelled"  # 요청이 취소되어 호출을 중단함 (실패로 세지 않음)
+
+
+def _record_call(model: str, mode: str, start: float, status: str, usage: Any) -> None:
+    """끝난 API 호출 하나를 메트릭과 요청 추적(trace 모드)에 기록합니다. status는 _CALL_* 값"""
+    seconds = time.perf_counter() - start
+    metrics.LLM_IN_FLIGHT.dec()
+    metrics.LLM_REQUESTS.inc(model=model, mode=mode, status=status)
+    metrics.LLM_SECONDS.observe(seconds, model=model, mode=mode)
+    record_usage(model, usage)
+    tracing.record_llm_call(
+        model, mode, seconds,
+        prompt_tokens=usage.prompt_tokens if usage is not None else None,
+        completion_tokens=usage.completion_tokens if usage is not None else None,
+        failed=status == _CALL_ERROR,
+        cancelled=status == _CALL_CANCELLED
+    )
+
+
+def _failure_kind(error: BaseException) -> Optional[str]:
+    """
+    재시도할 수 있는 일시적 실패의 종류. 재시도해도 소용없는 실패(잘못된 요청, 인증 오류 등)면 None
+        rate_limited: 429 (한도 초과), quota_exhausted: 429 insufficient_quota (재시도하지 않음),
+        server_error: 5xx, 408, 409, timeout, connection
+    """
+    import openai
+
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    if isinstance(error, openai.RateLimitError):
+        return "quota_exhausted" if error.code == "insufficient_quota" else "rate_limited"
+    if isinstance(error, openai.APIStatusError) and (error.status_code >= 500 or error.status_code in (408, 409)):
+        return "server_error"
+    return None
+
+
+# 재시도하는 실패 / 서킷 브레이커가 서버 상태 문제로 세는 실패
+_RETRYABLE = ("rate_limited", "server_error", "timeout", "connection")
+_SERVER_FAILURES = ("server_error", "timeout", "connection")
+
 
 class OpenAIClient:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
     async def create_chat_completion(
         self,
@@ -16,11 +189,14 @@ class OpenAIClient:
         context: Dict[str, Any],
         temperature: float = 0.7,
         response_format: Optional[Dict[str, str]] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True
     ) -> Union[str, Dict[str, Any]]:
         """
-        OpenAI API를 호출하여 chat completion을 생성합니다.
-        
+        OpenAI API를 비동기로 호출하여 chat completion을 생성합니다.
+        호출 중에는 이벤트 루프를 막지 않으며, 공유 연결 풀과 동시 호출 한도(OPENAI_MAX_CONCURRENCY)를 사용합니다.
+
         Args:
             model: 사용할 OpenAI 모델 이름
             system_prompt: 시스템 프롬프트 내용
@@ -28,44 +204,268 @@ class OpenAIClient:
             temperature: 생성 모델의 temperature 값
             response_format: 응답 형식 (예: {"type": "json_object"})
             max_tokens: 최대 토큰 수
-            
+            timeout: 이 호출의 타임아웃(초). 없으면 OPENAI_TIMEOUT
+            use_cache: 같은 입력의 응답을 LLM 캐시에서 재사용할지 여부
+
         Returns:
             API 응답으로부터 추출한 텍스트 또는 JSON 객체
         """
         try:
-            # API 호출 파라미터 구성
-            params = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(context, ensure_ascii=False)}
-                ],
-                "temperature": temperature
-            }
-            
-            # 선택적 파라미터 추가
-            if response_format:
-                params["response_format"] = response_format
-                
-            if max_tokens:
-                params["max_tokens"] = max_tokens
-            
-            # API 호출
-            response = self.client.chat.completions.create(**params)
-            
+            # 같은 입력(모델, 프롬프트, 컨텍스트, 파라미터)의 캐시된 응답이 있으면 네트워크 호출 없이 반환
+            cache = get_llm_cache() if use_cache else None
+            cache_key = None
+            if cache is not None:
+                cache_key = self._cache_key(cache, model, system_prompt, context, temperature, response_format, max_tokens)
+                lookup_start = time.perf_counter()
+                cached = await cache.get(cache_key)
+                if cached is not None:
+                    tracing.record_llm_call(model, "create", time.perf_counter() - lookup_start, cached=True)
+                    return cached
+
+            params = self._build_params(model, system_prompt, context, temperature, response_format, max_tokens, timeout)
+
+            # API 호출 (분당 요청/토큰 한도와 동시 호출 한도 내에서 비동기로 대기, 일시적 실패는 재시도)
+            response = None
+            async with self._request(model, "create", params) as (raw, start, settle):
+                try:
+                    response = raw.parse()
+                finally:
+                    usage = response.usage if response is not None else None
+                    settle(usage)
+                    _record_call(model, "create", start, _CALL_SUCCESS if response is not None else _CALL_ERROR, usage)
+
             # 응답 추출
             content = response.choices[0].message.content.strip()
-            
+
             # JSON 응답이 요청된 경우 파싱
             if response_format and response_format.get("type") == "json_object":
                 try:
-                    return json.loads(content)
+                    content = json.loads(content)
                 except json.JSONDecodeError as e:
                     self.logger.error(f"JSON 파싱 실패: {e}")
                     return content
-            
+
+            if cache is not None and content:
+                await cache.set(cache_key, content)
+
             return content
-            
+
         except Exception as e:
             self.logger.error(f"OpenAI API 호출 실패: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def stream_chat_completion(
+        self,
+        model: str,
+        system_prompt: str,
+        context: Dict[str, Any],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        chat completion을 스트리밍으로 생성하여 토큰 조각(delta)을 도착하는 대로 반환합니다.
+        캐시 키는 create_chat_completion과 같으므로 두 방식이 응답을 공유합니다.
+        캐시에 있으면 전체 텍스트를 한 번에 반환합니다.
+
+        Args:
+            create_chat_completion과 동일 (response_format 제외)
+
+        Yields:
+            응답 텍스트 조각
+        """
+        try:
+            cache = get_llm_cache() if use_cache else None
+            cache_key = None
+            if cache is not None:
+                cache_key = self._cache_key(cache, model, system_prompt, context, temperature, None, max_tokens)
+                lookup_start = time.perf_counter()
+                cached = await cache.get(cache_key)
+                if cached is not None:
+                    tracing.record_llm_call(model, "stream", time.perf_counter() - lookup_start, cached=True)
+                    yield cached
+                    return
+
+            params = self._build_params(model, system_prompt, context, temperature, None, max_tokens, timeout)
+            params["stream"] = True
+            # 마지막 청크로 토큰 사용량을 받음 (choices가 빈 청크)
+            params["stream_options"] = {"include_usage": True}
+
+            chunks = []
+            usage = None
+            status = _CALL_ERROR
+            # 재시도는 응답을 받기 전까지만 (스트림 도중 실패하면 이미 보낸 조각이 있으므로 그대로 실패)
+            async with self._request(model, "stream", params) as (raw, start, settle):
+                try:
+                    async for chunk in raw.parse():
+                        if chunk.usage is not None:
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            chunks.append(delta)
+                            yield delta
+                    status = _CALL_SUCCESS
+                except (asyncio.CancelledError, GeneratorExit):
+                    # 요청이 취소되었거나 받는 쪽이 스트림을 중단함
+                    status = _CALL_CANCELLED
+                    raise
+                finally:
+                    settle(usage)
+                    _record_call(model, "stream", start, status, usage)
+
+            content = "".join(chunks).strip()
+            if cache is not None and content:
+                await cache.set(cache_key, content)
+
+        except Exception as e:
+            self.logger.error(f"OpenAI API 스트리밍 호출 실패: {str(e)}")
+            raise
+
+    @contextlib.asynccontextmanager
+    async def _request(self, model: str, mode: str, params: Dict[str, Any]):
+        """
+        API 요청을 보내고 원본 응답을 받을 때까지 일시적 실패를 재시도합니다.
+        블록 안에서는 동시 호출 한도(OPENAI_MAX_CONCURRENCY)를 잡고 있으며, (원본 응답, 시작 시각, 정산 함수)를 줍니다.
+        블록은 토큰 사용량으로 정산 함수(settle(usage))를 호출하고 성공한 호출을 _record_call로 기록해야 합니다.
+        실패하거나 취소된 시도는 여기서 기록합니다. (한도를 기다리는 중에 취소되면 보낸 호출이 없으므로 기록하지 않음)
+
+            - 호출 전 분당 요청/토큰 한도(OPENAI_MAX_RPM, OPENAI_MAX_TPM)를 기다리고,
+              응답 헤더의 남은 한도가 없으면 다른 호출도 한도가 다시 채워질 때까지 멈춥니다.
+            - 429, 5xx, 타임아웃, 연결 실패는 최대 OPENAI_MAX_RETRIES번 재시도합니다.
+              Retry-After가 있으면 그만큼(429면 모든 호출이 함께) 기다리고, 없으면 지터를 넣은 지수 백오프
+            - 서버 오류가 연속되면 서킷 브레이커가 열려 호출하지 않고 바로 실패합니다.
+              (한도 초과, 할당량 소진, 취소는 서버 상태 문제로 세지 않음)
+
+        Raises:
+            LLMUnavailableError: 재시도를 모두 실패했거나 할당량이 소진되었거나 서킷 브레이커가 열린 경우
+            openai.APIStatusError: 재시도해도 소용없는 오류 (잘못된 요청, 인증 오류 등)
+        """
+        pool = get_client_pool()
+        estimated = self._estimate_tokens(params) if pool.limiter.tracks_tokens else 0
+        attempt = 0
+        while True:
+            if not await pool.breaker.admit():
+                raise LLMUnavailableError(
+                    DEGRADED_CIRCUIT_OPEN, "OpenAI API 호출 차단 중 (연속 실패로 서킷 브레이커가 열림)"
+                )
+            start = time.perf_counter()
+            try:
+                await pool.limiter.acquire(estimated)
+                await pool.semaphore.acquire()
+            except BaseException:
+                # 한도를 기다리다 취소됨: 호출하지 않았으므로 기록하지 않고, 반열림 확인 호출이었다면 양보
+                pool.breaker.release()
+                raise
+            metrics.LLM_IN_FLIGHT.inc()
+            try:
+                raw = await pool.client.chat.completions.with_raw_response.create(**params)
+                break
+            except asyncio.CancelledError:
+                # 요청이 취소됨 (클라이언트 연결 끊김 등): 서버 상태와 무관하므로 실패로 세지 않음
+                pool.semaphore.release()
+                _record_call(model, mode, start, _CALL_CANCELLED, None)
+                pool.breaker.release()
+                raise
+            except BaseException as e:
+                pool.semaphore.release()
+                _record_call(model, mode, start, _CALL_ERROR, None)
+                kind = _failure_kind(e) if isinstance(e, Exception) else None
+                if kind in _SERVER_FAILURES:
+                    pool.breaker.record_failure()
+                elif kind is None and hasattr(e, "status_code"):
+                    # 요청 자체의 오류 (서버는 정상 응답)
+                    pool.breaker.record_success()
+                else:
+                    # 한도 초과, 할당량 소진: 서버 상태를 판단할 수 없음
+                    pool.breaker.release()
+                if kind not in _RETRYABLE:
+                    if kind == "quota_exhausted":
+                        raise LLMUnavailableError(DEGRADED_QUOTA_EXHAUSTED, f"OpenAI API 할당량 소진: {e}") from e
+                    raise
+                if attempt >= OPENAI_MAX_RETRIES:
+                    reason = DEGRADED_RATE_LIMITED if kind == "rate_limited" else DEGRADED_UNAVAILABLE
+                    raise LLMUnavailableError(reason, f"OpenAI API 호출 {attempt + 1}번 실패 ({kind}): {e}") from e
+
+                response = getattr(e, "response", None)
+                retry_after = parse_retry_after(response.headers if response is not None else None)
+                if kind == "rate_limited" and retry_after is not None:
+                    # 같은 한도를 쓰는 다른 호출도 함께 기다림 (한꺼번에 다시 429를 받지 않도록)
+                    pool.limiter.pause(min(retry_after, OPENAI_RETRY_MAX_DELAY))
+                delay = retry_delay(attempt, retry_after, OPENAI_RETRY_BASE_DELAY, OPENAI_RETRY_MAX_DELAY)
+                metrics.LLM_RETRIES.inc(model=model, reason=kind)
+                self.logger.warning(
+                    f"OpenAI API 일시적 실패 ({kind}), {delay:.1f}초 후 재시도 ({attempt + 1}/{OPENAI_MAX_RETRIES})"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+
+        pool.breaker.record_success()
+        pool.limiter.observe_headers(raw.headers, estimated, max_pause=OPENAI_RETRY_MAX_DELAY)
+
+        def settle(usage: Any) -> None:
+            pool.limiter.settle(estimated, usage.total_tokens if usage is not None else None)
+
+        try:
+            yield raw, start, settle
+        finally:
+            pool.semaphore.release()
+
+    @staticmethod
+    def _estimate_tokens(params: Dict[str, Any]) -> int:
+        """분당 토큰 한도에 쓰는 요청의 추정 토큰 수 (프롬프트 + 최대 출력 토큰)"""
+        prompt = sum(estimate_tokens(message["content"]) for message in params["messages"])
+        return prompt + (params.get("max_tokens") or _DEFAULT_COMPLETION_TOKENS)
+
+    @staticmethod
+    def _cache_key(
+        cache: Any,
+        model: str,
+        system_prompt: str,
+        context: Dict[str, Any],
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        max_tokens: Optional[int]
+    ) -> str:
+        return cache.make_key(
+            model=model,
+            system_prompt=system_prompt,
+            context=context,
+            temperature=temperature,
+            response_format=response_format,
+            max_tokens=max_tokens
+        )
+
+    @staticmethod
+    def _build_params(
+        model: str,
+        system_prompt: str,
+        context: Dict[str, Any],
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        max_tokens: Optional[int],
+        timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        # API 호출 파라미터 구성
+        params = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": json.dumps(context, ensure_ascii=False)}
+            ],
+            "temperature": temperature
+        }
+
+        # 선택적 파라미터 추가
+        if response_format:
+            params["response_format"] = response_format
+
+        if max_tokens:
+            params["max_tokens"] = max_tokens
+
+        if timeout:
+            params["timeout"] = timeout
+
+        return params
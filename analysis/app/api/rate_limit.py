@@ -0,0 +1,152 @@
+# app/api/rate_limit.py
+import asyncio
+import re
+import time
+from typing import Mapping, Optional
+
+# x-ratelimit-reset-* 헤더의 기간 형식 (예: "1s", "6m0s", "20ms")
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class RateBudget:
+    """
+    분당 한도를 지키는 비동기 토큰 버킷.
+    버킷은 초당 per_minute / 60씩 채워지고 최대 burst만큼 쌓입니다.
+    대기하는 호출은 도착한 순서대로 통과합니다.
+
+    Example:
+        budget = RateBudget(per_minute=500)
+        await budget.acquire()  # 요청 하나
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        # 기본 버스트는 1초 분량 (최소 1): 한도를 분 단위로 몰아 쓰지 않고 고르게 분산
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        amount만큼 한도를 사용합니다. 남은 한도가 부족하면 채워질 때까지 기다립니다.
+        amount가 버킷 크기보다 크면 버킷이 가득 찼을 때 통과시키고 초과분은 이후 호출이 기다립니다.
+        """
+        async with self._lock:
+            needed = min(amount, self.capacity)
+            self._refill()
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """사용한 한도를 amount만큼 돌려받습니다. 음수면 그만큼 더 사용한 것으로 처리합니다. (추정치 정산용)"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    OpenAI x-ratelimit-reset-* 헤더의 기간(예: "1s", "6m0s", "20ms")을 초로 변환합니다.
+    숫자만 있으면 초로 보고, 해석할 수 없으면 None을 반환합니다.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class QuotaLimiter:
+    """
+    분당 요청 수(RPM)와 분당 토큰 수(TPM) 한도를 함께 지키는 LLM 호출 제한기.
+
+    - 호출 전: 요청 하나와 추정 토큰 수만큼 각 토큰 버킷(RateBudget)의 한도를 기다려 사용합니다.
+    - 호출 후: 실제 토큰 사용량으로 추정치를 정산합니다. (settle)
+    - 429 응답이나 남은 한도가 없다는 응답 헤더를 받으면 모든 호출을 지정한 시간 동안 멈춥니다. (pause)
+      한도는 여러 프로세스가 함께 쓰므로, 프로세스별 버킷보다 API가 알려주는 남은 한도를 우선합니다.
+
+    Example:
+        limiter = QuotaLimiter(requests_per_minute=500, tokens_per_minute=30000)
+        await limiter.acquire(tokens=1200)
+        ...
+        limiter.settle(estimated=1200, actual=usage.total_tokens)
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = RateBudget(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = RateBudget(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+
+    @property
+    def tracks_tokens(self) -> bool:
+        """토큰 한도가 설정되어 있어 호출마다 토큰 수를 추정해야 하는지 여부"""
+        return self.tokens is not None
+
+    @property
+    def paused_for(self) -> float:
+        """모든 호출이 멈춰 있는 남은 시간(초). 멈춰 있지 않으면 0"""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    async def acquire(self, tokens: float = 0) -> None:
+        """호출 하나만큼 한도를 기다려 사용합니다. tokens는 요청의 추정 토큰 수 (프롬프트 + 최대 출력)"""
+        await self._wait_pause()
+        if self.requests is not None:
+            await self.requests.acquire()
+        if self.tokens is not None and tokens > 0:
+            await self.tokens.acquire(tokens)
+        # 버킷을 기다리는 동안 다른 호출이 429를 받았을 수 있음
+        await self._wait_pause()
+
+    def settle(self, estimated: float, actual: Optional[float]) -> None:
+        """호출이 끝난 뒤 추정 토큰 수와 실제 사용량의 차이를 토큰 한도에 반영합니다."""
+        if self.tokens is not None and actual is not None and estimated > 0:
+            self.tokens.refund(estimated - actual)
+
+    def pause(self, seconds: float) -> None:
+        """지금부터 seconds초 동안 모든 호출을 멈춥니다. (이미 더 길게 멈춰 있으면 그대로 둠)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+
+    def observe_headers(
+        self,
+        headers: Mapping[str, str],
+        tokens: float = 0,
+        max_pause: Optional[float] = None
+    ) -> None:
+        """
+        응답의 x-ratelimit-* 헤더를 보고, 남은 요청 수가 없거나 남은 토큰이 다음 요청(tokens)에 모자라면
+        한도가 다시 채워질 때(reset)까지 모든 호출을 멈춥니다. (최대 max_pause초)
+        """
+        for kind, needed in (("requests", 1.0), ("tokens", max(1.0, tokens))):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                exhausted = float(remaining) < needed
+            except ValueError:
+                continue
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if exhausted and reset:
+                self.pause(min(reset, max_pause) if max_pause is not None else reset)
+
+    async def _wait_pause(self) -> None:
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
@@ -0,0 +1,172 @@
+# app/api/resilience.py
+"""
+LLM 호출 실패 처리: 재시도 대기 시간, 서킷 브레이커, 대체 경로 사유.
+
+    - retry_delay: 재시도 전 대기 시간. Retry-After 헤더를 우선하고, 없으면 지터를 넣은 지수 백오프
+    - CircuitBreaker: 연속 실패가 쌓이면 일정 시간 호출을 막아(열림) 요청이 바로 로컬 대체 경로로 가도록 하고,
+      대기 시간이 지나면 호출 하나로 상태를 확인(반열림)한 뒤 성공하면 다시 닫힙니다.
+    - LLMUnavailableError: 재시도를 모두 실패했거나 차단 중이라 LLM을 쓸 수 없을 때 발생. reason은 대체 결과에 표시하는 사유
+
+openai SDK를 import하지 않으므로 analyzer가 예외 종류를 확인해도 SDK를 불러오지 않습니다.
+"""
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Mapping, Optional
+
+from .. import metrics
+
+# 대체 경로(로컬 키워드 추출, 통계 기반 요약)로 만든 결과의 사유
+DEGRADED_RATE_LIMITED = "rate_limited"  # 재시도 후에도 한도 초과 (429)
+DEGRADED_QUOTA_EXHAUSTED = "quota_exhausted"  # 계정 할당량 소진 (429 insufficient_quota, 재시도하지 않고 서킷 브레이커도 열지 않음)
+DEGRADED_UNAVAILABLE = "unavailable"  # 재시도 후에도 서버 오류, 타임아웃, 연결 실패
+DEGRADED_CIRCUIT_OPEN = "circuit_open"  # 서킷 브레이커가 열려 호출하지 않음
+DEGRADED_ERROR = "error"  # 그 밖의 호출 실패 (잘못된 요청 등)
+DEGRADED_PARTIAL = "partial"  # 키워드 배치 일부만 성공
+DEGRADED_EMPTY = "empty"  # LLM 응답에서 키워드를 찾지 못함
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class LLMUnavailableError(Exception):
+    """LLM을 사용할 수 없어 호출을 포기했을 때 발생. reason은 DEGRADED_* 사유"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def failure_reason(error: BaseException) -> str:
+    """LLM 호출 예외를 대체 결과에 표시할 사유로 변환합니다."""
+    return error.reason if isinstance(error, LLMUnavailableError) else DEGRADED_ERROR
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    응답 헤더의 재시도 대기 시간(초). retry-after-ms, retry-after(초 또는 HTTP 날짜) 순으로 확인하고 없으면 None
+    """
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_delay(attempt: int, retry_after: Optional[float], base: float, cap: float) -> float:
+    """
+    attempt번째(0부터) 재시도 전에 기다릴 시간(초).
+    서버가 Retry-After를 주면 그 시간에 작은 지터를 더하고(동시에 받은 호출이 한꺼번에 재시도하지 않도록),
+    없으면 base * 2^attempt를 상한으로 하는 지수 백오프의 절반 이상을 무작위로 기다립니다. 최대 cap초
+    """
+    if retry_after is not None:
+        return min(cap, retry_after + random.uniform(0, base))
+    ceiling = min(cap, base * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """
+    LLM 서버 상태를 추적하는 서킷 브레이커.
+    연속 failure_threshold번 실패하면 열려서 cooldown초 동안 allow()가 False를 반환하고,
+    그 뒤에는 호출 하나만 허용(반열림)해 성공하면 닫히고 실패하면 다시 열립니다.
+    반열림 상태에서 확인 중인 호출이 있으면 admit()은 그 결과를 기다렸다가 판단합니다.
+
+    Example:
+        if not await breaker.admit():
+            raise LLMUnavailableError(DEGRADED_CIRCUIT_OPEN, "...")
+        try:
+            response = await call()
+        except ServerError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.logger = logging.getLogger(__name__)
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_finished = asyncio.Event()
+        metrics.LLM_CIRCUIT_OPEN.set(0)
+
+    def allow(self) -> bool:
+        """호출해도 되는지 확인합니다. 반열림 상태에서 True를 받은 호출은 결과를 꼭 기록해야 합니다."""
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        if self.state == CIRCUIT_OPEN:
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self.state = CIRCUIT_HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        self._probe_finished = asyncio.Event()
+        return True
+
+    async def admit(self) -> bool:
+        """
+        allow()와 같지만, 반열림 상태에서 다른 호출이 서버 상태를 확인 중이면 그 결과를 기다립니다.
+        (복구 직후 동시에 들어온 호출이 확인 호출 하나 때문에 대체 경로로 가지 않도록)
+        """
+        while not self.allow():
+            if self.state != CIRCUIT_HALF_OPEN:
+                return False
+            await self._probe_finished.wait()
+        return True
+
+    def _finish_probe(self) -> None:
+        self._probing = False
+        self._probe_finished.set()
+
+    def record_success(self) -> None:
+        """서버가 응답했습니다. (정상 응답 또는 요청 자체의 오류)"""
+        if self.state != CIRCUIT_CLOSED:
+            self.logger.info("LLM 서버가 다시 응답해 서킷 브레이커를 닫습니다.")
+            metrics.LLM_CIRCUIT_OPEN.set(0)
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._finish_probe()
+
+    def record_failure(self) -> None:
+        """서버 오류, 타임아웃, 연결 실패 등 서버 상태로 인한 실패"""
+        self.failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != CIRCUIT_OPEN:
+                self.logger.warning(
+                    f"LLM 호출이 연속 {self.failures}번 실패해 {self.cooldown:g}초 동안 로컬 대체 경로를 사용합니다."
+                )
+            self.state = CIRCUIT_OPEN
+            self._opened_at = time.monotonic()
+            self.failures = 0
+            metrics.LLM_CIRCUIT_OPEN.set(1)
+        self._finish_probe()
+
+    def release(self) -> None:
+        """서버 상태를 판단할 수 없는 결과 (한도 초과, 취소). 반열림 상태면 다음 호출이 다시 확인합니다."""
+        self._finish_probe()
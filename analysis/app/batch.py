@@ -0,0 +1,112 @@
+# app/batch.py
+"""
+여러 사용자의 시청 기록을 HTTP 요청 없이 한 번에 분석하는 일괄 분석 CLI.
+사용자마다 결과 한 줄(NDJSON)을 분석이 끝나는 순서대로 출력합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m app.batch <사용자 디렉터리> [-o results.ndjson] [--concurrency 32] [--workers 8] [--llm-rpm 500] [--llm-tpm 200000]
+
+사용자 디렉터리 구조는 app.services.batch_service.discover_batch_inputs 참고.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+from app.api import openai as openai_api
+from app.api.openai import close_client_pool
+from app.services import offload
+from app.services.batch_service import BATCH_CONCURRENCY, discover_batch_inputs, run_batch
+from app.services.constant import DEFAULT_TIMEZONE, KEYWORD_MODE_LLM, KEYWORD_MODES
+from app.services.time_stats import resolve_timezone
+
+logger = logging.getLogger("app.batch")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="여러 사용자의 YouTube 시청 기록을 일괄 분석합니다.")
+    parser.add_argument("directory", help="사용자별 하위 디렉터리(이름이 analysis_id)를 담은 디렉터리")
+    parser.add_argument("-o", "--output", help="결과 NDJSON 파일 (기본값: 표준 출력)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="동시에 분석하는 사용자 수")
+    parser.add_argument(
+        "--workers", type=int, default=offload.HISTORY_PROCESS_WORKERS or os.cpu_count(),
+        help="파싱/집계 작업 프로세스 수 (0이면 이벤트 루프에서 처리)"
+    )
+    parser.add_argument(
+        "--llm-rpm", type=float, default=openai_api.OPENAI_MAX_RPM,
+        help="모든 사용자가 공유하는 분당 LLM 요청 한도 (0이면 제한 없음)"
+    )
+    parser.add_argument(
+        "--llm-tpm", type=float, default=openai_api.OPENAI_MAX_TPM,
+        help="모든 사용자가 공유하는 분당 LLM 토큰 한도 (0이면 제한 없음)"
+    )
+    parser.add_argument("--keyword-mode", choices=KEYWORD_MODES, default=KEYWORD_MODE_LLM)
+    parser.add_argument("--timezone", default=DEFAULT_TIMEZONE, help="시간 통계 기준 시간대 (IANA 이름)")
+    parser.add_argument("--approximate", action="store_true", help="채널 집계를 heavy-hitter 요약으로 근사")
+    parser.add_argument("--incremental", action="store_true", help="저장된 상태에 새 기록만 더해 분석")
+    args = parser.parse_args(argv)
+    try:
+        resolve_timezone(args.timezone)
+    except ValueError:
+        parser.error(f"알 수 없는 시간대입니다: {args.timezone}")
+    if not os.path.isdir(args.directory):
+        parser.error(f"디렉터리가 아닙니다: {args.directory}")
+    return args
+
+
+async def run(args: argparse.Namespace, output) -> None:
+    start = time.perf_counter()
+    succeeded = failed = 0
+    try:
+        async for result in run_batch(
+            discover_batch_inputs(args.directory),
+            concurrency=args.concurrency,
+            keyword_mode=args.keyword_mode,
+            timezone=args.timezone,
+            approximate=args.approximate,
+            incremental=args.incremental
+        ):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            if result["status"] == "success":
+                succeeded += 1
+            else:
+                failed += 1
+                logger.warning(f"{result['analysisId']} 분석 실패: {result['message']}")
+    finally:
+        await offload.close_process_pool()
+        await close_client_pool()
+
+    elapsed = time.perf_counter() - start
+    total = succeeded + failed
+    logger.info(
+        f"{total}명 분석 완료 (성공 {succeeded}, 실패 {failed}), "
+        f"{elapsed:.1f}초, {total / elapsed if elapsed else 0:.2f}명/초"
+    )
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    # 요청마다 남는 HTTP 로그는 생략
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # 공유 한도는 풀을 만들기 전에 설정해야 적용됨
+    offload.HISTORY_PROCESS_WORKERS = max(0, args.workers)
+    openai_api.OPENAI_MAX_RPM = max(0.0, args.llm_rpm)
+    openai_api.OPENAI_MAX_TPM = max(0.0, args.llm_tpm)
+
+    with contextlib.ExitStack() as stack:
+        if args.output:
+            output = stack.enter_context(open(args.output, "w", encoding="utf-8"))
+        else:
+            output = sys.stdout
+        asyncio.run(run(args, output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,47 @@
 # app/main.py
-from fastapi import FastAPI
+import asyncio
+import contextlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from app import metrics
 from app.api.endpoints import router
+from app.api.openai import close_client_pool
+from app.services.analysis_service import close_analysis_services, warm_up_analysis_services
+from app.services.coalescing import close_single_flight
+from app.services.jobs import close_job_manager
+from app.services.offload import close_process_pool
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# 애플리케이션 로그 레벨 (DEBUG면 단계별 중간 결과까지 기록)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# OpenAI 호출마다 남는 HTTP 로그는 생략
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# 시작 직후 백그라운드에서 서비스 객체를 만들고 openai SDK를 미리 import (0이면 첫 분석 요청 때 불러옴)
+SERVICE_WARMUP = os.environ.get("SERVICE_WARMUP", "1") not in ("0", "false", "False")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 준비 작업을 기다리지 않고 바로 요청을 받음 (/, /health는 준비 중에도 즉시 응답)
+    warmup = asyncio.create_task(warm_up_analysis_services()) if SERVICE_WARMUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await warmup
+    # 종료 시 작업 워커와 진행 중인 분석을 먼저 멈춘 뒤 CPU 작업 프로세스 풀과 공유 OpenAI 연결 풀 정리
+    await close_job_manager()
+    await close_single_flight()
+    await close_process_pool()
+    await close_client_pool()
+    close_analysis_services()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 설정 추가
 app.add_middleware(
@@ -12,7 +50,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-History-Hash"],  # 저장된 시청 기록을 다시 참조할 때 쓰는 업로드 해시
 )
+# 처리 중인 요청 수 메트릭
+app.add_middleware(metrics.InFlightMiddleware)
 
 # Router 등록
 app.include_router(router, prefix="/api/v1", tags=["Analysis"])
@@ -21,6 +62,18 @@ app.include_router(router, prefix="/api/v1", tags=["Analysis"])
 async def root():
     return {"message": "LLM Analysis Server is running"}
 
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    # 헬스 체크 (서비스 준비 여부와 관계없이 바로 응답)
+    return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    # Prometheus 텍스트 형식 (단계별 지연 시간, LLM 사용량/비용, 캐시 적중, 처리 중 요청/작업 수, 업로드 크기)
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,299 @@
+# app/metrics.py
+"""
+Prometheus 텍스트 형식(/metrics)으로 내보내는 프로세스 내부 메트릭.
+외부 의존성 없이 카운터/게이지/히스토그램만 구현하고, 모든 메트릭은 이 모듈에 정의합니다.
+
+    from app import metrics
+    metrics.STAGE_SECONDS.observe(0.12, stage="hourly_stats")
+    metrics.LLM_TOKENS.inc(1200, model="gpt-4o", type="prompt")
+
+값은 프로세스별로 집계되므로 작업 프로세스 풀(HISTORY_PROCESS_WORKERS)에서 실행된 작업은
+작업을 맡긴 쪽(이벤트 루프)에서 기록합니다.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 히스토그램 구간 (상한값)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = tuple(float(1024 * 4 ** power) for power in range(3, 11))  # 64KiB ~ 256MiB
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name}: expected labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def set_function(self, collect: Callable[[], Dict[LabelValues, float]]) -> None:
+        """
+        값을 직접 기록하는 대신 수집할 때마다 collect()를 호출해 값을 읽습니다.
+        collect는 {레이블 값 튜플: 값}을 반환합니다. (레이블이 없으면 키는 ())
+        """
+        self._collect = collect
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Value(_Metric):
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def _add(self, amount: float, labels: Dict[str, str]) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        values = self._collect() if self._collect is not None else dict(self._values)
+        lines = self._header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Value):
+    """단조 증가 카운터"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        self._add(amount, labels)
+
+
+class Gauge(_Value):
+    """증감하는 현재 값"""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self._add(-amount, labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """구간별 관측 수와 합계 (Prometheus 누적 구간 형식으로 출력)"""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 값 -> [구간별 관측 수 (마지막은 +Inf), 합계]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, **labels: str) -> "_Timer":
+        """with 블록의 실행 시간을 초 단위로 기록합니다."""
+        return _Timer(self, labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        names = self.label_names + ("le",)
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    """메트릭 목록. render()로 Prometheus 텍스트 형식을 만듭니다."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# 분석 단계
+STAGE_SECONDS = REGISTRY.histogram(
+    "analysis_stage_duration_seconds",
+    "Duration of each analysis stage (parse = upload parsing and preprocessing)",
+    ("stage",)
+)
+STAGE_FAILURES = REGISTRY.counter(
+    "analysis_stage_failures_total", "Analysis stages that raised an error", ("stage",)
+)
+UPLOAD_BYTES = REGISTRY.histogram(
+    "analysis_upload_bytes", "Size of uploaded files", ("kind", "format"), buckets=SIZE_BUCKETS
+)
+DEGRADED_RESULTS = REGISTRY.counter(
+    "analysis_degraded_results_total", "Stage results produced by the local fallback instead of the LLM", ("stage", "reason")
+)
+COALESCED_REQUESTS = REGISTRY.counter(
+    "analysis_coalesced_requests_total", "Analysis requests that joined an identical in-flight analysis", ("endpoint",)
+)
+TAKEOUT_TIMES = REGISTRY.counter(
+    "analysis_takeout_times_total",
+    "Watch times read from Takeout HTML histories "
+    "(parsed = known zone, fallback = read in the request timezone, unparsed = entry dropped)",
+    ("result",)
+)
+HISTORY_STORE_LOOKUPS = REGISTRY.counter(
+    "analysis_history_store_lookups_total", "Parsed-history store lookups by upload hash", ("result",)
+)
+HISTORY_STORE_EVICTIONS = REGISTRY.counter(
+    "analysis_history_store_evictions_total", "Parsed histories deleted to keep the store under its size limit"
+)
+
+# LLM 호출
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "LLM API calls (cache hits excluded)", ("model", "mode", "status")
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds", "LLM API call duration, including rate-limit and concurrency waits", ("model", "mode")
+)
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported by the LLM API", ("model", "type"))
+LLM_COST = REGISTRY.counter("llm_cost_usd_total", "Estimated LLM cost in USD (models with a known price)", ("model",))
+LLM_IN_FLIGHT = REGISTRY.gauge("llm_requests_in_flight", "LLM API calls sent and not yet finished (rate-limit waits excluded)")
+LLM_CACHE_LOOKUPS = REGISTRY.counter("llm_cache_lookups_total", "LLM response cache lookups", ("result",))
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total", "LLM API calls retried after a transient failure", ("model", "reason")
+)
+LLM_CIRCUIT_OPEN = REGISTRY.gauge(
+    "llm_circuit_open", "1 while the LLM circuit breaker is open or probing (LLM stages use the local fallback)"
+)
+
+# 요청 / 작업 대기열
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being served (streaming responses included)")
+JOBS = REGISTRY.gauge("analysis_jobs", "Analysis jobs held by the job manager", ("status",))
+
+
+class InFlightMiddleware:
+    """처리 중인 HTTP 요청 수(http_requests_in_flight)를 기록하는 ASGI 미들웨어. 스트리밍 응답은 전송이 끝날 때까지 포함"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+
+
+def observe_stage(stage: str, seconds: float, failed: bool = False) -> None:
+    """분석 단계 하나의 실행 시간을 기록합니다. (StageGraph observer)"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if failed:
+        STAGE_FAILURES.inc(stage=stage)
+
+
+def render() -> str:
+    """모든 메트릭을 Prometheus 텍스트 형식으로 반환합니다."""
+    return REGISTRY.render()
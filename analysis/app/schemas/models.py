@@ -1,10 +1,15 @@
 # app/schemas/models.py
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List, Optional
 
 class CategoryViews(BaseModel):
     name: str = Field(description="카테고리 이름")
     views: float = Field(description="해당 시간대의 카테고리 시청 횟수", ge=0)
+    error: Optional[float] = Field(
+        description="근사 모드에서 views의 최대 과대 추정치 (실제 값은 views - error 이상)",
+        default=None,
+        ge=0
+    )
 
 class HourlyStat(BaseModel):
     hour: int = Field(description="시간대 (0~23)", ge=0, le=23)
@@ -18,6 +23,27 @@ class KeywordFrequency(BaseModel):
     keyword: str = Field(description="키워드")
     frequency: float = Field(description="키워드 출현 빈도", ge=0)
 
+class DailyViews(BaseModel):
+    date: str = Field(description="날짜 (YYYY-MM-DD, 요청한 시간대 기준)")
+    views: int = Field(description="해당 날짜의 시청 횟수", ge=0)
+
+class MonthlyViews(BaseModel):
+    month: str = Field(description="월 (YYYY-MM, 요청한 시간대 기준)")
+    views: int = Field(description="해당 월의 시청 횟수", ge=0)
+
+class TimeStats(BaseModel):
+    timezone: str = Field(description="통계 기준 시간대 (IANA 이름)")
+    totalViews: int = Field(description="전체 시청 횟수", ge=0)
+    approximate: bool = Field(description="채널 집계가 heavy-hitter 요약 기반 근사값인지 여부", default=False)
+    weekdayHourly: List[List[int]] = Field(
+        description="요일×시간대 시청 횟수 (행: 월요일~일요일, 열: 0~23시)",
+        min_items=7,
+        max_items=7
+    )
+    daily: List[DailyViews] = Field(description="일별 시청 횟수 (날짜 오름차순, 시청한 날만)", default=[])
+    monthly: List[MonthlyViews] = Field(description="월별 시청 횟수 (월 오름차순)", default=[])
+    channels: List[CategoryViews] = Field(description="채널별 시청 횟수 (내림차순 상위 채널)", default=[])
+
 class AnalysisData(BaseModel):
     hourlyStats: List[HourlyStat] = Field(
         description="0시부터 23시까지의 시간대별 시청 통계",
@@ -29,6 +55,15 @@ class AnalysisData(BaseModel):
         min_items=1
     )
     llmAnalysis: str = Field(description="LLM 기반 텍스트 분석 결과")
+    timeStats: Optional[TimeStats] = Field(
+        description="요일×시간, 일별, 월별, 채널별 시청 통계",
+        default=None
+    )
+    degraded: Optional[Dict[str, str]] = Field(
+        description="LLM을 쓸 수 없어 로컬 대체 경로로 만든 결과: 단계 이름(keyword_frequency, llm_analysis) -> 사유 "
+                    "(rate_limited, quota_exhausted, unavailable, circuit_open, error, partial, empty). 모두 정상이면 생략",
+        default=None
+    )
 
 class AnalysisResult(BaseModel):
     status: str = Field("success", description="API 요청 처리 상태")
@@ -90,4 +125,38 @@ class AnalysisResult(BaseModel):
                     "llmAnalysis": "사용자는 주로 저녁 시간대에 엔터테인먼트 콘텐츠를 시청하는 경향이 있습니다."
                 }
             }
-        }
\ No newline at end of file
+        }
+
+class TimeStatsData(BaseModel):
+    hourlyStats: List[HourlyStat] = Field(
+        description="0시부터 23시까지의 시간대별 시청 통계",
+        min_items=24,
+        max_items=24
+    )
+    timeStats: TimeStats
+
+class TimeStatsResult(BaseModel):
+    status: str = Field("success", description="API 요청 처리 상태")
+    data: TimeStatsData
+class JobInfo(BaseModel):
+    jobId: str = Field(description="작업 식별자")
+    analysisId: str = Field(description="분석 식별자")
+    status: str = Field(description="작업 상태 (queued, running, succeeded, failed)")
+    queuePosition: Optional[int] = Field(
+        description="대기 중인 경우 앞에 있는 작업 수 (0이면 다음 차례)",
+        default=None,
+        ge=0
+    )
+    createdAt: float = Field(description="작업 접수 시각 (epoch 초)")
+    startedAt: Optional[float] = Field(description="실행 시작 시각 (epoch 초)", default=None)
+    finishedAt: Optional[float] = Field(description="실행 종료 시각 (epoch 초)", default=None)
+    historyHash: Optional[str] = Field(
+        description="작업이 파싱한 업로드의 해시 (시청 기록 저장소가 켜져 있을 때). history_hash로 다시 분석할 때 사용",
+        default=None
+    )
+    result: Optional[AnalysisData] = Field(description="작업이 성공한 경우 분석 결과", default=None)
+    error: Optional[str] = Field(description="작업이 실패한 경우 오류 메시지", default=None)
+
+class JobResult(BaseModel):
+    status: str = Field("success", description="API 요청 처리 상태")
+    data: JobInfo
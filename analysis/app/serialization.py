@@ -0,0 +1,64 @@
+# app/serialization.py
+"""
+응답 JSON 직렬화.
+
+pydantic-core의 JSON 직렬화기(Rust 구현)로 dict/list와 Pydantic 모델을 바로 UTF-8 JSON 바이트로 만듭니다.
+(표준 json.dumps보다 빠르고, 한글을 \\uXXXX로 바꾸지 않아 응답도 작음)
+
+    - ModelResponse: 이미 만들어 검증된 응답 모델을 다시 검증하지 않고 직렬화하는 응답 클래스.
+      엔드포인트가 Response를 반환하면 FastAPI는 response_model 검증/직렬화를 건너뛰므로,
+      response_model은 OpenAPI 문서에만 쓰이고 모델 검증은 응답 모델을 만들 때 한 번만 일어납니다.
+    - ndjson_line: 스트리밍 응답의 NDJSON 줄을 바이트로 만듭니다. (StreamingResponse가 문자열을 다시 인코딩하지 않음)
+
+NaN/Infinity는 표준 JSON에 없으므로 null로 직렬화합니다.
+"""
+from typing import Any, Mapping, Optional
+
+from pydantic_core import to_json
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+
+def dumps(value: Any, exclude_none: bool = False) -> bytes:
+    """
+    값을 JSON 바이트로 직렬화합니다. Pydantic 모델이 섞여 있어도 됩니다.
+
+    Args:
+        value: dict, list, 문자열/숫자, Pydantic 모델 등
+        exclude_none: 모델 필드 중 None인 필드를 생략할지 여부 (response_model_exclude_none과 같음)
+
+    Returns:
+        bytes: UTF-8 JSON
+    """
+    return to_json(value, exclude_none=exclude_none, inf_nan_mode="null")
+
+
+def ndjson_line(value: Any) -> bytes:
+    """값 하나를 NDJSON 한 줄(끝에 줄바꿈 포함)로 직렬화합니다."""
+    return dumps(value) + b"\n"
+
+
+class ModelResponse(Response):
+    """
+    응답 모델(또는 dict)을 검증 없이 JSON으로 보내는 응답. None인 필드는 생략합니다.
+
+    Example:
+        @router.get("/jobs/{job_id}", response_model=JobResult, response_model_exclude_none=True)
+        async def get_job(job_id: str):
+            return ModelResponse(JobResult(status="success", data=...))
+    """
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+        exclude_none: bool = True
+    ):
+        self.exclude_none = exclude_none
+        super().__init__(content, status_code=status_code, headers=headers, background=background)
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content, exclude_none=self.exclude_none)
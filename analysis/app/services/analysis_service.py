@@ -1,16 +1,347 @@
 # app/services/analysis_service.py
-import json
 import asyncio
-from typing import Dict, Any, AsyncGenerator, Optional
+import importlib
+import json
+import time
+from typing import Dict, Any, AsyncGenerator, AsyncIterator, Awaitable, NamedTuple, Optional, Tuple
 
 from .preprocessor import DataPreprocessor
+from .takeout import (
+    ARCHIVE_FORMATS, ARCHIVE_MAGIC_SIZE, FORMAT_ZIP, SpooledUpload, TakeoutArchiveError, TakeoutContents,
+    TakeoutTimes, detect_format, iter_history_upload, parse_subscriptions, read_takeout_archive
+)
+from .history import WatchHistory
+from .history_store import HashingFile, HashingUpload, StoredHistoryNotFound, UploadDigest, get_history_store
+from .scheduler import StageGraph
 from .analyzer import DataAnalyzer
-from ..schemas.models import AnalysisData, KeywordFrequency
-from .constant import TEST_HOURLY_STATS, TEST_KEYWORD_DATA, TEST_LLM_ANALYSIS
+from .analysis_state import AnalysisState, get_analysis_state_store, subscriptions_digest
+from .jobs import Job, JOB_SUCCEEDED, get_job_manager
+from .coalescing import COALESCING_ENABLED, get_single_flight, request_key
+from .offload import preprocess_upload_in_process, should_offload_upload
+from .. import metrics
+from ..tracing import RequestTrace
+from ..serialization import ndjson_line
+from ..schemas.models import AnalysisData, JobInfo, KeywordFrequency, TimeStatsData
+from .constant import TEST_HOURLY_STATS, TEST_KEYWORD_DATA, TEST_LLM_ANALYSIS, KEYWORD_MODE_LLM
+from .constant import DEFAULT_TIMEZONE, HOURLY_TOP_CHANNELS, TIME_STATS_TOP_CHANNELS
+
+# 서비스 인스턴스 (첫 사용 시 생성, 애플리케이션 종료 시 close_analysis_services로 정리)
+_preprocessor: Optional[DataPreprocessor] = None
+_analyzer: Optional[DataAnalyzer] = None
+
+
+def get_preprocessor() -> DataPreprocessor:
+    """공유 DataPreprocessor를 반환합니다. 없으면 새로 만듭니다."""
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = DataPreprocessor()
+    return _preprocessor
+
+
+def get_analyzer() -> DataAnalyzer:
+    """공유 DataAnalyzer를 반환합니다. 없으면 새로 만듭니다. (OpenAI 클라이언트는 첫 LLM 호출 때 생성)"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = DataAnalyzer()
+    return _analyzer
+
+
+async def warm_up_analysis_services() -> None:
+    """
+    서비스 객체를 만들고 LLM 호출에 필요한 무거운 모듈(openai SDK)을 스레드에서 미리 import합니다.
+    애플리케이션 시작 직후 백그라운드에서 호출해, 서버는 바로 요청을 받으면서 첫 분석 요청의 지연도 줄입니다.
+    """
+    get_preprocessor()
+    get_analyzer()
+    for module in ("app.api.openai", "openai"):
+        await asyncio.to_thread(importlib.import_module, module)
+
+
+def close_analysis_services() -> None:
+    """서비스 객체를 정리합니다. (애플리케이션 종료 시 호출, 공유 연결 풀은 close_client_pool로 정리)"""
+    global _preprocessor, _analyzer
+    _preprocessor = None
+    _analyzer = None
+
+
+async def _read_history_upload(
+    history_file: Any,
+    times: TakeoutTimes,
+    digest: Optional[UploadDigest] = None
+) -> TakeoutContents:
+    archive_format = detect_format(await history_file.read(ARCHIVE_MAGIC_SIZE))
+    await history_file.seek(0)
+    size = getattr(history_file, "size", None)
+    if size is not None:
+        metrics.UPLOAD_BYTES.observe(size, kind="history", format=archive_format)
+
+    start = time.perf_counter()
+    failed = True
+    try:
+        if should_offload_upload(history_file):
+            upload = HashingUpload(history_file, digest) if digest is not None else history_file
+            contents = await preprocess_upload_in_process(upload, times)
+        elif archive_format in ARCHIVE_FORMATS:
+            # 압축 해제와 파싱은 동기 코드이므로 스레드에서 실행 (파일은 한 번만 순서대로 읽음)
+            contents = await asyncio.to_thread(
+                _read_archive_upload, history_file.file, archive_format, times, digest
+            )
+        else:
+            upload = HashingUpload(history_file, digest) if digest is not None else history_file
+            history = await get_preprocessor().preprocess_history_stream(
+                iter_history_upload(upload, times=times)
+            )
+            contents = TakeoutContents(history, None)
+        times.verify()
+        failed = False
+        if digest is not None:
+            digest.end_file()
+        return contents
+    finally:
+        metrics.observe_stage("parse", time.perf_counter() - start, failed)
+
+
+def _read_archive_upload(
+    file: Any,
+    archive_format: str,
+    times: TakeoutTimes,
+    digest: Optional[UploadDigest]
+) -> TakeoutContents:
+    """Takeout 압축 파일을 읽고, digest가 주어지면 읽는 동안 업로드 해시도 계산합니다. (동기 함수, 스레드에서 호출)"""
+    if digest is None:
+        return read_takeout_archive(file, archive_format, get_preprocessor(), times)
+    if archive_format == FORMAT_ZIP:
+        # zip은 끝의 목록부터 필요한 항목만 골라 읽으므로 파싱 뒤 처음부터 한 번 더 읽어 해시
+        contents = read_takeout_archive(file, archive_format, get_preprocessor(), times)
+        file.seek(0)
+        digest.read_rest(file)
+        return contents
+    # tgz는 처음부터 순서대로 읽으므로 읽는 동안 해시하고, 필요한 항목을 찾은 뒤 남은 부분만 더 읽음
+    hashing_file = HashingFile(file, digest)
+    contents = read_takeout_archive(hashing_file, archive_format, get_preprocessor(), times)
+    digest.read_rest(file)
+    return contents
+
+
+async def preprocess_history_upload(history_file: Any, timezone: Optional[str] = None) -> WatchHistory:
+    """
+    업로드된 시청 기록 파일을 청크 단위로 읽으면서 바로 전처리합니다.
+    원본 파일 전체나 파싱된 JSON 트리를 메모리에 올리지 않습니다.
+    watch-history.json, watch-history.html, Takeout 압축 파일(.zip, .tgz)을 모두 받습니다.
+    프로세스 풀(HISTORY_PROCESS_WORKERS)이 켜져 있고 업로드가 크면 파싱을 작업 프로세스에서 실행해
+    이벤트 루프가 다른 요청을 계속 처리합니다.
+    
+    Args:
+        history_file: 업로드된 시청 기록 파일 (UploadFile)
+        timezone: HTML 시청 기록에서 시간대 약어를 모르거나 약어가 여러 시간대를 뜻할 때 시각을 해석할 시간대 (IANA 이름)
+        
+    Returns:
+        WatchHistory: 전처리된 시청 기록 (열 단위 컨테이너)
+        
+    Raises:
+        json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+        TakeoutArchiveError: 압축 파일을 읽을 수 없거나 시청 기록이 없거나, HTML 시청 기록의 시각을 하나도 해석하지 못한 경우
+    """
+    return (await _read_history_upload(history_file, TakeoutTimes(timezone))).history
+
+
+def _traced(trace: Optional[RequestTrace], stage: str, coroutine: Awaitable[Any]) -> Awaitable[Any]:
+    """trace 모드면 코루틴을 stage 단계로 측정하며 실행합니다."""
+    return trace.run_stage(stage, coroutine) if trace is not None else coroutine
+
+
+class PreprocessedUploads(NamedTuple):
+    """preprocess_uploads 결과"""
+    history: WatchHistory
+    subscriptions: Any  # 구독 정보 (없으면 빈 리스트)
+    upload_hash: Optional[str]  # 업로드 해시 (시청 기록 저장소와 요청 합치기의 키, 계산하지 않았으면 None)
+
+
+async def preprocess_uploads(
+    history_file: Optional[Any],
+    subscriptions_file: Optional[Any] = None,
+    trace: Optional[RequestTrace] = None,
+    history_hash: Optional[str] = None,
+    timezone: Optional[str] = None
+) -> PreprocessedUploads:
+    """
+    분석 요청의 업로드 파일을 읽어 전처리된 시청 기록과 구독 정보를 반환합니다.
+    시청 기록으로 Takeout 압축 파일을 올리면 그 안의 구독정보도 함께 읽으므로 구독 정보 파일은 생략할 수 있습니다.
+    history_hash(이전 응답의 X-History-Hash)가 주어지면 업로드 대신 시청 기록 저장소에 저장된 기록을 씁니다.
+    파일을 올렸으면 파싱이 업로드를 읽는 동안 업로드 해시를 함께 계산하고(저장소와 요청 합치기가 모두 꺼져 있으면 생략),
+    저장소가 켜져 있으면 파싱한 결과를 그 해시로 저장합니다.
+    
+    Args:
+        history_file: 업로드된 시청 기록 파일 (JSON, HTML, .zip, .tgz). None이면 history_hash로 저장된 기록을 사용
+        subscriptions_file: 업로드된 구독 정보 파일 (JSON 또는 CSV, 있으면 압축 파일의 구독정보보다 우선)
+        trace: 요청 추적 (trace 모드, 업로드 파싱을 parse 단계로, 저장된 기록 읽기를 load_history 단계로 기록)
+        history_hash: 저장된 기록의 업로드 해시 (파일을 올렸으면 None)
+        timezone: HTML 시청 기록의 시각 해석에 쓸 요청의 시간대 (preprocess_history_upload 참고).
+            해석 결과가 시간대에 따라 달라지면 저장소에 시간대별로 따로 저장합니다.
+        
+    Returns:
+        PreprocessedUploads: (전처리된 시청 기록, 구독 정보, 업로드 해시)
+        
+    Raises:
+        json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+        TakeoutArchiveError: 압축 파일을 읽을 수 없거나 시청 기록이 없거나, HTML 시청 기록의 시각을 하나도 해석하지 못한 경우
+        StoredHistoryNotFound: history_hash로 참조한 기록이 저장소에 없는 경우
+    """
+    store = get_history_store()
+    if history_hash is not None:
+        stored = await _traced(trace, "load_history", store.load(history_hash, timezone))
+        if stored is None:
+            raise StoredHistoryNotFound(history_hash)
+        return PreprocessedUploads(*stored, history_hash)
+
+    digest = UploadDigest() if store.enabled or COALESCING_ENABLED else None
+    times = TakeoutTimes(timezone)
+    preprocessed_history, subscriptions_data = await _traced(
+        trace, "parse", _read_history_upload(history_file, times, digest)
+    )
+    if subscriptions_file is not None:
+        data = await subscriptions_file.read()
+        metrics.UPLOAD_BYTES.observe(
+            len(data), kind="subscriptions", format="json" if data.lstrip()[:1] in (b"[", b"{") else "csv"
+        )
+        subscriptions_data = parse_subscriptions(data)
+        if digest is not None:
+            digest.update(data)
+            digest.end_file()
+    elif digest is not None:
+        digest.skip_file()
+    subscriptions_data = subscriptions_data if subscriptions_data is not None else []
+    upload_hash = digest.hexdigest() if digest is not None else None
+    if upload_hash is not None:
+        await store.save(
+            upload_hash, preprocessed_history, subscriptions_data,
+            timezone=timezone if times.depends_on_timezone else None
+        )
+    return PreprocessedUploads(preprocessed_history, subscriptions_data, upload_hash)
+
+
+def build_analysis_graph(
+    preprocessed_history: WatchHistory,
+    subscriptions_data: Dict[str, Any],
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    stream_llm: bool = False,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    state: Optional[AnalysisState] = None,
+    trace: Optional[RequestTrace] = None,
+    degraded: Optional[Dict[str, str]] = None
+) -> StageGraph:
+    """
+    분석 단계 의존성 그래프를 구성합니다.
+    
+    subscriptions ──> keyword_frequency ─────────────┐
+    time_aggregation ──> hourly_stats ───────────────┴──> llm_analysis
+                     └─> time_stats
+    
+    구독 정보 전처리와 시간 집계는 동시에 실행되고,
+    전체 소요 시간은 가장 긴 경로(키워드 LLM 호출 -> 분석 LLM 호출)에 가까워집니다.
+    시간 집계는 한 번만 계산하고 hourly_stats와 time_stats가 함께 사용합니다.
+    approximate가 True면 채널 집계를 크기가 고정된 heavy-hitter 요약으로 계산합니다.
+    stream_llm이 True면 llm_analysis 단계가 생성 중인 텍스트 조각을 중간 결과로 전달합니다.
+    state(증분 분석 상태)가 주어지면 새 기록(state.delta)만 저장된 집계/키워드 상태에 더해 전체 결과를 만듭니다.
+    trace(요청 추적)가 주어지면 단계마다 실행 시간, CPU 시간, 할당량, LLM 호출을 기록합니다.
+    LLM을 쓸 수 없어 로컬 대체 경로로 만든 단계는 degraded에 단계 이름 -> 사유로 기록됩니다.
+    """
+    preprocessor = get_preprocessor()
+    analyzer = get_analyzer()
+    aggregation_history = state.delta if state is not None else preprocessed_history
+    keyword_history = state.keyword_history if state is not None else preprocessed_history
+
+    async def subscriptions_stage():
+        return await preprocessor.preprocess_subscriptions(subscriptions_data)
+
+    async def time_aggregation_stage():
+        if state is None:
+            return await analyzer.aggregate_watch_times(preprocessed_history, timezone, approximate)
+        state.aggregation = await analyzer.aggregate_watch_times(
+            aggregation_history, timezone, approximate, aggregation=state.aggregation
+        )
+        return state.aggregation
+
+    async def hourly_stats_stage(time_aggregation):
+        return await analyzer.extract_hourly_channel_stats(
+            preprocessed_history, timezone, aggregation=time_aggregation
+        )
+
+    async def time_stats_stage(time_aggregation):
+        return time_aggregation.time_stats(top_channels=TIME_STATS_TOP_CHANNELS)
 
-# 서비스 인스턴스 생성
-preprocessor = DataPreprocessor()
-analyzer = DataAnalyzer()
+    async def keyword_frequency_stage(subscriptions):
+        return await analyzer.extract_keywords({
+            "history": keyword_history,
+            "subscriptions": subscriptions
+        }, mode=keyword_mode, state=state.keywords if state is not None else None, degraded=degraded)
+
+    async def llm_analysis_stage(hourly_stats, keyword_frequency):
+        return await analyzer.generate_llm_analysis({
+            "hourly_stats": hourly_stats,
+            "keyword_frequency": keyword_frequency
+        }, degraded=degraded)
+
+    async def llm_analysis_stream_stage(hourly_stats, keyword_frequency, emit):
+        chunks = []
+        async for delta in analyzer.generate_llm_analysis_stream({
+            "hourly_stats": hourly_stats,
+            "keyword_frequency": keyword_frequency
+        }, degraded=degraded):
+            chunks.append(delta)
+            emit(delta)
+        return "".join(chunks).strip()
+
+    graph = StageGraph(observer=metrics.observe_stage)
+
+    def add(name, func, **options):
+        graph.add(name, trace.wrap(name, func) if trace is not None else func, **options)
+
+    add("subscriptions", subscriptions_stage)
+    add("time_aggregation", time_aggregation_stage)
+    add("hourly_stats", hourly_stats_stage, depends_on=("time_aggregation",))
+    add("time_stats", time_stats_stage, depends_on=("time_aggregation",))
+    add("keyword_frequency", keyword_frequency_stage, depends_on=("subscriptions",))
+    if stream_llm:
+        add("llm_analysis", llm_analysis_stream_stage, depends_on=("hourly_stats", "keyword_frequency"), streaming=True)
+    else:
+        add("llm_analysis", llm_analysis_stage, depends_on=("hourly_stats", "keyword_frequency"))
+    return graph
+
+
+async def load_analysis_state(
+    analysis_id: str,
+    preprocessed_history: WatchHistory,
+    subscriptions_data: Any,
+    keyword_mode: str,
+    timezone: str,
+    approximate: bool
+) -> Tuple[str, AnalysisState]:
+    """
+    증분 분석 상태를 불러오고 이번 업로드에서 새로 반영할 기록을 정합니다.
+    저장된 상태가 없으면 빈 상태에서 시작합니다 (전체 기록을 반영).
+    
+    Returns:
+        (저장 키, AnalysisState)
+    """
+    store = get_analysis_state_store()
+    key = store.make_key(analysis_id, timezone, approximate)
+    state = await store.load(key) or AnalysisState()
+    state.begin(preprocessed_history, keyword_mode, subscriptions_digest(subscriptions_data))
+    return key, state
+
+
+async def save_analysis_state(key: str, state: AnalysisState) -> None:
+    """
+    분석이 끝난 상태를 저장합니다. 키워드 배치 일부가 실패했으면 저장하지 않아
+    다음 요청에서 같은 기록을 다시 처리합니다.
+    상태를 불러온 뒤 같은 analysis_id의 다른 요청이 먼저 저장했으면 그 상태를 남기고 이번 상태는 버립니다.
+    """
+    if state.keywords.incomplete:
+        return
+    state.commit()
+    await get_analysis_state_store().save(key, state)
 
 
 def get_test_analysis_data() -> AnalysisData:
@@ -40,68 +371,72 @@ def get_test_analysis_data() -> AnalysisData:
     )
 
 
-async def get_test_streaming_data() -> AsyncGenerator[str, None]:
+async def get_test_streaming_events() -> AsyncGenerator[Dict[str, Any], None]:
     """
-    테스트용 스트리밍 분석 데이터를 생성합니다. (스트리밍 엔드포인트용)
+    테스트용 스트리밍 분석 이벤트를 생성합니다. (스트리밍 엔드포인트, 작업 모드용)
     각 단계의 결과를 2초 간격으로 반환합니다.
     
     Yields:
-        각 분석 단계의 결과를 JSON 문자열로 반환
+        각 분석 단계의 결과 이벤트 (dict)
     """
     # 1. 시간대별 통계 데이터 (constants.py에서 가져옴)
-    hourly_response = {
+    yield {
         "function": "hourly_stats",
         "status": "success",
         "data": TEST_HOURLY_STATS
     }
-    yield json.dumps(hourly_response) + "\n"
     
     # 2초 대기
     await asyncio.sleep(2)
     
     # 2. 키워드 빈도 데이터 (constants.py에서 가져옴)
-    keyword_response = {
+    yield {
         "function": "keyword_frequency",
         "status": "success",
         "data": TEST_KEYWORD_DATA
     }
-    yield json.dumps(keyword_response) + "\n"
     
     # 2초 대기
     await asyncio.sleep(2)
     
     # 3. LLM 분석 데이터 (constants.py에서 가져옴)
-    llm_response = {
+    yield {
         "function": "llm_analysis",
         "status": "success",
         "data": TEST_LLM_ANALYSIS
     }
-    yield json.dumps(llm_response) + "\n"
     
     # 2초 대기
     await asyncio.sleep(2)
     
     # 4. 완료 메시지
-    final_response = {
+    yield {
         "function": "completion",
         "status": "success",
         "message": "분석이 완료되었습니다."
     }
-    yield json.dumps(final_response) + "\n"
 
 
 async def process_analysis_request(
-    history_data: Dict[str, Any], 
+    preprocessed_history: WatchHistory, 
     subscriptions_data: Dict[str, Any],
-    analysis_id: Optional[str] = None
+    analysis_id: Optional[str] = None,
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    incremental: bool = False
 ) -> AnalysisData:
     """
     분석 프로세스 실행 및 결과 생성 (기존 엔드포인트용)
     
     Args:
-        history_data: 시청 기록 데이터
+        preprocessed_history: 전처리된 시청 기록 데이터 (preprocess_history_upload 결과)
         subscriptions_data: 구독 정보 데이터
         analysis_id: 분석 식별자 (테스트 모드 확인용)
+        keyword_mode: 키워드 추출 방식 ("llm" 또는 "local")
+        timezone: 시간 통계 기준 시간대 (IANA 이름)
+        approximate: 채널 집계 근사 모드 여부
+        incremental: analysis_id별로 저장된 집계 상태에 새 기록만 더해 분석할지 여부
         
     Returns:
         AnalysisData: 분석 결과
@@ -110,81 +445,136 @@ async def process_analysis_request(
     if analysis_id == "test":
         return get_test_analysis_data()
     
-    # 일반 분석 프로세스 (기존 코드)
-    # 데이터 전처리
-    preprocessed_history = await preprocessor.preprocess_history(history_data)
-    preprocessed_subscriptions = await preprocessor.preprocess_subscriptions(subscriptions_data)
+    # 일반 분석 프로세스 (시청 기록은 업로드 시 이미 전처리됨)
+    # 독립적인 단계는 동시에 실행
+    results = {}
+    degraded = {}
+    try:
+        state_key, state = None, None
+        if incremental:
+            state_key, state = await load_analysis_state(
+                analysis_id, preprocessed_history, subscriptions_data, keyword_mode, timezone, approximate
+            )
+        async for event in build_analysis_graph(
+            preprocessed_history, subscriptions_data, keyword_mode,
+            timezone=timezone, approximate=approximate, state=state, degraded=degraded
+        ).run():
+            results[event.stage] = event.data
+        if state is not None:
+            await save_analysis_state(state_key, state)
+    except Exception as e:
+        raise Exception(f"Data analysis failed: {str(e)}")
     
-    # 데이터 분석
-    analysis_data = await analyzer.analyze_data(
-        preprocessed_history,
-        preprocessed_subscriptions
+    return AnalysisData(
+        hourlyStats=results["hourly_stats"],  # 시간대별 통계 (HourlyStat 리스트)
+        keywordFrequency=results["keyword_frequency"],  # 키워드 빈도 (KeywordFrequency 리스트)
+        llmAnalysis=results["llm_analysis"],  # LLM 분석 결과 (문자열)
+        timeStats=results["time_stats"],  # 요일×시간, 일별, 월별, 채널별 통계
+        degraded=degraded or None  # LLM 대신 로컬 대체 경로로 만든 단계 (없으면 생략)
     )
-    
-    return analysis_data
 
 
-async def process_streaming_analysis(
-    history_data: Dict[str, Any], 
+async def iter_analysis_events(
+    preprocessed_history: WatchHistory, 
     subscriptions_data: Dict[str, Any],
-    analysis_id: Optional[str] = None
-) -> AsyncGenerator[str, None]:
+    analysis_id: Optional[str] = None,
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    incremental: bool = False,
+    trace: Optional[RequestTrace] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
     """
-    스트리밍 분석 프로세스 실행 및 결과 생성
+    스트리밍 분석 프로세스를 실행하고 단계별 결과 이벤트를 생성합니다. (스트리밍 엔드포인트, 작업 모드용)
     
     Args:
-        history_data: 시청 기록 데이터
+        preprocessed_history: 전처리된 시청 기록 데이터 (preprocess_history_upload 결과)
         subscriptions_data: 구독 정보 데이터
         analysis_id: 분석 식별자 (테스트 모드 확인용)
+        keyword_mode: 키워드 추출 방식 ("llm" 또는 "local")
+        timezone: 시간 통계 기준 시간대 (IANA 이름)
+        approximate: 채널 집계 근사 모드 여부
+        incremental: analysis_id별로 저장된 집계 상태에 새 기록만 더해 분석할지 여부
+        trace: 요청 추적 (trace 모드)
         
     Yields:
-        각 분석 단계의 결과를 JSON 문자열로 반환
+        각 분석 단계의 결과 이벤트 (dict, {"function", "status", "data" 또는 "message"})
     """
     # 테스트 모드 확인 (analysis_id가 "test"인 경우)
     if analysis_id == "test":
-        async for result in get_test_streaming_data():
-            yield result
+        async for event in get_test_streaming_events():
+            yield event
         return
     
     try:
-        # 데이터 전처리
-        preprocessed_history = await preprocessor.preprocess_history(history_data)
-        preprocessed_subscriptions = await preprocessor.preprocess_subscriptions(subscriptions_data)
-        
-        # 1. 시간대별 통계 분석 및 전송
-        hourly_stats = await analyzer.extract_hourly_channel_stats(preprocessed_history)
-        hourly_response = {
-            "function": "hourly_stats",
-            "status": "success",
-            "data": hourly_stats
-        }
-        yield json.dumps(hourly_response) + "\n"
-        
-        # 2. 키워드 분석 및 전송
-        keyword_frequency = await analyzer.extract_keywords({
-            "history": preprocessed_history,
-            "subscriptions": preprocessed_subscriptions
-        })
-        # Pydantic 모델을 dict로 변환
-        keyword_data = [{"keyword": kw.keyword, "frequency": kw.frequency} for kw in keyword_frequency]
-        keyword_response = {
-            "function": "keyword_frequency",
-            "status": "success",
-            "data": keyword_data
-        }
-        yield json.dumps(keyword_response) + "\n"
+        # 단계가 끝나는 순서대로 결과 전송 (시청 기록은 업로드 시 이미 전처리됨)
+        state_key, state = None, None
+        degraded = {}
+        if incremental:
+            state_key, state = await _traced(trace, "load_state", load_analysis_state(
+                analysis_id, preprocessed_history, subscriptions_data, keyword_mode, timezone, approximate
+            ))
+        graph = build_analysis_graph(
+            preprocessed_history, subscriptions_data, keyword_mode,
+            stream_llm=True, timezone=timezone, approximate=approximate, state=state, trace=trace,
+            degraded=degraded
+        )
+        async for event in graph.run():
+            stage, result = event.stage, event.data
+            if event.partial:
+                # LLM 분석 텍스트 조각을 도착하는 대로 전송
+                delta_response = {
+                    "function": "llm_analysis_delta",
+                    "status": "success",
+                    "data": result
+                }
+                yield delta_response
+                
+            elif stage == "hourly_stats":
+                # 1. 시간대별 통계 전송
+                hourly_response = {
+                    "function": "hourly_stats",
+                    "status": "success",
+                    "data": result
+                }
+                yield hourly_response
+                
+            elif stage == "time_stats":
+                # 1-1. 요일×시간, 일별, 월별, 채널별 통계 전송
+                time_stats_response = {
+                    "function": "time_stats",
+                    "status": "success",
+                    "data": result
+                }
+                yield time_stats_response
+                
+            elif stage == "keyword_frequency":
+                # 2. 키워드 분석 전송 (Pydantic 모델을 dict로 변환)
+                keyword_data = [{"keyword": kw.keyword, "frequency": kw.frequency} for kw in result]
+                keyword_response = {
+                    "function": "keyword_frequency",
+                    "status": "success",
+                    "data": keyword_data
+                }
+                if stage in degraded:
+                    # LLM 대신 로컬 빈도 분석으로 만든 결과 (사유)
+                    keyword_response["degraded"] = degraded[stage]
+                yield keyword_response
+                
+            elif stage == "llm_analysis":
+                # 3. LLM 분석 전체 텍스트 전송 (llm_analysis_delta 조각을 합친 결과)
+                llm_response = {
+                    "function": "llm_analysis",
+                    "status": "success",
+                    "data": result
+                }
+                if stage in degraded:
+                    # LLM 대신 통계 기반 요약 (또는 중간에 끊긴 LLM 응답)
+                    llm_response["degraded"] = degraded[stage]
+                yield llm_response
         
-        # 3. LLM 분석 및 전송
-        llm_analysis = await analyzer.generate_llm_analysis({
-            "hourly_stats": hourly_stats,
-            "keyword_frequency": keyword_frequency
-        })
-        llm_response = {
-            "function": "llm_analysis",
-            "status": "success",
-            "data": llm_analysis
-        }
-        yield json.dumps(llm_response) + "\n"
+        if state is not None:
+            await _traced(trace, "save_state", save_analysis_state(state_key, state))
         
         # 4. 완료 메시지
         final_response = {
@@ -192,7 +582,7 @@ async def process_streaming_analysis(
             "status": "success",
             "message": "분석이 완료되었습니다."
         }
-        yield json.dumps(final_response) + "\n"
+        yield final_response
         
     except Exception as e:
         error_response = {
@@ -200,4 +590,249 @@ async def process_streaming_analysis(
             "status": "error",
             "message": str(e)
         }
-        yield json.dumps(error_response) + "\n"
\ No newline at end of file
+        yield error_response
+
+
+async def process_streaming_analysis(
+    preprocessed_history: WatchHistory, 
+    subscriptions_data: Dict[str, Any],
+    analysis_id: Optional[str] = None,
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    incremental: bool = False,
+    trace: Optional[RequestTrace] = None
+) -> AsyncGenerator[bytes, None]:
+    """
+    스트리밍 분석 프로세스 실행 및 결과 생성 (iter_analysis_events의 이벤트를 NDJSON 줄로 변환)
+    trace(요청 추적)가 주어지면 마지막에 단계별 측정값을 담은 trace 이벤트를 전송합니다.
+    
+    Yields:
+        각 분석 단계의 결과를 NDJSON 줄(UTF-8 바이트)로 반환
+    """
+    try:
+        async for event in iter_analysis_events(
+            preprocessed_history, subscriptions_data,
+            analysis_id=analysis_id,
+            keyword_mode=keyword_mode,
+            timezone=timezone,
+            approximate=approximate,
+            incremental=incremental,
+            trace=trace
+        ):
+            yield ndjson_line(event)
+
+        if trace is not None:
+            # 5. 단계별 측정값 (wall/CPU 시간, 할당량, LLM 호출)
+            trace_response = {
+                "function": "trace",
+                "status": "success",
+                "data": await trace.finish()
+            }
+            yield ndjson_line(trace_response)
+    finally:
+        # 클라이언트가 연결을 끊어도 tracemalloc/cProfile이 켜진 채로 남지 않도록 정리
+        if trace is not None:
+            trace.close()
+
+
+async def run_analysis_upload(
+    uploads: PreprocessedUploads,
+    analysis_id: Optional[str] = None,
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    incremental: bool = False
+) -> AnalysisData:
+    """
+    전처리한 업로드(preprocess_uploads)를 분석해 결과를 반환합니다. (process_analysis_request)
+    업로드 내용과 옵션이 같은 분석이 진행 중이면 새로 계산하지 않고 그 결과를 함께 받습니다. (ANALYSIS_COALESCING)
+    """
+    async def work():
+        yield await process_analysis_request(
+            uploads.history,
+            uploads.subscriptions,
+            analysis_id=analysis_id,
+            keyword_mode=keyword_mode,
+            timezone=timezone,
+            approximate=approximate,
+            incremental=incremental
+        )
+
+    if COALESCING_ENABLED and uploads.upload_hash is not None:
+        key = request_key(
+            "analysis", uploads.upload_hash,
+            analysis_id=analysis_id, keyword_mode=keyword_mode, timezone=timezone,
+            approximate=approximate, incremental=incremental
+        )
+        results = get_single_flight().follow(key, work, endpoint="analysis")
+    else:
+        results = work()
+    analysis_data = None
+    async for analysis_data in results:
+        pass
+    return analysis_data
+
+
+def start_streaming_analysis(
+    uploads: PreprocessedUploads,
+    analysis_id: Optional[str] = None,
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    incremental: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    전처리한 업로드(preprocess_uploads)의 스트리밍 분석 NDJSON 줄을 내는 이터레이터를 반환합니다.
+    업로드 내용과 옵션이 같은 분석이 진행 중이면 새로 계산하지 않고, 그 분석이 지금까지 보낸 줄부터
+    같은 줄을 받습니다. (ANALYSIS_COALESCING)
+    """
+    def work():
+        return process_streaming_analysis(
+            uploads.history,
+            uploads.subscriptions,
+            analysis_id=analysis_id,
+            keyword_mode=keyword_mode,
+            timezone=timezone,
+            approximate=approximate,
+            incremental=incremental
+        )
+
+    if COALESCING_ENABLED and uploads.upload_hash is not None:
+        key = request_key(
+            "analysis-stream", uploads.upload_hash,
+            analysis_id=analysis_id, keyword_mode=keyword_mode, timezone=timezone,
+            approximate=approximate, incremental=incremental
+        )
+        return get_single_flight().follow(key, work, endpoint="analysis-stream")
+    return work()
+
+
+def submit_analysis_job(
+    job: Job,
+    history_file: Optional[SpooledUpload],
+    subscriptions_file: Optional[SpooledUpload] = None,
+    history_hash: Optional[str] = None,
+    keyword_mode: str = KEYWORD_MODE_LLM,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False,
+    incremental: bool = False
+) -> None:
+    """
+    reserve()로 자리를 확보한 작업에 업로드 파싱과 분석을 맡겨 워커 풀 대기열에 넣습니다. (작업 모드용)
+    업로드(spool_upload로 옮긴 임시 파일)는 워커가 파싱하고 작업이 끝나면 지웁니다.
+    파싱 오류는 작업 실패(error 이벤트)로 알립니다.
+    작업은 스트리밍 분석과 같은 이벤트를 만들고, 결과는 GET /jobs/{job_id}나 /jobs/{job_id}/stream으로 받습니다.
+    """
+    spooled = [upload for upload in (history_file, subscriptions_file) if upload is not None]
+
+    def close_uploads():
+        for upload in spooled:
+            upload.close()
+
+    async def work():
+        try:
+            uploads = await preprocess_uploads(
+                history_file, subscriptions_file, history_hash=history_hash, timezone=timezone
+            )
+        except StoredHistoryNotFound:
+            yield _job_error("저장된 시청 기록을 찾을 수 없습니다. 파일을 다시 업로드해 주세요.")
+            return
+        except json.JSONDecodeError:
+            yield _job_error("업로드된 파일 중 하나의 JSON 형식이 올바르지 않습니다.")
+            return
+        except TakeoutArchiveError as e:
+            yield _job_error(str(e))
+            return
+        finally:
+            # 파싱이 끝나면 분석을 기다리지 않고 임시 파일 삭제
+            close_uploads()
+        job.upload_hash = uploads.upload_hash
+        async for event in iter_analysis_events(
+            uploads.history, uploads.subscriptions,
+            analysis_id=job.analysis_id,
+            keyword_mode=keyword_mode,
+            timezone=timezone,
+            approximate=approximate,
+            incremental=incremental
+        ):
+            yield event
+
+    get_job_manager().submit(job, work, cleanup=close_uploads)
+
+
+def _job_error(message: str) -> Dict[str, Any]:
+    return {"function": "error", "status": "error", "message": message}
+
+
+def describe_job(job: Job) -> JobInfo:
+    """
+    작업 상태를 응답 모델로 변환합니다. 성공한 작업은 단계별 이벤트를 모아 분석 결과를 만듭니다.
+    
+    Returns:
+        JobInfo: 작업 상태, 대기 순서, 결과 또는 오류
+    """
+    result = None
+    if job.status == JOB_SUCCEEDED:
+        results = job.results
+        degraded = {event["function"]: event["degraded"] for event in job.events if "degraded" in event}
+        result = AnalysisData(
+            hourlyStats=results["hourly_stats"],
+            keywordFrequency=results["keyword_frequency"],
+            llmAnalysis=results["llm_analysis"],
+            timeStats=results.get("time_stats"),
+            degraded=degraded or None
+        )
+    return JobInfo(
+        jobId=job.id,
+        analysisId=job.analysis_id,
+        status=job.status,
+        queuePosition=get_job_manager().queue_position(job),
+        createdAt=job.created_at,
+        startedAt=job.started_at,
+        finishedAt=job.finished_at,
+        historyHash=job.upload_hash if get_history_store().enabled else None,
+        result=result,
+        error=job.error
+    )
+
+
+async def follow_analysis_job(job: Job) -> AsyncGenerator[bytes, None]:
+    """
+    작업의 이벤트를 처음부터 NDJSON 줄로 전달하고 작업이 끝날 때까지 새 이벤트를 기다립니다.
+    첫 줄은 연결 시점의 작업 상태입니다 ({"function": "job", ...}).
+    """
+    job_response = {
+        "function": "job",
+        "status": "success",
+        "data": describe_job(job).model_dump(exclude_none=True)
+    }
+    yield ndjson_line(job_response)
+    async for event in job.follow():
+        yield ndjson_line(event)
+
+
+async def process_time_stats_request(
+    preprocessed_history: WatchHistory,
+    timezone: str = DEFAULT_TIMEZONE,
+    approximate: bool = False
+) -> TimeStatsData:
+    """
+    LLM 호출 없이 시간 통계만 계산합니다. (시간 통계 엔드포인트용)
+    
+    Args:
+        preprocessed_history: 전처리된 시청 기록 데이터 (preprocess_history_upload 결과)
+        timezone: 통계 기준 시간대 (IANA 이름)
+        approximate: 채널 집계 근사 모드 여부
+        
+    Returns:
+        TimeStatsData: 시간대별 통계와 요일×시간, 일별, 월별, 채널별 통계
+    """
+    try:
+        aggregation = await get_analyzer().aggregate_watch_times(preprocessed_history, timezone, approximate)
+        return TimeStatsData(
+            hourlyStats=aggregation.hourly_stats(top_k=HOURLY_TOP_CHANNELS),
+            timeStats=aggregation.time_stats(top_channels=TIME_STATS_TOP_CHANNELS)
+        )
+    except Exception as e:
+        raise Exception(f"Time stats analysis failed: {str(e)}")
@@ -0,0 +1,240 @@
+# app/services/analysis_state.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .history import WatchHistory
+from .keywords import KeywordState
+from .time_stats import TimeAggregation
+
+# 증분 분석 상태 저장소 설정 (환경 변수로 조정)
+ANALYSIS_STATE_PATH = os.environ.get("ANALYSIS_STATE_PATH", os.path.join(".cache", "analysis_state.sqlite3"))
+ANALYSIS_STATE_TTL = float(os.environ.get("ANALYSIS_STATE_TTL", str(90 * 24 * 3600)))
+ANALYSIS_STATE_MAX_TERMS = int(os.environ.get("ANALYSIS_STATE_MAX_TERMS", "20000"))  # 저장하는 용어 빈도 수 (빈도 상위)
+ANALYSIS_STATE_MAX_KEYWORDS = int(os.environ.get("ANALYSIS_STATE_MAX_KEYWORDS", "100"))  # 저장하는 LLM 후보 키워드 수
+
+# 저장 형식이 바뀌면 올려서 이전 상태를 무시
+_STATE_VERSION = 2
+
+
+class AnalysisState:
+    """
+    analysis_id별로 저장하는 증분 분석 상태.
+
+    Attributes:
+        aggregation: 지금까지 반영한 시청 기록의 시간/채널 집계 (처음 분석 전에는 None)
+        keywords: 키워드 추출 상태 (KeywordState)
+        high_water_mark: 반영한 시청 기록 중 가장 늦은 시청 시각 (UTC epoch ms). 이보다 늦은 항목만 새 기록으로 취급
+        entry_count: 지금까지 반영한 시청 기록 수
+
+    begin()이 정하는 이번 요청의 입력 (저장되지 않음):
+        delta: 시간 집계에 더할 새 기록
+        keyword_history: 키워드 상태에 더할 기록. 키워드 방식이나 구독 정보가 바뀌었으면 전체 기록
+
+    version: 불러온 저장 행의 버전 (저장된 상태가 없으면 0). 저장할 때 그 사이 다른 요청이 저장했는지 확인하는 데 사용
+    """
+
+    def __init__(
+        self,
+        aggregation: Optional[TimeAggregation] = None,
+        keywords: Optional[KeywordState] = None,
+        high_water_mark: Optional[int] = None,
+        entry_count: int = 0
+    ):
+        self.aggregation = aggregation
+        self.keywords = keywords if keywords is not None else KeywordState()
+        self.high_water_mark = high_water_mark
+        self.entry_count = entry_count
+        self.version = 0
+        self.delta = WatchHistory()
+        self.keyword_history = WatchHistory()
+        self._latest: Optional[int] = None
+
+    def begin(self, history: WatchHistory, keyword_mode: str, subscriptions_digest: str) -> None:
+        """업로드된 전체 기록에서 아직 반영하지 않은 항목(high_water_mark 이후)을 골라 이번 요청의 입력을 정합니다."""
+        self.delta = history if self.high_water_mark is None else history.since(self.high_water_mark)
+        if self.keywords.matches(keyword_mode, subscriptions_digest):
+            self.keyword_history = self.delta
+        else:
+            # 이전 키워드 상태를 이어 쓸 수 없으므로 전체 기록으로 다시 만듦
+            self.keywords = KeywordState(keyword_mode, subscriptions_digest)
+            self.keyword_history = history
+        self._latest = max(history.times) if history else None
+
+    def commit(self) -> None:
+        """
+        이번 요청의 새 기록을 반영한 것으로 표시하고 (high_water_mark와 항목 수 갱신),
+        저장할 키워드 상태를 ANALYSIS_STATE_MAX_TERMS / ANALYSIS_STATE_MAX_KEYWORDS 크기로 줄입니다.
+        """
+        self.keywords.compact(ANALYSIS_STATE_MAX_TERMS, ANALYSIS_STATE_MAX_KEYWORDS)
+        if self._latest is not None and (self.high_water_mark is None or self._latest > self.high_water_mark):
+            self.high_water_mark = self._latest
+        self.entry_count += len(self.delta)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "version": _STATE_VERSION,
+            "aggregation": self.aggregation.to_state() if self.aggregation is not None else None,
+            "keywords": self.keywords.to_state(),
+            "high_water_mark": self.high_water_mark,
+            "entry_count": self.entry_count
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> Optional["AnalysisState"]:
+        """저장된 상태를 복원합니다. 형식 버전이 다르면 None"""
+        if state.get("version") != _STATE_VERSION:
+            return None
+        aggregation = state["aggregation"]
+        return cls(
+            aggregation=TimeAggregation.from_state(aggregation) if aggregation is not None else None,
+            keywords=KeywordState.from_state(state["keywords"]),
+            high_water_mark=state["high_water_mark"],
+            entry_count=state["entry_count"]
+        )
+
+
+def subscriptions_digest(subscriptions_data: Any) -> str:
+    """구독 정보가 바뀌었는지 비교하기 위한 해시"""
+    serialized = json.dumps(subscriptions_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class AnalysisStateStore:
+    """
+    증분 분석 상태를 SQLite에 JSON으로 저장합니다.
+    키는 analysis_id와 집계 설정(시간대, 근사 모드)으로 구성되므로 설정이 다르면 별도의 상태를 사용합니다.
+
+    같은 키의 요청이 동시에 불러오기 -> 분석 -> 저장을 하면 (같은 워커든 다른 워커든) 행의 버전으로 저장을 한 번만 받습니다.
+    저장은 불러온 버전이 그대로일 때만 성공하고, 그 사이 다른 요청이 먼저 저장했으면 이번 상태는 버립니다.
+    버린 요청의 새 기록은 저장된 high_water_mark 이후이므로 다음 요청에서 다시 반영되어, 같은 기록이 두 번 세어지지 않습니다.
+    """
+
+    def __init__(self, db_path: str = ANALYSIS_STATE_PATH, ttl: float = ANALYSIS_STATE_TTL):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        try:
+            self._db = self._open_db(db_path)
+        except sqlite3.Error as e:
+            self.logger.error(f"분석 상태 DB 열기 실패, 증분 분석 비활성화: {e}")
+
+    @staticmethod
+    def _open_db(db_path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_state ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL, version INTEGER NOT NULL DEFAULT 1)"
+        )
+        # version 열이 없던 이전 DB
+        columns = {row[1] for row in db.execute("PRAGMA table_info(analysis_state)")}
+        if "version" not in columns:
+            db.execute("ALTER TABLE analysis_state ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        return db
+
+    @staticmethod
+    def make_key(analysis_id: str, timezone: str, approximate: bool) -> str:
+        return json.dumps([analysis_id, timezone, approximate])
+
+    async def load(self, key: str) -> Optional[AnalysisState]:
+        """저장된 상태를 반환합니다. 없거나 만료되었거나 읽을 수 없으면 None"""
+        if self._db is None:
+            return None
+        # 상태가 클 수 있으므로 역직렬화까지 스레드에서 처리
+        return await asyncio.to_thread(self._load, key)
+
+    async def save(self, key: str, state: AnalysisState) -> bool:
+        """
+        상태를 저장합니다. 불러온 뒤(state.version) 다른 요청이 같은 키에 먼저 저장했으면 저장하지 않습니다.
+
+        Returns:
+            bool: 저장했으면 True
+        """
+        if self._db is None:
+            return False
+        return await asyncio.to_thread(self._save, key, state)
+
+    def _load(self, key: str) -> Optional[AnalysisState]:
+        row = self._db_get(key)
+        if row is None:
+            return None
+        value, version = row
+        try:
+            state = AnalysisState.from_state(json.loads(value))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            self.logger.error(f"분석 상태 복원 실패, 전체 분석으로 진행: {e}")
+            return None
+        if state is not None:
+            state.version = version
+        return state
+
+    def _save(self, key: str, state: AnalysisState) -> bool:
+        saved = self._db_set(key, json.dumps(state.to_state(), ensure_ascii=False), state.version)
+        if not saved:
+            self.logger.warning(f"같은 분석의 다른 요청이 먼저 상태를 저장해 이번 상태는 저장하지 않음: {key}")
+        return saved
+
+    def _db_get(self, key: str) -> Optional[Tuple[str, int]]:
+        """(저장된 값, 행 버전). 없거나 만료되었으면 None"""
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, version FROM analysis_state WHERE key = ? AND updated_at > ?",
+                    (key, time.time() - self.ttl)
+                ).fetchone()
+                return (row[0], row[1]) if row else None
+        except sqlite3.Error as e:
+            self.logger.error(f"분석 상태 조회 실패: {e}")
+            return None
+
+    def _db_set(self, key: str, value: str, version: int) -> bool:
+        """
+        불러온 행의 버전이 version일 때만 값을 쓰고 버전을 올립니다. (version이 0이면 행이 없거나 만료되었을 때만)
+        다른 요청이 먼저 썼으면 False
+        """
+        now = time.time()
+        try:
+            with self._db_lock:
+                if version:
+                    cursor = self._db.execute(
+                        "UPDATE analysis_state SET value = ?, updated_at = ?, version = version + 1 "
+                        "WHERE key = ? AND version = ?",
+                        (value, now, key, version)
+                    )
+                else:
+                    # 만료된 행은 load가 없는 것으로 보므로 덮어씀
+                    cursor = self._db.execute(
+                        "INSERT INTO analysis_state (key, value, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at, "
+                        "version = version + 1 WHERE updated_at <= ?",
+                        (key, value, now, now - self.ttl)
+                    )
+                saved = cursor.rowcount > 0
+                # 오래 갱신되지 않은 상태 정리
+                self._db.execute("DELETE FROM analysis_state WHERE updated_at <= ?", (now - self.ttl,))
+                return saved
+        except sqlite3.Error as e:
+            self.logger.error(f"분석 상태 저장 실패: {e}")
+            return False
+
+
+_store: Optional[AnalysisStateStore] = None
+
+
+def get_analysis_state_store() -> AnalysisStateStore:
+    """프로세스 전체에서 공유하는 분석 상태 저장소"""
+    global _store
+    if _store is None:
+        _store = AnalysisStateStore()
+    return _store
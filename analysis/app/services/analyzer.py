@@ -1,27 +1,103 @@
 # app/servies/analyzer.py
-from typing import Dict, Any, List, Counter
+from collections import Counter
+from typing import Dict, Any, List, Optional, AsyncIterator
+import asyncio
 import logging
-import os
 import json
-from openai import OpenAI
-from app.schemas.models import AnalysisData, KeywordFrequency
-from collections import defaultdict
+import os
+from app import metrics
+from app.api.resilience import DEGRADED_EMPTY, DEGRADED_ERROR, DEGRADED_PARTIAL, failure_reason
+from app.schemas.models import KeywordFrequency
+from app.services.history import WatchHistory
 from app.services.constant import KEYWORD_EXTRACTION_PROMPT, LLM_ANALYSIS_PROMPT, KEYWORD_EXTRACTER_MODEL, ANLYSIS_AGENT
-from app.api.openai import OpenAIClient
+from app.services.constant import KEYWORD_MODE_LLM, KEYWORD_MODE_LOCAL
+from app.services.constant import DEFAULT_TIMEZONE, HOURLY_TOP_CHANNELS
+from app.services.keywords import KeywordState, LocalKeywordExtractor, merge_keyword_lists, sample_titles
+from app.services.time_stats import TimeAggregation
+from app.services.offload import aggregate_in_process, should_offload_history
+from app.services.token_budget import estimate_tokens, pack_batches
+
+# LLM 키워드 추출 map-reduce 설정 (환경 변수로 조정)
+KEYWORD_BATCH_TOKENS = int(os.environ.get("KEYWORD_BATCH_TOKENS", "6000"))  # 배치 하나의 제목 토큰 예산
+KEYWORD_MAP_CONCURRENCY = int(os.environ.get("KEYWORD_MAP_CONCURRENCY", "4"))  # 요청 하나에서 동시에 보내는 배치 수
+# 요청 하나에서 보내는 최대 배치 수. 0(기본값)이면 전체 제목을 보내고, 양수면 넘치는 기록은 시청 횟수 가중 표본만 보냄
+KEYWORD_MAX_BATCHES = int(os.environ.get("KEYWORD_MAX_BATCHES", "0"))
+KEYWORD_REDUCE_FAN_IN = int(os.environ.get("KEYWORD_REDUCE_FAN_IN", "16"))  # reduce 한 단계에서 합치는 배치 결과 수
+KEYWORD_REDUCE_CANDIDATES = int(os.environ.get("KEYWORD_REDUCE_CANDIDATES", "100"))  # 중간 reduce 단계가 남기는 후보 수
+
+# 근사 모드에서 시간대/채널 요약 하나가 유지하는 채널 카운터 수
+CHANNEL_SKETCH_CAPACITY = int(os.environ.get("CHANNEL_SKETCH_CAPACITY", "64"))
+
+# LLM 분석 기본 메시지
+NO_DATA_ANALYSIS_MESSAGE = "분석에 필요한 충분한 데이터가 없습니다. 더 많은 YouTube 활동이 필요합니다."
+INSUFFICIENT_DATA_ANALYSIS_MESSAGE = "충분한 시청 데이터가 없어 정확한 분석이 어렵습니다. YouTube를 더 시청한 후 다시 시도해 주세요."
+ANALYSIS_ERROR_MESSAGE = "분석 중 오류가 발생했습니다. 시스템 관리자에게 문의해 주세요."
+LOCAL_ANALYSIS_NOTICE = "(지금은 AI 분석을 사용할 수 없어 시청 통계로 만든 요약입니다. 잠시 후 다시 분석해 주세요.)"
+
+
+def mark_degraded(degraded: Optional[Dict[str, str]], stage: str, reason: str) -> None:
+    """단계 결과를 LLM 대신 로컬 대체 경로로 만들었음을 기록합니다. (degraded: 단계 이름 -> 사유)"""
+    metrics.DEGRADED_RESULTS.inc(stage=stage, reason=reason)
+    if degraded is not None:
+        degraded[stage] = reason
+
 
 class DataAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        # OpenAI API 클라이언트 초기화
-        self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        self._openai_client = None
+
+    @property
+    def openai_client(self):
+        """OpenAIClient (공유 비동기 연결 풀 사용). LLM을 처음 사용할 때 만듭니다."""
+        if self._openai_client is None:
+            from app.api.openai import OpenAIClient
+            self._openai_client = OpenAIClient()
+        return self._openai_client
+
+    async def aggregate_watch_times(
+        self,
+        history: WatchHistory,
+        timezone: str = DEFAULT_TIMEZONE,
+        approximate: bool = False,
+        aggregation: Optional[TimeAggregation] = None
+    ) -> TimeAggregation:
+        """
+        시청 기록의 시간/채널 집계를 한 번에 계산합니다.
+        시간대별, 요일×시간, 일별, 월별, 채널별 통계는 모두 이 집계에서 다시 파싱 없이 꺼냅니다.
+        Args:
+            history: preprocess_history에서 반환된 WatchHistory
+            timezone: 통계 기준 시간대 (IANA 이름, 예: "Asia/Seoul")
+            approximate: True면 채널 집계를 크기가 고정된 heavy-hitter 요약(CHANNEL_SKETCH_CAPACITY)으로 계산
+            aggregation: 증분 분석에서 복원한 기존 집계. 주어지면 history(새 기록)를 여기에 더해 반환
+        Returns:
+            TimeAggregation
+        """
+        try:
+            sketch_capacity = CHANNEL_SKETCH_CAPACITY if approximate else None
+            if should_offload_history(history):
+                # 기록이 많으면 작업 프로세스에서 집계 (이벤트 루프를 막지 않음)
+                return await aggregate_in_process(history, timezone, sketch_capacity, aggregation)
+            if aggregation is not None:
+                # 증분 분석: 저장된 집계에 새 기록만 더함
+                aggregation.update(history)
+                return aggregation
+            return TimeAggregation.from_history(history, timezone, sketch_capacity)
+        except Exception as e:
+            raise Exception(f"Watch time aggregation failed: {str(e)}")
 
-        # OpenAIClient 초기화 추가
-        self.openai_client = OpenAIClient()
-    async def extract_hourly_channel_stats(self, preprocessed_history_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def extract_hourly_channel_stats(
+        self,
+        history: WatchHistory,
+        timezone: str = DEFAULT_TIMEZONE,
+        aggregation: Optional[TimeAggregation] = None
+    ) -> List[Dict[str, Any]]:
         """
         시간대별 총 조회수와 채널별 조회수 TOP3를 추출합니다.
         Args:
-            preprocessed_history_data: preprocess_history에서 반환된 전처리된 데이터
+            history: preprocess_history에서 반환된 WatchHistory
+            timezone: 시간대 기준 (IANA 이름, 기본값 UTC)
+            aggregation: 이미 계산한 aggregate_watch_times 결과 (없으면 새로 집계)
         Returns:
             시간대별 통계 리스트 (총 조회수, 채널별 TOP3)
         Example Returns:
@@ -42,223 +118,249 @@ class DataAnalyzer:
         }
         """
         try:
-            if not preprocessed_history_data:
+            if not history:
                 return []
 
-            # 시간대별 통계를 위한 딕셔너리 초기화
-            hourly_stats = defaultdict(lambda: {'totalViews': 0, 'channels': defaultdict(int)})
-
-            # 데이터 처리
-            for entry in preprocessed_history_data:
-                hour = entry['time'].hour  # 시청 시간대의 '시간' 추출
-                channel = entry['channel']
-                
-                # 시간대 총 조회수 증가
-                hourly_stats[hour]['totalViews'] += 1
-                # 채널별 조회수 증가
-                hourly_stats[hour]['channels'][channel] += 1
-
-            # 결과 포맷팅
-            result = []
-            for hour in range(24):
-                total_views = hourly_stats[hour]['totalViews']
-                channels = hourly_stats[hour]['channels']
-                
-                # 채널별 조회수를 리스트로 변환하고 내림차순 정렬
-                channel_list = [
-                    {'name': channel, 'views': views} 
-                    for channel, views in channels.items()
-                ]
-                channel_list.sort(key=lambda x: x['views'], reverse=True)
-                
-                # TOP3만 추출 (3개 미만이면 모두 포함)
-                top_channels = channel_list[:min(3, len(channel_list))]
-                
-                result.append({
-                    'hour': hour,
-                    'totalViews': total_views,
-                    'categories': top_channels if total_views > 0 else []
-                })
-            print("------total view------")
-            print(result)
-            print()
+            if aggregation is None:
+                aggregation = await self.aggregate_watch_times(history, timezone)
+            result = aggregation.hourly_stats(top_k=HOURLY_TOP_CHANNELS)
+            # 결과 전체를 문자열로 만드는 비용이 크므로 DEBUG 레벨일 때만 포맷 (지연 포맷팅)
+            self.logger.debug("Hourly stats: %s", result)
             return result
 
         except Exception as e:
             raise Exception(f"Hourly channel stats extraction failed: {str(e)}")
         
-    async def extract_keywords(self, preprocessed_data: Dict[str, Any]) -> List[KeywordFrequency]:
-        """키워드 빈도 분석"""
+    async def extract_keywords(
+        self,
+        preprocessed_data: Dict[str, Any],
+        mode: str = KEYWORD_MODE_LLM,
+        state: Optional[KeywordState] = None,
+        degraded: Optional[Dict[str, str]] = None
+    ) -> List[KeywordFrequency]:
+        """
+        키워드 빈도 분석
+        LLM 추출은 제목을 최대 KEYWORD_MAX_BATCHES개 배치로 보내(넘치면 시청 횟수 가중 표본) 후보 키워드를 모은 뒤,
+        후보를 전체 제목의 실제 출현 빈도로 다시 매겨 상위 키워드를 고릅니다.
+        LLM 추출이 모두 실패하거나(한도 초과, 서버 오류, 서킷 브레이커 열림) 키워드를 찾지 못하면
+        로컬 빈도 분석으로 대신하고 degraded에 "keyword_frequency" -> 사유를 기록합니다.
+        Args:
+            preprocessed_data: {"history": WatchHistory, "subscriptions": 전처리된 구독 정보}
+            mode: KEYWORD_MODE_LLM(LLM 추출) 또는 KEYWORD_MODE_LOCAL(네트워크 없이 전체 제목의 실제 빈도 분석)
+            state: 증분 분석 상태. 주어지면 history는 새 기록만이며, 그 결과를 state에 누적한 뒤 전체 키워드를 고름
+            degraded: 대체 경로로 만든 단계를 기록할 dict (단계 이름 -> 사유)
+        """
         try:
             # 분석할 데이터 준비
-            history_data = preprocessed_data.get("history", [])
+            history_data = preprocessed_data.get("history") or WatchHistory()
             subscriptions_data = preprocessed_data.get("subscriptions", [])
             
             # 데이터가 비어있는 경우 기본값 반환
-            if not history_data and not subscriptions_data:
+            if not history_data and not subscriptions_data and not state:
                 return [
                     KeywordFrequency(keyword="데이터 없음", frequency=0)
                 ]
-            
-            # 시청 기록에서 제목과 설명 추출
-            video_titles = [entry.get('title', '') for entry in history_data if 'title' in entry]
-            video_descriptions = [entry.get('description', '') for entry in history_data if 'description' in entry]
+
+            # 로컬 엔진: 전체 제목의 단어/구 빈도를 흔한 용어 가중치로 정렬
+            if mode == KEYWORD_MODE_LOCAL:
+                return self._extract_local_keywords(history_data, state)
             
             # 구독 채널 정보 추출
             channel_names = [sub.get('channelName', '') for sub in subscriptions_data if 'channelName' in sub]
             channel_descriptions = [sub.get('description', '') for sub in subscriptions_data if 'description' in sub]
-            
-            # LLM에게 전달할 컨텍스트 구성
-            context = {
-                "video_titles": video_titles[:100],  # API 한도를 고려해 최대 100개만 전송
-                "video_descriptions": video_descriptions[:50],  # 간결성을 위해 설명은 50개만 전송
+            channel_context = {
                 "channel_names": channel_names,
                 "channel_descriptions": channel_descriptions[:50]
             }
             
-            # OpenAI API 호출 (리팩토링된 함수 사용)
-            response = await self.openai_client.create_chat_completion(
-                model=KEYWORD_EXTRACTER_MODEL,
-                system_prompt=KEYWORD_EXTRACTION_PROMPT,
-                context=context,
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
+            # 증분 분석에서 이미 누적된 배치가 있으면 새 제목만 보내고 구독 정보는 다시 보내지 않음
+            continuing = state is not None and bool(state.partials)
             
-            # API 응답 로깅
-            print("-----raw data-----")
-            print(response)
-            print("------------------")
+            # 후보 키워드의 실제 빈도에 쓸 전체 제목의 용어 빈도는 LLM 호출을 기다리는 동안 스레드에서 계산
+            extractor = LocalKeywordExtractor()
+            counting = asyncio.ensure_future(asyncio.to_thread(extractor.count_terms, history_data))
             
-            # API 응답 파싱
             try:
-                keywords_list = []
-                
-                if isinstance(response, dict):
-                    # 'keywords' 키가 있는 경우
-                    if "keywords" in response:
-                        keywords_list = response.get("keywords", [])
-                    # 'keyword' 키가 있는 경우 (예시 출력에서 확인됨)
-                    elif "keyword" in response:
-                        keywords_list = response.get("keyword", [])
-                    # 다른 예상치 못한 구조인 경우
-                    else:
-                        # response 자체가 키워드 리스트인지 확인
-                        if any("keyword" in item and "frequency" in item for item in response.values() if isinstance(item, dict)):
-                            keywords_list = [item for item in response.values() if isinstance(item, dict) and "keyword" in item and "frequency" in item]
-                            self.logger.info(f"Extracted {len(keywords_list)} keywords from response values")
-                elif isinstance(response, list):
-                    # 결과가 직접 리스트인 경우
-                    keywords_list = response
+                # map: 제목(중복 제거, 최근 시청 순)을 토큰 예산 크기의 배치로 나누어 동시에 추출 (구독 정보는 첫 배치에만 포함)
+                # KEYWORD_MAX_BATCHES가 설정되어 있으면 그 배치 수에 들어가는 만큼만 시청 횟수 가중 표본으로 보냄
+                reserved = 0 if continuing else estimate_tokens(json.dumps(channel_context, ensure_ascii=False))
+                video_titles = history_data.titles
+                if KEYWORD_MAX_BATCHES > 0:
+                    video_titles = sample_titles(history_data, KEYWORD_MAX_BATCHES * KEYWORD_BATCH_TOKENS - reserved)
+                # 배치 경계의 남는 공간 때문에 넘친 마지막 배치는 버림
+                batches = pack_batches(video_titles, KEYWORD_BATCH_TOKENS, reserved_first=reserved)[:KEYWORD_MAX_BATCHES or None]
+                if not continuing:
+                    batches = batches or [[]]
+                semaphore = asyncio.Semaphore(KEYWORD_MAP_CONCURRENCY)
+            
+                async def extract_batch(index: int, titles: List[str]) -> List[KeywordFrequency]:
+                    # LLM에게 전달할 컨텍스트 구성
+                    context = {"video_titles": titles}
+                    if index == 0 and not continuing:
+                        context.update(channel_context)
                 
-                # KeywordFrequency 객체 리스트로 변환
-                keyword_results = []
-                for item in keywords_list:
-                    if isinstance(item, dict) and "keyword" in item and "frequency" in item:
-                        keyword_results.append(
-                            KeywordFrequency(keyword=item["keyword"], frequency=item["frequency"])
+                    async with semaphore:
+                        # OpenAI API 호출 (리팩토링된 함수 사용)
+                        response = await self.openai_client.create_chat_completion(
+                            model=KEYWORD_EXTRACTER_MODEL,
+                            system_prompt=KEYWORD_EXTRACTION_PROMPT,
+                            context=context,
+                            temperature=0.1,
+                            response_format={"type": "json_object"}
                         )
                 
-                # 결과가 비어 있으면 오류 메시지 출력
-                if not keyword_results and keywords_list:
-                    self.logger.error(f"Failed to convert keywords to KeywordFrequency objects. Raw list: {keywords_list}")
+                    # API 응답 로깅
+                    self.logger.debug("Keyword batch %d raw response: %s", index, response)
                 
-                # 결과가 비어 있으면 기본값 반환
-                if not keyword_results:
-                    return [
-                        KeywordFrequency(keyword="뉴스", frequency=150),
-                        KeywordFrequency(keyword="정치", frequency=100),
-                        KeywordFrequency(keyword="스포츠", frequency=80),
-                        KeywordFrequency(keyword="문화", frequency=60),
-                        KeywordFrequency(keyword="엔터테인먼트", frequency=40)
-                    ]
-                print("-----keyword_results-----")
-                print(keyword_results)
-                print("-------------------------")
-                return keyword_results
-                
-            except (json.JSONDecodeError, KeyError, TypeError) as e:
-                # 오류 발생 시 기본 키워드 반환
-                default_keywords = [
-                    KeywordFrequency(keyword="음악", frequency=150),
-                    KeywordFrequency(keyword="게임", frequency=100),
-                    KeywordFrequency(keyword="요리", frequency=80),
-                    KeywordFrequency(keyword="여행", frequency=60),
-                    KeywordFrequency(keyword="스포츠", frequency=40)
-                ]
-                return default_keywords
+                    return self._parse_keyword_response(response)
+            
+                partials = await asyncio.gather(
+                    *(extract_batch(index, titles) for index, titles in enumerate(batches)),
+                    return_exceptions=True
+                )
+                term_counts = await counting
+            finally:
+                # 단계가 실패하거나 취소되어도 빈도 계산 작업이 남아 예외가 버려지지 않도록 정리
+                if not counting.done():
+                    counting.cancel()
+                await asyncio.gather(counting, return_exceptions=True)
+            
+            # 모든 배치가 실패하면 로컬 빈도 분석으로 대체, 일부만 실패한 경우 나머지 결과로 진행
+            failures = [partial for partial in partials if isinstance(partial, BaseException)]
+            if failures and len(failures) == len(partials):
+                self.logger.warning(f"LLM keyword extraction failed, using local extraction: {failures[0]}")
+                if state is not None:
+                    # 실패한 배치의 제목은 다음 분석에서 다시 보내야 하므로 상태를 저장하지 않도록 표시
+                    state.incomplete = True
+                mark_degraded(degraded, "keyword_frequency", failure_reason(failures[0]))
+                return self._select_local_keywords(extractor, term_counts)
+            if failures:
+                self.logger.warning(f"{len(failures)}/{len(partials)} keyword batches failed: {failures[0]}")
+                mark_degraded(degraded, "keyword_frequency", DEGRADED_PARTIAL)
+            
+            # LLM이 답한 빈도는 배치마다 기준이 달라 쓰지 않음 (배치마다 키워드당 1표)
+            keyword_lists = [
+                [(kw.keyword, 1) for kw in partial]
+                for partial in partials if not isinstance(partial, BaseException)
+            ]
+            if state is not None:
+                # 실패한 배치의 제목은 다음 분석에서 다시 보내야 하므로 상태를 저장하지 않도록 표시
+                state.incomplete = state.incomplete or bool(failures)
+                state.partials.extend(keyword_lists)
+                keyword_lists = state.partials
+                state.term_counts.update(term_counts)
+                term_counts = state.term_counts
+            
+            # reduce: 배치별 키워드를 단계적으로 합친 후보를 실제 제목의 출현 빈도로 다시 매겨 상위 10개 선택
+            candidates = extractor.reduce_candidates(
+                keyword_lists, term_counts, KEYWORD_REDUCE_FAN_IN, KEYWORD_REDUCE_CANDIDATES
+            )
+            merged = extractor.rescore(candidates, term_counts, top_k=10)
+            keyword_results = [
+                KeywordFrequency(keyword=keyword, frequency=frequency)
+                for keyword, frequency in merged
+            ]
+            
+            # LLM 응답에서 제목에 나오는 키워드를 찾지 못하면 로컬 빈도 분석으로 대체
+            if not keyword_results:
+                self.logger.warning("LLM keyword extraction returned no keywords, using local extraction")
+                mark_degraded(degraded, "keyword_frequency", DEGRADED_EMPTY)
+                return self._select_local_keywords(extractor, term_counts)
+            self.logger.debug("Keyword results: %s", keyword_results)
+            return keyword_results
                 
         except Exception as e:
             raise Exception(f"Keyword extraction failed: {str(e)}")
 
-    async def generate_llm_analysis(self, analysis_results: Dict[str, Any]) -> str:
+    def _extract_local_keywords(
+        self,
+        history_data: WatchHistory,
+        state: Optional[KeywordState] = None
+    ) -> List[KeywordFrequency]:
+        """로컬 키워드 추출 (KEYWORD_MODE_LOCAL, LLM 추출의 대체 경로). state가 있으면 단어 빈도를 누적해 고름"""
+        extractor = LocalKeywordExtractor()
+        term_counts = extractor.count_terms(history_data)
+        if state is not None:
+            state.term_counts.update(term_counts)
+            term_counts = state.term_counts
+        return self._select_local_keywords(extractor, term_counts)
+
+    @staticmethod
+    def _select_local_keywords(extractor: LocalKeywordExtractor, term_counts: Counter) -> List[KeywordFrequency]:
+        """용어 빈도(count_terms 결과)에서 로컬 엔진으로 키워드를 고릅니다."""
+        local_keywords = extractor.select(term_counts)
+        if not local_keywords:
+            return [
+                KeywordFrequency(keyword="데이터 없음", frequency=0)
+            ]
+        return [
+            KeywordFrequency(keyword=keyword, frequency=frequency)
+            for keyword, frequency in local_keywords
+        ]
+
+    def _parse_keyword_response(self, response: Any) -> List[KeywordFrequency]:
+        """키워드 추출 LLM 응답을 KeywordFrequency 리스트로 변환합니다. 해석할 수 없으면 빈 리스트"""
+        try:
+            keywords_list = []
+            
+            if isinstance(response, dict):
+                # 'keywords' 키가 있는 경우
+                if "keywords" in response:
+                    keywords_list = response.get("keywords", [])
+                # 'keyword' 키가 있는 경우 (예시 출력에서 확인됨)
+                elif "keyword" in response:
+                    keywords_list = response.get("keyword", [])
+                # 다른 예상치 못한 구조인 경우
+                else:
+                    # response 자체가 키워드 리스트인지 확인
+                    if any("keyword" in item and "frequency" in item for item in response.values() if isinstance(item, dict)):
+                        keywords_list = [item for item in response.values() if isinstance(item, dict) and "keyword" in item and "frequency" in item]
+                        self.logger.info(f"Extracted {len(keywords_list)} keywords from response values")
+            elif isinstance(response, list):
+                # 결과가 직접 리스트인 경우
+                keywords_list = response
+            
+            # KeywordFrequency 객체 리스트로 변환
+            keyword_results = []
+            for item in keywords_list:
+                if isinstance(item, dict) and "keyword" in item and "frequency" in item:
+                    keyword_results.append(
+                        KeywordFrequency(keyword=item["keyword"], frequency=item["frequency"])
+                    )
+            
+            # 결과가 비어 있으면 오류 메시지 출력
+            if not keyword_results and keywords_list:
+                self.logger.error(f"Failed to convert keywords to KeywordFrequency objects. Raw list: {keywords_list}")
+            
+            return keyword_results
+            
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            self.logger.error(f"Keyword response parsing failed: {e}")
+            return []
+
+    async def generate_llm_analysis(
+        self,
+        analysis_results: Dict[str, Any],
+        degraded: Optional[Dict[str, str]] = None
+    ) -> str:
         """
         시간대별 통계와 키워드 빈도를 기반으로 LLM을 통해 사용자의 YouTube 시청 패턴을 분석합니다.
+        LLM 호출이 실패하면 통계로 만든 요약을 대신 반환하고 degraded에 "llm_analysis" -> 사유를 기록합니다.
         
         Args:
             analysis_results: 분석 결과 딕셔너리
                 - hourly_stats: 시간대별 시청 통계 리스트
                 - keyword_frequency: 키워드 빈도 리스트
+            degraded: 대체 경로로 만든 단계를 기록할 dict (단계 이름 -> 사유)
         
         Returns:
             str: LLM이 생성한 분석 내용
         """
+        context = None
         try:
-            hourly_stats = analysis_results.get("hourly_stats", [])
-            keyword_frequency = analysis_results.get("keyword_frequency", [])
-            
-            if not hourly_stats and not keyword_frequency:
-                return "분석에 필요한 충분한 데이터가 없습니다. 더 많은 YouTube 활동이 필요합니다."
-            
-            # 분석을 위한 데이터 정리
-            # 가장 시청이 많은 시간대 찾기
-            peak_hours = sorted(
-                [h for h in hourly_stats if h["totalViews"] > 0],
-                key=lambda x: x["totalViews"],
-                reverse=True
-            )[:3]  # 상위 3개 시간대
-            
-            # 키워드 빈도 정리 (상위 10개)
-            top_keywords = sorted(
-                keyword_frequency,
-                key=lambda x: x.frequency,
-                reverse=True
-            )[:10]
-            
-            # 시간대 그룹화 (아침, 오후, 저녁, 밤)
-            time_groups = {
-                "아침(06-11)": sum(h["totalViews"] for h in hourly_stats if 6 <= h["hour"] <= 11),
-                "오후(12-17)": sum(h["totalViews"] for h in hourly_stats if 12 <= h["hour"] <= 17),
-                "저녁(18-23)": sum(h["totalViews"] for h in hourly_stats if 18 <= h["hour"] <= 23),
-                "심야(00-05)": sum(h["totalViews"] for h in hourly_stats if 0 <= h["hour"] <= 5)
-            }
-            
-            # LLM에게 전달할 컨텍스트 구성
-            context = {
-                "peak_hours": [
-                    {
-                        "hour": h["hour"],
-                        "totalViews": h["totalViews"],
-                        "top_channels": h["categories"][:3] if h["categories"] else []
-                    } 
-                    for h in peak_hours
-                ],
-                "top_keywords": [
-                    {
-                        "keyword": kw.keyword,
-                        "frequency": kw.frequency
-                    } 
-                    for kw in top_keywords
-                ],
-                "time_groups": [
-                    {
-                        "name": name,
-                        "total_views": views
-                    }
-                    for name, views in time_groups.items()
-                ],
-                "total_views": sum(h["totalViews"] for h in hourly_stats)
-            }
+            context = self._build_analysis_context(analysis_results)
+            if context is None:
+                return NO_DATA_ANALYSIS_MESSAGE
             
             # OpenAI API 호출
             analysis_text = await self.openai_client.create_chat_completion(
@@ -270,49 +372,151 @@ class DataAnalyzer:
             )
             
             if not analysis_text:
-                return "충분한 시청 데이터가 없어 정확한 분석이 어렵습니다. YouTube를 더 시청한 후 다시 시도해 주세요."
+                return INSUFFICIENT_DATA_ANALYSIS_MESSAGE
             
-            print(analysis_text)
+            self.logger.debug("LLM analysis: %s", analysis_text)
             return analysis_text
             
         except Exception as e:
             self.logger.error(f"LLM analysis generation failed: {str(e)}")
-            # 오류 발생 시 기본 분석 메시지 반환
-            return "분석 중 오류가 발생했습니다. 시스템 관리자에게 문의해 주세요."
+            # LLM 호출 실패 시 통계 기반 요약 반환 (컨텍스트를 만들지 못했으면 기본 오류 메시지)
+            mark_degraded(degraded, "llm_analysis", failure_reason(e) if context is not None else DEGRADED_ERROR)
+            return self._local_analysis(context) if context is not None else ANALYSIS_ERROR_MESSAGE
 
-    async def analyze_data(self, 
-                        history_data: List[Dict[str, Any]],  # 타입 수정: Dict -> List[Dict]
-                        subscriptions_data: List[Dict[str, Any]]) -> AnalysisData:  # 타입 수정: Dict -> List[Dict]
+    async def generate_llm_analysis_stream(
+        self,
+        analysis_results: Dict[str, Any],
+        degraded: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
         """
-        전체 데이터 분석 수행
+        generate_llm_analysis의 스트리밍 버전. 분석 텍스트를 모델이 생성하는 대로 조각(delta) 단위로 반환합니다.
+        조각을 모두 이어 붙이면 전체 분석 내용이 됩니다.
+        
         Args:
-            history_data: 시청 기록데이터 
-            subscriptions_data: 구독 채널 데이터
-        Returns:
-            AnalysisData: 분석 결과 (시간대별 통계, 키워드 빈도, LLM 분석)
+            analysis_results: generate_llm_analysis와 동일
+            degraded: generate_llm_analysis와 동일
+        
+        Yields:
+            str: LLM이 생성한 분석 내용의 조각
         """
         try:
-            # 시간대별 총 조회수와 채널별 TOP3 추출
-            hourly_stats = await self.extract_hourly_channel_stats(history_data)
-            
-            # 키워드 빈도 분석
-            keyword_frequency = await self.extract_keywords({
-                "history": history_data,
-                "subscriptions": subscriptions_data
-            })
-            
-            # LLM 기반 분석
-            llm_analysis = await self.generate_llm_analysis({
-                "hourly_stats": hourly_stats,
-                "keyword_frequency": keyword_frequency
-            })
+            context = self._build_analysis_context(analysis_results)
+        except Exception as e:
+            self.logger.error(f"LLM analysis generation failed: {str(e)}")
+            mark_degraded(degraded, "llm_analysis", DEGRADED_ERROR)
+            yield ANALYSIS_ERROR_MESSAGE
+            return
+        if context is None:
+            yield NO_DATA_ANALYSIS_MESSAGE
+            return
+        
+        emitted = False
+        try:
+            async for delta in self.openai_client.stream_chat_completion(
+                model=ANLYSIS_AGENT,
+                system_prompt=LLM_ANALYSIS_PROMPT,
+                context=context,
+                temperature=0.7,
+                max_tokens=500
+            ):
+                emitted = True
+                yield delta
+        except Exception as e:
+            self.logger.error(f"LLM analysis streaming failed: {str(e)}")
+            mark_degraded(degraded, "llm_analysis", failure_reason(e))
+            # 아직 아무것도 보내지 않았다면 통계 기반 요약 반환 (일부를 보냈다면 거기서 종료)
+            if not emitted:
+                emitted = True
+                yield self._local_analysis(context)
+        
+        if not emitted:
+            yield INSUFFICIENT_DATA_ANALYSIS_MESSAGE
 
-            # AnalysisData 객체로 반환
-            return AnalysisData(
-                hourlyStats=hourly_stats,  # 시간대별 통계 (HourlyStat 리스트)
-                keywordFrequency=keyword_frequency,  # 키워드 빈도 (KeywordFrequency 리스트)
-                llmAnalysis=llm_analysis  # LLM 분석 결과 (문자열)
+    def _local_analysis(self, context: Dict[str, Any]) -> str:
+        """LLM을 쓸 수 없을 때 분석 컨텍스트(_build_analysis_context)의 통계로 만드는 요약"""
+        sentences = []
+        total_views = context["total_views"]
+        if total_views > 0:
+            group = max(context["time_groups"], key=lambda item: item["total_views"])
+            share = group["total_views"] / total_views * 100
+            sentences.append(
+                f"전체 {total_views:,.0f}회 시청 중 {group['name']} 시간대 시청이 {share:.0f}%로 가장 많습니다."
             )
+        peak_hours = context["peak_hours"]
+        if peak_hours:
+            hours = ", ".join(f"{peak['hour']}시" for peak in peak_hours)
+            top_channels = peak_hours[0]["top_channels"]
+            if top_channels:
+                sentences.append(
+                    f"가장 많이 시청한 시간은 {hours}이고, "
+                    f"{peak_hours[0]['hour']}시에는 '{top_channels[0]['name']}' 채널을 가장 많이 봅니다."
+                )
+            else:
+                sentences.append(f"가장 많이 시청한 시간은 {hours}입니다.")
+        keywords = [kw["keyword"] for kw in context["top_keywords"] if kw["frequency"] > 0][:5]
+        if keywords:
+            sentences.append(f"자주 등장하는 키워드는 {', '.join(keywords)}입니다.")
+        if not sentences:
+            return INSUFFICIENT_DATA_ANALYSIS_MESSAGE
+        sentences.append(LOCAL_ANALYSIS_NOTICE)
+        return " ".join(sentences)
 
-        except Exception as e:
-            raise Exception(f"Data analysis failed: {str(e)}")
\ No newline at end of file
+    def _build_analysis_context(self, analysis_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """LLM 분석 요청 컨텍스트를 구성합니다. 분석할 데이터가 없으면 None"""
+        hourly_stats = analysis_results.get("hourly_stats", [])
+        keyword_frequency = analysis_results.get("keyword_frequency", [])
+        
+        if not hourly_stats and not keyword_frequency:
+            return None
+        
+        # 분석을 위한 데이터 정리
+        # 가장 시청이 많은 시간대 찾기
+        peak_hours = sorted(
+            [h for h in hourly_stats if h["totalViews"] > 0],
+            key=lambda x: x["totalViews"],
+            reverse=True
+        )[:3]  # 상위 3개 시간대
+        
+        # 키워드 빈도 정리 (상위 10개)
+        top_keywords = sorted(
+            keyword_frequency,
+            key=lambda x: x.frequency,
+            reverse=True
+        )[:10]
+        
+        # 시간대 그룹화 (아침, 오후, 저녁, 밤)
+        time_groups = {
+            "아침(06-11)": sum(h["totalViews"] for h in hourly_stats if 6 <= h["hour"] <= 11),
+            "오후(12-17)": sum(h["totalViews"] for h in hourly_stats if 12 <= h["hour"] <= 17),
+            "저녁(18-23)": sum(h["totalViews"] for h in hourly_stats if 18 <= h["hour"] <= 23),
+            "심야(00-05)": sum(h["totalViews"] for h in hourly_stats if 0 <= h["hour"] <= 5)
+        }
+        
+        # LLM에게 전달할 컨텍스트 구성
+        context = {
+            "peak_hours": [
+                {
+                    "hour": h["hour"],
+                    "totalViews": h["totalViews"],
+                    "top_channels": h["categories"][:3] if h["categories"] else []
+                } 
+                for h in peak_hours
+            ],
+            "top_keywords": [
+                {
+                    "keyword": kw.keyword,
+                    "frequency": kw.frequency
+                } 
+                for kw in top_keywords
+            ],
+            "time_groups": [
+                {
+                    "name": name,
+                    "total_views": views
+                }
+                for name, views in time_groups.items()
+            ],
+            "total_views": sum(h["totalViews"] for h in hourly_stats)
+        }
+        
+        return context
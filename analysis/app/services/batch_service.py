@@ -0,0 +1,162 @@
+# app/services/batch_service.py
+import asyncio
+import fnmatch
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, NamedTuple, Optional
+
+from .analysis_service import process_analysis_request
+from .offload import preprocess_history_file
+from .takeout import parse_subscriptions
+
+# 일괄 분석에서 동시에 처리하는 사용자 수 (환경 변수로 조정)
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "32"))
+
+# 사용자 디렉터리에서 찾는 파일 이름 (앞에 있는 패턴 우선)
+HISTORY_FILE_PATTERNS = (
+    "watch-history.json", "시청 기록.json", "*history*.json",
+    "watch-history.html", "시청 기록.html", "*history*.html"
+)
+SUBSCRIPTIONS_FILE_PATTERNS = (
+    "subscriptions.json", "구독정보.json", "*subscription*.json",
+    "subscriptions.csv", "구독정보.csv", "*subscription*.csv"
+)
+
+
+class BatchInput(NamedTuple):
+    """일괄 분석 대상 사용자 한 명"""
+    analysis_id: str
+    history_path: Optional[str]  # 없으면 오류 결과로 보고
+    subscriptions_path: Optional[str]  # 없으면 구독 정보 없이 분석
+
+
+def _find_file(names: Iterable[str], patterns: Iterable[str]) -> Optional[str]:
+    names = sorted(names)
+    for pattern in patterns:
+        for name in names:
+            if fnmatch.fnmatch(name.lower(), pattern):
+                return name
+    return None
+
+
+def discover_batch_inputs(directory: str) -> Iterator[BatchInput]:
+    """
+    디렉터리의 하위 디렉터리마다 사용자 한 명으로 보고 분석 대상을 찾습니다.
+
+    directory/
+        user-1/watch-history.json, subscriptions.json
+        user-2/...
+
+    Args:
+        directory: 사용자별 하위 디렉터리를 담은 디렉터리 (하위 디렉터리 이름이 analysis_id)
+
+    Yields:
+        BatchInput (analysis_id 순)
+    """
+    with os.scandir(directory) as entries:
+        user_dirs = sorted((entry for entry in entries if entry.is_dir()), key=lambda entry: entry.name)
+    for user_dir in user_dirs:
+        names = [name for name in os.listdir(user_dir.path) if os.path.isfile(os.path.join(user_dir.path, name))]
+        history_name = _find_file(names, HISTORY_FILE_PATTERNS)
+        subscriptions_name = _find_file(names, SUBSCRIPTIONS_FILE_PATTERNS)
+        yield BatchInput(
+            analysis_id=user_dir.name,
+            history_path=os.path.join(user_dir.path, history_name) if history_name else None,
+            subscriptions_path=os.path.join(user_dir.path, subscriptions_name) if subscriptions_name else None
+        )
+
+
+def _load_subscriptions(path: str) -> Any:
+    with open(path, "rb") as file:
+        return parse_subscriptions(file.read())
+
+
+async def analyze_batch_input(item: BatchInput, **options: Any) -> Dict[str, Any]:
+    """
+    사용자 한 명을 분석하고 결과 줄(dict)을 만듭니다. 실패해도 예외 대신 오류 결과를 반환합니다.
+
+    Args:
+        item: 분석 대상
+        options: process_analysis_request에 넘길 옵션 (keyword_mode, timezone, approximate, incremental)
+
+    Returns:
+        {"analysisId", "status": "success", "data": AnalysisData, "elapsed"} 또는
+        {"analysisId", "status": "error", "message", "elapsed"}
+    """
+    start = time.perf_counter()
+    try:
+        if item.history_path is None:
+            raise FileNotFoundError("시청 기록 파일을 찾을 수 없습니다.")
+        preprocessed_history = await preprocess_history_file(item.history_path, options.get("timezone"))
+        subscriptions_data = []
+        if item.subscriptions_path is not None:
+            subscriptions_data = await asyncio.to_thread(_load_subscriptions, item.subscriptions_path)
+
+        analysis_data = await process_analysis_request(
+            preprocessed_history,
+            subscriptions_data,
+            analysis_id=item.analysis_id,
+            **options
+        )
+        return {
+            "analysisId": item.analysis_id,
+            "status": "success",
+            "data": analysis_data.model_dump(exclude_none=True),
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
+
+    except json.JSONDecodeError:
+        message = "시청 기록 또는 구독 정보 파일의 JSON 형식이 올바르지 않습니다."
+    except Exception as e:
+        message = str(e)
+    return {
+        "analysisId": item.analysis_id,
+        "status": "error",
+        "message": message,
+        "elapsed": round(time.perf_counter() - start, 3)
+    }
+
+
+async def run_batch(
+    inputs: Iterable[BatchInput],
+    concurrency: int = BATCH_CONCURRENCY,
+    **options: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    여러 사용자를 동시에 분석하고 결과를 끝나는 순서대로 반환합니다.
+    동시에 분석하는 사용자는 concurrency명으로 제한되고, 모든 사용자가 같은 OpenAI 연결 풀과
+    호출 한도(OPENAI_MAX_CONCURRENCY, OPENAI_MAX_RPM), LLM 캐시, 작업 프로세스 풀을 공유합니다.
+
+    Args:
+        inputs: 분석 대상 (discover_batch_inputs 결과 등, 필요할 때마다 하나씩 꺼냄)
+        concurrency: 동시에 분석하는 사용자 수
+        options: analyze_batch_input 참고
+
+    Yields:
+        analyze_batch_input의 결과 줄
+    """
+    iterator = iter(inputs)
+    # 소비자가 느리면 워커도 기다리도록 결과 큐 크기를 제한
+    results: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency))
+    finished = object()
+
+    async def worker() -> None:
+        # analyze_batch_input은 실패를 결과 줄로 반환하므로 워커는 입력이 끝날 때까지 계속 실행됨
+        for item in iterator:
+            await results.put(await analyze_batch_input(item, **options))
+        await results.put(finished)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            result = await results.get()
+            if result is finished:
+                remaining -= 1
+                continue
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
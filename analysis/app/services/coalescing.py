@@ -0,0 +1,211 @@
+# app/services/coalescing.py
+"""
+같은 입력으로 동시에 들어온 분석 요청을 하나의 계산으로 합칩니다. (single-flight)
+
+프런트엔드 재시도나 중복 클릭으로 같은 업로드가 몇 초 안에 여러 번 들어오면, 업로드 파일 내용의 해시
+(파싱하면서 계산한 history_store.UploadDigest, 저장된 기록을 참조하면 그 해시)와 요청 옵션으로 만든 키가 같은 요청은
+먼저 시작된 분석(Flight)에 합류해 같은 결과를 받습니다.
+해시를 파싱하면서 계산하므로 업로드 파싱은 요청마다 하고, 이후의 집계와 LLM 호출을 합칩니다.
+계산은 요청과 별개의 태스크에서 실행되고 만든 값을 모두 보관하므로, 늦게 합류한 요청도
+처음부터 같은 값(스트리밍이면 같은 NDJSON 줄)을 받은 뒤 이후에 생성되는 값을 이어서 받습니다.
+
+    key = request_key("analysis-stream", upload_hash, analysis_id=analysis_id)
+    async for line in get_single_flight().follow(key, produce_lines, endpoint="analysis-stream"):
+        ...
+
+합류한 요청의 연결이 모두 끊겨도 COALESCING_GRACE초 동안은 계산을 계속해 그 사이에 들어온 재시도가 이어받고,
+그 뒤에는 계산을 취소합니다. 끝난 계산은 바로 목록에서 빠지므로 이후 요청은 새로 계산합니다.
+(같은 입력의 LLM 응답은 LLM 응답 캐시가 재사용)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .. import metrics
+
+# 요청 합치기 설정 (환경 변수로 조정)
+COALESCING_ENABLED = os.environ.get("ANALYSIS_COALESCING", "1") not in ("0", "false", "False")
+COALESCING_GRACE = float(os.environ.get("ANALYSIS_COALESCING_GRACE", "10"))  # 요청이 모두 끊긴 뒤 계산을 유지하는 시간(초)
+
+
+def request_key(endpoint: str, upload_hash: str, **options: Any) -> str:
+    """
+    업로드 해시와 요청 옵션으로 요청 합치기 키를 만듭니다.
+
+    Args:
+        endpoint: 엔드포인트 이름 (응답 형식이 다른 엔드포인트끼리는 합치지 않음)
+        upload_hash: 업로드 파일 내용의 해시 (preprocess_uploads의 upload_hash)
+        options: 결과에 영향을 주는 요청 옵션 (analysis_id, keyword_mode, timezone 등)
+
+    Returns:
+        str: SHA-256 16진수 문자열
+    """
+    serialized = json.dumps([endpoint, upload_hash, options], sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """
+    진행 중인 계산 하나.
+    계산이 만든 값을 모두 보관하므로, 늦게 합류한 요청도 처음부터 같은 값을 받을 수 있습니다.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.items: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.abandon_handle: Optional[asyncio.TimerHandle] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, item: Any) -> None:
+        self.items.append(item)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self.done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        # 기다리던 구독자를 모두 깨우고 다음 변경을 위한 새 이벤트로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        """다음 값이 추가되거나 계산이 끝날 때까지 기다립니다."""
+        await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    키가 같은 계산을 하나만 실행하고, 같은 키로 들어온 요청은 실행 중인 계산의 결과를 함께 받습니다.
+
+    Example:
+        history, subscriptions, upload_hash = await preprocess_uploads(history_file, subscriptions_file)
+
+        async def work():
+            yield await process_analysis_request(history, subscriptions, ...)
+
+        async for result in get_single_flight().follow(key, work, endpoint="analysis"):
+            ...
+    """
+
+    def __init__(self, grace: float = COALESCING_GRACE):
+        self.logger = logging.getLogger(__name__)
+        self.loop = asyncio.get_running_loop()
+        self.grace = max(0.0, grace)
+        self._flights: Dict[str, Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def follow(
+        self,
+        key: str,
+        work: Callable[[], AsyncIterator[Any]],
+        endpoint: str
+    ) -> AsyncIterator[Any]:
+        """
+        key의 계산이 실행 중이면 합류하고, 없으면 work로 새 계산을 시작합니다.
+        계산이 만든 값을 처음부터 전달한 뒤 계산이 끝날 때까지 새 값을 기다려 전달하고,
+        계산이 예외로 끝나면 같은 예외를 발생시킵니다.
+
+        Args:
+            key: 요청 합치기 키 (request_key)
+            work: 값을 만드는 비동기 제너레이터 함수 (새 계산을 시작할 때만 호출)
+            endpoint: 메트릭 레이블 (analysis_coalesced_requests_total)
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(key)
+            self._flights[key] = flight
+            flight.task = self.loop.create_task(self._run(flight, work))
+        else:
+            metrics.COALESCED_REQUESTS.inc(endpoint=endpoint)
+            self.logger.info(f"진행 중인 분석에 합류 ({endpoint}, 요청 {flight.subscribers + 1}개)")
+
+        self._attach(flight)
+        try:
+            index = 0
+            while True:
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wait()
+        finally:
+            self._detach(flight)
+
+    async def _run(self, flight: Flight, work: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for item in work():
+                flight.publish(item)
+            flight.finish()
+        except asyncio.CancelledError:
+            flight.finish(Exception("분석이 취소되었습니다."))
+            raise
+        except Exception as e:
+            flight.finish(e)
+        finally:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def _attach(self, flight: Flight) -> None:
+        flight.subscribers += 1
+        if flight.abandon_handle is not None:
+            flight.abandon_handle.cancel()
+            flight.abandon_handle = None
+
+    def _detach(self, flight: Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and not flight.done:
+            # 재시도가 이어받을 수 있도록 잠시 기다린 뒤 취소
+            flight.abandon_handle = self.loop.call_later(self.grace, self._abandon, flight)
+
+    def _abandon(self, flight: Flight) -> None:
+        """받을 요청이 없는 계산을 취소합니다. (LLM 호출도 함께 취소됨)"""
+        flight.abandon_handle = None
+        if flight.subscribers > 0 or flight.done:
+            return
+        self.logger.info("연결된 요청이 없어 진행 중인 분석을 취소합니다.")
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        flight.task.cancel()
+
+    async def close(self) -> None:
+        """실행 중인 계산을 모두 취소합니다. (애플리케이션 종료 시 호출)"""
+        tasks = [flight.task for flight in self._flights.values() if flight.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._flights = {}
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """현재 이벤트 루프에서 공유하는 SingleFlight를 반환합니다. 없으면 새로 만듭니다."""
+    global _single_flight
+    loop = asyncio.get_running_loop()
+    if _single_flight is None or _single_flight.loop is not loop:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+async def close_single_flight() -> None:
+    """SingleFlight를 정리합니다. (애플리케이션 종료 시 호출)"""
+    global _single_flight
+    if _single_flight is not None:
+        single_flight, _single_flight = _single_flight, None
+        await single_flight.close()
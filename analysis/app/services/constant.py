@@ -47,6 +47,46 @@ LLM_ANALYSIS_PROMPT = """
 KEYWORD_EXTRACTER_MODEL = "gpt-4o-2024-11-20"
 ANLYSIS_AGENT = "gpt-3.5-turbo-0125"
 
+# 키워드 추출 방식
+KEYWORD_MODE_LLM = "llm"  # KEYWORD_EXTRACTER_MODEL로 추출 (기본값)
+KEYWORD_MODE_LOCAL = "local"  # 네트워크 없이 로컬 빈도 분석으로 추출
+KEYWORD_MODES = (KEYWORD_MODE_LLM, KEYWORD_MODE_LOCAL)
+
+# 시간 집계
+DEFAULT_TIMEZONE = "UTC"  # 시간대별 통계의 기본 시간대 (IANA 이름)
+HOURLY_TOP_CHANNELS = 3  # 시간대별 통계에 포함하는 채널 수
+TIME_STATS_TOP_CHANNELS = 20  # 채널별 통계에 포함하는 채널 수
+
+# 로컬 키워드 엔진의 흔한 용어 가중치 표 (손으로 정한 값, 실제 코퍼스에서 센 값이 아님)
+# 어느 시청 기록에나 자주 나오는 상투어/채널명/구어 표현을 완전히 버리지는 않고 순위만 낮추는 약한 불용어 목록입니다.
+# 값은 KEYWORD_COMMON_TERM_SCALE 기준의 흔한 정도로, 클수록 가중치 log((SCALE + 1) / (값 + 1))가 낮아집니다.
+# (값 2600이면 약 1.35배, 150이면 약 4.2배 낮음. 표에 없는 용어의 가중치는 log(SCALE + 1) ≈ 9.2)
+KEYWORD_COMMON_TERM_SCALE = 10000
+KEYWORD_COMMON_TERMS = {
+    "shorts": 2600, "short": 900, "youtube": 700, "official": 650, "mv": 600, "video": 550,
+    "live": 520, "ep": 480, "full": 420, "music": 400, "edit": 350, "highlights": 300,
+    "highlight": 300, "vlog": 300, "eng": 280, "sub": 260, "kor": 240, "feat": 220,
+    "new": 200, "best": 200, "top": 180, "pov": 150, "trailer": 150, "reaction": 140,
+    "tv": 400, "news": 350, "kbs": 300, "mbc": 300, "sbs": 280, "jtbc": 200, "tvn": 180,
+    "뉴스": 900, "방송": 700, "영상": 650, "오늘": 600, "공식": 450, "하이라이트": 450,
+    "풀버전": 200, "예고": 250, "티저": 150, "브이로그": 300, "리뷰": 350, "라이브": 300,
+    "편집": 150, "최초": 200, "공개": 400, "모음": 300, "레전드": 300, "역대급": 250,
+    "진짜": 500, "정말": 350, "완전": 250, "너무": 450, "무조건": 150, "이유": 400,
+    "방법": 350, "사람": 400, "사람들": 300, "이렇게": 250, "이런": 300, "그냥": 200,
+    "우리": 300, "처음": 300, "다시": 250, "지금": 350, "결국": 200, "드디어": 250,
+    "ㅋㅋ": 500, "ㅋㅋㅋ": 450, "ㅋㅋㅋㅋ": 300, "ㄷㄷ": 150, "ㅎㅎ": 150,
+    "1부": 150, "2부": 150, "1화": 200, "2화": 180, "시즌": 200, "회차": 100,
+}
+
+# 로컬 키워드 엔진이 버리는 불용어 (조사를 뗀 뒤 비교)
+KEYWORD_STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are", "at", "by",
+    "from", "this", "that", "my", "your", "you", "i", "we", "it", "be", "vs", "ft",
+    "시청했습니다", "광고", "본", "홈페이지에서", "있는", "없는", "하는", "했다", "한다", "합니다",
+    "했습니다", "됩니다", "있다", "없다", "있었습니다", "것", "거", "수", "더", "또", "및", "등",
+    "그", "저", "이", "내", "왜", "뭐", "어떻게", "보세요", "보는", "봤다", "대한", "위한",
+}
+
 # 테스트 데이터 관련 상수
 TEST_HOURLY_STATS = [
     {'hour': 0, 'totalViews': 7, 'categories': [
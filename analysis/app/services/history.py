@@ -0,0 +1,114 @@
+# app/services/history.py
+from array import array
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+
+class WatchHistory:
+    """
+    전처리된 시청 기록을 열(column) 단위로 저장하는 컨테이너.
+    항목마다 dict와 datetime을 만드는 대신 정수 배열과 공유 조회 테이블을 사용합니다.
+
+    Columns:
+        times: 시청 시각 (UTC epoch 밀리초, int64 배열)
+        channel_ids: `channels` 테이블의 인덱스 (int32 배열)
+        title_ids: `titles` 테이블의 인덱스 (int32 배열)
+
+    Tables:
+        channels: 채널명 목록 (처음 등장한 순서, 중복 없음)
+        titles: 동영상 제목 목록 (처음 등장한 순서, 중복 없음)
+    """
+
+    __slots__ = ("times", "channel_ids", "title_ids", "channels", "titles", "_channel_index", "_title_index")
+
+    def __init__(self):
+        self.times = array("q")
+        self.channel_ids = array("i")
+        self.title_ids = array("i")
+        self.channels: List[str] = []
+        self.titles: List[str] = []
+        self._channel_index: Dict[str, int] = {}
+        self._title_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, time_ms: int, channel: str, title: str) -> None:
+        """항목 하나를 추가합니다. 채널명과 제목은 조회 테이블에 한 번만 저장됩니다."""
+        self.times.append(time_ms)
+        self.channel_ids.append(self._intern(channel, self.channels, self._channel_index))
+        self.title_ids.append(self._intern(title, self.titles, self._title_index))
+
+    @staticmethod
+    def _intern(value: str, table: List[str], index: Dict[str, int]) -> int:
+        value_id = index.get(value)
+        if value_id is None:
+            value_id = len(table)
+            index[value] = value_id
+            table.append(value)
+        return value_id
+
+    def since(self, time_ms: int) -> "WatchHistory":
+        """시청 시각이 time_ms보다 늦은 항목만 담은 새 WatchHistory (항목 순서 유지)"""
+        delta = WatchHistory()
+        channels = self.channels
+        titles = self.titles
+        for entry_time, channel_id, title_id in zip(self.times, self.channel_ids, self.title_ids):
+            if entry_time > time_ms:
+                delta.append(entry_time, channels[channel_id], titles[title_id])
+        return delta
+
+    def to_compact(self, include_titles: bool = True) -> Tuple[Any, ...]:
+        """
+        프로세스 간 전달용 압축 형식. 숫자 열은 배열 메모리를 그대로 복사한 bytes, 조회 테이블은 문자열 리스트입니다.
+        항목마다 객체를 직렬화하지 않으므로 pickle 크기와 비용이 항목 수가 아니라 바이트 수에 비례합니다.
+
+        Args:
+            include_titles: False면 제목 열과 테이블을 생략 (시간/채널 집계처럼 제목이 필요 없는 작업용)
+        """
+        if not include_titles:
+            return self.times.tobytes(), self.channel_ids.tobytes(), b"", self.channels, []
+        return self.times.tobytes(), self.channel_ids.tobytes(), self.title_ids.tobytes(), self.channels, self.titles
+
+    @classmethod
+    def from_compact(cls, compact: Tuple[Any, ...]) -> "WatchHistory":
+        """to_compact() 결과에서 WatchHistory를 복원합니다."""
+        times, channel_ids, title_ids, channels, titles = compact
+        history = cls()
+        history.times.frombytes(times)
+        history.channel_ids.frombytes(channel_ids)
+        history.title_ids.frombytes(title_ids)
+        history.channels = channels
+        history.titles = titles
+        history._channel_index = {channel: index for index, channel in enumerate(channels)}
+        history._title_index = {title: index for index, title in enumerate(titles)}
+        return history
+
+    @classmethod
+    def from_columns(
+        cls,
+        times: Sequence[int],
+        channel_ids: Sequence[int],
+        title_ids: Sequence[int],
+        channels: List[str],
+        titles: List[str]
+    ) -> "WatchHistory":
+        """
+        이미 만들어진 열로 읽기 전용 WatchHistory를 만듭니다. 열은 복사하지 않습니다.
+        숫자 열은 array 대신 memoryview(예: 메모리 매핑한 파일, 형식 "q"/"i")여도 되며, 이 경우 append는 사용할 수 없습니다.
+        """
+        history = cls()
+        history.times = times
+        history.channel_ids = channel_ids
+        history.title_ids = title_ids
+        history.channels = channels
+        history.titles = titles
+        history._channel_index = {}
+        history._title_index = {}
+        return history
+
+    def __iter__(self) -> Iterator[Tuple[int, str, str]]:
+        """(시청 시각 epoch ms, 채널명, 제목) 튜플을 항목 순서대로 반환합니다."""
+        channels = self.channels
+        titles = self.titles
+        for time_ms, channel_id, title_id in zip(self.times, self.channel_ids, self.title_ids):
+            yield time_ms, channels[channel_id], titles[title_id]
@@ -0,0 +1,292 @@
+# app/services/history_store.py
+"""
+전처리한 시청 기록 저장소.
+
+HISTORY_STORE_PATH를 설정한 경우에만 사용합니다. (기본값은 꺼짐)
+업로드를 파싱/전처리한 결과(WatchHistory와 구독 정보)를 업로드 파일 내용의 SHA-256 해시를 키로 디스크에 저장합니다.
+해시는 파싱이 업로드를 읽는 동안 함께 계산합니다. (UploadDigest)
+응답 헤더로 받은 해시(history_hash)로 참조하면(시간대나 옵션만 바꿔 다시 분석) 파일을 다시 올리거나 파싱하지 않고
+저장된 파일을 메모리 매핑해 바로 분석합니다. 같은 파일을 다시 올리면 다시 파싱합니다.
+
+HTML 시청 기록의 시각을 요청의 timezone으로 해석한 경우(TakeoutTimes.depends_on_timezone)에는 결과가 시간대마다
+다르므로 업로드 해시와 시간대를 함께 해시한 키(timezone_key)로 저장합니다. load는 업로드 해시, 그 시간대의 키 순으로 찾습니다.
+
+파일 하나에 기록 하나를 열 단위 바이너리로 저장합니다.
+    헤더 | times (int64 × n) | channel_ids (int32 × n) | title_ids (int32 × n) | channels JSON | titles JSON | 구독 정보 JSON
+숫자 열은 복사하지 않고 메모리 매핑한 파일을 그대로 WatchHistory의 열로 쓰므로, 여러 워커 프로세스가 같은 기록을
+읽어도 OS 페이지 캐시 하나를 공유합니다. 문자열 조회 테이블과 구독 정보만 읽을 때 역직렬화합니다.
+
+저장소 전체 크기가 HISTORY_STORE_MAX_BYTES를 넘으면 가장 오래 사용하지 않은 파일부터 지웁니다.
+(읽을 때마다 파일 수정 시각을 갱신해 사용 시각으로 씀. 여러 워커가 같은 디렉터리를 함께 사용)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+from typing import Any, BinaryIO, Optional, Tuple
+
+from .history import WatchHistory
+from .. import metrics
+
+# 시청 기록 저장소 설정 (환경 변수로 조정)
+HISTORY_STORE_PATH = os.environ.get("HISTORY_STORE_PATH", "")  # 저장소 디렉터리 (기본값은 비어 있어 저장하지 않음)
+HISTORY_STORE_MAX_BYTES = int(os.environ.get("HISTORY_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))  # 저장소 전체 최대 크기
+
+# 파싱이 끝까지 읽지 않은 업로드를 해시할 때 한 번에 읽는 크기
+_HASH_CHUNK_SIZE = 1024 * 1024
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# 파일 형식 (형식이 바뀌면 _VERSION을 올려 이전 파일을 무시)
+# 이 서버가 쓴 파일만 읽으므로 숫자 열은 기계의 바이트 순서 그대로 저장
+_MAGIC = b"AVWH"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQQQQ")  # magic, 버전, 항목 수, channels/titles/구독 정보 JSON 바이트 수
+_SUFFIX = ".hist"
+
+
+class StoredHistoryNotFound(Exception):
+    """history_hash로 참조한 시청 기록이 저장소에 없을 때 (지워졌거나 다른 서버에 올린 업로드)"""
+
+
+def is_upload_hash(value: str) -> bool:
+    """업로드 해시 형식(SHA-256 16진수 64자)인지 여부"""
+    return bool(_HASH_PATTERN.match(value))
+
+
+def timezone_key(upload_hash: str, timezone: str) -> str:
+    """시간대에 따라 전처리 결과가 달라지는 업로드의 저장소 키 (업로드 해시와 같은 형식)"""
+    return hashlib.sha256(f"{upload_hash}\0{timezone}".encode("utf-8")).hexdigest()
+
+
+class UploadDigest:
+    """
+    업로드 파일 내용의 SHA-256 해시 (시청 기록 저장소 키, 요청 합치기 키).
+    파싱이 업로드를 읽는 동안 HashingUpload/HashingFile이 읽은 바이트를 더하므로 해시하려고 업로드를 한 번 더 읽지 않습니다.
+    파일을 다 읽을 때마다 end_file(), 올리지 않은 파일은 skip_file()을 호출합니다. (순서가 다르면 다른 해시)
+    """
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self._size = 0
+
+    def update(self, chunk: bytes) -> None:
+        self._digest.update(chunk)
+        self._size += len(chunk)
+
+    def read_rest(self, file: BinaryIO) -> None:
+        """파싱이 끝까지 읽지 않은 파일의 나머지를 읽어 더합니다. (동기 함수, 스레드에서 호출)"""
+        while True:
+            chunk = file.read(_HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            self.update(chunk)
+
+    def end_file(self) -> None:
+        # 파일 경계 표시 (앞 파일의 끝이 뒤 파일로 옮겨가도 같은 해시가 되지 않도록)
+        self._digest.update(b"\x01" + self._size.to_bytes(8, "big"))
+        self._size = 0
+
+    def skip_file(self) -> None:
+        self._digest.update(b"\x00")
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+class HashingUpload:
+    """읽은 내용을 UploadDigest에 더하는 업로드 파일(UploadFile) 래퍼 (처음부터 순서대로 읽는 파싱용)"""
+
+    def __init__(self, upload: Any, digest: UploadDigest):
+        self.upload = upload
+        self.digest = digest
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = await self.upload.read(size)
+        self.digest.update(chunk)
+        return chunk
+
+
+class HashingFile:
+    """읽은 내용을 UploadDigest에 더하는 파일 래퍼 (tarfile 스트리밍 모드처럼 처음부터 순서대로 읽는 동기 코드용)"""
+
+    def __init__(self, file: BinaryIO, digest: UploadDigest):
+        self.file = file
+        self.digest = digest
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.file.read(size)
+        self.digest.update(chunk)
+        return chunk
+
+
+class HistoryStore:
+    """
+    업로드 해시 -> (전처리된 시청 기록, 구독 정보) 파일 저장소.
+    디렉터리를 만들 수 없으면 비활성화되어 load()는 항상 None, save()는 아무것도 하지 않습니다.
+
+    Example:
+        stored = await store.load(upload_hash)
+        if stored is None:
+            history, subscriptions = await parse(...)
+            await store.save(upload_hash, history, subscriptions)
+    """
+
+    def __init__(self, directory: str = HISTORY_STORE_PATH, max_bytes: int = HISTORY_STORE_MAX_BYTES):
+        self.logger = logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self.directory: Optional[str] = None
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self.directory = directory
+            except OSError as e:
+                self.logger.error(f"시청 기록 저장소 디렉터리 생성 실패, 저장소 비활성화: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def _path(self, key: str) -> str:
+        if not is_upload_hash(key):
+            raise ValueError(f"invalid upload hash: {key!r}")
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    async def load(self, key: str, timezone: Optional[str] = None) -> Optional[Tuple[WatchHistory, Any]]:
+        """
+        저장된 (시청 기록, 구독 정보)를 반환합니다. 없거나 읽을 수 없으면 None
+        timezone이 주어지면 시간대와 무관하게 저장된 기록이 없을 때 그 시간대로 해석해 저장된 기록(timezone_key)을 찾습니다.
+        """
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        stored = await asyncio.to_thread(self._load, key)
+        if stored is None and timezone is not None:
+            stored = await asyncio.to_thread(self._load, timezone_key(key, timezone))
+        metrics.observe_stage("load_history", time.perf_counter() - start)
+        metrics.HISTORY_STORE_LOOKUPS.inc(result="hit" if stored is not None else "miss")
+        return stored
+
+    async def save(self, key: str, history: WatchHistory, subscriptions: Any, timezone: Optional[str] = None) -> None:
+        """
+        전처리 결과를 저장하고, 저장소가 HISTORY_STORE_MAX_BYTES를 넘으면 오래 사용하지 않은 파일을 지웁니다.
+        결과가 요청의 시간대에 따라 달라지면 timezone을 넘겨 그 시간대의 키(timezone_key)로 저장합니다.
+        """
+        if not self.enabled:
+            return
+        if timezone is not None:
+            key = timezone_key(key, timezone)
+        await asyncio.to_thread(self._save, key, history, subscriptions)
+
+    def _load(self, key: str) -> Optional[Tuple[WatchHistory, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.error(f"저장된 시청 기록 열기 실패: {e}")
+            return None
+        try:
+            magic, version, count, channels_size, titles_size, subscriptions_size = _HEADER.unpack_from(mapped)
+            if magic != _MAGIC or version != _VERSION:
+                return None
+            times_end = _HEADER.size + count * 8
+            channel_ids_end = times_end + count * 4
+            title_ids_end = channel_ids_end + count * 4
+            channels_end = title_ids_end + channels_size
+            titles_end = channels_end + titles_size
+            if titles_end + subscriptions_size != len(mapped):
+                raise ValueError("file size does not match its header")
+            view = memoryview(mapped)
+            history = WatchHistory.from_columns(
+                view[_HEADER.size:times_end].cast("q"),
+                view[times_end:channel_ids_end].cast("i"),
+                view[channel_ids_end:title_ids_end].cast("i"),
+                json.loads(mapped[title_ids_end:channels_end]),
+                json.loads(mapped[channels_end:titles_end])
+            )
+            subscriptions = json.loads(mapped[titles_end:])
+        except (struct.error, ValueError, TypeError) as e:
+            self.logger.error(f"저장된 시청 기록 복원 실패, 다시 파싱: {e}")
+            return None
+        # 가장 오래 사용하지 않은 파일부터 지우도록 사용 시각 갱신
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return history, subscriptions
+
+    def _save(self, key: str, history: WatchHistory, subscriptions: Any) -> None:
+        path = self._path(key)
+        channels = json.dumps(history.channels, ensure_ascii=False).encode("utf-8")
+        titles = json.dumps(history.titles, ensure_ascii=False).encode("utf-8")
+        subscriptions_json = json.dumps(subscriptions, ensure_ascii=False, default=str).encode("utf-8")
+        try:
+            # 다른 워커가 읽는 중에도 완성된 파일만 보이도록 임시 파일에 쓴 뒤 교체
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(_HEADER.pack(
+                        _MAGIC, _VERSION, len(history), len(channels), len(titles), len(subscriptions_json)
+                    ))
+                    file.write(history.times.tobytes())
+                    file.write(history.channel_ids.tobytes())
+                    file.write(history.title_ids.tobytes())
+                    file.write(channels)
+                    file.write(titles)
+                    file.write(subscriptions_json)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self._evict(keep=path)
+        except OSError as e:
+            self.logger.error(f"시청 기록 저장 실패: {e}")
+
+    def _evict(self, keep: str) -> None:
+        """저장소 크기가 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 파일을 지웁니다. (keep은 제외)"""
+        files = []
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # 매핑해서 읽는 중인 파일도 지울 수 있음 (이미 연 매핑은 그대로 유효)
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            metrics.HISTORY_STORE_EVICTIONS.inc()
+
+
+_store: Optional[HistoryStore] = None
+
+
+def get_history_store() -> HistoryStore:
+    """프로세스 전체에서 공유하는 시청 기록 저장소"""
+    global _store
+    if _store is None:
+        _store = HistoryStore(HISTORY_STORE_PATH, HISTORY_STORE_MAX_BYTES)
+    return _store
@@ -0,0 +1,274 @@
+# app/services/jobs.py
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .. import metrics
+
+# 작업 모드 설정 (환경 변수로 조정)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))  # 동시에 실행하는 분석 작업 수
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "16"))  # 대기할 수 있는 작업 수 (넘으면 429)
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "600"))  # 끝난 작업의 결과를 보관하는 시간(초)
+JOB_RETRY_AFTER = float(os.environ.get("JOB_RETRY_AFTER", "30"))  # 완료된 작업이 없을 때 가정하는 작업 하나의 소요 시간(초)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# 작업 소요 시간 이동 평균의 가중치 (Retry-After 추정용)
+_DURATION_SMOOTHING = 0.2
+
+
+class JobQueueFull(Exception):
+    """대기열이 가득 차서 작업을 받을 수 없을 때 발생. retry_after는 다시 시도할 때까지 권장 대기 시간(초)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    분석 작업 하나.
+    실행 중 발생한 이벤트(analysis-stream과 같은 형식의 dict)를 모두 보관하므로,
+    늦게 연결한 클라이언트도 처음부터 결과를 받을 수 있습니다.
+    """
+
+    def __init__(self, job_id: str, analysis_id: str):
+        self.id = job_id
+        self.analysis_id = analysis_id
+        self.status = JOB_QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.upload_hash: Optional[str] = None  # 작업이 파싱한 업로드의 해시 (파싱 뒤 설정)
+        # 실행할 작업 (업로드된 데이터를 잡고 있으므로 실행이 끝나면 해제)
+        self.work: Optional[Callable[[], AsyncIterator[Dict[str, Any]]]] = None
+        # 작업이 끝나면(실행되지 못하고 취소되어도) 호출 (임시 파일 삭제 등)
+        self.cleanup: Optional[Callable[[], None]] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    @property
+    def results(self) -> Dict[str, Any]:
+        """단계 이름(function) -> 결과 데이터 (중간 결과와 완료/오류 이벤트 제외)"""
+        return {
+            event["function"]: event["data"]
+            for event in self.events
+            if "data" in event and event["function"] != "llm_analysis_delta"
+        }
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        if event.get("function") == "error":
+            self.error = event.get("message")
+        self._notify()
+
+    def finish(self) -> None:
+        self.status = JOB_FAILED if self.error is not None else JOB_SUCCEEDED
+        self.finished_at = time.time()
+        self.work = None
+        if self.cleanup is not None:
+            cleanup, self.cleanup = self.cleanup, None
+            cleanup()
+        self._notify()
+
+    def fail(self, message: str) -> None:
+        self.publish({"function": "error", "status": "error", "message": message})
+        self.finish()
+
+    def _notify(self) -> None:
+        # 기다리던 follow()를 모두 깨우고 다음 변경을 위한 새 이벤트로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """지금까지의 이벤트를 처음부터 전달한 뒤, 작업이 끝날 때까지 새 이벤트를 기다려 전달합니다."""
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await self._changed.wait()
+
+
+class JobManager:
+    """
+    고정 크기 워커 풀과 크기가 제한된 대기열로 분석 작업을 실행합니다.
+    동시에 실행되는 분석 수는 workers, 보관 중인 업로드 수는 workers + queue_size로 제한되고
+    대기열이 가득 차면 JobQueueFull을 발생시킵니다.
+
+    Example:
+        job = manager.reserve(analysis_id)      # 업로드를 읽기 전에 자리 확보 (가득 차면 JobQueueFull)
+        upload = await spool_upload(history_file)
+        manager.submit(job, lambda: parse_and_analyze(upload), cleanup=upload.close)
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        queue_size: int = JOB_QUEUE_SIZE,
+        result_ttl: float = JOB_RESULT_TTL
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.loop = asyncio.get_running_loop()
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queued = 0  # 자리를 확보했지만 아직 실행되지 않은 작업 수 (업로드를 옮기는 중 포함)
+        self._average_duration = JOB_RETRY_AFTER
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JOB_RUNNING)
+
+    def retry_after(self) -> int:
+        """대기열에 자리가 날 때까지의 예상 시간(초). 워커 하나가 작업을 끝낼 때마다 한 자리가 빔"""
+        return max(1, math.ceil(self._average_duration / self.workers))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """대기 중인 작업의 순서 (0이면 다음 차례). 대기 중이 아니면 None"""
+        if job.status != JOB_QUEUED:
+            return None
+        position = 0
+        for other in self._jobs.values():
+            if other is job:
+                return position
+            if other.status == JOB_QUEUED:
+                position += 1
+        return None
+
+    def reserve(self, analysis_id: str) -> Job:
+        """
+        대기열에 자리를 확보하고 작업을 만듭니다. 업로드를 읽기 전에 호출해 과부하 시 바로 거절합니다.
+
+        Raises:
+            JobQueueFull: 대기열이 가득 찬 경우
+        """
+        self._prune()
+        if self._queued >= self.queue_size:
+            raise JobQueueFull(self.retry_after())
+        job = Job(uuid.uuid4().hex, analysis_id)
+        self._jobs[job.id] = job
+        self._queued += 1
+        return job
+
+    def submit(
+        self,
+        job: Job,
+        work: Callable[[], AsyncIterator[Dict[str, Any]]],
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        reserve()로 만든 작업을 대기열에 넣습니다. work는 분석 이벤트를 만드는 비동기 제너레이터 함수입니다.
+        cleanup은 작업이 끝나거나 실행되지 못하고 취소될 때 한 번 호출됩니다.
+        """
+        self._start_workers()
+        job.work = work
+        job.cleanup = cleanup
+        self._queue.put_nowait(job)
+
+    def discard(self, job: Job) -> None:
+        """제출하지 않은 작업을 취소하고 자리를 반환합니다. (업로드 복사 실패 등)"""
+        if self._jobs.pop(job.id, None) is not None and job.status == JOB_QUEUED:
+            self._queued -= 1
+
+    def _start_workers(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._queued -= 1
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            async for event in job.work():
+                job.publish(event)
+            job.finish()
+        except asyncio.CancelledError:
+            job.fail("서버 종료로 작업이 취소되었습니다.")
+            raise
+        except Exception as e:
+            self.logger.error(f"분석 작업 실패 ({job.id}): {e}")
+            job.fail(str(e))
+        duration = job.finished_at - job.started_at
+        self._average_duration += _DURATION_SMOOTHING * (duration - self._average_duration)
+
+    def _prune(self) -> None:
+        """보관 시간이 지난 끝난 작업을 삭제합니다."""
+        expired_before = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job.finished_at < expired_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def close(self) -> None:
+        """워커를 멈추고 대기 중인 작업을 실패 처리합니다. (애플리케이션 종료 시 호출)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._jobs.values():
+            if not job.done:
+                job.fail("서버 종료로 작업이 취소되었습니다.")
+        self._queued = 0
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """현재 이벤트 루프에서 공유하는 작업 관리자를 반환합니다. 없으면 새로 만듭니다."""
+    global _manager
+    loop = asyncio.get_running_loop()
+    if _manager is None or _manager.loop is not loop:
+        _manager = JobManager()
+    return _manager
+
+
+async def close_job_manager() -> None:
+    """작업 관리자를 정리합니다. (애플리케이션 종료 시 호출)"""
+    global _manager
+    if _manager is not None:
+        manager, _manager = _manager, None
+        await manager.close()
+
+
+def _collect_jobs() -> Dict[Tuple[str, ...], float]:
+    """analysis_jobs: 대기 중(업로드를 옮기는 중 포함)/실행 중인 작업 수를 수집 시점에 읽음"""
+    if _manager is None:
+        return {(JOB_QUEUED,): 0, (JOB_RUNNING,): 0}
+    return {(JOB_QUEUED,): _manager.queue_depth, (JOB_RUNNING,): _manager.running}
+
+
+metrics.JOBS.set_function(_collect_jobs)
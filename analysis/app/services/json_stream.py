@@ -0,0 +1,155 @@
+# app/services/json_stream.py
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, List
+
+# 업로드 파일을 읽어 들이는 청크 크기 (1 MiB)
+CHUNK_SIZE = 1024 * 1024
+
+# 항목 하나가 이 크기를 넘으면 형식 오류로 간주 (시청 기록 항목은 보통 1KB 미만)
+MAX_VALUE_SIZE = 8 * 1024 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = frozenset(",] \t\n\r")
+
+_EXPECT_OPEN = 0
+_EXPECT_VALUE_OR_CLOSE = 1
+_EXPECT_VALUE = 2
+_EXPECT_SEPARATOR = 3
+_DONE = 4
+
+
+class JsonArrayParser:
+    """
+    최상위가 배열인 JSON 문서를 청크 단위로 받아 항목을 하나씩 돌려주는 증분 파서.
+    전체 JSON 트리를 만들지 않으므로 메모리 사용량은 가장 큰 항목 하나 크기에 비례합니다.
+
+    Example:
+        parser = JsonArrayParser()
+        for chunk in chunks:
+            for entry in parser.feed(chunk):
+                ...
+        for entry in parser.close():
+            ...
+    """
+
+    def __init__(self, max_value_size: int = MAX_VALUE_SIZE):
+        self._decoder = json.JSONDecoder()
+        # utf-8-sig: BOM이 있으면 제거, 청크 경계에서 잘린 멀티바이트 문자도 처리
+        self._text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _EXPECT_OPEN
+        self._max_value_size = max_value_size
+        self._retry_size = 0  # 미완성 항목을 다시 디코딩해 볼 버퍼 크기
+
+    def feed(self, data: bytes) -> List[Any]:
+        """바이트 청크를 추가하고, 새로 완성된 배열 항목들을 반환합니다."""
+        self._append(self._text_decoder.decode(data))
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        """입력의 끝을 알리고 남은 항목을 반환합니다. 배열이 닫히지 않았으면 JSONDecodeError를 발생시킵니다."""
+        self._append(self._text_decoder.decode(b"", final=True))
+        items = self._drain(final=True)
+        if self._state != _DONE:
+            raise self._error("Unexpected end of JSON array")
+        return items
+
+    def _append(self, text: str) -> None:
+        # 이미 소비한 앞부분을 버려 버퍼가 계속 커지지 않도록 함
+        if self._pos:
+            self._retry_size = max(0, self._retry_size - self._pos)
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self._buffer += text
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _drain(self, final: bool) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        end = len(buffer)
+
+        while self._state != _DONE:
+            self._pos = _WHITESPACE.match(buffer, self._pos).end()
+            if self._pos >= end:
+                break
+
+            char = buffer[self._pos]
+
+            if self._state == _EXPECT_OPEN:
+                if char != "[":
+                    raise self._error("Expecting '[' at the start of the history file")
+                self._pos += 1
+                self._state = _EXPECT_VALUE_OR_CLOSE
+
+            elif self._state == _EXPECT_SEPARATOR:
+                if char == ",":
+                    self._pos += 1
+                    self._state = _EXPECT_VALUE
+                elif char == "]":
+                    self._pos += 1
+                    self._state = _DONE
+                else:
+                    raise self._error("Expecting ',' delimiter")
+
+            elif self._state == _EXPECT_VALUE_OR_CLOSE and char == "]":
+                self._pos += 1
+                self._state = _DONE
+
+            else:
+                # 버퍼가 충분히 늘어나기 전에는 미완성 항목을 다시 디코딩하지 않음 (재시도 비용 상각)
+                if not final and end < self._retry_size:
+                    break
+                try:
+                    value, next_pos = self._decoder.raw_decode(buffer, self._pos)
+                except json.JSONDecodeError:
+                    pending = end - self._pos
+                    if final or pending > self._max_value_size:
+                        raise
+                    self._retry_size = end + max(pending, 1)
+                    break
+                if not final and _is_number(value) and (next_pos >= end or buffer[next_pos] not in _DELIMITERS):
+                    # 청크 경계에 걸친 숫자("12|3", "6.|5")는 다음 청크에서 이어질 수 있음
+                    self._retry_size = end + 1
+                    break
+                self._retry_size = 0
+                self._pos = next_pos
+                self._state = _EXPECT_SEPARATOR
+                items.append(value)
+
+        if self._state == _DONE:
+            self._pos = _WHITESPACE.match(buffer, self._pos).end()
+            if self._pos < end:
+                raise self._error("Extra data after the JSON array")
+
+        return items
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+async def iter_json_array(upload: Any, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[Any]:
+    """
+    UploadFile을 청크 단위로 읽으면서 최상위 JSON 배열의 항목을 하나씩 반환합니다.
+
+    Args:
+        upload: `read(size)` 코루틴을 제공하는 업로드 파일 (fastapi.UploadFile)
+        chunk_size: 한 번에 읽을 바이트 수
+
+    Yields:
+        배열의 각 항목 (dict 등)
+    """
+    parser = JsonArrayParser()
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,380 @@
+# app/services/keywords.py
+import heapq
+import math
+import random
+import re
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constant import KEYWORD_COMMON_TERMS, KEYWORD_COMMON_TERM_SCALE, KEYWORD_STOPWORDS, KEYWORD_MODE_LLM
+from .history import WatchHistory
+from .token_budget import item_tokens
+
+# 제목에 남아 있을 수 있는 시청 기록 상투어
+_BOILERPLATE = re.compile(r"\s*을\(를\)\s*시청했습니다\.?\s*$|^Watched\s+")
+
+# 한글/영문/숫자 토큰 (해시태그의 '#', 괄호, 이모지, 구두점은 구분자로 취급)
+_TOKEN = re.compile(r"[0-9A-Za-z가-힣ㄱ-ㅎ]+")
+
+# 명사 뒤에 붙는 조사 (긴 것부터 검사)
+_PARTICLES = sorted(
+    [
+        "에서는", "으로는", "에게서", "이라는", "이라고", "에서", "으로", "에게", "한테", "까지",
+        "부터", "처럼", "보다", "이나", "이랑", "하고", "라는", "라고", "에는", "와의", "과의",
+        "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "도", "만", "로", "랑",
+    ],
+    key=len,
+    reverse=True,
+)
+_HANGUL = re.compile(r"[가-힣]")
+
+# 숫자만 있거나 숫자+단위인 토큰 (예: '2025년', '13일', '250113')
+_NUMERIC = re.compile(r"[0-9]+(년|월|일|시|분|초|회|화|부|편|개|명|위|세|살|만|억|k|m|p|cm|kg|s)?$")
+
+
+def _normalize_token(raw: str) -> Optional[str]:
+    """토큰 하나를 소문자로 바꾸고 조사를 뗍니다. 키워드로 쓰지 않는 토큰(한 글자, 숫자, 불용어)은 None"""
+    token = raw.lower()
+    if _HANGUL.search(token):
+        for particle in _PARTICLES:
+            # 조사를 뗀 뒤에도 두 글자 이상 남는 경우만 제거 (예: '한국의' -> '한국', '나이'는 유지)
+            if token.endswith(particle) and len(token) - len(particle) >= 2:
+                token = token[:-len(particle)]
+                break
+
+    if len(token) < 2 or _NUMERIC.match(token) or token in KEYWORD_STOPWORDS:
+        return None
+    return token
+
+
+class _ChunkTokens(dict):
+    """
+    공백으로 나눈 제목 조각 -> 정규화된 토큰들. 없는 조각만 토큰화/정규화해 저장합니다.
+    토큰은 공백을 포함하지 않으므로 조각별 결과를 이으면 제목 전체를 토큰화한 것과 같고,
+    같은 조각('[LIVE]', '#shorts', 채널명 등)이 여러 제목에 반복되므로 제목마다 정규식을 돌리는 것보다 빠릅니다.
+    """
+
+    def __missing__(self, chunk: str) -> Tuple[str, ...]:
+        tokens = tuple(token for token in map(_normalize_token, _TOKEN.findall(chunk)) if token is not None)
+        self[chunk] = tokens
+        return tokens
+
+
+class LocalKeywordExtractor:
+    """
+    네트워크 없이 시청 기록 제목 전체에서 키워드를 추출하는 로컬 엔진.
+
+    - 시청 기록 상투어와 한국어 조사를 제거한 뒤 단어(unigram)와 두 단어 구(bigram)의 실제 빈도를 셉니다.
+    - 같은 제목을 여러 번 본 경우 시청 횟수만큼 셉니다.
+    - 실제 빈도에 흔한 용어 가중치(KEYWORD_COMMON_TERMS)를 곱한 점수로 순위를 정합니다.
+      이 표는 손으로 정한 용어 78개의 값이며, 배경 코퍼스에서 센 문서 빈도(DF) 표가 아닙니다.
+    """
+
+    def __init__(self):
+        # 제목 조각 -> 정규화된 토큰들. 같은 조각이 반복되므로 캐시
+        self._chunk_tokens = _ChunkTokens()
+
+    def extract(self, history: WatchHistory, top_k: int = 10) -> List[Tuple[str, int]]:
+        """
+        Args:
+            history: 전처리된 시청 기록
+            top_k: 반환할 키워드 수
+
+        Returns:
+            (키워드, 실제 출현 빈도) 리스트. 가중 점수 내림차순
+        """
+        return self.select(self.count_terms(history), top_k)
+
+    def count_terms(self, history: WatchHistory) -> Counter:
+        """
+        시청 기록 제목의 단어(str)와 두 단어 구(tuple) 빈도. 여러 기록의 결과를 더해 select()에 넘길 수 있습니다.
+
+        Args:
+            history: 전처리된 시청 기록
+
+        Returns:
+            용어 -> 시청 횟수를 반영한 출현 빈도
+        """
+        # 제목별 시청 횟수 (제목은 WatchHistory에 한 번만 저장됨)
+        watch_counts = Counter(history.title_ids)
+
+        # 한 번 본 제목(대부분)의 용어는 목록에 모아 마지막에 한 번에 셈 (제목마다 Counter.update를 부르지 않음)
+        once: List[Any] = []
+        extend = once.extend
+        repeated: Counter = Counter()
+        titles = history.titles
+        title_terms = self._title_terms
+        for title_id, watches in watch_counts.items():
+            terms = title_terms(titles[title_id])
+            if watches == 1:
+                extend(terms)
+            else:
+                for term in terms:
+                    repeated[term] += watches
+
+        term_counts = Counter(once)
+        for term, count in repeated.items():
+            term_counts[term] += count
+        return term_counts
+
+    def _title_terms(self, title: str) -> set:
+        """제목 하나의 단어(str)와 두 단어 구(tuple) 집합. 한 제목 안의 중복은 한 번만 셉니다."""
+        if "시청했습니다" in title or title.startswith("Watched"):
+            title = _BOILERPLATE.sub("", title)
+
+        tokens = self._tokens(title)
+        terms = set(tokens)
+        if len(tokens) > 1:
+            terms.update(zip(tokens, tokens[1:]))
+        return terms
+
+    def _tokens(self, text: str) -> List[str]:
+        """정규화된 토큰 목록 (조각별 결과를 캐시에서 꺼내 이어 붙임)"""
+        return list(chain.from_iterable(map(self._chunk_tokens.__getitem__, text.split())))
+
+    @staticmethod
+    def _weight(words: Tuple[str, ...]) -> float:
+        # 두 단어 구는 구성 단어 중 더 흔한 쪽의 값을 사용
+        commonness = max(KEYWORD_COMMON_TERMS.get(word, 0) for word in words)
+        return math.log((KEYWORD_COMMON_TERM_SCALE + 1) / (commonness + 1))
+
+    def _keyword_words(self, keyword: str) -> Tuple[str, ...]:
+        """임의의 키워드(예: LLM이 추출한 키워드)를 제목과 같은 방식으로 정규화한 단어들"""
+        return tuple(self._tokens(keyword))
+
+    @staticmethod
+    def _count_words(term_counts: Counter, words: Tuple[str, ...]) -> int:
+        """단어들이 이어서 나온 제목의 시청 횟수. 세 단어 이상이면 연속한 두 단어 구 빈도 중 최솟값(상한 근사)"""
+        if not words:
+            return 0
+        if len(words) == 1:
+            return term_counts.get(words[0], 0)
+        return min(term_counts.get(pair, 0) for pair in zip(words, words[1:]))
+
+    def rescore(
+        self,
+        candidates: List[Tuple[str, int]],
+        term_counts: Counter,
+        top_k: int = 10
+    ) -> List[Tuple[str, int]]:
+        """
+        LLM이 추출한 후보 키워드(merge_keyword_lists 결과)를 실제 제목의 출현 빈도로 다시 매겨 상위 top_k개를 고릅니다.
+        빈도가 같으면 더 많은 배치에서 추출된 키워드가 앞서고, 제목에 나오지 않는 키워드와
+        정규화하면 같은 키워드(예: '침착맨', '침착맨의')는 버립니다.
+
+        Args:
+            candidates: (키워드, 추출한 배치 수) 목록
+            term_counts: 시청 기록의 count_terms() 결과 (증분 분석이면 누적 결과)
+            top_k: 반환할 키워드 수
+
+        Returns:
+            (키워드, 실제 출현 빈도) 리스트. 빈도 내림차순
+        """
+        return [(keyword, count) for count, _, keyword in self.rank_candidates(candidates, term_counts)[:top_k]]
+
+    def rank_candidates(self, candidates: List[Tuple[str, int]], term_counts: Counter) -> List[Tuple[int, int, str]]:
+        """후보 키워드의 (실제 빈도, 추출한 배치 수, 키워드) 목록. 빈도, 배치 수 내림차순"""
+        scored = []
+        seen = set()
+        for keyword, votes in candidates:
+            words = self._keyword_words(keyword)
+            if not words or words in seen:
+                continue
+            seen.add(words)
+            count = self._count_words(term_counts, words)
+            if count > 0:
+                scored.append((count, votes, keyword))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return scored
+
+    def reduce_candidates(
+        self,
+        partials: List[List[Tuple[str, int]]],
+        term_counts: Counter,
+        fan_in: int,
+        keep: int
+    ) -> List[Tuple[str, int]]:
+        """
+        배치별 키워드 목록을 단계적으로 합칩니다 (계층적 reduce, 결과 형식은 merge_keyword_lists와 같음).
+        목록이 fan_in개보다 많으면 fan_in개씩 묶어 합친 뒤 실제 빈도(rank_candidates) 상위 keep개만 남기기를 반복합니다.
+        빈도는 전체 제목에서 센 값이라 묶음과 무관하므로, keep이 최종으로 고를 수 이상이면 상위 키워드는 중간에 잘리지 않습니다.
+        """
+        lists = list(partials)
+        fan_in = max(fan_in, 2)
+        while len(lists) > fan_in:
+            lists = [
+                [
+                    (keyword, votes) for _, votes, keyword
+                    in self.rank_candidates(merge_keyword_lists(lists[start:start + fan_in]), term_counts)[:keep]
+                ]
+                for start in range(0, len(lists), fan_in)
+            ]
+        return merge_keyword_lists(lists)
+
+    def select(self, term_counts: Counter, top_k: int = 10) -> List[Tuple[str, int]]:
+        """count_terms() 결과에서 가중 점수 상위 top_k개 키워드를 고릅니다."""
+        # 두 단어 구는 두 번 이상 등장한 경우만 후보로 사용
+        scored = (
+            (count * self._weight(words), count, words)
+            for words, count in (
+                ((term,), count) if isinstance(term, str) else (term, count)
+                for term, count in term_counts.items()
+            )
+            if count >= 2 or len(words) == 1
+        )
+        # 전체 정렬 대신 중복 제거 여유분을 포함한 상위 후보만 선택
+        candidates = heapq.nlargest(top_k * 10, scored)
+
+        selected: List[Tuple[str, int]] = []
+        selected_words = []
+        for _, count, term_words in candidates:
+            words = set(term_words)
+            # 이미 고른 키워드와 거의 같은 빈도로 겹치는 단어/구는 중복으로 보고 건너뜀
+            if any(
+                (words <= chosen or chosen <= words) and min(count, chosen_count) >= 0.8 * max(count, chosen_count)
+                for chosen, chosen_count in selected_words
+            ):
+                continue
+            selected.append((" ".join(term_words), count))
+            selected_words.append((words, count))
+            if len(selected) >= top_k:
+                break
+        return selected
+
+
+def sample_titles(history: WatchHistory, max_tokens: int, seed: int = 0) -> List[str]:
+    """
+    LLM 키워드 추출에 보낼 제목. 중복 없는 전체 제목의 추정 토큰 수가 max_tokens 이하면 전체 제목을,
+    넘으면 시청 횟수에 비례하는 확률로 뽑은 제목을 max_tokens까지 반환합니다. (가중 비복원 추출, Efraimidis-Spirakis)
+    기간 전체에서 고르게 뽑히고 여러 번 본 제목일수록 잘 뽑히며, 같은 기록이면 항상 같은 표본이므로 LLM 응답 캐시가 재사용됩니다.
+
+    Args:
+        history: 전처리된 시청 기록
+        max_tokens: 제목 전체의 최대 추정 토큰 수 (token_budget.item_tokens 합계)
+        seed: 표본 추출 난수 시드
+
+    Returns:
+        제목 목록 (시청 기록의 제목 테이블 순서, 최근 시청 순)
+    """
+    titles = history.titles
+    used = 0
+    for title in titles:
+        used += item_tokens(title)
+        if used > max_tokens:
+            break
+    else:
+        return list(titles)
+
+    rng = random.Random(seed)
+    # 키 log(u) / 시청 횟수가 큰 제목부터 선택 (u는 (0, 1] 균등 난수)
+    keys = sorted(
+        ((math.log(1.0 - rng.random()) / watches, title_id) for title_id, watches in Counter(history.title_ids).items()),
+        reverse=True
+    )
+    chosen = []
+    used = 0
+    for _, title_id in keys:
+        used += item_tokens(titles[title_id])
+        if used > max_tokens:
+            break
+        chosen.append(title_id)
+    chosen.sort()
+    return [titles[title_id] for title_id in chosen]
+
+
+def merge_keyword_lists(partials: List[List[Tuple[str, int]]]) -> List[Tuple[str, int]]:
+    """
+    배치별로 추출한 키워드 목록을 후보 목록 하나로 합칩니다 (map-reduce의 reduce 단계, 순위는 LocalKeywordExtractor.rescore).
+    대소문자/공백만 다른 키워드는 같은 키워드로 보고 가장 많이 나온 표기를 사용합니다.
+    LLM이 답한 빈도는 배치마다 기준이 달라 합치지 않고, 키워드를 추출한 배치 수를 셉니다.
+
+    Args:
+        partials: 배치별 (키워드, 추출한 배치 수) 목록. LLM 배치 결과는 키워드마다 1
+
+    Returns:
+        추출한 배치 수 내림차순 (키워드, 추출한 배치 수) 목록
+    """
+    totals: Counter = Counter()
+    spellings: Dict[str, Counter] = {}
+    for partial in partials:
+        for keyword, votes in partial:
+            key = " ".join(keyword.split()).casefold()
+            if not key:
+                continue
+            totals[key] += votes
+            spellings.setdefault(key, Counter())[keyword.strip()] += votes
+
+    return [
+        (spellings[key].most_common(1)[0][0], votes)
+        for key, votes in totals.most_common()
+    ]
+
+
+class KeywordState:
+    """
+    증분 분석에서 analysis_id별로 저장하는 키워드 추출 상태.
+    새 시청 기록만 처리한 결과를 더한 뒤 전체 키워드를 다시 고릅니다.
+
+    Attributes:
+        mode: 상태를 만든 키워드 추출 방식 (KEYWORD_MODE_LLM / KEYWORD_MODE_LOCAL)
+        subscriptions_digest: LLM 추출 첫 배치에 포함한 구독 정보의 해시
+        term_counts: 용어 빈도 누적 (LocalKeywordExtractor.count_terms 합계). 로컬 엔진의 순위와 LLM 키워드의 실제 빈도에 사용
+        partials: LLM 추출의 배치별 (키워드, 추출한 배치 수) 목록 누적 (map 결과, merge_keyword_lists 입력)
+        incomplete: 이번 요청에서 일부 배치가 실패해 저장하면 안 되는 상태인지 여부 (저장되지 않음)
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        subscriptions_digest: Optional[str] = None,
+        term_counts: Optional[Counter] = None,
+        partials: Optional[List[List[Tuple[str, int]]]] = None
+    ):
+        self.mode = mode
+        self.subscriptions_digest = subscriptions_digest
+        self.term_counts: Counter = term_counts if term_counts is not None else Counter()
+        self.partials: List[List[Tuple[str, int]]] = partials if partials is not None else []
+        self.incomplete = False
+
+    def __bool__(self) -> bool:
+        return bool(self.term_counts or self.partials)
+
+    def compact(self, max_terms: int, max_candidates: int) -> None:
+        """
+        저장하기 전에 상태 크기를 제한합니다. (증분 분석을 반복해도 상태와 저장 비용이 계속 늘지 않도록)
+            - partials: 배치별 목록을 후보 하나로 합쳐 실제 빈도 상위 max_candidates개만 남김 (추출한 배치 수 유지)
+            - term_counts: 빈도 상위 max_terms개만 남김. 잘린 용어가 나중에 다시 나오면 그때부터 다시 세므로
+              빈도가 낮은 용어의 누적 빈도는 실제보다 작을 수 있음
+        """
+        if self.partials:
+            ranked = LocalKeywordExtractor().rank_candidates(merge_keyword_lists(self.partials), self.term_counts)
+            self.partials = [[(keyword, votes) for _, votes, keyword in ranked[:max_candidates]]]
+        if len(self.term_counts) > max_terms:
+            self.term_counts = Counter(dict(self.term_counts.most_common(max_terms)))
+
+    def matches(self, mode: str, subscriptions_digest: str) -> bool:
+        """같은 방식(LLM이면 같은 구독 정보)으로 만든 상태인지 여부. 아니면 전체 기록으로 다시 만들어야 합니다."""
+        if self.mode != mode:
+            return False
+        return mode != KEYWORD_MODE_LLM or self.subscriptions_digest == subscriptions_digest
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "subscriptions_digest": self.subscriptions_digest,
+            # 두 단어 구(tuple)는 JSON 배열로 저장
+            "term_counts": [[term if isinstance(term, str) else list(term), count] for term, count in self.term_counts.items()],
+            "partials": [[[keyword, frequency] for keyword, frequency in partial] for partial in self.partials]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "KeywordState":
+        return cls(
+            mode=state["mode"],
+            subscriptions_digest=state["subscriptions_digest"],
+            term_counts=Counter({
+                term if isinstance(term, str) else tuple(term): count for term, count in state["term_counts"]
+            }),
+            partials=[[(keyword, frequency) for keyword, frequency in partial] for partial in state["partials"]]
+        )
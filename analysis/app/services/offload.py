@@ -0,0 +1,188 @@
+# app/services/offload.py
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .history import WatchHistory
+from .json_stream import CHUNK_SIZE
+from .preprocessor import DataPreprocessor
+from .takeout import ARCHIVE_FORMATS, ARCHIVE_MAGIC_SIZE, TakeoutContents, TakeoutTimes, detect_format, read_takeout_archive
+from .time_stats import TimeAggregation
+
+# CPU 작업 프로세스 풀 설정 (환경 변수로 조정)
+HISTORY_PROCESS_WORKERS = int(os.environ.get("HISTORY_PROCESS_WORKERS", "0"))  # 0이면 이벤트 루프에서 직접 처리
+HISTORY_PROCESS_MIN_BYTES = int(os.environ.get("HISTORY_PROCESS_MIN_BYTES", str(4 * 1024 * 1024)))  # 이보다 작은 업로드는 바로 파싱
+HISTORY_PROCESS_MIN_ENTRIES = int(os.environ.get("HISTORY_PROCESS_MIN_ENTRIES", "50000"))  # 이보다 적은 기록은 바로 집계
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    프로세스 전체에서 공유하는 CPU 작업 프로세스 풀. HISTORY_PROCESS_WORKERS가 0이면 None.
+    작업 프로세스는 spawn으로 시작하므로 이벤트 루프, 연결 풀, SQLite 연결을 물려받지 않습니다.
+    """
+    global _pool
+    if HISTORY_PROCESS_WORKERS <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=HISTORY_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+async def close_process_pool() -> None:
+    """프로세스 풀을 종료합니다. (애플리케이션 종료 시 호출)"""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    func(*args)를 프로세스 풀에서 실행하고 결과를 기다립니다. 풀이 비활성화되어 있으면 바로 실행합니다.
+    func와 인자, 결과는 pickle로 전달되므로 모듈 최상위 함수와 압축 형식(WatchHistory.to_compact 등)을 사용합니다.
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+
+def should_offload_upload(upload: Any) -> bool:
+    """업로드를 프로세스 풀에서 파싱할지 여부 (풀이 켜져 있고 크기가 HISTORY_PROCESS_MIN_BYTES 이상)"""
+    if get_process_pool() is None:
+        return False
+    size = getattr(upload, "size", None)
+    return size is None or size >= HISTORY_PROCESS_MIN_BYTES
+
+
+def should_offload_history(history: WatchHistory) -> bool:
+    """시청 기록을 프로세스 풀에서 집계할지 여부 (풀이 켜져 있고 항목 수가 HISTORY_PROCESS_MIN_ENTRIES 이상)"""
+    return get_process_pool() is not None and len(history) >= HISTORY_PROCESS_MIN_ENTRIES
+
+
+async def preprocess_upload_in_process(upload: Any, times: Optional[TakeoutTimes] = None) -> TakeoutContents:
+    """
+    업로드 파일(JSON, HTML 또는 Takeout 압축 파일)을 임시 파일로 옮긴 뒤 작업 프로세스에서 파싱/전처리합니다.
+    이벤트 루프는 파일 복사(I/O)만 하고, 결과는 압축 형식으로 돌려받아 복원합니다.
+    times가 주어지면 그 fallback_timezone으로 HTML 시각을 해석하고, 작업 프로세스에서 센 결과를 times에 합칩니다.
+
+    Returns:
+        TakeoutContents (구독 정보는 Takeout 압축 파일에 들어 있는 경우에만)
+
+    Raises:
+        json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+        TakeoutArchiveError: 압축 파일을 읽을 수 없는 경우
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="history-", suffix=".json", delete=False)
+    try:
+        with spool:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                await asyncio.to_thread(spool.write, chunk)
+        compact, subscriptions, worker_times = await run_in_process(
+            _preprocess_history_file, spool.name, times.fallback_timezone if times is not None else None
+        )
+        if times is not None:
+            times.merge(worker_times)
+        return TakeoutContents(WatchHistory.from_compact(compact), subscriptions)
+    finally:
+        os.unlink(spool.name)
+
+
+async def preprocess_history_file(path: str, fallback_timezone: Optional[str] = None) -> WatchHistory:
+    """
+    디스크에 있는 시청 기록 파일(JSON 또는 HTML)을 파싱/전처리합니다. (일괄 분석용)
+    프로세스 풀이 켜져 있고 파일이 HISTORY_PROCESS_MIN_BYTES 이상이면 작업 프로세스에서 실행합니다.
+    HTML 시각의 시간대 약어를 모르면 fallback_timezone으로 해석합니다.
+
+    Raises:
+        json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+        TakeoutArchiveError: HTML 시청 기록의 시각을 하나도 해석하지 못한 경우
+    """
+    times = TakeoutTimes(fallback_timezone)
+    if get_process_pool() is not None and os.path.getsize(path) >= HISTORY_PROCESS_MIN_BYTES:
+        compact, _, worker_times = await run_in_process(_preprocess_history_file, path, fallback_timezone)
+        times.merge(worker_times)
+        history = WatchHistory.from_compact(compact)
+    else:
+        history = DataPreprocessor().preprocess_history_chunks(_read_chunks(path), times)
+    times.verify()
+    return history
+
+
+async def aggregate_in_process(
+    history: WatchHistory,
+    timezone: str,
+    sketch_capacity: Optional[int],
+    aggregation: Optional[TimeAggregation] = None
+) -> TimeAggregation:
+    """
+    작업 프로세스에서 시간/채널 집계를 계산합니다.
+    시청 시각과 채널 열만 bytes로 보내고(제목 제외) 집계 상태(to_state)를 돌려받습니다.
+    aggregation이 주어지면 그 상태에 history를 더한 결과를 반환합니다 (증분 분석).
+    """
+    state = await run_in_process(
+        _aggregate_history,
+        history.to_compact(include_titles=False),
+        timezone,
+        sketch_capacity,
+        aggregation.to_state() if aggregation is not None else None
+    )
+    return TimeAggregation.from_state(state)
+
+
+# ---- 작업 프로세스에서 실행되는 함수 (모듈 최상위여야 pickle 가능) ----
+
+def _read_chunks(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _preprocess_history_file(
+    path: str,
+    fallback_timezone: Optional[str]
+) -> Tuple[Tuple[Any, ...], Optional[Any], TakeoutTimes]:
+    """(압축 형식의 시청 기록, Takeout 압축 파일의 구독 정보 또는 None, HTML 시각 해석 결과)"""
+    preprocessor = DataPreprocessor()
+    times = TakeoutTimes(fallback_timezone)
+    try:
+        with open(path, "rb") as file:
+            archive_format = detect_format(file.read(ARCHIVE_MAGIC_SIZE))
+        if archive_format in ARCHIVE_FORMATS:
+            with open(path, "rb") as file:
+                history, subscriptions = read_takeout_archive(file, archive_format, preprocessor, times)
+        else:
+            history, subscriptions = preprocessor.preprocess_history_chunks(_read_chunks(path), times), None
+        return history.to_compact(), subscriptions, times
+    except json.JSONDecodeError as e:
+        # 원본 문서 전체(e.doc)를 담아 돌려보내지 않도록 메시지만 남김
+        raise json.JSONDecodeError(e.msg, "", 0) from None
+
+
+def _aggregate_history(
+    compact: Tuple[Any, ...],
+    timezone: str,
+    sketch_capacity: Optional[int],
+    state: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    if state is not None:
+        aggregation = TimeAggregation.from_state(state)
+    else:
+        aggregation = TimeAggregation(timezone, sketch_capacity)
+    aggregation.update(WatchHistory.from_compact(compact))
+    return aggregation.to_state()
@@ -1,67 +1,106 @@
 # app/services/preprocessor.py
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Iterable, Tuple
+import json
 import logging
-from datetime import datetime
+
+from .history import WatchHistory
+from .takeout import TakeoutTimes, iter_history_entries
+from .timeparse import parse_timestamp
 
 class DataPreprocessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    async def preprocess_history(self, history_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def preprocess_history(self, history_data: List[Dict[str, Any]]) -> WatchHistory:
         """
         시청 기록 데이터 전처리
         Returns:
-            동영상 제목, 채널명, 시청한 시각 추출
+            동영상 제목, 채널명, 시청한 시각을 열 단위로 담은 WatchHistory
         Example Returns:
-        [
-            {
-                'title': '아형 최장신 서장훈 키로 놀리며 하극상',
-                'channel': 'JTBC Voyage,
-                'time': datetime.datetime(2025, 2, 13, 13, 52, 46, 874000)
-            }
-        ]
+        WatchHistory(
+            times=array('q', [1739454766874]),
+            channel_ids=array('i', [0]),
+            title_ids=array('i', [0]),
+            channels=['JTBC Voyage'],
+            titles=['아형 최장신 서장훈 키로 놀리며 하극상']
+        )
+        """
+        return self._preprocess_entries(history_data or (), WatchHistory())
+
+    async def preprocess_history_stream(self, batches: AsyncIterator[Iterable[Dict[str, Any]]]) -> WatchHistory:
+        """
+        업로드를 청크 단위로 읽으면서 청크마다 나온 시청 기록 항목들을 받아 전처리합니다.
+        원본 JSON 전체를 메모리에 올리지 않으므로 대용량 업로드에 사용합니다.
+        Args:
+            batches: 청크마다 그 청크에서 나온 항목 목록을 반환하는 비동기 이터레이터 (takeout.iter_history_upload)
+        Returns:
+            preprocess_history와 동일한 형식의 전처리 결과
+        Raises:
+            json.JSONDecodeError: 업로드된 파일의 JSON 형식이 올바르지 않은 경우
+        """
+        processed_data = WatchHistory()
+        async for entries in batches:
+            self._preprocess_entries(entries, processed_data)
+        return processed_data
+
+    def preprocess_history_chunks(self, chunks: Iterable[bytes], times: Optional[TakeoutTimes] = None) -> WatchHistory:
+        """
+        시청 기록 파일(JSON 또는 Takeout HTML)의 바이트 청크를 동기적으로 파싱하면서 전처리합니다.
+        이벤트 루프 밖(작업 프로세스, Takeout 압축 해제 스레드)에서 파일 전체를 처리할 때 사용합니다.
+        Args:
+            chunks: 파일 내용을 앞에서부터 나눈 바이트 청크들
+            times: HTML 시청 기록의 시각 해석 (결과별 개수를 셈, 없으면 시간대를 모르는 항목을 버림)
+        Returns:
+            preprocess_history와 동일한 형식의 전처리 결과
+        Raises:
+            json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+        """
+        return self._preprocess_entries(iter_history_entries(chunks, times), WatchHistory())
+
+    def _preprocess_entries(self, entries: Iterable[Dict[str, Any]], processed_data: WatchHistory) -> WatchHistory:
+        """
+        시청 기록 항목들을 전처리해 processed_data에 더하고 반환합니다. (세 preprocess_history* 메서드 공통)
+        entries가 파싱하면서 항목을 내는 이터레이터면 파싱 오류도 여기서 발생합니다.
+        Raises:
+            json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
         """
         try:
-            if not history_data:
-                return []
-                
-            processed_data = []
-            
-            for entry in history_data:
-                # 채널명 추출
-                channel = None
-                if 'subtitles' in entry and entry['subtitles']:
-                    channel = entry['subtitles'][0]['name']
-                    
-                # channel이 None인 경우는 건너뛰기
-                if channel is None:
-                    continue
-                    
-                processed_item = {
-                    'title': entry['title'].replace('을(를) 시청했습니다.', '').strip(),
-                    'channel': channel,
-                    'time': None
-                }
-                
-                # 시청 시간 처리
-                time_str = entry['time']
-                try:
-                    time_obj = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
-                except ValueError:
-                    try:
-                        time_obj = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-                    except ValueError:
-                        continue
-                        
-                processed_item['time'] = time_obj
-                processed_data.append(processed_item)
-            
+            for entry in entries:
+                processed_item = self._preprocess_history_entry(entry)
+                if processed_item is not None:
+                    processed_data.append(*processed_item)
             return processed_data
-            
+
+        except json.JSONDecodeError:
+            raise
         except Exception as e:
             self.logger.error(f"History preprocessing failed: {str(e)}")
             raise Exception(f"History preprocessing failed: {str(e)}")
 
+    def _preprocess_history_entry(self, entry: Dict[str, Any]) -> Optional[Tuple[int, str, str]]:
+        """
+        시청 기록 항목 하나를 전처리합니다.
+        Returns:
+            (시청 시각 epoch 밀리초, 채널명, 제목) 튜플. 채널이나 시청 시각이 없는 항목(광고 등)은 None
+        """
+        # 채널명 추출
+        channel = None
+        if 'subtitles' in entry and entry['subtitles']:
+            channel = entry['subtitles'][0]['name']
+            
+        # channel이 None인 경우는 건너뛰기
+        if channel is None:
+            return None
+            
+        title = entry['title'].replace('을(를) 시청했습니다.', '').strip()
+        
+        # 시청 시간 처리 (초/밀리초/오프셋 형식을 한 번에 파싱)
+        time_ms = parse_timestamp(entry['time'])
+        if time_ms is None:
+            return None
+                
+        return time_ms, channel, title
+
     async def preprocess_subscriptions(self, data: Any) -> List[Dict[str, str]]:
         """
         구독 채널 데이터 전처리
@@ -97,8 +136,9 @@ class DataPreprocessor:
                 # 새로운 형식 처리 (리스트)
                 for item in data:
                     if isinstance(item, dict):
+                        # Takeout 구독정보 CSV의 행 (한국어 또는 영어 열 이름)
                         processed_item = {
-                            'title': item.get('채널 제목', 'Unknown Channel'),
+                            'title': item.get('채널 제목') or item.get('Channel Title') or 'Unknown Channel',
                             'description': 'No description'
                         }
                         if processed_item['title'] != 'Unknown Channel':
@@ -0,0 +1,101 @@
+# app/services/scheduler.py
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+class StageEvent(NamedTuple):
+    """StageGraph.run()이 전달하는 이벤트"""
+    stage: str  # 단계 이름
+    data: Any  # 단계 결과 또는 중간 결과
+    partial: bool = False  # True면 스트리밍 단계가 emit한 중간 결과
+
+
+class StageGraph:
+    """
+    분석 단계를 의존성 그래프로 실행하는 스케줄러.
+    서로 의존하지 않는 단계는 동시에 실행되고, 결과는 단계가 끝나는 순서대로 전달됩니다.
+
+    Example:
+        graph = StageGraph()
+        graph.add("subscriptions", lambda: preprocess_subscriptions(data))
+        graph.add("hourly_stats", lambda: extract_hourly_channel_stats(history))
+        graph.add("keyword_frequency", lambda subscriptions: extract_keywords(subscriptions),
+                  depends_on=("subscriptions",))
+        async for event in graph.run():
+            ...
+
+    observer를 주면 단계가 끝날 때마다 observer(단계 이름, 실행 시간(초), 실패 여부)를 호출합니다.
+    """
+
+    def __init__(self, observer: Optional[Callable[[str, float, bool], None]] = None):
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...], bool]] = {}
+        self.observer = observer
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        depends_on: Iterable[str] = (),
+        streaming: bool = False
+    ) -> None:
+        """
+        단계를 추가합니다. 의존하는 단계는 먼저 추가되어 있어야 합니다 (순환 방지).
+
+        Args:
+            name: 단계 이름
+            func: 의존 단계의 결과를 같은 이름의 키워드 인자로 받는 코루틴 함수
+            depends_on: 먼저 끝나야 하는 단계 이름들
+            streaming: True면 func에 `emit` 키워드 인자(중간 결과를 바로 전달하는 콜백)를 넘김
+        """
+        depends_on = tuple(depends_on)
+        if name in self._stages:
+            raise ValueError(f"Stage already registered: {name}")
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Unknown dependency '{dependency}' for stage '{name}'")
+        self._stages[name] = (func, depends_on, streaming)
+
+    async def run(self) -> AsyncIterator[StageEvent]:
+        """
+        모든 단계를 실행하고 이벤트를 발생 순서대로 반환합니다.
+        단계가 끝나면 StageEvent(이름, 결과), 스트리밍 단계의 중간 결과는 StageEvent(이름, 값, partial=True).
+        한 단계가 실패하면 실행 중인 나머지 단계를 취소하고 예외를 다시 발생시킵니다.
+        """
+        results: Dict[str, Any] = {}
+        waiting = dict(self._stages)
+        running: Dict[asyncio.Future, str] = {}
+        started: Dict[str, float] = {}
+        # 끝난 Task와 중간 결과(StageEvent)가 발생 순서대로 들어오는 큐
+        events: asyncio.Queue = asyncio.Queue()
+
+        def start_ready_stages() -> None:
+            for name, (func, depends_on, streaming) in list(waiting.items()):
+                if all(dependency in results for dependency in depends_on):
+                    del waiting[name]
+                    kwargs = {dependency: results[dependency] for dependency in depends_on}
+                    if streaming:
+                        kwargs["emit"] = lambda value, name=name: events.put_nowait(StageEvent(name, value, True))
+                    task = asyncio.ensure_future(func(**kwargs))
+                    task.add_done_callback(events.put_nowait)
+                    running[task] = name
+                    started[name] = time.perf_counter()
+
+        try:
+            start_ready_stages()
+            while running:
+                item = await events.get()
+                if isinstance(item, StageEvent):
+                    yield item
+                    continue
+
+                name = running.pop(item)
+                if self.observer is not None and not item.cancelled():
+                    self.observer(name, time.perf_counter() - started[name], item.exception() is not None)
+                results[name] = item.result()
+                # 다음 단계를 먼저 시작한 뒤 결과를 전달 (소비자가 느려도 실행은 계속됨)
+                start_ready_stages()
+                yield StageEvent(name, results[name])
+        finally:
+            for task in running:
+                task.cancel()
@@ -0,0 +1,131 @@
+# app/services/sketch.py
+import heapq
+from itertools import count as _sequence
+from typing import Any, Dict, Hashable, Iterator, List, Mapping, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter 요약 (Metwally et al., 2005).
+    서로 다른 항목이 아무리 많아도 카운터를 최대 capacity개만 유지합니다 (메모리 O(capacity)).
+
+    보장:
+        - 추정치는 실제 빈도 이상이며, 과대 추정은 항목별 error 이하입니다.
+          (실제 빈도는 [count - error, count] 범위)
+        - 요약에 없는 항목의 실제 빈도는 error_bound 이하이며, error_bound <= total / capacity 입니다.
+        - 따라서 실제 빈도가 total / capacity보다 큰 항목은 항상 요약에 남아 있습니다.
+
+    Example:
+        sketch = SpaceSaving(64)
+        for channel in channels:
+            sketch.update(channel)
+        sketch.top(3)  # [(채널, 추정 빈도, 최대 과대 추정치), ...]
+    """
+
+    __slots__ = ("capacity", "total", "_counts", "_errors", "_heap", "_sequence")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # 항목마다 하나씩 있는 (빈도, 순번, 항목) 최소 힙. 빈도는 늘어나기만 하므로 증가 시에는 갱신하지 않고
+        # 교체할 때 꺼낸 값이 오래된 것이면 현재 빈도로 다시 넣음 (교체 비용 O(log capacity) 분할 상환)
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._sequence = _sequence()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._counts)
+
+    @property
+    def error_bound(self) -> int:
+        """요약에 없는 항목의 최대 빈도이자 항목별 과대 추정의 상한. 요약이 가득 차기 전에는 0 (정확)"""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def update(self, item: Hashable, count: int = 1) -> None:
+        """항목의 빈도를 count만큼 더합니다. 요약이 가득 찼으면 가장 작은 카운터를 새 항목으로 교체합니다."""
+        self.total += count
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            self._errors[item] = 0
+            heapq.heappush(self._heap, (count, next(self._sequence), item))
+            return
+
+        # 가장 작은 카운터의 값을 새 항목이 물려받고, 그 값을 과대 추정 한도로 기록
+        heap = self._heap
+        floor, _, victim = heap[0]
+        while counts[victim] != floor:
+            heapq.heapreplace(heap, (counts[victim], next(self._sequence), victim))
+            floor, _, victim = heap[0]
+        del counts[victim]
+        del self._errors[victim]
+        counts[item] = floor + count
+        self._errors[item] = floor
+        heapq.heapreplace(heap, (floor + count, next(self._sequence), item))
+
+    def update_counts(self, counts: Mapping[Hashable, int]) -> None:
+        """미리 집계한 (항목 -> 빈도)를 한 번에 더합니다. 가중치 갱신도 같은 보장을 유지합니다."""
+        update = self.update
+        for item, count in counts.items():
+            update(item, count)
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """
+        다른 요약을 합칩니다 (Agarwal et al., 2012의 mergeable summary).
+        한쪽에만 있는 항목은 다른 쪽의 error_bound만큼 빈도와 error를 더한 뒤 상위 capacity개만 남깁니다.
+        """
+        self_floor = self.error_bound
+        other_floor = other.error_bound
+        merged: List[Tuple[int, int, Hashable]] = []
+        for item in list(self._counts) + [item for item in other._counts if item not in self._counts]:
+            count = self._counts.get(item, self_floor) + other._counts.get(item, other_floor)
+            error = self._errors.get(item, self_floor) + other._errors.get(item, other_floor)
+            merged.append((count, error, item))
+
+        kept = heapq.nlargest(self.capacity, merged, key=lambda entry: entry[0])
+        self._counts = {item: count for count, _, item in kept}
+        self._errors = {item: error for _, error, item in kept}
+        self._heap = [(count, next(self._sequence), item) for count, _, item in kept]
+        heapq.heapify(self._heap)
+        self.total += other.total
+
+    def top(self, k: int) -> List[Tuple[Hashable, int, int]]:
+        """
+        추정 빈도 상위 k개 항목.
+
+        Returns:
+            (항목, 추정 빈도, 최대 과대 추정치) 리스트. 추정 빈도 내림차순
+        """
+        top_items = heapq.nlargest(k, self._counts.items(), key=lambda entry: entry[1])
+        return [(item, count, self._errors[item]) for item, count in top_items]
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON으로 저장할 수 있는 상태 (항목은 JSON 값이어야 함)"""
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "items": [[item, count, self._errors[item]] for item, count in self._counts.items()]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SpaceSaving":
+        """to_state()로 저장한 상태에서 요약을 복원합니다."""
+        sketch = cls(state["capacity"])
+        sketch.total = state["total"]
+        for item, count, error in state["items"]:
+            sketch._counts[item] = count
+            sketch._errors[item] = error
+            sketch._heap.append((count, next(sketch._sequence), item))
+        heapq.heapify(sketch._heap)
+        return sketch
@@ -0,0 +1,500 @@
+# app/services/takeout.py
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+import posixpath
+import re
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .history import WatchHistory
+from .json_stream import CHUNK_SIZE, JsonArrayParser
+from .time_stats import resolve_timezone
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# 업로드 형식 (앞부분 바이트로 판별)
+FORMAT_JSON = "json"
+FORMAT_HTML = "html"
+FORMAT_ZIP = "zip"
+FORMAT_TGZ = "tgz"
+ARCHIVE_FORMATS = (FORMAT_ZIP, FORMAT_TGZ)
+ARCHIVE_MAGIC_SIZE = 4  # 압축 파일 여부를 판별하는 데 필요한 앞부분 바이트 수
+
+# Takeout 압축 파일에서 찾는 항목 이름 (경로의 마지막 부분, 소문자 비교. 앞에 있는 이름 우선)
+TAKEOUT_HISTORY_NAMES = ("watch-history.json", "시청 기록.json", "watch-history.html", "시청 기록.html")
+TAKEOUT_SUBSCRIPTIONS_NAMES = ("subscriptions.csv", "구독정보.csv", "subscriptions.json", "구독정보.json")
+
+# HTML 시청 기록의 시각에 붙는 시간대 약어 -> UTC 오프셋(시간)
+TAKEOUT_TIMEZONE_ABBREVIATIONS = {
+    "UTC": 0, "GMT": 0, "WET": 0, "WEST": 1, "CET": 1, "CEST": 2, "EET": 2, "EEST": 3, "MSK": 3, "TRT": 3,
+    "WAT": 1, "CAT": 2, "SAST": 2, "EAT": 3, "IRST": 3.5, "GST": 4, "PKT": 5, "NPT": 5.75,
+    "ICT": 7, "WIB": 7, "WITA": 8, "WIT": 9, "SGT": 8, "MYT": 8, "HKT": 8, "PHT": 8, "PHST": 8, "AWST": 8,
+    "KST": 9, "JST": 9, "ACST": 9.5, "ACDT": 10.5, "AEST": 10, "AEDT": 11, "CHST": 10, "NZST": 12, "NZDT": 13,
+    "HST": -10, "HDT": -9, "AKST": -9, "AKDT": -8, "PST": -8, "PDT": -7, "MST": -7, "MDT": -6,
+    "CDT": -5, "EST": -5, "EDT": -4, "ADT": -3, "NST": -3.5, "NDT": -2.5, "BRT": -3, "ART": -3
+}
+# 여러 시간대를 뜻하는 약어 -> 후보 오프셋(시간). 요청의 timezone이 그 시각에 후보 중 하나와 같으면 그것을, 아니면 첫 번째를 사용
+# (CST: 미국 중부/중국/쿠바, IST: 인도/아일랜드/이스라엘, BST: 영국 서머타임/방글라데시, AST: 대서양/아라비아)
+TAKEOUT_AMBIGUOUS_TIMEZONES = {"CST": (-6, 8, -5), "IST": (5.5, 1, 2), "BST": (1, 6), "AST": (-4, 3)}
+TAKEOUT_TIME_SAMPLES = 3  # 해석하지 못한 시각 문자열을 경고 로그/오류 메시지에 몇 개까지 남길지
+
+_ZIP_MAGIC = b"PK\x03\x04"
+_GZIP_MAGIC = b"\x1f\x8b"
+_WHITESPACE = b" \t\r\n"
+_BOM = codecs.BOM_UTF8
+
+_MONTHS = {name: index for index, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+# "2025. 2. 13. 오후 1:52:46 KST"
+_KOREAN_TIME = re.compile(r"(\d{4})\.\s*(\d{1,2})\.\s*(\d{1,2})\.\s*(오전|오후)\s*(\d{1,2}):(\d{2}):(\d{2})\s*(\S+)")
+# "Feb 13, 2025, 1:52:46 PM KST"
+_US_TIME = re.compile(r"([A-Za-z]{3})[a-z]*\.? (\d{1,2}), (\d{4}),? (\d{1,2}):(\d{2}):(\d{2}) ?([AaPp][Mm]) (\S+)")
+# "13 Feb 2025, 13:52:46 GMT"
+_DAY_FIRST_TIME = re.compile(r"(\d{1,2}) ([A-Za-z]{3})[a-z]*\.? (\d{4}),? (\d{1,2}):(\d{2}):(\d{2}) (\S+)")
+# "GMT+09:00", "UTC-5"
+_OFFSET = re.compile(r"(?:GMT|UTC)([+-])(\d{1,2})(?::?(\d{2}))?$")
+
+
+class TakeoutArchiveError(ValueError):
+    """압축 파일을 읽을 수 없거나 시청 기록 항목이 없는 경우"""
+
+
+class TakeoutContents(NamedTuple):
+    """Takeout 압축 파일에서 읽은 내용"""
+    history: Optional[WatchHistory]
+    subscriptions: Optional[List[Dict[str, Any]]]  # 구독 정보 항목이 없으면 None
+
+
+def detect_format(head: bytes) -> str:
+    """업로드의 앞부분 바이트로 형식(FORMAT_*)을 판별합니다. 알 수 없으면 JSON으로 간주"""
+    if head.startswith(_ZIP_MAGIC):
+        return FORMAT_ZIP
+    if head.startswith(_GZIP_MAGIC):
+        return FORMAT_TGZ
+    text = head[len(_BOM):] if head.startswith(_BOM) else head
+    if text.lstrip(_WHITESPACE).startswith(b"<"):
+        return FORMAT_HTML
+    return FORMAT_JSON
+
+
+def parse_takeout_time(text: str) -> Optional[str]:
+    """
+    HTML 시청 기록의 지역화된 시각 문자열을 ISO-8601(오프셋 포함)로 변환합니다.
+    한국어("2025. 2. 13. 오후 1:52:46 KST")와 영어("Feb 13, 2025, 1:52:46 PM KST", "13 Feb 2025, 13:52:46 GMT")
+    형식을 지원합니다. 여러 시간대를 뜻하는 약어는 TAKEOUT_AMBIGUOUS_TIMEZONES의 첫 번째 오프셋으로 해석합니다.
+
+    Returns:
+        ISO-8601 문자열. 형식이나 시간대를 알 수 없으면 None
+    """
+    return TakeoutTimes().parse(text)
+
+
+class TakeoutTimes:
+    """
+    HTML 시청 기록의 시각을 해석하고 결과별로 셉니다. (업로드 하나에 하나씩 만들어 파서에 넘김)
+    시간대 약어를 모르면 fallback_timezone(요청의 timezone)의 현지 시각으로 보고, 그것도 없으면 항목을 버립니다.
+    작업 프로세스에서 센 결과는 merge로 합친 뒤 이벤트 루프 쪽에서 verify를 호출합니다.
+    """
+
+    def __init__(self, fallback_timezone: Optional[str] = None):
+        self.fallback_timezone = fallback_timezone
+        self.parsed = 0  # 시각에 붙은 약어나 오프셋으로 해석한 수
+        self.fallback = 0  # 약어를 몰라 fallback_timezone으로 해석한 수
+        self.ambiguous = 0  # 여러 시간대를 뜻하는 약어라 fallback_timezone으로 후보를 고른 수 (parsed에 포함)
+        self.unparsed = 0  # 해석하지 못해 버린 수
+        self.unknown_zones: Counter = Counter()  # 모르는 시간대 약어 -> 나온 횟수
+        self.samples: List[str] = []  # 해석하지 못한 시각 문자열 (TAKEOUT_TIME_SAMPLES개까지)
+        self._fallback = resolve_timezone(fallback_timezone) if fallback_timezone else None
+
+    def parse(self, text: str) -> Optional[str]:
+        """시각 문자열을 ISO-8601로 변환합니다. 해석하지 못하면 None"""
+        parts = _split_takeout_time(text)
+        offsets = _zone_offsets(parts[1]) if parts is not None else ()
+        if parts is not None and offsets:
+            moment = parts[0]
+            offset = offsets[0]
+            if len(offsets) > 1 and self._fallback is not None:
+                self.ambiguous += 1
+                local = moment.replace(tzinfo=self._fallback).utcoffset()
+                offset = next((candidate for candidate in offsets if candidate.utcoffset(None) == local), offset)
+            self.parsed += 1
+            return moment.replace(tzinfo=offset).isoformat()
+        if parts is not None:
+            self.unknown_zones[parts[1]] += 1
+            if self._fallback is not None:
+                self.fallback += 1
+                return parts[0].replace(tzinfo=self._fallback).isoformat()
+        self.unparsed += 1
+        if len(self.samples) < TAKEOUT_TIME_SAMPLES:
+            self.samples.append(text.strip())
+        return None
+
+    def merge(self, other: "TakeoutTimes") -> None:
+        """작업 프로세스에서 센 결과를 더합니다."""
+        self.parsed += other.parsed
+        self.fallback += other.fallback
+        self.ambiguous += other.ambiguous
+        self.unparsed += other.unparsed
+        self.unknown_zones.update(other.unknown_zones)
+        self.samples.extend(other.samples[:TAKEOUT_TIME_SAMPLES - len(self.samples)])
+
+    @property
+    def depends_on_timezone(self) -> bool:
+        """해석 결과가 fallback_timezone에 따라 달라지는지 여부 (시청 기록 저장소 키에 시간대를 포함할지)"""
+        return bool(self.fallback or self.ambiguous)
+
+    def verify(self) -> None:
+        """
+        결과를 메트릭(analysis_takeout_times_total)에 기록하고, 모르는 시간대나 버린 항목이 있으면 경고를 남깁니다.
+
+        Raises:
+            TakeoutArchiveError: 시각이 있는 항목을 하나도 해석하지 못한 경우
+        """
+        for result, count in (("parsed", self.parsed), ("fallback", self.fallback), ("unparsed", self.unparsed)):
+            if count:
+                metrics.TAKEOUT_TIMES.inc(count, result=result)
+        if self.unknown_zones or self.unparsed:
+            zones = ", ".join(f"{zone} {count}" for zone, count in self.unknown_zones.most_common(5))
+            logger.warning(
+                f"Takeout HTML times: {self.fallback} read in {self.fallback_timezone or '(no timezone)'}, "
+                f"{self.unparsed} dropped "
+                f"(unknown zones: {zones or '-'}, samples: {self.samples})"
+            )
+        if self.unparsed and not (self.parsed or self.fallback):
+            hint = "" if self._fallback is not None else " timezone을 지정하면 모르는 시간대 약어를 그 시간대로 해석합니다."
+            raise TakeoutArchiveError(f"HTML 시청 기록의 시각을 해석할 수 없습니다 (예: {self.samples[0]!r}).{hint}")
+
+
+def _split_takeout_time(text: str) -> Optional[Tuple[datetime, str]]:
+    """(시간대 없는 시각, 시간대 문자열). 형식을 알 수 없으면 None"""
+    text = " ".join(text.replace("\u202f", " ").replace("\xa0", " ").split())
+    match = _KOREAN_TIME.match(text)
+    if match:
+        year, month, day, meridiem, hour, minute, second, zone = match.groups()
+        hour = int(hour) % 12 + (12 if meridiem == "오후" else 0)
+    else:
+        match = _US_TIME.match(text)
+        if match:
+            month_name, day, year, hour, minute, second, meridiem, zone = match.groups()
+            hour = int(hour) % 12 + (12 if meridiem.lower() == "pm" else 0)
+        else:
+            match = _DAY_FIRST_TIME.match(text)
+            if not match:
+                return None
+            day, month_name, year, hour, minute, second, zone = match.groups()
+        month = _MONTHS.get(month_name.lower())
+        if month is None:
+            return None
+
+    try:
+        moment = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+    except ValueError:
+        return None
+    return moment, zone
+
+
+def _zone_offsets(zone: str) -> Tuple[timezone, ...]:
+    """시간대 문자열이 뜻할 수 있는 오프셋들 (여러 개면 앞의 것이 기본값). 알 수 없으면 빈 튜플"""
+    zone = zone.upper()
+    hours = TAKEOUT_TIMEZONE_ABBREVIATIONS.get(zone)
+    if hours is not None:
+        return (timezone(timedelta(hours=hours)),)
+    if zone in TAKEOUT_AMBIGUOUS_TIMEZONES:
+        return tuple(timezone(timedelta(hours=hours)) for hours in TAKEOUT_AMBIGUOUS_TIMEZONES[zone])
+    match = _OFFSET.match(zone)
+    if match is None:
+        return ()
+    sign, hours, minutes = match.groups()
+    delta = timedelta(hours=int(hours), minutes=int(minutes or 0))
+    return (timezone(-delta if sign == "-" else delta),)
+
+
+class TakeoutHtmlParser(HTMLParser):
+    """
+    Takeout 시청 기록 HTML(watch-history.html)을 청크 단위로 받아 항목을 하나씩 돌려주는 증분 파서.
+    JSON 시청 기록과 같은 형식의 dict({"title", "subtitles": [{"name"}], "time"})를 만들어
+    같은 전처리 경로(DataPreprocessor)를 사용합니다. JsonArrayParser와 같은 feed()/close() 인터페이스입니다.
+
+    항목 하나는 다음과 같은 content-cell입니다:
+        <div class="content-cell ... mdl-typography--body-1">
+            <a href="https://www.youtube.com/watch?v=...">제목</a>을(를) 시청했습니다.<br>
+            <a href="https://www.youtube.com/channel/...">채널명</a><br>
+            2025. 2. 13. 오후 1:52:46 KST<br>
+        </div>
+    채널 링크가 없는 항목(삭제된 동영상, 광고 등)은 JSON의 subtitles가 없는 항목처럼 채널 없이 반환됩니다.
+    시각은 times(TakeoutTimes)로 해석하며, 해석하지 못한 항목은 time이 None입니다.
+    """
+
+    def __init__(self, times: Optional[TakeoutTimes] = None):
+        super().__init__(convert_charrefs=True)
+        self.times = times if times is not None else TakeoutTimes()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._entries: List[Dict[str, Any]] = []
+        self._cell_depth = 0  # 항목 셀 안의 div 깊이 (0이면 셀 밖)
+        self._links: List[List[str]] = []  # [href, 텍스트] 목록
+        self._link: Optional[List[str]] = None
+        self._lines: List[str] = []  # <br>로 나뉜 셀 텍스트 줄
+
+    def feed(self, data: Union[bytes, str]) -> List[Dict[str, Any]]:  # type: ignore[override]
+        """바이트 청크를 추가하고, 새로 완성된 항목들을 반환합니다."""
+        if isinstance(data, bytes):
+            data = self._text_decoder.decode(data)
+        super().feed(data)
+        entries, self._entries = self._entries, []
+        return entries
+
+    def close(self) -> List[Dict[str, Any]]:
+        """입력의 끝을 알리고 남은 항목을 반환합니다."""
+        super().feed(self._text_decoder.decode(b"", final=True))
+        super().close()
+        entries, self._entries = self._entries, []
+        return entries
+
+    def handle_starttag(self, tag: str, attrs: List[Any]) -> None:
+        if tag == "div":
+            if self._cell_depth:
+                self._cell_depth += 1
+                return
+            classes = (dict(attrs).get("class") or "").split()
+            if "content-cell" in classes and "mdl-typography--body-1" in classes:
+                self._cell_depth = 1
+                self._links = []
+                self._link = None
+                self._lines = [""]
+        elif not self._cell_depth:
+            return
+        elif tag == "a":
+            self._link = [dict(attrs).get("href") or "", ""]
+        elif tag == "br":
+            self._lines.append("")
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._cell_depth:
+            return
+        if tag == "a" and self._link is not None:
+            self._links.append(self._link)
+            self._lines[-1] += self._link[1]
+            self._link = None
+        elif tag == "div":
+            self._cell_depth -= 1
+            if not self._cell_depth:
+                self._finish_entry()
+
+    def handle_data(self, data: str) -> None:
+        if not self._cell_depth:
+            return
+        if self._link is not None:
+            self._link[1] += data
+        else:
+            self._lines[-1] += data
+
+    def _finish_entry(self) -> None:
+        lines = [line.strip() for line in self._lines if line.strip()]
+        videos = [text for href, text in self._links if "watch" in href]
+        channels = [text for href, text in self._links if "/channel/" in href or "/@" in href or "/user/" in href]
+        if not videos or not lines:
+            return
+        entry: Dict[str, Any] = {"title": videos[0].strip(), "time": self.times.parse(lines[-1])}
+        if channels:
+            entry["subtitles"] = [{"name": channels[0].strip()}]
+        self._entries.append(entry)
+
+
+def history_parser_for(head: bytes, times: Optional[TakeoutTimes] = None) -> Union[JsonArrayParser, TakeoutHtmlParser]:
+    """시청 기록 파일 앞부분을 보고 JSON 또는 HTML 증분 파서를 만듭니다. (times는 HTML 시각 해석용)"""
+    if detect_format(head) == FORMAT_HTML:
+        return TakeoutHtmlParser(times)
+    return JsonArrayParser()
+
+
+def iter_history_entries(chunks: Iterable[bytes], times: Optional[TakeoutTimes] = None) -> Iterator[Dict[str, Any]]:
+    """시청 기록 파일(JSON 또는 HTML)의 바이트 청크에서 항목을 하나씩 반환합니다. (times는 HTML 시각 해석용)"""
+    parser = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if parser is None:
+            parser = history_parser_for(chunk, times)
+        yield from parser.feed(chunk)
+    yield from (parser or JsonArrayParser()).close()
+
+
+async def iter_history_upload(
+    upload: Any,
+    chunk_size: int = CHUNK_SIZE,
+    times: Optional[TakeoutTimes] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    UploadFile을 청크 단위로 읽으면서 청크마다 그 청크에서 완성된 시청 기록 항목들을 반환합니다. (JSON 또는 HTML, times는 HTML 시각 해석용)
+    항목마다 이벤트 루프로 돌아가지 않고 청크 단위로 받아 전처리합니다. (DataPreprocessor.preprocess_history_stream)
+
+    Raises:
+        json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+    """
+    parser = None
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        if parser is None:
+            parser = history_parser_for(chunk, times)
+        yield parser.feed(chunk)
+    yield (parser or JsonArrayParser()).close()
+
+
+class SpooledUpload:
+    """
+    요청이 끝난 뒤에도 읽을 수 있도록 임시 파일로 옮긴 업로드 (spool_upload 결과).
+    UploadFile처럼 read/seek/file/size를 쓸 수 있고, 다 쓴 뒤 close()로 임시 파일을 지웁니다. (여러 번 호출해도 됨)
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.file = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        return await asyncio.to_thread(self.file.read, size)
+
+    async def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_upload(upload: Any) -> SpooledUpload:
+    """
+    업로드 파일(UploadFile) 내용을 파싱하지 않고 그대로 임시 파일에 복사합니다. (작업 모드용)
+    UploadFile은 응답을 보내면 닫히므로 응답 뒤에 파싱하려면 먼저 옮겨 둬야 합니다. 복사는 스레드에서 실행합니다.
+    """
+    def copy() -> str:
+        spool = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+        try:
+            with spool:
+                upload.file.seek(0)
+                shutil.copyfileobj(upload.file, spool, CHUNK_SIZE)
+        except BaseException:
+            os.unlink(spool.name)
+            raise
+        return spool.name
+
+    path = await asyncio.to_thread(copy)
+    return SpooledUpload(path, os.path.getsize(path))
+
+
+def _iter_member_chunks(member: BinaryIO) -> Iterator[bytes]:
+    while True:
+        chunk = member.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _member_kind(name: str) -> Optional[str]:
+    base = posixpath.basename(name).lower()
+    if base in TAKEOUT_HISTORY_NAMES:
+        return "history"
+    if base in TAKEOUT_SUBSCRIPTIONS_NAMES:
+        return "subscriptions"
+    return None
+
+
+def parse_subscriptions(data: bytes) -> Any:
+    """
+    구독 정보를 읽습니다. JSON이면 그대로, 아니면 Takeout 구독정보 CSV로 보고 행({열 이름: 값}) 목록을 반환합니다.
+
+    Raises:
+        json.JSONDecodeError: JSON 형식이 올바르지 않은 경우
+    """
+    text = data.decode("utf-8-sig")
+    if text.lstrip()[:1] in ("[", "{", ""):
+        return json.loads(text)
+    return [row for row in csv.DictReader(io.StringIO(text, newline="")) if any(row.values())]
+
+
+def read_takeout_archive(
+    fileobj: BinaryIO,
+    archive_format: str,
+    preprocessor: Any,
+    times: Optional[TakeoutTimes] = None
+) -> TakeoutContents:
+    """
+    Takeout 압축 파일(.zip 또는 .tgz)에서 시청 기록과 구독 정보 항목을 찾아 읽습니다.
+    항목을 디스크에 풀거나 통째로 메모리에 올리지 않고, 압축을 풀면서 청크 단위로 전처리합니다.
+    동기 함수이므로 이벤트 루프 밖(스레드)에서 호출합니다.
+
+    Args:
+        fileobj: 압축 파일 (zip은 탐색 가능해야 함)
+        archive_format: FORMAT_ZIP 또는 FORMAT_TGZ
+        preprocessor: DataPreprocessor (preprocess_history_chunks 사용)
+        times: HTML 시청 기록의 시각 해석 (TakeoutTimes)
+
+    Raises:
+        TakeoutArchiveError: 압축 파일을 읽을 수 없는 경우
+        json.JSONDecodeError: 시청 기록이나 구독 정보의 JSON 형식이 올바르지 않은 경우
+    """
+    history = None
+    subscriptions = None
+    try:
+        if archive_format == FORMAT_ZIP:
+            with zipfile.ZipFile(fileobj) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+                # 같은 종류가 여러 개면 TAKEOUT_*_NAMES 순서가 앞선 항목 사용 (HTML보다 JSON 우선)
+                for info in sorted(members, key=lambda info: _name_rank(info.filename)):
+                    kind = _member_kind(info.filename)
+                    if kind == "history" and history is None:
+                        with archive.open(info) as member:
+                            history = preprocessor.preprocess_history_chunks(_iter_member_chunks(member), times)
+                    elif kind == "subscriptions" and subscriptions is None:
+                        with archive.open(info) as member:
+                            subscriptions = parse_subscriptions(member.read())
+        else:
+            # 스트리밍 모드("r|*"): 항목을 압축 파일에 들어 있는 순서대로 한 번만 읽음
+            with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+                for info in archive:
+                    if not info.isfile():
+                        continue
+                    kind = _member_kind(info.name)
+                    if kind == "history" and history is None:
+                        history = preprocessor.preprocess_history_chunks(
+                            _iter_member_chunks(archive.extractfile(info)), times
+                        )
+                    elif kind == "subscriptions" and subscriptions is None:
+                        # 구독 정보는 작으므로 한 번에 읽음
+                        subscriptions = parse_subscriptions(archive.extractfile(info).read())
+                    if history is not None and subscriptions is not None:
+                        break
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise TakeoutArchiveError(f"Takeout 압축 파일을 읽을 수 없습니다: {e}")
+
+    if history is None:
+        raise TakeoutArchiveError("Takeout 압축 파일에서 시청 기록(watch-history.json/html)을 찾을 수 없습니다.")
+    return TakeoutContents(history, subscriptions)
+
+
+def _name_rank(name: str) -> int:
+    base = posixpath.basename(name).lower()
+    for names in (TAKEOUT_HISTORY_NAMES, TAKEOUT_SUBSCRIPTIONS_NAMES):
+        if base in names:
+            return names.index(base)
+    return len(TAKEOUT_HISTORY_NAMES)
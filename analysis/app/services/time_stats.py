@@ -0,0 +1,311 @@
+# app/services/time_stats.py
+import heapq
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .history import WatchHistory
+from .sketch import SpaceSaving
+
+MS_PER_HOUR = 3600 * 1000
+MS_PER_DAY = 24 * MS_PER_HOUR
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_ONE_MS = timedelta(milliseconds=1)
+
+# 1970-01-01은 목요일 -> (epoch 기준 일 번호 + 3) % 7 이 월요일=0 기준 요일
+_EPOCH_WEEKDAY = 3
+
+# 근사 모드에서 (시, 채널) 쌍을 미리 합산하는 블록 크기 (블록 안의 정확한 집계만 임시로 유지)
+SKETCH_BLOCK_SIZE = 4096
+CHANNEL_SKETCH_SCALE = 4
+
+_views = itemgetter(1)
+_MISSING = object()
+
+
+def resolve_timezone(name: str) -> tzinfo:
+    """
+    IANA 시간대 이름(예: "Asia/Seoul", "UTC")을 tzinfo로 변환합니다.
+
+    Raises:
+        ValueError: 알 수 없는 시간대 이름인 경우
+    """
+    if name.upper() == "UTC":
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+
+def _span_offset_ms(tz: tzinfo, start_ms: int, length_ms: int) -> Optional[int]:
+    """[start_ms, start_ms + length_ms) 구간의 UTC 오프셋(ms). 구간 안에서 오프셋이 바뀌면(서머타임 전환) None"""
+    start = _EPOCH + timedelta(milliseconds=start_ms)
+    offset = start.astimezone(tz).utcoffset()
+    if (start + timedelta(milliseconds=length_ms - 1)).astimezone(tz).utcoffset() != offset:
+        return None
+    return offset // _ONE_MS
+
+
+def _hour_offsets(tz: tzinfo, utc_hours: Iterable[int]) -> Dict[int, Optional[int]]:
+    """
+    UTC 시간 번호마다의 UTC 오프셋(ms). 오프셋은 하루 단위로 먼저 계산하고,
+    전환이 있는 날만 시간 단위로 다시 계산합니다. 시간 안에서 전환되면 None.
+    """
+    day_offsets: Dict[int, Optional[int]] = {}
+    offsets = {}
+    for utc_hour in utc_hours:
+        day = utc_hour // 24
+        offset = day_offsets.get(day, _MISSING)
+        if offset is _MISSING:
+            offset = day_offsets[day] = _span_offset_ms(tz, day * MS_PER_DAY, MS_PER_DAY)
+        if offset is None:
+            offset = _span_offset_ms(tz, utc_hour * MS_PER_HOUR, MS_PER_HOUR)
+        offsets[utc_hour] = offset
+    return offsets
+
+
+def local_hour_indexes(times: Any, tz: tzinfo) -> List[int]:
+    """
+    UTC epoch 밀리초 열을 주어진 시간대의 '현지 시각 기준 epoch 시간 번호'(현지 epoch ms // 1시간)로 변환합니다.
+    시간대 변환은 항목마다가 아니라 서로 다른 UTC 시간 구간마다 한 번만 계산합니다.
+
+    Args:
+        times: UTC epoch 밀리초 배열 (WatchHistory.times)
+        tz: 변환할 시간대
+
+    Returns:
+        현지 시간 번호 리스트. 번호 // 24 는 현지 날짜(epoch 기준 일 번호), 번호 % 24 는 현지 시(0~23)
+    """
+    if tz is timezone.utc:
+        return [time_ms // MS_PER_HOUR for time_ms in times]
+
+    utc_hours = [time_ms // MS_PER_HOUR for time_ms in times]
+    offsets = _hour_offsets(tz, set(utc_hours))
+    if None not in offsets.values():
+        return [(time_ms + offsets[utc_hour]) // MS_PER_HOUR for time_ms, utc_hour in zip(times, utc_hours)]
+
+    # 서머타임 전환이 있는 시간 구간의 항목만 개별 계산
+    result = []
+    for time_ms, utc_hour in zip(times, utc_hours):
+        offset = offsets[utc_hour]
+        if offset is None:
+            offset = (_EPOCH + timedelta(milliseconds=time_ms)).astimezone(tz).utcoffset() // _ONE_MS
+        result.append((time_ms + offset) // MS_PER_HOUR)
+    return result
+
+
+class TimeAggregation:
+    """
+    시청 기록의 시간/채널 집계를 한 번에 계산해 두고 여러 해상도의 통계로 꺼내 쓰는 집계 엔진.
+
+    집계 상태:
+        hour_counts: 현지 시간 번호(local_hour_indexes 참고) -> 시청 수.
+            시간대별, 요일×시간 히트맵, 일별, 월별 통계를 모두 여기서 계산합니다.
+        hour_channel_counts: (현지 시 0~23, 채널명) -> 시청 수. 시간대별 TOP 채널과 채널별 통계에 사용합니다.
+
+    근사 모드(sketch_capacity 지정)에서는 hour_channel_counts 대신 시간대마다 크기가 고정된
+    Space-Saving 요약(hour_channel_sketches)과 전체 채널 요약(channel_sketch)을 유지합니다.
+    서로 다른 채널 수와 관계없이 채널 집계 메모리는 O(sketch_capacity)이고,
+    채널별 시청 수에는 최대 과대 추정치('error')가 함께 반환됩니다.
+
+    Example:
+        aggregation = TimeAggregation("Asia/Seoul")
+        aggregation.update(history)
+        aggregation.hourly_stats()  # extract_hourly_channel_stats와 같은 형식
+        aggregation.time_stats()    # 요일×시간, 일별, 월별, 채널별 통계
+    """
+
+    def __init__(self, timezone_name: str = "UTC", sketch_capacity: Optional[int] = None):
+        self.timezone_name = timezone_name
+        self.tz = resolve_timezone(timezone_name)
+        self.sketch_capacity = sketch_capacity
+        self.hour_counts: Counter = Counter()
+        self.hour_channel_counts: Counter = Counter()
+        self.hour_channel_sketches: Optional[List[SpaceSaving]] = None
+        self.channel_sketch: Optional[SpaceSaving] = None
+        if sketch_capacity is not None:
+            self.hour_channel_sketches = [SpaceSaving(sketch_capacity) for _ in range(24)]
+            # 전체 채널 요약은 모든 항목을 보고 더 많은 채널(TOP 20)을 반환하므로 4배 크기로 유지
+            self.channel_sketch = SpaceSaving(sketch_capacity * CHANNEL_SKETCH_SCALE)
+
+    @classmethod
+    def from_history(
+        cls,
+        history: WatchHistory,
+        timezone_name: str = "UTC",
+        sketch_capacity: Optional[int] = None
+    ) -> "TimeAggregation":
+        aggregation = cls(timezone_name, sketch_capacity)
+        aggregation.update(history)
+        return aggregation
+
+    @property
+    def approximate(self) -> bool:
+        return self.sketch_capacity is not None
+
+    def to_state(self) -> Dict[str, Any]:
+        """집계 상태를 JSON으로 저장할 수 있는 dict로 변환합니다. (from_state로 복원)"""
+        state: Dict[str, Any] = {
+            "timezone": self.timezone_name,
+            "sketch_capacity": self.sketch_capacity,
+            "hour_counts": list(self.hour_counts.items())
+        }
+        if self.approximate:
+            state["hour_channel_sketches"] = [sketch.to_state() for sketch in self.hour_channel_sketches]
+            state["channel_sketch"] = self.channel_sketch.to_state()
+        else:
+            state["hour_channel_counts"] = [
+                [hour, channel, views] for (hour, channel), views in self.hour_channel_counts.items()
+            ]
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "TimeAggregation":
+        """to_state()로 저장한 상태에서 집계를 복원합니다. 이후 update()로 새 기록을 더할 수 있습니다."""
+        aggregation = cls(state["timezone"], state["sketch_capacity"])
+        aggregation.hour_counts.update(dict(state["hour_counts"]))
+        if aggregation.approximate:
+            aggregation.hour_channel_sketches = [
+                SpaceSaving.from_state(sketch) for sketch in state["hour_channel_sketches"]
+            ]
+            aggregation.channel_sketch = SpaceSaving.from_state(state["channel_sketch"])
+        else:
+            for hour, channel, views in state["hour_channel_counts"]:
+                aggregation.hour_channel_counts[hour, channel] = views
+        return aggregation
+
+    @property
+    def total_views(self) -> int:
+        return sum(self.hour_counts.values())
+
+    def update(self, history: WatchHistory) -> None:
+        """시청 기록 전체를 집계에 더합니다. 항목 단위 처리는 시간 번호 계산과 두 번의 Counter 집계뿐입니다."""
+        if not history:
+            return
+        local_hours = local_hour_indexes(history.times, self.tz)
+        self.hour_counts.update(local_hours)
+
+        channels = history.channels
+        hours_of_day = [local_hour % 24 for local_hour in local_hours]
+        if self.approximate:
+            self._update_sketches(hours_of_day, history.channel_ids, channels)
+            return
+
+        # 채널 ID로 센 뒤 서로 다른 (시, 채널) 쌍만 채널명으로 변환
+        hour_channel_ids = Counter(zip(hours_of_day, history.channel_ids))
+        for (hour, channel_id), views in hour_channel_ids.items():
+            self.hour_channel_counts[hour, channels[channel_id]] += views
+
+    def _update_sketches(self, hours_of_day: List[int], channel_ids: Any, channels: List[str]) -> None:
+        # 블록마다 (시, 채널) 쌍을 합산한 뒤 가중치로 요약에 더함 (항목마다 요약을 갱신하는 것보다 빠름)
+        hour_sketches = self.hour_channel_sketches
+        for start in range(0, len(hours_of_day), SKETCH_BLOCK_SIZE):
+            end = start + SKETCH_BLOCK_SIZE
+            block = Counter(zip(hours_of_day[start:end], channel_ids[start:end]))
+            block_channels: Counter = Counter()
+            for (hour, channel_id), views in block.items():
+                channel = channels[channel_id]
+                hour_sketches[hour].update(channel, views)
+                block_channels[channel] += views
+            self.channel_sketch.update_counts(block_channels)
+
+    def hourly_stats(self, top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        시간대별 총 조회수와 채널별 조회수 TOP k를 반환합니다.
+
+        Returns:
+            [{'hour': 0~23, 'totalViews': int, 'categories': [{'name': 채널명, 'views': int}, ...]}, ...] 24개
+            근사 모드에서는 채널 항목마다 'error'(views의 최대 과대 추정치)가 추가됩니다.
+        """
+        hourly_totals = [0] * 24
+        for local_hour, views in self.hour_counts.items():
+            hourly_totals[local_hour % 24] += views
+
+        if self.approximate:
+            return [
+                {
+                    'hour': hour,
+                    'totalViews': hourly_totals[hour],
+                    'categories': [
+                        {'name': channel, 'views': views, 'error': error}
+                        for channel, views, error in self.hour_channel_sketches[hour].top(top_k)
+                    ]
+                }
+                for hour in range(24)
+            ]
+
+        hourly_channels: List[List[Tuple[str, int]]] = [[] for _ in range(24)]
+        for (hour, channel), views in self.hour_channel_counts.items():
+            hourly_channels[hour].append((channel, views))
+
+        result = []
+        for hour in range(24):
+            # 전체 정렬 대신 부분 선택 (동점이면 먼저 집계된 채널 우선, sorted와 같은 순서)
+            top_channels = heapq.nlargest(top_k, hourly_channels[hour], key=_views)
+            result.append({
+                'hour': hour,
+                'totalViews': hourly_totals[hour],
+                'categories': [{'name': channel, 'views': views} for channel, views in top_channels]
+            })
+        return result
+
+    def time_stats(self, top_channels: int = 20) -> Dict[str, Any]:
+        """
+        요일×시간 히트맵, 일별/월별 시청 수, 채널별 시청 수 TOP k를 반환합니다.
+
+        Returns:
+            {
+                'timezone': 시간대 이름,
+                'totalViews': 전체 시청 수,
+                'approximate': 근사 모드 여부,
+                'weekdayHourly': 7×24 리스트 (행: 월요일=0 ~ 일요일=6, 열: 0~23시),
+                'daily': [{'date': 'YYYY-MM-DD', 'views': int}, ...] (날짜 오름차순, 시청한 날만),
+                'monthly': [{'month': 'YYYY-MM', 'views': int}, ...] (월 오름차순),
+                'channels': [{'name': 채널명, 'views': int}, ...] (시청 수 내림차순)
+            }
+            근사 모드에서는 채널 항목마다 'error'(views의 최대 과대 추정치)가 추가됩니다.
+        """
+        weekday_hourly = [[0] * 24 for _ in range(7)]
+        daily_counts: Counter = Counter()
+        for local_hour, views in self.hour_counts.items():
+            day, hour = divmod(local_hour, 24)
+            weekday_hourly[(day + _EPOCH_WEEKDAY) % 7][hour] += views
+            daily_counts[day] += views
+
+        daily = []
+        monthly_counts: Dict[str, int] = {}
+        for day in sorted(daily_counts):
+            local_date = date.fromordinal(day + _EPOCH_ORDINAL)
+            views = daily_counts[day]
+            daily.append({'date': local_date.isoformat(), 'views': views})
+            month = local_date.isoformat()[:7]
+            monthly_counts[month] = monthly_counts.get(month, 0) + views
+
+        if self.approximate:
+            channel_views = [
+                {'name': channel, 'views': views, 'error': error}
+                for channel, views, error in self.channel_sketch.top(top_channels)
+            ]
+        else:
+            channel_counts: Counter = Counter()
+            for (_, channel), views in self.hour_channel_counts.items():
+                channel_counts[channel] += views
+            channel_views = [
+                {'name': channel, 'views': views}
+                for channel, views in heapq.nlargest(top_channels, channel_counts.items(), key=_views)
+            ]
+
+        return {
+            'timezone': self.timezone_name,
+            'totalViews': self.total_views,
+            'approximate': self.approximate,
+            'weekdayHourly': weekday_hourly,
+            'daily': daily,
+            'monthly': [{'month': month, 'views': views} for month, views in monthly_counts.items()],
+            'channels': channel_views
+        }
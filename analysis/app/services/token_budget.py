@@ -0,0 +1,58 @@
+# app/services/token_budget.py
+import math
+import re
+from typing import List, Sequence
+
+# 한글 음절/자모는 대략 한 글자당 토큰 1개, 그 외(영문, 숫자, 기호)는 4글자당 토큰 1개로 추정
+_WIDE_CHARS = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ぀-ヿ一-鿿]")
+
+# JSON 배열 항목 하나에 붙는 따옴표/쉼표 등의 오버헤드
+_ITEM_OVERHEAD = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 텍스트의 토큰 수를 보수적으로 추정합니다.
+
+    Args:
+        text: 토큰 수를 추정할 텍스트
+
+    Returns:
+        추정 토큰 수
+    """
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def item_tokens(item: str) -> int:
+    """JSON 배열 항목 하나(예: 동영상 제목)의 추정 토큰 수 (따옴표/쉼표 포함)"""
+    return estimate_tokens(item) + _ITEM_OVERHEAD
+
+
+def pack_batches(items: Sequence[str], budget: int, reserved_first: int = 0) -> List[List[str]]:
+    """
+    문자열 목록을 순서대로, 배치마다 추정 토큰 수가 budget을 넘지 않도록 나눕니다.
+    예산보다 큰 항목 하나는 단독 배치가 됩니다.
+
+    Args:
+        items: 나눌 문자열 목록 (예: 동영상 제목)
+        budget: 배치 하나에 들어갈 항목들의 최대 추정 토큰 수
+        reserved_first: 첫 배치에서 다른 컨텍스트(구독 채널 등)에 미리 쓰는 토큰 수
+
+    Returns:
+        배치 목록. items가 비어 있으면 빈 리스트
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    used = reserved_first
+    for item in items:
+        cost = item_tokens(item)
+        if current and used + cost > budget:
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,272 @@
+# app/tracing.py
+"""
+요청 단위 실행 추적 (trace 모드).
+
+분석 단계마다 다음을 기록하고 스트리밍 응답 마지막에 `trace` 이벤트로 전송합니다.
+    - wall: 단계 시작부터 끝까지의 경과 시간
+    - cpu: 이벤트 루프 스레드에서 이 단계의 코드가 실제로 실행된 CPU 시간
+      (동시에 실행되는 다른 단계/요청의 시간은 제외, 스레드/작업 프로세스로 넘긴 작업은 wall에만 포함)
+    - allocPeak: 단계 시작 시점 대비 할당 메모리의 최대 증가량 (tracemalloc, 근사치)
+    - llmCalls: 단계 안에서 호출한 LLM API 왕복 시간과 토큰 수 (캐시 적중 포함)
+
+단계 코루틴을 한 단계(await 사이의 동기 실행 구간)씩 직접 실행하면서 그 구간만 측정하므로
+같은 이벤트 루프에서 동시에 실행되는 단계끼리 시간이 섞이지 않습니다.
+
+profile=True면 요청이 끝날 때까지 cProfile을 켜고 결과를 TRACE_PROFILE_DIR/<request_id>.prof로 저장합니다.
+cProfile은 스레드 전체를 측정하므로 같은 시간에 처리된 다른 요청도 포함되고, 한 번에 한 요청만 프로파일링합니다.
+"""
+import asyncio
+import cProfile
+import contextvars
+import logging
+import os
+import re
+import time
+import tracemalloc
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional
+
+# cProfile 결과 저장 위치와 보관 개수 (환경 변수로 조정)
+TRACE_PROFILE_DIR = os.environ.get("TRACE_PROFILE_DIR", os.path.join(".cache", "profiles"))
+TRACE_PROFILE_MAX_FILES = int(os.environ.get("TRACE_PROFILE_MAX_FILES", "100"))
+
+TRACE_TIMING = "timing"
+TRACE_PROFILE = "profile"
+TRACE_MODES = (TRACE_TIMING, TRACE_PROFILE)
+
+_REQUEST_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_current_stage: contextvars.ContextVar[Optional["StageTrace"]] = contextvars.ContextVar("trace_stage", default=None)
+
+# tracemalloc을 켠 추적 요청 수 (0이 되면 끔. 외부에서 켠 경우에는 끄지 않음)
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+_active_profiler: Optional[cProfile.Profile] = None
+
+logger = logging.getLogger(__name__)
+
+
+class StageTrace:
+    """단계 하나의 측정값"""
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.alloc_net = 0  # 지금까지 실행된 구간의 할당 증감 합계
+        self.alloc_peak = 0
+        self.failed = False
+        self.llm_calls: List[Dict[str, Any]] = []
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data = {
+            "stage": self.name,
+            "start": round(self.start - origin, 6),
+            "wall": round(self.wall, 6),
+            "cpu": round(self.cpu, 6),
+            "allocPeak": self.alloc_peak,
+            "llmCalls": self.llm_calls
+        }
+        if self.failed:
+            data["failed"] = True
+        return data
+
+
+class _SteppedCoroutine:
+    """
+    코루틴을 await 지점 사이 구간별로 실행하면서 구간마다 CPU 시간과 할당량을 StageTrace에 더하는 awaitable.
+    asyncio Task가 보내는 값/예외(취소 포함)는 그대로 안쪽 코루틴에 전달합니다.
+    """
+
+    def __init__(self, coroutine: Any, stage: StageTrace):
+        self.coroutine = coroutine
+        self.stage = stage
+
+    def _step(self, method: Callable[[Any], Any], arg: Any) -> Any:
+        stage = self.stage
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.thread_time()
+        try:
+            return method(arg)
+        finally:
+            stage.cpu += time.thread_time() - start
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stage.alloc_peak = max(stage.alloc_peak, stage.alloc_net + peak - before)
+                stage.alloc_net += current - before
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coroutine = self.coroutine
+        method, arg = coroutine.send, None
+        while True:
+            try:
+                future = self._step(method, arg)
+            except StopIteration as e:
+                return e.value
+            try:
+                arg = yield future
+                method = coroutine.send
+            except GeneratorExit:
+                coroutine.close()
+                raise
+            except BaseException as e:
+                method, arg = coroutine.throw, e
+
+
+class RequestTrace:
+    """
+    요청 하나의 추적. start()로 시작하고 close()로 끝냅니다. (close는 여러 번 호출해도 됨)
+
+    Example:
+        trace = RequestTrace(profile=True)
+        trace.start()
+        history = await trace.run_stage("parse", preprocess_history_upload(history_file))
+        ...
+        event = await trace.finish()  # {"requestId", "wall", "cpu", "stages", "profile"}
+    """
+
+    def __init__(self, profile: bool = False, request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.profile = profile
+        self.stages: List[StageTrace] = []
+        self.started_at = 0.0
+        self.wall = 0.0
+        self.profile_path: Optional[str] = None
+        self.profile_skipped = False
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started = False
+        self._closed = False
+
+    def start(self) -> "RequestTrace":
+        """측정을 시작합니다. (tracemalloc과 cProfile은 이 요청이 끝날 때까지 켜짐)"""
+        global _tracemalloc_users, _tracemalloc_owned, _active_profiler
+        self.started_at = time.perf_counter()
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+        if self.profile:
+            if _active_profiler is None:
+                self._profiler = _active_profiler = cProfile.Profile()
+                self._profiler.enable()
+            else:
+                self.profile_skipped = True
+        self._started = True
+        return self
+
+    def close(self) -> None:
+        """측정을 멈추고 tracemalloc/cProfile을 정리합니다."""
+        global _tracemalloc_users, _tracemalloc_owned, _active_profiler
+        if not self._started or self._closed:
+            return
+        self._closed = True
+        self.wall = time.perf_counter() - self.started_at
+        if self._profiler is not None:
+            self._profiler.disable()
+            _active_profiler = None
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+    async def run_stage(self, name: str, coroutine: Awaitable[Any]) -> Any:
+        """코루틴을 name 단계로 측정하며 실행합니다. 안에서 호출한 LLM API는 이 단계에 기록됩니다."""
+        stage = StageTrace(name, time.perf_counter())
+        self.stages.append(stage)
+        token = _current_stage.set(stage)
+        try:
+            return await _SteppedCoroutine(coroutine, stage)
+        except BaseException:
+            stage.failed = True
+            raise
+        finally:
+            stage.wall = time.perf_counter() - stage.start
+            _current_stage.reset(token)
+
+    def wrap(self, name: str, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """StageGraph에 등록할 단계 함수를 측정하는 함수로 감쌉니다. (의존 단계 결과 등 인자는 그대로 전달)"""
+        def traced(**kwargs: Any) -> Awaitable[Any]:
+            return self.run_stage(name, func(**kwargs))
+        return traced
+
+    def save_profile(self) -> Optional[str]:
+        """cProfile 결과를 TRACE_PROFILE_DIR에 저장하고 경로를 반환합니다. (동기 함수, 스레드에서 호출)"""
+        if self._profiler is None:
+            return None
+        os.makedirs(TRACE_PROFILE_DIR, exist_ok=True)
+        path = profile_path(self.request_id)
+        self._profiler.dump_stats(path)
+        _prune_profiles()
+        return path
+
+    async def finish(self) -> Dict[str, Any]:
+        """측정을 끝내고 trace 이벤트 데이터를 만듭니다. profile 모드면 cProfile 결과도 저장합니다."""
+        self.close()
+        data: Dict[str, Any] = {
+            "requestId": self.request_id,
+            "wall": round(self.wall, 6),
+            # 요청 전체 CPU는 단계별 CPU의 합 (같은 시간에 처리된 다른 요청 제외)
+            "cpu": round(sum(stage.cpu for stage in self.stages), 6),
+            "stages": [stage.to_dict(self.started_at) for stage in self.stages]
+        }
+        if self._profiler is not None:
+            try:
+                self.profile_path = await asyncio.to_thread(self.save_profile)
+                data["profile"] = self.request_id
+            except OSError as e:
+                logger.error(f"프로파일 저장 실패 ({self.request_id}): {e}")
+        elif self.profile_skipped:
+            data["profile"] = None
+            data["profileSkipped"] = "다른 요청을 프로파일링하는 중이라 이 요청은 건너뛰었습니다."
+        return data
+
+
+def record_llm_call(
+    model: str,
+    mode: str,
+    seconds: float,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    cached: bool = False,
+    failed: bool = False,
+    cancelled: bool = False
+) -> None:
+    """현재 추적 중인 단계에 LLM 호출을 기록합니다. 추적 중이 아니면 아무것도 하지 않습니다."""
+    stage = _current_stage.get()
+    if stage is None:
+        return
+    call: Dict[str, Any] = {"model": model, "mode": mode, "seconds": round(seconds, 6), "cached": cached}
+    if failed:
+        call["failed"] = True
+    if cancelled:
+        call["cancelled"] = True
+    if prompt_tokens is not None:
+        call["promptTokens"] = prompt_tokens
+    if completion_tokens is not None:
+        call["completionTokens"] = completion_tokens
+    stage.llm_calls.append(call)
+
+
+def profile_path(request_id: str) -> str:
+    """요청의 cProfile 결과 파일 경로"""
+    if not _REQUEST_ID.match(request_id):
+        raise ValueError(f"Invalid request id: {request_id}")
+    return os.path.join(TRACE_PROFILE_DIR, f"{request_id}.prof")
+
+
+def _prune_profiles() -> None:
+    """오래된 프로파일부터 지워 TRACE_PROFILE_MAX_FILES개만 남깁니다."""
+    try:
+        entries = [entry for entry in os.scandir(TRACE_PROFILE_DIR) if entry.name.endswith(".prof")]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[TRACE_PROFILE_MAX_FILES:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,103 @@
+# benchmarks/coalescing.py
+"""
+중복 요청 합치기(ANALYSIS_COALESCING) 벤치마크.
+
+로컬 OpenAI 호환 스텁 서버와 분석 서버를 ANALYSIS_COALESCING=0/1로 각각 띄우고,
+재시도 폭주처럼 같은 analysis_id와 같은 업로드로 동시 요청 여러 개를 보내는 것을 반복합니다.
+    - 스텁이 받은 LLM 요청 수와 프롬프트 토큰 수 (합치기가 켜져 있으면 요청 묶음마다 요청 하나 분량)
+    - 요청 지연 시간 p50/최대와 실패 요청 수
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.coalescing [--duplicates 8] [--rounds 3] [--endpoint analysis-stream] [--entries 10000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Dict
+
+import httpx
+
+from .generator import generate_history, generate_subscriptions
+from .loadtest import LoadTest, _free_port, _start, _stop, _wait_ready, summarize
+
+
+async def measure(args: argparse.Namespace, enabled: bool, history_json: bytes, subscriptions_json: bytes) -> Dict[str, Any]:
+    """합치기 설정 하나로 서버를 띄워 요청 묶음을 rounds번 보내고 결과를 요약합니다."""
+    stub_port, server_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    base_url = f"http://127.0.0.1:{server_port}"
+    stub = _start([
+        sys.executable, "-m", "benchmarks.llm_stub", "--port", str(stub_port),
+        "--latency", str(args.stub_latency), "--seed", str(args.seed)
+    ], dict(os.environ))
+    server = None
+    try:
+        env = dict(
+            os.environ,
+            OPENAI_BASE_URL=f"{stub_url}/v1",
+            OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "stub"),
+            LLM_CACHE_ENABLED="0",
+            ANALYSIS_COALESCING="1" if enabled else "0",
+            LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING")
+        )
+        server = _start([
+            sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(server_port), "--log-level", "warning"
+        ], env)
+        await _wait_ready(f"{stub_url}/stats", stub)
+        await _wait_ready(f"{base_url}/", server)
+
+        results, elapsed = [], 0.0
+        for round_index in range(args.rounds):
+            load = LoadTest(
+                base_url, args.endpoint, history_json, subscriptions_json, args.keyword_mode, args.timezone,
+                analysis_id=f"retry-storm-{round_index}"
+            )
+            elapsed += await load.run(args.duplicates, args.duplicates, None)
+            results += load.results
+
+        async with httpx.AsyncClient() as client:
+            llm = (await client.get(f"{stub_url}/stats")).json()
+        return {"coalescing": enabled, **summarize(results, elapsed), "llm": llm}
+    finally:
+        _stop(server)
+        _stop(stub)
+
+
+def _ms(value) -> str:
+    return f"{value * 1000:8.0f}ms" if value is not None else f"{'-':>10}"
+
+
+async def run(args: argparse.Namespace) -> None:
+    history_json = json.dumps(list(generate_history(args.entries, seed=args.seed)), ensure_ascii=False).encode("utf-8")
+    subscriptions_json = json.dumps(
+        generate_subscriptions(args.subscriptions, seed=args.seed), ensure_ascii=False
+    ).encode("utf-8")
+
+    print(f"{args.endpoint}, {args.entries:,} entries, {args.rounds} rounds x {args.duplicates} identical requests")
+    print(f"{'coalescing':<12} {'requests':>8} {'failed':>6} {'p50':>10} {'max':>10} "
+          f"{'llm calls':>10} {'prompt tokens':>14}")
+    for enabled in (False, True):
+        report = await measure(args, enabled, history_json, subscriptions_json)
+        print(f"{'on' if enabled else 'off':<12} {report['requests']:>8} {report['failed']:>6} "
+              f"{_ms(report['latency']['p50'])} {_ms(report['latency']['max'])} "
+              f"{report['llm']['requests']:>10} {report['llm']['promptTokens']:>14,}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="중복 요청 합치기 벤치마크")
+    parser.add_argument("--duplicates", type=int, default=8, help="한 번에 보내는 같은 요청 수")
+    parser.add_argument("--rounds", type=int, default=3, help="요청 묶음 반복 횟수 (묶음마다 analysis_id가 다름)")
+    parser.add_argument("--endpoint", choices=("analysis-stream", "analysis"), default="analysis-stream")
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--subscriptions", type=int, default=200)
+    parser.add_argument("--keyword-mode", default="llm")
+    parser.add_argument("--timezone", default="Asia/Seoul")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="스텁 LLM 첫 토큰까지의 지연 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
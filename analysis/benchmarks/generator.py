@@ -0,0 +1,234 @@
+# benchmarks/generator.py
+"""
+벤치마크용 합성 Google Takeout 데이터 생성기.
+
+실제 시청 기록과 비슷한 특성의 watch-history.json과 구독 정보를 1천 ~ 500만 항목 규모로 생성합니다.
+    - 채널 분포 혼합: 소수 채널에 몰린 멱법칙(Zipf형) 시청, 롱테일 균등 분포 시청, 같은 채널 연속 시청(몰아보기)
+    - 광고 항목 (subtitles 없이 details에 "출처: Google 광고"), 삭제된 동영상 항목 (titleUrl/subtitles 없음)
+    - 시각 형식 혼합: 밀리초가 있는 형식("...T13:52:46.874Z")과 없는 형식("...T13:52:46Z")
+    - 하루 중 시청 시간대 편중 (저녁/밤에 많음), 최신 기록이 먼저 오는 내림차순
+같은 seed면 항상 같은 파일을 만듭니다. 항목을 하나씩 생성해 바로 쓰므로 큰 파일도 메모리를 적게 사용합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.generator <출력 디렉터리> [--entries 1000000] [--subscriptions 200] [--seed 0]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+# 항목 종류 비율
+AD_RATIO = 0.03  # 광고
+REMOVED_RATIO = 0.01  # 삭제된 동영상
+FRACTION_RATIO = 0.9  # 시각에 밀리초가 있는 항목
+
+# 채널 분포 혼합 비율 (나머지는 롱테일 균등 분포)
+POWER_LAW_RATIO = 0.6
+BINGE_RATIO = 0.2
+
+# 시간대(UTC 시)별 시청 가중치: KST 저녁~새벽(UTC 10~17시)에 몰림
+HOUR_WEIGHTS = [3, 3, 2, 2, 2, 3, 3, 3, 4, 5, 7, 9, 10, 10, 9, 8, 6, 4, 2, 1, 1, 1, 2, 2]
+
+_TOPICS = [
+    "뉴스", "정치", "경제", "주식", "부동산", "게임", "롤", "마인크래프트", "먹방", "요리", "레시피", "여행", "브이로그",
+    "축구", "야구", "농구", "음악", "커버", "라이브", "K-POP", "아이돌", "드라마", "예능", "영화 리뷰", "코딩", "파이썬",
+    "공부", "영어", "운동", "헬스", "캠핑", "자동차", "IT", "아이폰", "리뷰", "언박싱", "ASMR", "강아지", "고양이", "과학"
+]
+_PATTERNS = [
+    "[{topic}] {word} {number}화",
+    "{topic} 총정리 | {word}",
+    "오늘의 {topic} {word} ({date})",
+    "{word}하는 법 - {topic} 초보 가이드",
+    "{topic} vs {topic2} 비교 {number}가지",
+    "【{topic}】 {word} 모음 #shorts",
+    "{topic} LIVE 🔴 {word}",
+    "How to {word_en} | {topic} tutorial part {number}",
+]
+_WORDS = ["레전드", "충격", "솔직 후기", "꿀팁", "하이라이트", "완벽 정리", "실시간", "분석", "첫 도전", "역대급", "비하인드"]
+_WORDS_EN = ["start", "win", "cook", "travel", "learn fast", "build", "review", "fix"]
+_CHANNEL_SUFFIXES = ["TV", "채널", "Official", "NEWS", "스튜디오", "Games", "Kitchen", "Vlog", "Music", "랩"]
+
+
+def make_channels(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """채널 목록 ({"name", "id"}). 앞쪽 채널일수록 멱법칙 분포에서 자주 선택됩니다."""
+    rng = random.Random(seed)
+    channels = []
+    for index in range(count):
+        topic = rng.choice(_TOPICS)
+        name = f"{topic} {rng.choice(_CHANNEL_SUFFIXES)} {index}"
+        channel_id = "UC" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+                                    for _ in range(22))
+        channels.append({"name": name, "id": channel_id, "topic": topic})
+    return channels
+
+
+def _video_id(rng: random.Random) -> str:
+    return "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_") for _ in range(11))
+
+
+def _title(rng: random.Random, topic: str, moment: datetime) -> str:
+    return rng.choice(_PATTERNS).format(
+        topic=topic,
+        topic2=rng.choice(_TOPICS),
+        word=rng.choice(_WORDS),
+        word_en=rng.choice(_WORDS_EN),
+        number=rng.randrange(1, 300),
+        date=moment.strftime("%Y.%m.%d")
+    )
+
+
+def _format_time(rng: random.Random, moment: datetime) -> str:
+    if rng.random() < FRACTION_RATIO:
+        return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{rng.randrange(1000):03d}Z"
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def generate_history(
+    count: int,
+    channel_count: Optional[int] = None,
+    seed: int = 0,
+    years: float = 5.0
+) -> Iterator[Dict[str, Any]]:
+    """
+    Takeout watch-history.json 형식의 항목을 최신순으로 하나씩 생성합니다.
+
+    Args:
+        count: 항목 수
+        channel_count: 채널 수 (기본값: 항목 수에 비례, 최소 50 / 최대 50000)
+        seed: 난수 seed
+        years: 시청 기록이 걸친 기간 (년)
+    """
+    rng = random.Random(seed)
+    channels = make_channels(channel_count or min(50_000, max(50, count // 20)), seed)
+    end = datetime(2025, 2, 13, 14, 0, tzinfo=timezone.utc)
+    # 항목 사이 평균 간격 (초): 기간 전체에 고르게 분포한 뒤 시간대 가중치로 조정
+    mean_gap = years * 365 * 86400 / max(1, count)
+    moment = end
+    previous = rng.choice(channels)
+
+    for _ in range(count):
+        # 다음(더 과거) 시청 시각: 지수 분포 간격, 가중치가 낮은 시간대는 더 빨리 지나감
+        weight = HOUR_WEIGHTS[moment.hour] / 10
+        moment -= timedelta(seconds=rng.expovariate(weight / mean_gap) if mean_gap > 0 else 0)
+
+        kind = rng.random()
+        if kind < AD_RATIO:
+            yield {
+                "header": "YouTube",
+                "title": f"ad_{rng.randrange(10000):04d}_1920x1080_KR.mp4 을(를) 시청했습니다.",
+                "titleUrl": f"https://www.youtube.com/watch?v={_video_id(rng)}",
+                "time": _format_time(rng, moment),
+                "products": ["YouTube"],
+                "details": [{"name": "출처: Google 광고"}],
+                "activityControls": ["웹 및 앱 활동", "YouTube 시청 기록"]
+            }
+            continue
+        if kind < AD_RATIO + REMOVED_RATIO:
+            yield {
+                "header": "YouTube",
+                "title": f"https://www.youtube.com/watch?v={_video_id(rng)} 을(를) 시청했습니다.",
+                "time": _format_time(rng, moment),
+                "products": ["YouTube"],
+                "activityControls": ["YouTube 시청 기록"]
+            }
+            continue
+
+        mix = rng.random()
+        if mix < BINGE_RATIO:
+            channel = previous
+        elif mix < BINGE_RATIO + POWER_LAW_RATIO:
+            channel = channels[int(rng.paretovariate(1.1)) % len(channels)]
+        else:
+            channel = rng.choice(channels)
+        previous = channel
+        yield {
+            "header": "YouTube",
+            "title": f"{_title(rng, channel['topic'], moment)} 을(를) 시청했습니다.",
+            "titleUrl": f"https://www.youtube.com/watch?v={_video_id(rng)}",
+            "subtitles": [{"name": channel["name"], "url": f"https://www.youtube.com/channel/{channel['id']}"}],
+            "time": _format_time(rng, moment),
+            "products": ["YouTube"],
+            "activityControls": ["YouTube 시청 기록"]
+        }
+
+
+def generate_subscriptions(count: int, seed: int = 0, channel_count: Optional[int] = None) -> Dict[str, Any]:
+    """
+    YouTube Data API subscriptions.list 응답 형식의 구독 정보 (example_subscriptions.json과 같은 형식).
+    시청 기록에 자주 나오는 채널을 우선 구독합니다.
+    """
+    rng = random.Random(seed + 1)
+    channels = make_channels(channel_count or max(count, 50), seed)
+    picked = channels[:count // 2] + rng.sample(channels[count // 2:], min(len(channels) - count // 2, count - count // 2))
+    items = []
+    for channel in picked:
+        items.append({
+            "kind": "youtube#subscription",
+            "id": _video_id(rng) * 4,
+            "snippet": {
+                "publishedAt": f"20{rng.randrange(15, 25)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}T10:47:48.556125Z",
+                "title": channel["name"],
+                "description": f"{channel['topic']} 콘텐츠를 올립니다. " * rng.randrange(0, 40),
+                "resourceId": {"kind": "youtube#channel", "channelId": channel["id"]},
+                "channelId": "UCsubscriber"
+            }
+        })
+    return {
+        "kind": "youtube#SubscriptionListResponse",
+        "pageInfo": {"totalResults": len(items), "resultsPerPage": 50},
+        "items": items
+    }
+
+
+def history_json_bytes(count: int, **options: Any) -> bytes:
+    """생성한 시청 기록 전체를 JSON 바이트로 반환합니다. (작은 규모용)"""
+    return json.dumps(list(generate_history(count, **options)), ensure_ascii=False).encode("utf-8")
+
+
+def write_history(path: str, count: int, **options: Any) -> int:
+    """시청 기록을 파일에 한 항목씩 씁니다. 쓴 바이트 수를 반환합니다."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("[")
+        for index, entry in enumerate(generate_history(count, **options)):
+            file.write(",\n" if index else "\n")
+            file.write(json.dumps(entry, ensure_ascii=False))
+        file.write("\n]\n")
+    return os.path.getsize(path)
+
+
+def write_subscriptions(directory: str, count: int, seed: int = 0, channel_count: Optional[int] = None) -> None:
+    """subscriptions.json(API 형식)과 subscriptions.csv(Takeout 형식)를 씁니다."""
+    data = generate_subscriptions(count, seed, channel_count)
+    with open(os.path.join(directory, "subscriptions.json"), "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+    with open(os.path.join(directory, "subscriptions.csv"), "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["채널 ID", "채널 URL", "채널 제목"])
+        for item in data["items"]:
+            channel_id = item["snippet"]["resourceId"]["channelId"]
+            writer.writerow([channel_id, f"http://www.youtube.com/channel/{channel_id}", item["snippet"]["title"]])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 Takeout 데이터를 생성합니다.")
+    parser.add_argument("directory", help="출력 디렉터리 (watch-history.json, subscriptions.json/csv)")
+    parser.add_argument("--entries", type=int, default=100_000, help="시청 기록 항목 수 (1000 ~ 5000000)")
+    parser.add_argument("--subscriptions", type=int, default=200, help="구독 채널 수")
+    parser.add_argument("--channels", type=int, default=None, help="채널 수 (기본값: 항목 수에 비례)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    channel_count = args.channels or min(50_000, max(50, args.entries // 20))
+    size = write_history(
+        os.path.join(args.directory, "watch-history.json"), args.entries, channel_count=channel_count, seed=args.seed
+    )
+    write_subscriptions(args.directory, args.subscriptions, args.seed, channel_count)
+    print(f"{args.entries:,} entries ({size / 1024 / 1024:.1f} MiB), {args.subscriptions} subscriptions -> {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
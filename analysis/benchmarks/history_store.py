@@ -0,0 +1,85 @@
+# benchmarks/history_store.py
+"""
+시청 기록 저장소(app.services.history_store) 벤치마크.
+
+같은 업로드를 다시 분석할 때 업로드를 파싱/전처리하는 경우와 저장된 기록을 메모리 매핑해 읽는 경우를 비교합니다.
+    - 파싱 (preprocess_uploads, 읽으면서 업로드 해시 계산, 저장소 사용 안 함)
+    - 저장 (HistoryStore.save)
+    - 읽기 (HistoryStore.load)
+    - 읽은 기록(메모리 매핑한 열)과 파싱한 기록(array 열)의 시간 집계 시간
+    - 결과가 같은지 확인 (다르면 AssertionError)
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.history_store [항목 수]
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.services.analysis_service import preprocess_uploads
+from app.services.analyzer import DataAnalyzer
+from app.services.history_store import HistoryStore
+
+from .generator import generate_subscriptions, history_json_bytes
+from .offload import MemoryUpload, same_history
+
+REPEAT = 5
+
+
+async def best_of(coroutine_factory):
+    """(마지막 결과, REPEAT번 실행 중 최소 소요 시간)"""
+    best = float("inf")
+    result = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = await coroutine_factory()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+async def run(count: int) -> None:
+    data = history_json_bytes(count)
+    subscriptions = json.dumps(generate_subscriptions(max(50, count // 100))).encode("utf-8")
+    analyzer = DataAnalyzer()
+    print(f"{count:,} entries, {len(data) / 1024 / 1024:.1f} MiB upload")
+    print(f"{'case':<28} {'time':>9}")
+
+    def uploads():
+        return MemoryUpload(data), MemoryUpload(subscriptions)
+
+    (parsed, parsed_subscriptions, key), elapsed = await best_of(lambda: preprocess_uploads(*uploads()))
+    print(f"{'parse':<28} {elapsed * 1000:7.1f}ms")
+    # ANALYSIS_COALESCING=0이면 파싱하면서 해시를 계산하지 않음
+    key = key or hashlib.sha256(data).hexdigest()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(directory)
+        _, elapsed = await best_of(lambda: store.save(key, parsed, parsed_subscriptions))
+        size = os.path.getsize(os.path.join(directory, key + ".hist"))
+        print(f"{'save':<28} {elapsed * 1000:7.1f}ms  ({size / 1024 / 1024:.1f} MiB on disk)")
+
+        (loaded, loaded_subscriptions), elapsed = await best_of(lambda: store.load(key))
+        print(f"{'load':<28} {elapsed * 1000:7.1f}ms")
+
+        results = {}
+        for label, history in (("parsed", parsed), ("loaded", loaded)):
+            aggregation, elapsed = await best_of(lambda: analyzer.aggregate_watch_times(history, "Asia/Seoul"))
+            print(f"{'aggregate, ' + label:<28} {elapsed * 1000:7.1f}ms")
+            results[label] = (aggregation.hourly_stats(), aggregation.time_stats())
+
+        assert same_history(parsed, loaded)
+        assert parsed_subscriptions == loaded_subscriptions
+        assert results["parsed"] == results["loaded"]
+        print("results identical")
+
+
+def main(count: int = 200_000) -> None:
+    asyncio.run(run(count))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,391 @@
+# benchmarks/llm_stub.py
+"""
+부하 테스트용 로컬 OpenAI 호환 서버 (chat completions API만 구현).
+
+OpenAIClient가 사용하는 POST /v1/chat/completions를 실제 API 대신 응답합니다. 할당량을 쓰지 않고 실제 분석 경로
+(업로드 파싱 -> 집계 -> 키워드 추출 -> LLM 분석 스트리밍)를 그대로 부하 테스트할 수 있습니다.
+    - 응답 지연: 첫 토큰까지 --latency초 (±--jitter), 이후 --tokens-per-second 속도로 생성
+      (stream=false면 전체 생성 시간 후 한 번에 응답)
+    - 오류 주입: --error-rate 비율로 500, --rate-limit-rate 비율로 429 (Retry-After 포함)
+    - 한도: --rpm/--tpm을 주면 최근 1분 동안의 요청 수/토큰 수(프롬프트 + max_tokens)가 한도를 넘는 요청에 429를
+      보내고, 모든 응답에 OpenAI와 같은 x-ratelimit-{limit,remaining,reset}-{requests,tokens} 헤더를 붙입니다.
+    - response_format=json_object 요청(키워드 추출)은 입력 video_titles에서 자주 나온 단어로 키워드 JSON을 만들고,
+      그 밖의 요청(LLM 분석)은 --completion-tokens 길이의 한국어 텍스트를 반환합니다.
+    - stream=true면 --chunk-tokens 토큰씩 SSE 청크로 보내고, stream_options.include_usage면 마지막에 usage 청크 전송
+    - 토큰 수는 app.services.token_budget.estimate_tokens로 추정합니다.
+GET /stats는 지금까지 받은 요청 수와 주입한 오류 수, 동시 처리 중인 요청 수(최댓값 포함)를 반환합니다.
+POST /faults는 실행 중에 오류 비율을 바꿉니다. (예: {"errorRate": 1.0} 으로 장애를 일으켰다가 {"errorRate": 0}으로 복구)
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.llm_stub [--port 8765] [--latency 0.5] [--error-rate 0.01] [--tokens-per-second 50]
+                                  [--rpm 60] [--tpm 40000]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.token_budget import estimate_tokens
+
+_ANALYSIS_SENTENCES = [
+    "주로 저녁 9시부터 자정 사이에 가장 활발하게 시청하시네요.",
+    "평일 오후에는 짧은 영상 위주로, 주말에는 긴 영상을 몰아서 보는 패턴이 보입니다.",
+    "뉴스와 경제 채널을 꾸준히 챙겨 보시는 걸 보면 시사에 관심이 많으신 것 같아요.",
+    "게임 실황과 리뷰 영상도 자주 보셔서 새로운 콘텐츠를 찾아보는 편으로 보입니다.",
+    "같은 채널의 영상을 연달아 보는 경우가 많아 좋아하는 크리에이터가 뚜렷합니다.",
+    "심야 시간대 시청이 잦으니 수면 시간을 조금 챙기셔도 좋겠어요.",
+]
+_WORD = re.compile(r"[가-힣A-Za-z][가-힣A-Za-z0-9]+")
+_STOPWORDS = {"시청했습니다", "the", "and", "for", "shorts", "LIVE", "How", "part", "tutorial"}
+
+
+class StubConfig:
+    """스텁 서버 동작 설정"""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.0,
+        tokens_per_second: float = 50.0,
+        chunk_tokens: int = 4,
+        completion_tokens: int = 300,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.random = random.Random(seed)
+
+
+class QuotaWindow:
+    """
+    최근 1분 동안 사용한 양을 세는 한도 (OpenAI의 RPM/TPM 한도 흉내)
+    limit이 0이면 제한하지 않습니다.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._used: deque = deque()  # (시각, 사용량)
+        self._total = 0
+
+    def _expire(self, now: float) -> None:
+        while self._used and self._used[0][0] <= now - self.WINDOW:
+            self._total -= self._used.popleft()[1]
+
+    def remaining(self, now: float) -> int:
+        self._expire(now)
+        return max(0, self.limit - self._total)
+
+    def allows(self, now: float, amount: int) -> bool:
+        return self.limit <= 0 or self.remaining(now) >= amount
+
+    def reset_after(self, now: float, amount: int) -> float:
+        """amount만큼 쓸 수 있게 될 때까지 남은 시간(초)"""
+        if self.limit <= 0:
+            return 0.0
+        self._expire(now)
+        excess = self._total + amount - self.limit
+        if excess <= 0:
+            return 0.0
+        for used_at, used in self._used:
+            excess -= used
+            if excess <= 0:
+                return max(0.0, used_at + self.WINDOW - now)
+        return self.WINDOW
+
+    def use(self, now: float, amount: int) -> None:
+        if self.limit > 0:
+            self._used.append((now, amount))
+            self._total += amount
+
+    def headers(self, now: float, kind: str) -> Dict[str, str]:
+        """x-ratelimit-* 헤더. reset은 가장 오래된 사용분이 빠져 한도가 다시 늘어날 때까지의 시간"""
+        if self.limit <= 0:
+            return {}
+        remaining = self.remaining(now)
+        reset = self._used[0][0] + self.WINDOW - now if self._used else 0.0
+        return {
+            f"x-ratelimit-limit-{kind}": str(self.limit),
+            f"x-ratelimit-remaining-{kind}": str(remaining),
+            f"x-ratelimit-reset-{kind}": f"{max(0.0, reset):.3f}s"
+        }
+
+
+class StubStats:
+    """받은 요청과 주입한 오류 집계 (GET /stats)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.streamed = 0
+        self.server_errors = 0
+        self.rate_limited = 0
+        self.quota_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "streamed": self.streamed,
+            "serverErrors": self.server_errors,
+            "rateLimited": self.rate_limited,
+            "quotaLimited": self.quota_limited,
+            "promptTokens": self.prompt_tokens,
+            "completionTokens": self.completion_tokens,
+            "inFlight": self.in_flight,
+            "peakInFlight": self.peak_in_flight
+        }
+
+
+def keyword_content(messages: List[Dict[str, Any]]) -> str:
+    """키워드 추출 요청의 video_titles/channel_names에서 자주 나온 단어 10개로 키워드 JSON을 만듭니다."""
+    counts: Counter = Counter()
+    for message in messages:
+        if message.get("role") != "user":
+            continue
+        try:
+            context = json.loads(message.get("content") or "{}")
+        except ValueError:
+            continue
+        if not isinstance(context, dict):
+            continue
+        for text in list(context.get("video_titles", [])) + list(context.get("channel_names", [])):
+            counts.update(word for word in _WORD.findall(str(text)) if word not in _STOPWORDS)
+    keywords = [{"keyword": word, "frequency": min(1000, count)} for word, count in counts.most_common(10)]
+    return json.dumps({"keywords": keywords}, ensure_ascii=False)
+
+
+def analysis_content(rng: random.Random, tokens: int) -> str:
+    """약 tokens 토큰 길이의 분석 텍스트 (2~4문단)"""
+    sentences: List[str] = []
+    while estimate_tokens(" ".join(sentences)) < tokens:
+        sentences.append(rng.choice(_ANALYSIS_SENTENCES))
+    paragraphs = max(1, min(4, len(sentences) // 2))
+    size = -(-len(sentences) // paragraphs)
+    return "\n\n".join(" ".join(sentences[index:index + size]) for index in range(0, len(sentences), size))
+
+
+def split_chunks(content: str, chunk_tokens: int) -> List[str]:
+    """content를 추정 토큰 수가 chunk_tokens 정도인 조각으로 나눕니다."""
+    chunks, current = [], ""
+    for char in content:
+        current += char
+        if estimate_tokens(current) >= chunk_tokens:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _error(status_code: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"message": message, "type": error_type, "param": None, "code": None}},
+        status_code=status_code,
+        headers=headers
+    )
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """스텁 서버 애플리케이션을 만듭니다."""
+    config = config or StubConfig()
+    stats = StubStats()
+    app = FastAPI(title="OpenAI-compatible stub")
+    app.state.config = config
+    app.state.stats = stats
+    request_quota = QuotaWindow(config.requests_per_minute)
+    token_quota = QuotaWindow(config.tokens_per_minute)
+
+    def quota_headers(now: float) -> Dict[str, str]:
+        return {**request_quota.headers(now, "requests"), **token_quota.headers(now, "tokens")}
+
+    def first_token_delay() -> float:
+        return max(0.0, config.latency + config.random.uniform(-config.jitter, config.jitter))
+
+    def generation_time(tokens: int) -> float:
+        return tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.to_dict()
+
+    @app.post("/faults")
+    async def set_faults(request: Request):
+        """실행 중에 오류 비율을 바꿉니다. {"errorRate": 0.5, "rateLimitRate": 0.1} (생략한 값은 유지)"""
+        body = await request.json()
+        if "errorRate" in body:
+            config.error_rate = float(body["errorRate"])
+        if "rateLimitRate" in body:
+            config.rate_limit_rate = float(body["rateLimitRate"])
+        return {"errorRate": config.error_rate, "rateLimitRate": config.rate_limit_rate}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        stream = bool(body.get("stream"))
+        messages = body.get("messages") or []
+        prompt_tokens = sum(estimate_tokens(str(message.get("content") or "")) for message in messages)
+        try:
+            # 한도 초과는 지연 없이 바로 거절 (요청 토큰 = 프롬프트 + 최대 출력)
+            now = time.monotonic()
+            requested = prompt_tokens + (body.get("max_tokens") or config.completion_tokens)
+            if not (request_quota.allows(now, 1) and token_quota.allows(now, requested)):
+                stats.quota_limited += 1
+                retry_after = max(request_quota.reset_after(now, 1), token_quota.reset_after(now, requested))
+                return _error(
+                    429, "Rate limit reached for requests (stub quota)", "requests",
+                    headers={"Retry-After": f"{retry_after:.3f}", **quota_headers(now)}
+                )
+            request_quota.use(now, 1)
+            token_quota.use(now, requested)
+            headers = quota_headers(now)
+
+            await asyncio.sleep(first_token_delay())
+
+            draw = config.random.random()
+            if draw < config.rate_limit_rate:
+                stats.rate_limited += 1
+                return _error(
+                    429, "Rate limit reached (injected by stub)", "requests",
+                    headers={"Retry-After": f"{config.retry_after:g}"}
+                )
+            if draw < config.rate_limit_rate + config.error_rate:
+                stats.server_errors += 1
+                return _error(500, "The server had an error (injected by stub)", "server_error")
+
+            if (body.get("response_format") or {}).get("type") == "json_object":
+                content = keyword_content(messages)
+            else:
+                content = analysis_content(config.random, body.get("max_tokens") or config.completion_tokens)
+            completion_tokens = estimate_tokens(content)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            created = int(time.time())
+            model = body.get("model", "stub")
+
+            if not stream:
+                await asyncio.sleep(generation_time(completion_tokens))
+                return JSONResponse({
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                }, headers=headers)
+
+            stats.streamed += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+            async def events() -> AsyncIterator[str]:
+                def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                    data = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    }
+                    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+                yield chunk({"role": "assistant", "content": ""})
+                for index, piece in enumerate(split_chunks(content, config.chunk_tokens)):
+                    if index:
+                        await asyncio.sleep(generation_time(config.chunk_tokens))
+                    yield chunk({"content": piece})
+                yield chunk({}, "stop")
+                if include_usage:
+                    data = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [],
+                        "usage": usage
+                    }
+                    yield f"data: {json.dumps(data)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+        finally:
+            # 스트리밍 응답은 본문 전송 전에 여기를 지나므로 in_flight는 첫 토큰까지의 동시 요청 수
+            stats.in_flight -= 1
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="부하 테스트용 로컬 OpenAI 호환 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="첫 토큰까지의 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연에 더할 균등 분포 무작위 범위 (±초)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="생성 속도 (0이면 지연 없음)")
+    parser.add_argument("--chunk-tokens", type=int, default=4, help="스트리밍 청크 하나의 토큰 수")
+    parser.add_argument("--completion-tokens", type=int, default=300, help="LLM 분석 응답 길이 (토큰)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류 비율")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 오류 비율")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 Retry-After (초)")
+    parser.add_argument("--rpm", type=int, default=0, help="분당 요청 한도 (0이면 제한 없음)")
+    parser.add_argument("--tpm", type=int, default=0, help="분당 토큰 한도 (프롬프트 + max_tokens, 0이면 제한 없음)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        chunk_tokens=args.chunk_tokens,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
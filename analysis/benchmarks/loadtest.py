@@ -0,0 +1,435 @@
+# benchmarks/loadtest.py
+"""
+분석 서버 부하 테스트.
+
+로컬 OpenAI 호환 스텁 서버(benchmarks.llm_stub)와 분석 서버(uvicorn app.main:app --workers N)를 띄우고,
+합성 Takeout 데이터(benchmarks.generator)를 목표 동시 요청 수로 실제 분석 경로에 계속 보냅니다.
+"test" analysis_id를 쓰지 않으므로 업로드 파싱, 집계, 키워드 추출, LLM 분석이 모두 실행되고 LLM 캐시는 끕니다.
+    - 처리량 (초당 완료 요청 수)과 지연 시간 p50/p95/p99/최대
+    - analysis-stream이면 첫 이벤트까지의 시간 p50/p95/p99
+    - 서버 프로세스별 최대 RSS (uvicorn 워커, 작업 프로세스 풀 포함; Linux /proc 기준)
+    - 실패 요청 (HTTP 상태 코드 또는 error 이벤트)과 스텁이 받은 LLM 요청/주입한 오류 수
+    - LLM 대신 로컬 대체 경로로 만든 결과(degraded)가 섞인 요청 수 (단계:사유별)
+--url로 이미 실행 중인 서버를 대상으로 할 수도 있습니다. (이 경우 메모리와 스텁 통계는 측정하지 않음)
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.loadtest [--workers 2] [--concurrency 16] [--requests 200 | --duration 60]
+        [--endpoint analysis-stream] [--entries 10000] [--stub-latency 0.5] [--stub-error-rate 0.01]
+        [--stub-rpm 600] [--stub-tpm 400000] [--output report.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .generator import generate_history, generate_subscriptions
+
+ENDPOINTS = ("analysis-stream", "analysis", "time-stats")
+STARTUP_TIMEOUT = 60.0
+MEMORY_SAMPLE_INTERVAL = 0.5
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """정렬하지 않은 값 목록의 q(0~100) 백분위수 (nearest-rank). 값이 없으면 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def _process_tree(pid: int) -> List[int]:
+    """pid와 모든 하위 프로세스 (Linux /proc)"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as file:
+                    pending.extend(int(child) for child in file.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _process_role(pid: int, root: int) -> str:
+    """uvicorn 슈퍼바이저/워커, 작업 프로세스 풀 등 프로세스 역할 (명령줄로 판단)"""
+    if pid == root:
+        return "server"
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as file:
+            cmdline = file.read().replace(b"\0", b" ").decode(errors="replace")
+    except OSError:
+        return "process"
+    if "resource_tracker" in cmdline:
+        return "tracker"
+    if "multiprocessing" in cmdline and "spawn_main" in cmdline:
+        return "worker" if _parent(pid) == root else "pool"
+    return "process"
+
+
+def _parent(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            # "pid (comm) state ppid ..." (comm에 공백이 있을 수 있으므로 마지막 ")" 이후를 사용)
+            return int(file.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class MemorySampler:
+    """서버 프로세스 트리의 프로세스별 최대 RSS를 주기적으로 기록합니다."""
+
+    def __init__(self, root: int):
+        self.root = root
+        self.peaks: Dict[int, Dict[str, Any]] = {}
+
+    def sample(self) -> None:
+        for pid in _process_tree(self.root):
+            rss = _rss_bytes(pid)
+            if rss is None:
+                continue
+            peak = self.peaks.get(pid)
+            if peak is None:
+                peak = self.peaks[pid] = {"pid": pid, "role": _process_role(pid, self.root), "peakRss": 0}
+            peak["peakRss"] = max(peak["peakRss"], rss)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            self.sample()
+            try:
+                await asyncio.wait_for(stop.wait(), MEMORY_SAMPLE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        self.sample()
+
+    def report(self) -> List[Dict[str, Any]]:
+        return sorted(self.peaks.values(), key=lambda peak: peak["pid"])
+
+
+class RequestResult:
+    def __init__(
+        self,
+        latency: float,
+        first_event: Optional[float],
+        error: Optional[str],
+        degraded: Optional[Dict[str, str]] = None
+    ):
+        self.latency = latency
+        self.first_event = first_event
+        self.error = error
+        self.degraded = degraded or {}  # 단계 이름 -> 대체 경로 사유
+
+
+class LoadTest:
+    """목표 동시 요청 수로 분석 요청을 보내고 요청별 결과를 모읍니다."""
+
+    def __init__(
+        self,
+        base_url: str,
+        endpoint: str,
+        history_json: bytes,
+        subscriptions_json: bytes,
+        keyword_mode: str,
+        timezone: str,
+        analysis_id: Optional[str] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.analysis_id = analysis_id  # None이면 요청마다 다른 analysis_id
+        self.endpoint = endpoint
+        self.history_json = history_json
+        self.subscriptions_json = subscriptions_json
+        self.params = {"keyword_mode": keyword_mode, "timezone": timezone}
+        self.results: List[RequestResult] = []
+        self._sequence = 0
+
+    async def request(self, client: httpx.AsyncClient) -> RequestResult:
+        self._sequence += 1
+        analysis_id = self.analysis_id or f"load-{self._sequence}"
+        url = f"{self.base_url}/api/v1/{self.endpoint}/{analysis_id}"
+        files = {
+            "history_file": ("watch-history.json", self.history_json, "application/json"),
+            "subscriptions_file": ("subscriptions.json", self.subscriptions_json, "application/json"),
+        }
+        params = self.params if self.endpoint != "time-stats" else {"timezone": self.params["timezone"]}
+        start = time.perf_counter()
+        first_event, error = None, None
+        degraded: Dict[str, str] = {}
+        try:
+            async with client.stream("POST", url, params=params, files=files) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    error = f"HTTP {response.status_code}"
+                elif self.endpoint == "analysis-stream":
+                    completed = False
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        if first_event is None:
+                            first_event = time.perf_counter() - start
+                        event = json.loads(line)
+                        if event.get("function") == "error":
+                            error = "error event"
+                        elif event.get("function") == "completion":
+                            completed = True
+                        elif "degraded" in event:
+                            degraded[event["function"]] = event["degraded"]
+                    if error is None and not completed:
+                        error = "incomplete stream"
+                else:
+                    body = await response.aread()
+                    if self.endpoint == "analysis":
+                        degraded = json.loads(body)["data"].get("degraded") or {}
+        except (httpx.HTTPError, ValueError) as e:
+            error = type(e).__name__
+        return RequestResult(time.perf_counter() - start, first_event, error, degraded)
+
+    async def run(self, concurrency: int, requests: Optional[int], duration: Optional[float]) -> float:
+        """동시 요청 concurrency개를 유지하며 requests개를 보내거나 duration초 동안 보냅니다. 경과 시간을 반환합니다."""
+        remaining = requests
+        deadline = time.perf_counter() + duration if duration else None
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+            async def user() -> None:
+                nonlocal remaining
+                while True:
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        return
+                    if remaining is not None:
+                        if remaining <= 0:
+                            return
+                        remaining -= 1
+                    self.results.append(await self.request(client))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+
+def summarize(results: List[RequestResult], elapsed: float) -> Dict[str, Any]:
+    latencies = [result.latency for result in results if result.error is None]
+    first_events = [result.first_event for result in results if result.error is None and result.first_event is not None]
+    errors: Dict[str, int] = {}
+    degraded: Dict[str, int] = {}
+    for result in results:
+        if result.error is not None:
+            errors[result.error] = errors.get(result.error, 0) + 1
+        for stage, reason in result.degraded.items():
+            degraded[f"{stage}:{reason}"] = degraded.get(f"{stage}:{reason}", 0) + 1
+    summary: Dict[str, Any] = {
+        "requests": len(results),
+        "succeeded": len(latencies),
+        "failed": len(results) - len(latencies),
+        "errors": errors,
+        "degraded": sum(1 for result in results if result.error is None and result.degraded),
+        "degradedReasons": degraded,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency": {f"p{q}": percentile(latencies, q) for q in (50, 95, 99)},
+    }
+    summary["latency"]["max"] = max(latencies) if latencies else None
+    if first_events:
+        summary["firstEvent"] = {f"p{q}": percentile(first_events, q) for q in (50, 95, 99)}
+    return summary
+
+
+def _start(command: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def _stop(process: Optional[subprocess.Popen]) -> None:
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def _wait_ready(url: str, process: subprocess.Popen) -> None:
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                stderr = process.stderr.read().decode(errors="replace") if process.stderr else ""
+                raise RuntimeError(f"{url} exited with {process.returncode}\n{stderr[-2000:]}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not start within {STARTUP_TIMEOUT:.0f}s")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    entries = list(generate_history(args.entries, seed=args.seed))
+    history_json = json.dumps(entries, ensure_ascii=False).encode("utf-8")
+    del entries
+    subscriptions_json = json.dumps(
+        generate_subscriptions(args.subscriptions, seed=args.seed), ensure_ascii=False
+    ).encode("utf-8")
+
+    stub, server, stub_url = None, None, None
+    base_url = args.url
+    try:
+        if base_url is None:
+            stub_port, server_port = _free_port(), _free_port()
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            stub = _start([
+                sys.executable, "-m", "benchmarks.llm_stub", "--port", str(stub_port),
+                "--latency", str(args.stub_latency), "--jitter", str(args.stub_jitter),
+                "--tokens-per-second", str(args.stub_tokens_per_second),
+                "--error-rate", str(args.stub_error_rate), "--rate-limit-rate", str(args.stub_rate_limit_rate),
+                "--rpm", str(args.stub_rpm), "--tpm", str(args.stub_tpm),
+                "--seed", str(args.seed)
+            ], dict(os.environ))
+            env = dict(
+                os.environ,
+                OPENAI_BASE_URL=f"{stub_url}/v1",
+                OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "stub"),
+                LLM_CACHE_ENABLED="0",
+                LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING")
+            )
+            base_url = f"http://127.0.0.1:{server_port}"
+            server = _start([
+                sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(server_port),
+                "--workers", str(args.workers), "--log-level", "warning"
+            ], env)
+            await _wait_ready(f"{stub_url}/stats", stub)
+            await _wait_ready(f"{base_url}/", server)
+
+        load = LoadTest(base_url, args.endpoint, history_json, subscriptions_json, args.keyword_mode, args.timezone)
+        # 워커마다 첫 요청의 import/연결 비용이 측정에 섞이지 않도록 미리 요청
+        await load.run(max(1, args.workers), args.warmup * max(1, args.workers), None)
+        load.results.clear()
+
+        sampler = MemorySampler(server.pid) if server is not None else None
+        stop = asyncio.Event()
+        sampling = asyncio.create_task(sampler.run(stop)) if sampler is not None else None
+        elapsed = await load.run(args.concurrency, args.requests if not args.duration else None, args.duration)
+        stop.set()
+        if sampling is not None:
+            await sampling
+
+        report = {
+            "config": {
+                "endpoint": args.endpoint,
+                "entries": args.entries,
+                "uploadBytes": len(history_json),
+                "concurrency": args.concurrency,
+                "workers": args.workers if server is not None else None,
+                "keywordMode": args.keyword_mode,
+                "stub": None if stub is None else {
+                    "latency": args.stub_latency,
+                    "jitter": args.stub_jitter,
+                    "tokensPerSecond": args.stub_tokens_per_second,
+                    "errorRate": args.stub_error_rate,
+                    "rateLimitRate": args.stub_rate_limit_rate,
+                    "rpm": args.stub_rpm,
+                    "tpm": args.stub_tpm
+                }
+            },
+            **summarize(load.results, elapsed)
+        }
+        if sampler is not None:
+            report["memory"] = sampler.report()
+        if stub_url is not None:
+            async with httpx.AsyncClient() as client:
+                report["llm"] = (await client.get(f"{stub_url}/stats")).json()
+        return report
+    finally:
+        _stop(server)
+        _stop(stub)
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value * 1000:8.0f}ms" if value is not None else f"{'-':>10}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    config = report["config"]
+    print(f"{config['endpoint']}: {config['entries']:,} entries ({config['uploadBytes'] / 1024 / 1024:.1f} MiB), "
+          f"concurrency {config['concurrency']}, workers {config['workers'] or '-'}, keyword_mode {config['keywordMode']}")
+    print(f"requests   {report['requests']} ({report['failed']} failed{', ' if report['errors'] else ''}"
+          f"{', '.join(f'{name}: {count}' for name, count in report['errors'].items())})")
+    if report["degraded"]:
+        print(f"degraded   {report['degraded']} requests with fallback results ("
+              f"{', '.join(f'{name}: {count}' for name, count in report['degradedReasons'].items())})")
+    print(f"throughput {report['throughput']:.2f} req/s over {report['elapsed']:.1f}s")
+    latency = report["latency"]
+    print(f"latency    p50 {_ms(latency['p50'])}  p95 {_ms(latency['p95'])}  p99 {_ms(latency['p99'])}  "
+          f"max {_ms(latency['max'])}")
+    if "firstEvent" in report:
+        first = report["firstEvent"]
+        print(f"first event p50 {_ms(first['p50'])}  p95 {_ms(first['p95'])}  p99 {_ms(first['p99'])}")
+    for peak in report.get("memory", []):
+        print(f"memory     pid {peak['pid']:<7} {peak['role']:<8} peak RSS {peak['peakRss'] / 1024 / 1024:7.1f} MiB")
+    if "llm" in report:
+        llm = report["llm"]
+        print(f"llm stub   {llm['requests']} calls ({llm['streamed']} streamed), {llm['serverErrors']} injected 500, "
+              f"{llm['rateLimited']} injected 429, {llm['quotaLimited']} quota 429, "
+              f"peak {llm['peakInFlight']} concurrent")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="로컬 LLM 스텁으로 분석 서버를 부하 테스트합니다.")
+    parser.add_argument("--url", default=None, help="이미 실행 중인 분석 서버 주소 (생략하면 서버와 스텁을 직접 실행)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--requests", type=int, default=100, help="보낼 요청 수")
+    parser.add_argument("--duration", type=float, default=None, help="요청 수 대신 이 시간(초) 동안 요청")
+    parser.add_argument("--warmup", type=int, default=1, help="측정 전 워커당 요청 수")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="analysis-stream")
+    parser.add_argument("--entries", type=int, default=10_000, help="요청마다 업로드할 시청 기록 항목 수")
+    parser.add_argument("--subscriptions", type=int, default=200, help="구독 채널 수")
+    parser.add_argument("--keyword-mode", choices=("llm", "local"), default="llm")
+    parser.add_argument("--timezone", default="Asia/Seoul")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="스텁 첫 토큰 지연 (초)")
+    parser.add_argument("--stub-jitter", type=float, default=0.1, help="스텁 지연 무작위 범위 (±초)")
+    parser.add_argument("--stub-tokens-per-second", type=float, default=50.0, help="스텁 생성 속도")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="스텁 500 오류 비율")
+    parser.add_argument("--stub-rate-limit-rate", type=float, default=0.0, help="스텁 429 오류 비율")
+    parser.add_argument("--stub-rpm", type=int, default=0, help="스텁 분당 요청 한도 (0이면 제한 없음)")
+    parser.add_argument("--stub-tpm", type=int, default=0, help="스텁 분당 토큰 한도 (0이면 제한 없음)")
+    parser.add_argument("--output", default=None, help="결과를 JSON으로 저장할 파일")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/offload.py
+"""
+CPU 작업 프로세스 풀(app.services.offload) 벤치마크.
+
+업로드 파싱/전처리와 시간 집계를 이벤트 루프에서 직접 실행할 때와 프로세스 풀에서 실행할 때를 비교합니다.
+    - 결과가 같은지 확인 (다르면 AssertionError)
+    - 처리 중 이벤트 루프 지연: 10ms마다 깨어나는 코루틴이 실제로 늦게 깨어난 최대 시간
+    - 업로드 여러 개를 동시에 처리할 때의 전체 시간 (코어 수만큼 나뉘는지)
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.offload [항목 수] [동시 업로드 수]
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.services import offload
+from app.services.analysis_service import preprocess_history_upload
+from app.services.analyzer import DataAnalyzer
+from app.services.history import WatchHistory
+
+from .time_stats import make_history
+
+TICK = 0.01
+
+
+class MemoryUpload:
+    """bytes를 UploadFile처럼 청크 단위로 읽게 해 주는 업로드 대용 객체"""
+
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+        self.size = len(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    async def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+
+def make_takeout_json(history: WatchHistory) -> bytes:
+    """WatchHistory를 Takeout watch-history.json 형식으로 직렬화합니다."""
+    entries = []
+    for time_ms, channel, title in history:
+        moment = datetime.fromtimestamp(time_ms / 1000, timezone.utc)
+        entries.append({
+            "header": "YouTube",
+            "title": f"{title}을(를) 시청했습니다.",
+            "titleUrl": "https://www.youtube.com/watch?v=xxxxxxxxxxx",
+            "subtitles": [{"name": channel, "url": "https://www.youtube.com/channel/xxxxxxxx"}],
+            "time": moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{time_ms % 1000:03d}Z",
+            "products": ["YouTube"],
+            "activityControls": ["YouTube watch history"]
+        })
+    return json.dumps(entries, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+async def measure(coroutine_factory):
+    """(결과, 소요 시간, 최대 이벤트 루프 지연)"""
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            expected = time.perf_counter() + TICK
+            await asyncio.sleep(TICK)
+            max_lag = max(max_lag, time.perf_counter() - expected)
+
+    ticker_task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)  # 측정 대상보다 먼저 ticker가 대기를 시작하도록 함
+    start = time.perf_counter()
+    result = await coroutine_factory()
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker_task
+    return result, elapsed, max_lag
+
+
+def same_history(left: WatchHistory, right: WatchHistory) -> bool:
+    return list(left) == list(right)
+
+
+async def run(count: int, uploads: int) -> None:
+    data = make_takeout_json(make_history(count))
+    analyzer = DataAnalyzer()
+    print(f"{count:,} entries, {len(data) / 1024 / 1024:.1f} MiB upload, {os.cpu_count()} CPUs")
+    print(f"{'case':<36} {'time':>9} {'max loop lag':>13}")
+
+    results = {}
+    for workers in (0, uploads):
+        offload.HISTORY_PROCESS_WORKERS = workers
+        label = "inline" if workers == 0 else f"process pool ({workers} workers)"
+        if workers:
+            # 작업 프로세스 시작 비용은 제외
+            await offload.run_in_process(len, b"")
+
+        history, elapsed, lag = await measure(lambda: preprocess_history_upload(MemoryUpload(data)))
+        print(f"{'parse, ' + label:<36} {elapsed * 1000:7.0f}ms {lag * 1000:11.0f}ms")
+
+        aggregation, elapsed, lag = await measure(
+            lambda: analyzer.aggregate_watch_times(history, "Asia/Seoul")
+        )
+        print(f"{'aggregate, ' + label:<36} {elapsed * 1000:7.0f}ms {lag * 1000:11.0f}ms")
+
+        _, elapsed, lag = await measure(lambda: asyncio.gather(*(
+            preprocess_history_upload(MemoryUpload(data)) for _ in range(uploads)
+        )))
+        print(f"{f'{uploads} uploads, ' + label:<36} {elapsed * 1000:7.0f}ms {lag * 1000:11.0f}ms")
+
+        results[workers] = (history, aggregation.hourly_stats(), aggregation.time_stats())
+        await offload.close_process_pool()
+
+    inline, pooled = results[0], results[uploads]
+    assert same_history(inline[0], pooled[0])
+    assert inline[1:] == pooled[1:]
+    print("results identical")
+
+
+def main(count: int = 200_000, uploads: int = 4) -> None:
+    # 모든 업로드/기록이 작업 프로세스로 가도록 기준 크기를 없앰
+    offload.HISTORY_PROCESS_MIN_BYTES = 0
+    offload.HISTORY_PROCESS_MIN_ENTRIES = 0
+    asyncio.run(run(count, uploads))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    )
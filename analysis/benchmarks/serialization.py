@@ -0,0 +1,128 @@
+# benchmarks/serialization.py
+"""
+응답 직렬화(app.serialization) 벤치마크.
+
+합성 시청 기록으로 만든 실제 분석 결과로 요청 하나의 직렬화 비용을 기존 방식과 비교합니다.
+    - /analysis 응답: AnalysisData/AnalysisResult 생성 + FastAPI response_model 처리
+      (모델 -> dict -> 재검증 -> dict -> JSONResponse의 json.dumps)  vs  모델 생성 + ModelResponse
+    - 스트리밍 응답: json.dumps(event) + "\\n" 후 StreamingResponse의 UTF-8 인코딩  vs  ndjson_line
+    - 두 방식의 결과가 같은 JSON인지 확인 (다르면 AssertionError)
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.serialization [항목 수]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.models import AnalysisData, AnalysisResult
+from app.serialization import ModelResponse, ndjson_line
+from app.services.analyzer import DataAnalyzer
+from app.services.constant import DEFAULT_TIMEZONE, KEYWORD_MODE_LOCAL
+from app.services.preprocessor import DataPreprocessor
+
+from .generator import generate_history, generate_subscriptions
+
+LLM_ANALYSIS_CHARS = 1500
+LLM_DELTAS = 300  # 스트리밍 LLM 분석 조각 수
+
+
+async def make_results(count: int):
+    """시간대별 통계, 시간 통계, 키워드(로컬 추출), LLM 분석 텍스트"""
+    preprocessor = DataPreprocessor()
+    analyzer = DataAnalyzer()
+    history = await preprocessor.preprocess_history(list(generate_history(count)))
+    subscriptions = await preprocessor.preprocess_subscriptions(generate_subscriptions(200))
+    aggregation = await analyzer.aggregate_watch_times(history, DEFAULT_TIMEZONE)
+    keyword_frequency = await analyzer.extract_keywords(
+        {"history": history, "subscriptions": subscriptions}, mode=KEYWORD_MODE_LOCAL
+    )
+    llm_analysis = ("저녁 시간대에 뉴스와 게임 영상을 주로 시청합니다. " * 100)[:LLM_ANALYSIS_CHARS]
+    return aggregation.hourly_stats(), aggregation.time_stats(), keyword_frequency, llm_analysis
+
+
+def run(count: int, number: int = 200) -> None:
+    hourly_stats, time_stats, keyword_frequency, llm_analysis = asyncio.run(make_results(count))
+    field = create_model_field(name="Response_analyze_data", type_=AnalysisResult, mode="serialization")
+
+    def build() -> AnalysisResult:
+        return AnalysisResult(status="success", data=AnalysisData(
+            hourlyStats=hourly_stats,
+            keywordFrequency=keyword_frequency,
+            llmAnalysis=llm_analysis,
+            timeStats=time_stats
+        ))
+
+    async def response_before() -> bytes:
+        content = await serialize_response(field=field, response_content=build(), exclude_none=True)
+        return JSONResponse(content).body
+
+    async def response_after() -> bytes:
+        return ModelResponse(build()).body
+
+    events = [
+        {"function": "hourly_stats", "status": "success", "data": hourly_stats},
+        {"function": "time_stats", "status": "success", "data": time_stats},
+        {"function": "keyword_frequency", "status": "success",
+         "data": [{"keyword": kw.keyword, "frequency": kw.frequency} for kw in keyword_frequency]},
+    ]
+    step = max(1, len(llm_analysis) // LLM_DELTAS)
+    events += [
+        {"function": "llm_analysis_delta", "status": "success", "data": llm_analysis[index:index + step]}
+        for index in range(0, len(llm_analysis), step)
+    ]
+    events += [
+        {"function": "llm_analysis", "status": "success", "data": llm_analysis},
+        {"function": "completion", "status": "success", "message": "분석이 완료되었습니다."},
+    ]
+
+    async def stream_before() -> bytes:
+        return b"".join((json.dumps(event) + "\n").encode("utf-8") for event in events)
+
+    async def stream_after() -> bytes:
+        return b"".join(ndjson_line(event) for event in events)
+
+    asyncio.run(compare(count, len(events), number, (
+        ("/analysis response", response_before, response_after),
+        ("/analysis-stream events", stream_before, stream_after),
+    )))
+
+
+async def measure(func, number: int) -> float:
+    """func를 number번 실행하는 것을 5번 반복해 가장 빠른 회차의 1회 평균 시간(초)"""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+async def compare(count: int, event_count: int, number: int, cases) -> None:
+    for name, before, after in cases:
+        before_body, after_body = await before(), await after()
+        assert [json.loads(line) for line in before_body.splitlines()] == \
+            [json.loads(line) for line in after_body.splitlines()], name
+
+    print(f"{count:,} entries, {event_count} stream events")
+    print(f"{'':<28} {'before':>10} {'after':>10} {'speedup':>8} {'bytes before':>13} {'after':>8}")
+    for name, before, after in cases:
+        before_time = await measure(before, number)
+        after_time = await measure(after, number)
+        print(f"{name:<28} {before_time * 1e6:8.0f}us {after_time * 1e6:8.0f}us {before_time / after_time:7.1f}x "
+              f"{len(await before()):13,} {len(await after()):8,}")
+    print("results identical")
+
+
+def main(count: int = 100_000) -> None:
+    run(count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,131 @@
+# benchmarks/sketch_accuracy.py
+"""
+근사 채널 집계(Space-Saving 요약)의 정확도를 정확한 집계와 비교합니다.
+
+확인하는 보장 (위반 시 AssertionError):
+    - 요약의 모든 항목: 실제 빈도 <= 추정치 <= 실제 빈도 + error
+    - error와 error_bound는 total / capacity 이하
+    - 실제 빈도가 error_bound보다 큰 항목은 모두 요약에 있음
+    - 여러 요약을 merge한 결과도 같은 보장을 만족
+
+그 외에 시간대별 TOP3 / 전체 채널 TOP20의 재현율과 채널 카운터 수(메모리)를 출력합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.sketch_accuracy [항목 수]
+"""
+import random
+import sys
+from collections import Counter
+
+from app.services.history import WatchHistory
+from app.services.sketch import SpaceSaving
+from app.services.time_stats import TimeAggregation
+
+from .time_stats import make_history
+
+
+def check_sketch(sketch: SpaceSaving, exact: Counter) -> None:
+    assert sketch.total == sum(exact.values())
+    bound = sketch.total / sketch.capacity
+    assert sketch.error_bound <= bound
+    for item, count, error in sketch.top(len(sketch)):
+        assert exact[item] <= count <= exact[item] + error, (item, exact[item], count, error)
+        assert error <= bound
+    for item, true_count in exact.items():
+        if true_count > sketch.error_bound:
+            assert item in sketch._counts, (item, true_count, sketch.error_bound)
+
+
+def recall(approx_top, exact: Counter, k: int) -> float:
+    """정확한 TOP k 중 근사 TOP k에 포함된 비율 (k번째와 동점인 항목은 모두 정답으로 인정)"""
+    if not exact:
+        return 1.0
+    ranked = exact.most_common()
+    threshold = ranked[min(k, len(ranked)) - 1][1]
+    correct = {item for item, count in ranked if count >= threshold}
+    found = [item for item in approx_top if item in correct]
+    return len(found) / min(k, len(ranked))
+
+
+def zipf_stream(rng: random.Random, count: int, distinct: int, skew: float):
+    weights = [1 / (rank + 1) ** skew for rank in range(distinct)]
+    return rng.choices(range(distinct), weights=weights, k=count)
+
+
+def make_long_tail_history(count: int, distinct: int = 50_000, skew: float = 1.0, seed: int = 0) -> WatchHistory:
+    """make_history의 시각에 Zipf 분포 채널(긴 꼬리)을 붙인 시청 기록"""
+    rng = random.Random(seed)
+    base = make_history(count, seed=seed)
+    history = WatchHistory()
+    for time_ms, channel_rank in zip(base.times, zipf_stream(rng, count, distinct, skew)):
+        history.append(time_ms, f"channel-{channel_rank}", "")
+    return history
+
+
+def check_random_streams() -> None:
+    """분포/크기를 바꿔 가며 단일 요약, 가중치 갱신, merge의 보장을 확인합니다."""
+    rng = random.Random(1)
+    for capacity in (4, 16, 64):
+        for skew in (0.6, 1.0, 1.5):
+            stream = zipf_stream(rng, 20_000, 5_000, skew)
+
+            sketch = SpaceSaving(capacity)
+            for item in stream:
+                sketch.update(item)
+            check_sketch(sketch, Counter(stream))
+
+            weighted = SpaceSaving(capacity)
+            for start in range(0, len(stream), 1000):
+                weighted.update_counts(Counter(stream[start:start + 1000]))
+            check_sketch(weighted, Counter(stream))
+
+            parts = [stream[index::5] for index in range(5)]
+            merged = SpaceSaving(capacity)
+            for part in parts:
+                part_sketch = SpaceSaving(capacity)
+                part_sketch.update_counts(Counter(part))
+                merged.merge(part_sketch)
+            check_sketch(merged, Counter(stream))
+    print("random streams: guarantees hold (capacity 4/16/64, skew 0.6/1.0/1.5, update/weighted/merge)")
+
+
+def main(count: int = 200_000) -> None:
+    check_random_streams()
+
+    history = make_long_tail_history(count)
+    exact = TimeAggregation.from_history(history)
+    exact_hours = [Counter() for _ in range(24)]
+    for (hour, channel), views in exact.hour_channel_counts.items():
+        exact_hours[hour][channel] = views
+    exact_channels = Counter()
+    for hour_counts in exact_hours:
+        exact_channels.update(hour_counts)
+
+    print(f"{count:,} entries, {len(history.channels):,} distinct channels")
+    print(f"{'capacity':>8} {'counters':>9} {'top3 recall':>12} {'top20 recall':>13} {'max error/views':>16}")
+    print(f"{'exact':>8} {len(exact.hour_channel_counts):>9,} {1.0:>12.3f} {1.0:>13.3f} {0.0:>16.4f}")
+    for capacity in (8, 16, 32, 64, 128, 256):
+        approx = TimeAggregation.from_history(history, sketch_capacity=capacity)
+        assert approx.hourly_stats() and [h['totalViews'] for h in approx.hourly_stats()] == \
+            [h['totalViews'] for h in exact.hourly_stats()]
+
+        for hour in range(24):
+            check_sketch(approx.hour_channel_sketches[hour], exact_hours[hour])
+        check_sketch(approx.channel_sketch, exact_channels)
+
+        hourly_recall = sum(
+            recall([item['name'] for item in stat['categories']], exact_hours[stat['hour']], 3)
+            for stat in approx.hourly_stats()
+        ) / 24
+        channels = approx.time_stats()['channels']
+        channel_recall = recall([item['name'] for item in channels], exact_channels, 20)
+        counters = sum(len(sketch) for sketch in approx.hour_channel_sketches) + len(approx.channel_sketch)
+        relative_error = max(
+            item['error'] / item['views']
+            for stat in approx.hourly_stats() for item in stat['categories']
+        )
+        print(f"{capacity:>8} {counters:>9,} {hourly_recall:>12.3f} {channel_recall:>13.3f} {relative_error:>16.4f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
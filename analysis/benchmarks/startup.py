@@ -0,0 +1,115 @@
+# benchmarks/startup.py
+"""
+콜드 스타트 벤치마크.
+
+새 프로세스에서 다음을 측정합니다. (매번 새 인터프리터를 띄우므로 OS 파일 캐시가 따뜻한 상태의 값)
+    - import: `import app.main`에 걸리는 시간과 import 비용이 큰 모듈 (python -X importtime 기준)
+    - 서버 시작: uvicorn 프로세스를 띄운 뒤 `/`가 처음 응답할 때까지의 시간과, 그 직후 `/health` 응답 시간
+      (SERVICE_WARMUP=1/0 각각. 1이면 시작 후 백그라운드에서 openai SDK를 불러오는 중에 응답해야 함)
+    - openai SDK가 앱 import 시점에 불러와지지 않는지 확인 (불러와지면 AssertionError)
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.startup [반복 횟수]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+STARTUP_TIMEOUT = 60.0
+TOP_MODULES = 10
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(repeat: int):
+    """import app.main 시간(초) 목록과 마지막 실행의 누적 import 시간 상위 모듈"""
+    code = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+    check = "import sys, app.main; print('openai' in sys.modules)"
+    assert subprocess.run(
+        [sys.executable, "-c", check], capture_output=True, text=True, check=True
+    ).stdout.strip() == "False", "openai SDK is imported at startup"
+
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        samples.append(float(output.stdout.strip().splitlines()[-1]))
+
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules.append((int(cumulative), name.strip()))
+    # 최상위 패키지 기준 (하위 모듈은 상위 패키지 누적 시간에 포함됨)
+    top = {}
+    for cumulative, name in modules:
+        if name.split(".")[0] == name or name.startswith("app."):
+            top[name] = max(top.get(name, 0), cumulative)
+    return samples, sorted(top.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]
+
+
+def _get(url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=5) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def measure_server(warmup: bool):
+    """(uvicorn 시작부터 / 첫 응답까지의 시간, 직후 /health 응답 시간 목록) 초 단위"""
+    port = _free_port()
+    env = dict(os.environ, SERVICE_WARMUP="1" if warmup else "0", LOG_LEVEL="WARNING")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            if time.perf_counter() - start > STARTUP_TIMEOUT:
+                raise RuntimeError("server did not start")
+            try:
+                _get(f"http://127.0.0.1:{port}/")
+                break
+            except OSError:
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+        health = [_get(f"http://127.0.0.1:{port}/health") for _ in range(20)]
+        return ready, health
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+
+def main(repeat: int = 5) -> None:
+    samples, modules = measure_import(repeat)
+    print(f"import app.main    min {min(samples) * 1000:7.0f}ms  median {statistics.median(samples) * 1000:7.0f}ms")
+    for name, cumulative in modules:
+        print(f"    {name:<36} {cumulative / 1000:7.0f}ms")
+    print("openai SDK not imported at startup")
+
+    for warmup in (True, False):
+        runs = [measure_server(warmup) for _ in range(repeat)]
+        ready = [run[0] for run in runs]
+        health = [latency for run in runs for latency in run[1]]
+        print(f"server start (SERVICE_WARMUP={int(warmup)})  first / response min {min(ready) * 1000:6.0f}ms  "
+              f"median {statistics.median(ready) * 1000:6.0f}ms;  /health right after  "
+              f"median {statistics.median(health) * 1000:5.1f}ms  max {max(health) * 1000:5.1f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,308 @@
+# benchmarks/suite.py
+"""
+분석 파이프라인 전체 벤치마크 모음.
+
+benchmarks.generator로 만든 합성 Takeout 데이터(같은 seed면 항상 같은 데이터)로 규모별로 다음을 측정하고
+결과를 benchmarks/results/<커밋>.json에 저장합니다. 이전 결과 파일과 비교해 느려진 항목을 표시합니다.
+    - preprocess_history: json.loads한 시청 기록 리스트 전처리 (DataPreprocessor.preprocess_history)
+    - upload_parse: 업로드 파일 스트리밍 파싱 + 전처리 (preprocess_uploads, 구독 정보 포함)
+    - preprocess_subscriptions: 구독 정보 전처리
+    - hourly_channel_stats: 시간대별 채널 통계 (DataAnalyzer.extract_hourly_channel_stats)
+    - serialize_response: /analysis 응답 모델 생성과 직렬화 (app.serialization.ModelResponse)
+    - serialize_stream: 스트리밍 응답 이벤트 직렬화 (app.serialization.ndjson_line)
+    - roundtrip_time_stats: /api/v1/time-stats 엔드포인트 왕복 (TestClient, multipart 업로드 포함)
+    - roundtrip_analysis: /api/v1/analysis 엔드포인트 왕복 (keyword_mode=local)
+      LLM 분석 호출이 있으므로 OPENAI_BASE_URL이 설정된 경우(로컬 OpenAI 호환 서버 등)에만 실행합니다.
+각 항목은 --repeat번 실행해 최솟값(비교 기준)과 중앙값, 초당 처리 항목 수(구독 정보 전처리는 구독 채널 수 기준)를 기록합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.suite [--sizes 1000,10000,100000] [--repeat 5] [--only upload_parse,...] [--compare [파일]]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.schemas.models import AnalysisData, AnalysisResult
+from app.serialization import ModelResponse, ndjson_line
+from app.services.analysis_service import preprocess_uploads
+from app.services.analyzer import DataAnalyzer
+from app.services.constant import DEFAULT_TIMEZONE, KEYWORD_MODE_LOCAL
+from app.services.preprocessor import DataPreprocessor
+
+from .generator import generate_history, generate_subscriptions
+from .offload import MemoryUpload
+
+# 결과 저장 위치 (환경 변수로 조정)
+BENCHMARK_RESULTS_DIR = os.environ.get(
+    "BENCHMARK_RESULTS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+)
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.15  # 이전 결과보다 최솟값이 이 비율 이상 늘면 느려진 것으로 표시
+SUBSCRIPTIONS_PER_ENTRIES = 100  # 시청 기록 100개당 구독 채널 1개 (최소 50, 최대 5000)
+
+
+class Workload:
+    """규모 하나의 합성 데이터 (업로드 바이트와 미리 파싱한 값)"""
+
+    def __init__(self, count: int, seed: int = 0):
+        self.count = count
+        entries = list(generate_history(count, seed=seed))
+        self.history_json = json.dumps(entries, ensure_ascii=False).encode("utf-8")
+        self.subscription_count = min(5000, max(50, count // SUBSCRIPTIONS_PER_ENTRIES))
+        self.subscriptions = generate_subscriptions(self.subscription_count, seed=seed)
+        self.subscriptions_json = json.dumps(self.subscriptions, ensure_ascii=False).encode("utf-8")
+        del entries
+
+
+def _git_commit() -> str:
+    """현재 커밋 (작업 트리에 변경이 있으면 -dirty). git을 쓸 수 없으면 "unknown\""""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+async def _measure(func: Callable[[], Awaitable[Any]], repeat: int) -> Dict[str, float]:
+    """func를 한 번 실행해 준비(캐시 등)한 뒤 repeat번 측정합니다."""
+    await func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return {"min": min(samples), "median": statistics.median(samples)}
+
+
+def _build_cases(workload: Workload) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    preprocessor = DataPreprocessor()
+    analyzer = DataAnalyzer()
+    history_data = json.loads(workload.history_json)
+    history = asyncio.run(preprocessor.preprocess_history(history_data))
+    subscriptions = asyncio.run(preprocessor.preprocess_subscriptions(workload.subscriptions))
+    aggregation = asyncio.run(analyzer.aggregate_watch_times(history, DEFAULT_TIMEZONE))
+    hourly_stats = aggregation.hourly_stats()
+    time_stats = aggregation.time_stats()
+    keyword_frequency = asyncio.run(analyzer.extract_keywords(
+        {"history": history, "subscriptions": subscriptions}, mode=KEYWORD_MODE_LOCAL
+    ))
+    events = [
+        {"function": "hourly_stats", "status": "success", "data": hourly_stats},
+        {"function": "time_stats", "status": "success", "data": time_stats},
+        {"function": "keyword_frequency", "status": "success",
+         "data": [{"keyword": kw.keyword, "frequency": kw.frequency} for kw in keyword_frequency]},
+    ] + [{"function": "llm_analysis_delta", "status": "success", "data": "분석 "}] * 200
+
+    async def preprocess_history():
+        return await preprocessor.preprocess_history(history_data)
+
+    async def upload_parse():
+        return await preprocess_uploads(
+            MemoryUpload(workload.history_json), MemoryUpload(workload.subscriptions_json)
+        )
+
+    async def preprocess_subscriptions():
+        return await preprocessor.preprocess_subscriptions(workload.subscriptions)
+
+    async def hourly_channel_stats():
+        return await analyzer.extract_hourly_channel_stats(history, DEFAULT_TIMEZONE)
+
+    async def serialize_response():
+        # analyze_data와 같은 변환 (응답 모델 생성 시 한 번 검증 후 바로 직렬화)
+        return ModelResponse(AnalysisResult(status="success", data=AnalysisData(
+            hourlyStats=hourly_stats,
+            keywordFrequency=keyword_frequency,
+            llmAnalysis="분석 결과 " * 200,
+            timeStats=time_stats
+        ))).body
+
+    async def serialize_stream():
+        return b"".join(ndjson_line(event) for event in events)
+
+    return {
+        "preprocess_history": preprocess_history,
+        "upload_parse": upload_parse,
+        "preprocess_subscriptions": preprocess_subscriptions,
+        "hourly_channel_stats": hourly_channel_stats,
+        "serialize_response": serialize_response,
+        "serialize_stream": serialize_stream,
+    }
+
+
+def _build_roundtrips(workload: Workload) -> Dict[str, Callable[[], Any]]:
+    """엔드포인트 왕복 (동기 TestClient 호출)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import history_store
+
+    # HISTORY_STORE_PATH가 설정되어 있어도 반복마다 저장소에 쓰지 않도록 끔 (저장소에서 읽는 비용은 benchmarks.history_store)
+    history_store.HISTORY_STORE_PATH = ""
+    client = TestClient(app)
+
+    def files():
+        return {
+            "history_file": ("watch-history.json", io.BytesIO(workload.history_json), "application/json"),
+            "subscriptions_file": ("subscriptions.json", io.BytesIO(workload.subscriptions_json), "application/json"),
+        }
+
+    def roundtrip_time_stats():
+        response = client.post("/api/v1/time-stats/benchmark", files=files())
+        response.raise_for_status()
+        return response.content
+
+    def roundtrip_analysis():
+        response = client.post(
+            "/api/v1/analysis/benchmark", params={"keyword_mode": KEYWORD_MODE_LOCAL}, files=files()
+        )
+        response.raise_for_status()
+        return response.content
+
+    cases = {"roundtrip_time_stats": roundtrip_time_stats}
+    if os.environ.get("OPENAI_BASE_URL"):
+        cases["roundtrip_analysis"] = roundtrip_analysis
+    return cases
+
+
+def _measure_sync(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    async def call():
+        return func()
+    return asyncio.run(_measure(call, repeat))
+
+
+def run(sizes: List[int], repeat: int, only: Optional[List[str]] = None, seed: int = 0) -> Dict[str, Any]:
+    """규모별로 모든 항목을 측정해 결과 dict를 반환합니다."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for count in sizes:
+        workload = Workload(count, seed)
+        print(f"\n{count:,} entries ({len(workload.history_json) / 1024 / 1024:.1f} MiB)")
+        print(f"{'case':<26} {'min':>10} {'median':>10} {'items/s':>12}")
+        cases: Dict[str, Dict[str, float]] = {}
+        measured = [(name, func, False) for name, func in _build_cases(workload).items()]
+        measured += [(name, func, True) for name, func in _build_roundtrips(workload).items()]
+        for name, func, sync in measured:
+            if only and name not in only:
+                continue
+            timing = _measure_sync(func, repeat) if sync else asyncio.run(_measure(func, repeat))
+            items = workload.subscription_count if name == "preprocess_subscriptions" else count
+            timing["itemsPerSecond"] = items / timing["min"] if timing["min"] > 0 else 0.0
+            cases[name] = timing
+            print(f"{name:<26} {timing['min'] * 1000:8.2f}ms {timing['median'] * 1000:8.2f}ms "
+                  f"{timing['itemsPerSecond']:12,.0f}")
+        results[str(count)] = cases
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": results
+    }
+
+
+def save(report: Dict[str, Any]) -> str:
+    """
+    결과를 BENCHMARK_RESULTS_DIR/<커밋>.json에 저장합니다.
+    같은 커밋의 결과가 있으면 이번에 측정한 규모/항목만 덮어씁니다. (--only, --sizes로 일부만 다시 측정한 경우)
+    """
+    os.makedirs(BENCHMARK_RESULTS_DIR, exist_ok=True)
+    path = os.path.join(BENCHMARK_RESULTS_DIR, f"{report['commit']}.json")
+    try:
+        with open(path, encoding="utf-8") as file:
+            results = json.load(file)["results"]
+    except (OSError, ValueError, KeyError):
+        results = {}
+    for size, cases in report["results"].items():
+        results.setdefault(size, {}).update(cases)
+    report = dict(report, results=results)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    return path
+
+
+def previous_report(exclude: str) -> Optional[str]:
+    """exclude를 제외한 가장 최근 결과 파일 경로"""
+    try:
+        paths = [
+            entry.path for entry in os.scandir(BENCHMARK_RESULTS_DIR)
+            if entry.name.endswith(".json") and entry.path != exclude
+        ]
+    except OSError:
+        return None
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def compare(report: Dict[str, Any], baseline_path: str, threshold: float) -> int:
+    """
+    baseline 결과와 최솟값을 비교해 출력합니다.
+
+    Returns:
+        int: threshold 이상 느려진 항목 수
+    """
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    print(f"\ncompared with {baseline['commit']} ({baseline['date']})")
+    regressions = 0
+    for size, cases in report["results"].items():
+        for name, timing in cases.items():
+            before = baseline["results"].get(size, {}).get(name)
+            if before is None or before["min"] <= 0:
+                continue
+            change = timing["min"] / before["min"] - 1
+            flag = ""
+            if change >= threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{int(size):>10,} {name:<26} {before['min'] * 1000:8.2f}ms -> {timing['min'] * 1000:8.2f}ms "
+                  f"{change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="분석 파이프라인 벤치마크를 실행하고 결과를 저장합니다.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="시청 기록 항목 수 (쉼표로 구분, 1000 ~ 5000000)")
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 측정 횟수")
+    parser.add_argument("--only", default=None, help="실행할 항목 (쉼표로 구분)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs="?", const="", default=None,
+                        help="이전 결과 파일과 비교 (파일을 생략하면 가장 최근 결과)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="느려진 것으로 표시할 최솟값 증가 비율")
+    parser.add_argument("--no-save", action="store_true", help="결과를 저장하지 않음")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    only = [name for name in args.only.split(",") if name] if args.only else None
+    report = run(sizes, max(1, args.repeat), only, args.seed)
+
+    path = None
+    if not args.no_save:
+        path = save(report)
+        print(f"\nsaved {path}")
+    if args.compare is not None:
+        baseline = args.compare or previous_report(exclude=path)
+        if baseline is None:
+            print("no previous results to compare with")
+        elif compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/takeout.py
+"""
+Takeout 압축 파일/HTML 시청 기록 수집(app.services.takeout) 벤치마크.
+
+같은 시청 기록을 watch-history.json, watch-history.html, Takeout .zip, .tgz로 만들어 업로드 경로로 읽고
+    - 모든 형식의 전처리 결과가 JSON 업로드와 같은지 확인 (다르면 AssertionError)
+    - 형식별 처리 시간과 처리량 (업로드 크기 기준 MiB/s)
+을 비교합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.takeout [항목 수]
+"""
+import asyncio
+import html
+import io
+import sys
+import tarfile
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+from app.services.analysis_service import preprocess_uploads
+from app.services.history import WatchHistory
+
+from .offload import MemoryUpload, make_takeout_json, same_history
+from .time_stats import make_history
+
+KST = timezone(timedelta(hours=9))
+SUBSCRIPTIONS_CSV = "채널 ID,채널 URL,채널 제목\nUCxxxxxxxx,http://www.youtube.com/channel/UCxxxxxxxx,channel-1\n"
+
+
+def make_takeout_html(history: WatchHistory) -> bytes:
+    """WatchHistory를 Takeout watch-history.html 형식(한국어, KST)으로 직렬화합니다."""
+    cells = []
+    for time_ms, channel, title in history:
+        moment = datetime.fromtimestamp(time_ms // 1000, KST)
+        meridiem = "오후" if moment.hour >= 12 else "오전"
+        hour = moment.hour % 12 or 12
+        cells.append(
+            '<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">'
+            '<div class="header-cell mdl-cell mdl-cell--12-col"><p class="mdl-typography--title">YouTube<br></p></div>'
+            '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">'
+            f'<a href="https://www.youtube.com/watch?v=xxxxxxxxxxx">{html.escape(title)}</a>을(를) 시청했습니다.<br>'
+            f'<a href="https://www.youtube.com/channel/xxxxxxxx">{html.escape(channel)}</a><br>'
+            f'{moment.year}. {moment.month}. {moment.day}. {meridiem} {hour}:{moment:%M:%S} KST<br></div>'
+            '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1 mdl-typography--text-right">'
+            '</div></div></div>'
+        )
+    return (
+        '<html><head><meta charset="UTF-8"><title>시청 기록</title></head>'
+        '<body><div class="mdl-grid">' + "".join(cells) + "</div></body></html>"
+    ).encode("utf-8")
+
+
+def make_zip(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tgz(members) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def truncate_ms(history: WatchHistory) -> WatchHistory:
+    """HTML 시각은 초 단위이므로 비교용 기록의 밀리초를 버립니다."""
+    truncated = WatchHistory()
+    for time_ms, channel, title in history:
+        truncated.append(time_ms - time_ms % 1000, channel, title)
+    return truncated
+
+
+async def run(count: int) -> None:
+    history = truncate_ms(make_history(count))
+    history_json = make_takeout_json(history)
+    history_html = make_takeout_html(history)
+    subscriptions = SUBSCRIPTIONS_CSV.encode("utf-8")
+    prefix = "Takeout/YouTube 및 YouTube Music/"
+    cases = {
+        "watch-history.json": history_json,
+        "watch-history.html": history_html,
+        "takeout.zip (json)": make_zip([
+            (prefix + "구독정보/구독정보.csv", subscriptions), (prefix + "시청 기록/시청 기록.json", history_json)
+        ]),
+        "takeout.zip (html)": make_zip([(prefix + "시청 기록/시청 기록.html", history_html)]),
+        "takeout.tgz (json)": make_tgz([
+            (prefix + "구독정보/구독정보.csv", subscriptions), (prefix + "시청 기록/시청 기록.json", history_json)
+        ]),
+    }
+
+    print(f"{count:,} entries")
+    print(f"{'upload':<22} {'size':>10} {'time':>9} {'throughput':>12}")
+    for name, data in cases.items():
+        start = time.perf_counter()
+        parsed, subscriptions_data, _ = await preprocess_uploads(MemoryUpload(data))
+        elapsed = time.perf_counter() - start
+        size = len(data) / 1024 / 1024
+        print(f"{name:<22} {size:8.1f}MiB {elapsed * 1000:7.0f}ms {size / elapsed:8.1f}MiB/s")
+        assert same_history(parsed, history), name
+        if "(json)" in name:
+            assert subscriptions_data == [{
+                "채널 ID": "UCxxxxxxxx", "채널 URL": "http://www.youtube.com/channel/UCxxxxxxxx", "채널 제목": "channel-1"
+            }], name
+    print("results identical")
+
+
+def main(count: int = 100_000) -> None:
+    asyncio.run(run(count))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
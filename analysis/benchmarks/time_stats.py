@@ -0,0 +1,101 @@
+# benchmarks/time_stats.py
+"""
+시간 집계 벤치마크.
+
+기존 extract_hourly_channel_stats 방식(UTC 시만 집계, 시간대별 채널 전체 정렬)과
+app.services.time_stats.TimeAggregation을 비교하고, 시간대 변환 결과를 datetime.astimezone과 대조합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.time_stats [항목 수]
+"""
+import random
+import sys
+import timeit
+from collections import Counter
+from datetime import datetime, timezone
+
+from app.services.history import WatchHistory
+from app.services.time_stats import TimeAggregation, resolve_timezone
+
+MS_PER_HOUR = 3600 * 1000
+
+
+def make_history(count: int, channels: int = 2000, seed: int = 0) -> WatchHistory:
+    """
+    5년 범위의 시청 시각과 일부 채널에 몰린 채널 분포로 WatchHistory를 생성합니다.
+    Takeout처럼 최신 기록이 먼저 오도록 시각을 내림차순으로 정렬합니다.
+    """
+    rng = random.Random(seed)
+    start = int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    span = 5 * 365 * 24 * MS_PER_HOUR
+    times = sorted((start + rng.randrange(span) for _ in range(count)), reverse=True)
+    history = WatchHistory()
+    for index, time_ms in enumerate(times):
+        channel = f"channel-{int(rng.paretovariate(1.2)) % channels}"
+        history.append(time_ms, channel, f"title-{index}")
+    return history
+
+
+def legacy_hourly_stats(history: WatchHistory):
+    """기존 방식: UTC 시 기준 (시, 채널) 집계 후 시간대마다 전체 정렬"""
+    hours = [(time_ms // MS_PER_HOUR) % 24 for time_ms in history.times]
+    hour_channel_counts = Counter(zip(hours, history.channel_ids))
+    hourly_totals = [0] * 24
+    hourly_channels = [[] for _ in range(24)]
+    for (hour, channel_id), views in hour_channel_counts.items():
+        hourly_totals[hour] += views
+        hourly_channels[hour].append((channel_id, views))
+    result = []
+    for hour in range(24):
+        channel_list = sorted(hourly_channels[hour], key=lambda x: x[1], reverse=True)
+        result.append({
+            'hour': hour,
+            'totalViews': hourly_totals[hour],
+            'categories': [{'name': history.channels[c], 'views': v} for c, v in channel_list[:3]]
+        })
+    return result
+
+
+def check_timezone(history: WatchHistory, timezone_name: str) -> None:
+    """시간대별/일별 집계가 항목마다 astimezone으로 계산한 값과 같은지 확인합니다."""
+    tz = resolve_timezone(timezone_name)
+    hourly = Counter()
+    daily = Counter()
+    for time_ms in history.times:
+        local = datetime.fromtimestamp(time_ms / 1000, tz)
+        hourly[local.hour] += 1
+        daily[local.date().isoformat()] += 1
+
+    aggregation = TimeAggregation.from_history(history, timezone_name)
+    assert [stat['totalViews'] for stat in aggregation.hourly_stats()] == [hourly[hour] for hour in range(24)]
+    assert {item['date']: item['views'] for item in aggregation.time_stats()['daily']} == daily
+
+
+def main(count: int = 200_000) -> None:
+    history = make_history(count)
+
+    # UTC 결과가 기존 방식과 동일한지, 시간대 변환(서머타임 포함)이 정확한지 먼저 확인
+    assert TimeAggregation.from_history(history).hourly_stats() == legacy_hourly_stats(history)
+    for timezone_name in ("Asia/Seoul", "America/New_York", "Asia/Kolkata", "Australia/Lord_Howe"):
+        check_timezone(history, timezone_name)
+
+    def all_views(timezone_name):
+        aggregation = TimeAggregation.from_history(history, timezone_name)
+        return aggregation.hourly_stats(), aggregation.time_stats()
+
+    cases = {
+        "legacy hourly (UTC only)": lambda: legacy_hourly_stats(history),
+        "hourly (UTC)": lambda: TimeAggregation.from_history(history).hourly_stats(),
+        "all views (UTC)": lambda: all_views("UTC"),
+        "all views (America/New_York)": lambda: all_views("America/New_York"),
+    }
+    baseline = None
+    print(f"{count:,} entries")
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        baseline = baseline or seconds
+        print(f"{name:<30} {seconds * 1000:9.1f} ms  {seconds / count * 1e9:8.0f} ns/item  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
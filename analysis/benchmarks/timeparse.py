@@ -0,0 +1,65 @@
+# benchmarks/timeparse.py
+"""
+시청 시각 파싱 마이크로 벤치마크.
+
+기존 방식(strptime 두 번 + ValueError fallback)과 app.services.timeparse를 비교합니다.
+
+실행 (analysis 디렉터리에서):
+    python -m benchmarks.timeparse [항목 수]
+"""
+import calendar
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from app.services.timeparse import parse_timestamp
+
+
+def make_timestamps(count: int, fraction_ratio: float = 0.9, seed: int = 0):
+    """Takeout과 비슷하게 대부분 밀리초가 붙은 시각 문자열을 생성합니다."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    values = []
+    for _ in range(count):
+        moment = start + timedelta(seconds=rng.randrange(5 * 365 * 86400))
+        if rng.random() < fraction_ratio:
+            values.append(moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{rng.randrange(1000):03d}Z")
+        else:
+            values.append(moment.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    return values
+
+
+def legacy_parse(time_str: str):
+    """기존 preprocess_history의 시각 처리 방식 (strptime 두 번 + ValueError fallback)"""
+    try:
+        time_obj = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        try:
+            time_obj = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%S.%fZ")
+        except ValueError:
+            return None
+    return calendar.timegm(time_obj.timetuple()) * 1000 + time_obj.microsecond // 1000
+
+
+def main(count: int = 100_000) -> None:
+    values = make_timestamps(count)
+
+    # 결과가 기존 방식과 동일한지 먼저 확인
+    expected = [legacy_parse(value) for value in values]
+    assert [parse_timestamp(value) for value in values] == expected
+
+    cases = {
+        "legacy strptime fallback": lambda: [legacy_parse(value) for value in values],
+        "parse_timestamp": lambda: [parse_timestamp(value) for value in values],
+    }
+    baseline = None
+    print(f"{count:,} timestamps")
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        baseline = baseline or seconds
+        print(f"{name:<28} {seconds * 1000:9.1f} ms  {seconds / count * 1e9:8.0f} ns/item  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
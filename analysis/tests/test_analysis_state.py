@@ -0,0 +1,185 @@
+# tests/test_analysis_state.py
+"""증분 분석 상태(AnalysisState, KeywordState, AnalysisStateStore)의 high_water_mark, 저장/복원, 동시 저장 테스트"""
+import asyncio
+import json
+from collections import Counter
+
+from app.services.analysis_state import AnalysisState, AnalysisStateStore
+from app.services.constant import KEYWORD_MODE_LLM, KEYWORD_MODE_LOCAL
+from app.services.history import WatchHistory
+from app.services.keywords import KeywordState, LocalKeywordExtractor
+from app.services.time_stats import TimeAggregation
+
+DAY_MS = 24 * 3600 * 1000
+BASE_MS = 1_739_454_766_000
+
+TITLES = ["침착맨 롤 하이라이트", "침착맨 롤 방송", "요리 브이로그", "침착맨 요리 방송"]
+
+
+def make_history(days):
+    """days일 전부터 지금까지 하루에 하나씩 (최신 항목이 앞, Takeout과 같은 순서)"""
+    history = WatchHistory()
+    for day in reversed(range(days)):
+        history.append(BASE_MS + day * DAY_MS, f"채널 {day % 3}", TITLES[day % len(TITLES)])
+    return history
+
+
+def run(state, history, mode=KEYWORD_MODE_LOCAL, digest="구독"):
+    """analysis_service가 하는 것처럼 begin -> 집계/키워드 갱신 -> commit"""
+    state.begin(history, mode, digest)
+    if state.aggregation is None:
+        state.aggregation = TimeAggregation("Asia/Seoul")
+    state.aggregation.update(state.delta)
+    state.keywords.term_counts.update(LocalKeywordExtractor().count_terms(state.keyword_history))
+    state.commit()
+
+
+def test_first_analysis_uses_whole_history():
+    state = AnalysisState()
+    history = make_history(5)
+    run(state, history)
+    assert state.delta is history
+    assert state.high_water_mark == BASE_MS + 4 * DAY_MS
+    assert state.entry_count == 5
+    assert state.aggregation.total_views == 5
+
+
+def test_reupload_only_adds_entries_after_high_water_mark():
+    state = AnalysisState()
+    run(state, make_history(5))
+    keyword_counts = Counter(state.keywords.term_counts)
+
+    # 같은 기록에 이틀치가 더해진 업로드
+    run(state, make_history(7))
+    assert len(state.delta) == 2
+    assert state.keyword_history is state.delta
+    assert state.high_water_mark == BASE_MS + 6 * DAY_MS
+    assert state.entry_count == 7
+    assert state.aggregation.total_views == 7
+    assert state.keywords.term_counts == keyword_counts + LocalKeywordExtractor().count_terms(state.delta)
+
+    # 같은 업로드를 다시 보내면 새 항목 없음
+    run(state, make_history(7))
+    assert len(state.delta) == 0
+    assert state.entry_count == 7
+    assert state.aggregation.total_views == 7
+
+
+def test_older_upload_does_not_move_high_water_mark_back():
+    state = AnalysisState()
+    run(state, make_history(7))
+    run(state, make_history(3))
+    assert len(state.delta) == 0
+    assert state.high_water_mark == BASE_MS + 6 * DAY_MS
+    assert state.entry_count == 7
+
+
+def test_keyword_mode_change_rebuilds_keywords_from_whole_history():
+    state = AnalysisState()
+    run(state, make_history(5), mode=KEYWORD_MODE_LLM, digest="구독 A")
+    history = make_history(6)
+    state.begin(history, KEYWORD_MODE_LLM, "구독 B")  # 구독 정보가 바뀜
+    assert len(state.delta) == 1
+    assert state.keyword_history is history
+    assert state.keywords.subscriptions_digest == "구독 B"
+    assert not state.keywords
+
+    # 로컬 방식은 구독 정보를 보지 않음
+    state = AnalysisState()
+    run(state, make_history(5), digest="구독 A")
+    state.begin(make_history(6), KEYWORD_MODE_LOCAL, "구독 B")
+    assert len(state.keyword_history) == 1
+
+
+def test_keyword_state_compact_and_round_trip():
+    extractor = LocalKeywordExtractor()
+    history = WatchHistory()
+    for index, title in enumerate(TITLES * 3):
+        history.append(BASE_MS + index, "채널", title)
+    term_counts = extractor.count_terms(history)
+    state = KeywordState(KEYWORD_MODE_LLM, "구독", Counter(term_counts), [
+        [("침착맨", 1), ("하이라이트", 1), ("없는 키워드", 1)],
+        [("침착맨", 1), ("요리", 1), ("브이로그", 1)],
+    ])
+    state.compact(max_terms=3, max_candidates=2)
+
+    # 후보는 실제 빈도 상위 2개 하나의 목록으로 (추출한 배치 수 유지), 용어는 빈도 상위 3개
+    assert state.partials == [[("침착맨", 2), ("요리", 1)]]
+    assert len(state.term_counts) == 3
+    assert state.term_counts.most_common(1) == term_counts.most_common(1)
+
+    restored = KeywordState.from_state(json.loads(json.dumps(state.to_state(), ensure_ascii=False)))
+    assert restored.partials == state.partials
+    assert restored.term_counts == state.term_counts
+    assert restored.matches(KEYWORD_MODE_LLM, "구독")
+    assert not restored.matches(KEYWORD_MODE_LLM, "다른 구독")
+
+
+def test_two_word_phrases_survive_round_trip():
+    state = KeywordState(KEYWORD_MODE_LOCAL, None, Counter({"침착맨": 3, ("침착맨", "롤"): 2}))
+    restored = KeywordState.from_state(json.loads(json.dumps(state.to_state())))
+    assert restored.term_counts == state.term_counts
+
+
+def test_store_round_trip(tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    key = AnalysisStateStore.make_key("사용자", "Asia/Seoul", False)
+    state = AnalysisState()
+    run(state, make_history(5))
+
+    asyncio.run(store.save(key, state))
+    restored = asyncio.run(store.load(key))
+    assert restored.high_water_mark == state.high_water_mark
+    assert restored.entry_count == 5
+    assert restored.aggregation.time_stats() == state.aggregation.time_stats()
+    assert restored.keywords.term_counts == state.keywords.term_counts
+
+    assert asyncio.run(store.load(AnalysisStateStore.make_key("사용자", "UTC", False))) is None
+
+
+def test_store_ignores_expired_and_old_version_states(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    key = AnalysisStateStore.make_key("사용자", "UTC", False)
+    state = AnalysisState()
+    run(state, make_history(2))
+
+    expired = AnalysisStateStore(path, ttl=-1)
+    asyncio.run(expired.save(key, state))
+    assert asyncio.run(expired.load(key)) is None
+
+    store = AnalysisStateStore(path)
+    store._db_set(key, json.dumps(dict(state.to_state(), version=1)), 0)
+    assert asyncio.run(store.load(key)) is None
+
+
+def test_concurrent_save_keeps_only_the_first(tmp_path):
+    """같은 상태를 불러온 두 요청 중 먼저 저장한 쪽만 남고, 버려진 요청의 새 기록은 다음 요청에서 반영됨"""
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    key = AnalysisStateStore.make_key("사용자", "Asia/Seoul", False)
+    state = AnalysisState()
+    run(state, make_history(5))
+    assert asyncio.run(store.save(key, state))
+
+    first, second = asyncio.run(store.load(key)), asyncio.run(store.load(key))
+    run(first, make_history(6))
+    run(second, make_history(8))
+    assert asyncio.run(store.save(key, first))
+    assert not asyncio.run(store.save(key, second))
+
+    latest = asyncio.run(store.load(key))
+    assert latest.entry_count == 6
+    run(latest, make_history(8))
+    assert len(latest.delta) == 2
+    assert latest.aggregation.total_views == 8
+    assert asyncio.run(store.save(key, latest))
+
+
+def test_first_save_of_a_key_conflicts_with_a_concurrent_first_save(tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.sqlite3"))
+    key = AnalysisStateStore.make_key("사용자", "UTC", False)
+    first, second = AnalysisState(), AnalysisState()
+    run(first, make_history(3))
+    run(second, make_history(4))
+    assert asyncio.run(store.save(key, first))
+    assert not asyncio.run(store.save(key, second))
+    assert asyncio.run(store.load(key)).entry_count == 3
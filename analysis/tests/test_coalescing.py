@@ -0,0 +1,149 @@
+# tests/test_coalescing.py
+"""같은 입력의 동시 요청 합치기(SingleFlight) 테스트"""
+import asyncio
+
+import pytest
+
+from app.services.coalescing import SingleFlight, request_key
+
+
+async def collect(single_flight, key, work, endpoint="analysis"):
+    return [item async for item in single_flight.follow(key, work, endpoint=endpoint)]
+
+
+def test_request_key_depends_on_endpoint_upload_and_options():
+    key = request_key("analysis", "a" * 64, analysis_id="사용자", timezone="Asia/Seoul")
+    assert key == request_key("analysis", "a" * 64, timezone="Asia/Seoul", analysis_id="사용자")
+    assert key != request_key("analysis-stream", "a" * 64, analysis_id="사용자", timezone="Asia/Seoul")
+    assert key != request_key("analysis", "b" * 64, analysis_id="사용자", timezone="Asia/Seoul")
+    assert key != request_key("analysis", "a" * 64, analysis_id="사용자", timezone="UTC")
+
+
+def test_concurrent_requests_share_one_computation():
+    calls = 0
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            yield "첫 줄"
+            await release.wait()
+            yield "둘째 줄"
+
+        single_flight = SingleFlight(grace=0)
+        first = asyncio.create_task(collect(single_flight, "key", work))
+        await asyncio.sleep(0.01)
+        # 첫 값이 나온 뒤 합류한 요청도 처음부터 받음
+        second = asyncio.create_task(collect(single_flight, "key", work))
+        other = asyncio.create_task(collect(single_flight, "other", work))
+        await asyncio.sleep(0.01)
+        assert single_flight.in_flight == 2
+        release.set()
+        results = await asyncio.gather(first, second, other)
+        assert single_flight.in_flight == 0
+        return results
+
+    assert asyncio.run(scenario()) == [["첫 줄", "둘째 줄"]] * 3
+    assert calls == 2
+
+
+def test_error_is_raised_to_every_subscriber_and_next_request_recomputes():
+    calls = 0
+
+    async def scenario():
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("분석 실패")
+            yield  # 비동기 제너레이터
+
+        async def succeeding():
+            yield "결과"
+
+        single_flight = SingleFlight(grace=0)
+        results = await asyncio.gather(
+            collect(single_flight, "key", failing), collect(single_flight, "key", failing), return_exceptions=True
+        )
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert results[0] is results[1]
+        # 끝난 계산은 목록에서 빠지므로 새로 계산
+        return await collect(single_flight, "key", succeeding)
+
+    assert asyncio.run(scenario()) == ["결과"]
+    assert calls == 1
+
+
+def test_abandoned_computation_is_cancelled_after_grace():
+    async def scenario():
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                yield "시작"
+                await asyncio.sleep(10)
+                yield "끝"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        single_flight = SingleFlight(grace=0.05)
+        subscriber = asyncio.create_task(collect(single_flight, "key", work))
+        await asyncio.sleep(0.01)
+        subscriber.cancel()  # 연결 끊김
+        with pytest.raises(asyncio.CancelledError):
+            await subscriber
+        await asyncio.sleep(0.01)
+        assert not cancelled.is_set()  # 유예 시간 동안은 계산 유지
+        assert single_flight.in_flight == 1
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return single_flight.in_flight
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_retry_within_grace_takes_over_computation():
+    calls = 0
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            yield "시작"
+            await release.wait()
+            yield "끝"
+
+        single_flight = SingleFlight(grace=0.2)
+        subscriber = asyncio.create_task(collect(single_flight, "key", work))
+        await asyncio.sleep(0.01)
+        subscriber.cancel()
+        await asyncio.sleep(0.01)
+        retry = asyncio.create_task(collect(single_flight, "key", work))
+        await asyncio.sleep(0.3)  # 유예 시간이 지나도 이어받은 요청이 있으면 계속
+        release.set()
+        return await retry
+
+    assert asyncio.run(scenario()) == ["시작", "끝"]
+    assert calls == 1
+
+
+def test_close_cancels_running_computations():
+    async def scenario():
+        async def work():
+            await asyncio.sleep(10)
+            yield "끝"
+
+        single_flight = SingleFlight()
+        subscriber = asyncio.create_task(collect(single_flight, "key", work))
+        await asyncio.sleep(0.01)
+        await single_flight.close()
+        with pytest.raises(Exception, match="취소"):
+            await subscriber
+        return single_flight.in_flight
+
+    assert asyncio.run(scenario()) == 0
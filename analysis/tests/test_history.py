@@ -0,0 +1,64 @@
+# tests/test_history.py
+"""열 단위 시청 기록 컨테이너(WatchHistory) 테스트"""
+import pickle
+
+from app.services.history import WatchHistory
+
+ENTRIES = [
+    (1_739_454_766_874, "채널 A", "영상 1"),
+    (1_739_454_700_000, "채널 B", "영상 2"),
+    (1_739_454_600_000, "채널 A", "영상 1"),
+    (1_739_454_500_000, "채널 C", "영상 3"),
+]
+
+
+def make_history() -> WatchHistory:
+    history = WatchHistory()
+    for entry in ENTRIES:
+        history.append(*entry)
+    return history
+
+
+def test_append_interns_channels_and_titles():
+    history = make_history()
+    assert len(history) == 4
+    assert list(history) == ENTRIES
+    assert history.channels == ["채널 A", "채널 B", "채널 C"]
+    assert history.titles == ["영상 1", "영상 2", "영상 3"]
+    assert list(history.channel_ids) == [0, 1, 0, 2]
+    assert list(history.title_ids) == [0, 1, 0, 2]
+
+
+def test_compact_round_trip_through_pickle():
+    history = make_history()
+    restored = WatchHistory.from_compact(pickle.loads(pickle.dumps(history.to_compact())))
+    assert list(restored) == ENTRIES
+    # 복원한 기록에도 기존 조회 테이블을 이어서 사용
+    restored.append(1, "채널 B", "영상 4")
+    assert restored.channel_ids[-1] == 1
+    assert restored.titles[-1] == "영상 4"
+
+
+def test_compact_without_titles_keeps_times_and_channels():
+    restored = WatchHistory.from_compact(make_history().to_compact(include_titles=False))
+    assert list(restored.times) == [entry[0] for entry in ENTRIES]
+    assert [restored.channels[channel_id] for channel_id in restored.channel_ids] == [entry[1] for entry in ENTRIES]
+    assert restored.titles == []
+
+
+def test_from_columns_accepts_memoryviews():
+    history = make_history()
+    view = WatchHistory.from_columns(
+        memoryview(history.times.tobytes()).cast("q"),
+        memoryview(history.channel_ids.tobytes()).cast("i"),
+        memoryview(history.title_ids.tobytes()).cast("i"),
+        history.channels,
+        history.titles
+    )
+    assert list(view) == ENTRIES
+
+
+def test_since_keeps_only_newer_entries_in_order():
+    delta = make_history().since(1_739_454_600_000)
+    assert list(delta) == ENTRIES[:2]
+    assert delta.channels == ["채널 A", "채널 B"]
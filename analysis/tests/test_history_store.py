@@ -0,0 +1,218 @@
+# tests/test_history_store.py
+"""전처리한 시청 기록 저장소(HistoryStore)의 저장/복원, 헤더 검사, 크기 제한 정리, 파싱하면서 계산하는 업로드 해시 테스트"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import struct
+import tarfile
+import zipfile
+
+import pytest
+
+from app.services import analysis_service
+from app.services.analysis_service import preprocess_uploads
+from app.services.history import WatchHistory
+from app.services.history_store import HistoryStore, StoredHistoryNotFound, is_upload_hash, timezone_key
+
+KEY_A = "a" * 64
+KEY_B = "b" * 64
+KEY_C = "c" * 64
+SUBSCRIPTIONS = [{"channel": "채널 A", "url": "https://www.youtube.com/channel/UCaaa"}]
+
+
+def make_history(size=100):
+    history = WatchHistory()
+    for index in range(size):
+        history.append(1_739_454_766_000 - index * 60_000, f"채널 {index % 7}", f"영상 {index % 13}")
+    return history
+
+
+def store_files(store):
+    return sorted(name for name in os.listdir(store.directory) if name.endswith(".hist"))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    history = make_history()
+    asyncio.run(store.save(KEY_A, history, SUBSCRIPTIONS))
+
+    loaded, subscriptions = asyncio.run(store.load(KEY_A))
+    assert list(loaded) == list(history)
+    assert loaded.channels == history.channels
+    assert loaded.titles == history.titles
+    assert subscriptions == SUBSCRIPTIONS
+    assert asyncio.run(store.load(KEY_B)) is None
+    # 임시 파일은 남지 않음
+    assert os.listdir(tmp_path) == [KEY_A + ".hist"]
+
+
+def test_empty_history_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    asyncio.run(store.save(KEY_A, WatchHistory(), None))
+    loaded, subscriptions = asyncio.run(store.load(KEY_A))
+    assert len(loaded) == 0
+    assert subscriptions is None
+
+
+def test_files_with_other_version_or_wrong_size_are_ignored(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    asyncio.run(store.save(KEY_A, make_history(), SUBSCRIPTIONS))
+    path = tmp_path / (KEY_A + ".hist")
+    data = bytearray(path.read_bytes())
+
+    struct.pack_into("<I", data, 4, 99)  # 형식 버전
+    path.write_bytes(bytes(data))
+    assert asyncio.run(store.load(KEY_A)) is None
+
+    struct.pack_into("<I", data, 4, 1)
+    path.write_bytes(bytes(data[:-5]))  # 잘린 파일
+    assert asyncio.run(store.load(KEY_A)) is None
+
+    path.write_bytes(b"AVWH")
+    assert asyncio.run(store.load(KEY_A)) is None
+
+
+def test_timezone_key_is_looked_up_after_plain_key(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    seoul, chicago = make_history(3), make_history(5)
+    asyncio.run(store.save(KEY_A, seoul, None, timezone="Asia/Seoul"))
+    asyncio.run(store.save(KEY_A, chicago, None, timezone="America/Chicago"))
+
+    assert is_upload_hash(timezone_key(KEY_A, "Asia/Seoul"))
+    assert timezone_key(KEY_A, "Asia/Seoul") != timezone_key(KEY_A, "America/Chicago")
+    assert len(asyncio.run(store.load(KEY_A, "Asia/Seoul"))[0]) == 3
+    assert len(asyncio.run(store.load(KEY_A, "America/Chicago"))[0]) == 5
+    assert asyncio.run(store.load(KEY_A)) is None
+    assert asyncio.run(store.load(KEY_A, "UTC")) is None
+
+    # 시간대와 무관하게 저장된 기록이 있으면 그것을 사용
+    asyncio.run(store.save(KEY_A, make_history(7), None))
+    assert len(asyncio.run(store.load(KEY_A, "Asia/Seoul"))[0]) == 7
+
+
+def test_eviction_removes_least_recently_used_files(tmp_path):
+    history = make_history()
+    probe = HistoryStore(str(tmp_path / "probe"))
+    asyncio.run(probe.save(KEY_A, history, None))
+    file_size = os.path.getsize(tmp_path / "probe" / (KEY_A + ".hist"))
+
+    store = HistoryStore(str(tmp_path / "store"), max_bytes=2 * file_size)
+    asyncio.run(store.save(KEY_A, history, None))
+    asyncio.run(store.save(KEY_B, history, None))
+    os.utime(os.path.join(store.directory, KEY_A + ".hist"), (1000, 1000))
+    os.utime(os.path.join(store.directory, KEY_B + ".hist"), (2000, 2000))
+    # 읽으면 사용 시각이 갱신되므로 A가 가장 최근에 사용한 파일이 됨
+    assert asyncio.run(store.load(KEY_A)) is not None
+
+    asyncio.run(store.save(KEY_C, history, None))
+    assert store_files(store) == [KEY_A + ".hist", KEY_C + ".hist"]
+
+
+def test_new_file_is_kept_even_if_larger_than_limit(tmp_path):
+    store = HistoryStore(str(tmp_path), max_bytes=1)
+    asyncio.run(store.save(KEY_A, make_history(), None))
+    asyncio.run(store.save(KEY_B, make_history(), None))
+    assert store_files(store) == [KEY_B + ".hist"]
+
+
+def test_disabled_store():
+    store = HistoryStore("")
+    assert not store.enabled
+    asyncio.run(store.save(KEY_A, make_history(), None))
+    assert asyncio.run(store.load(KEY_A)) is None
+
+
+HISTORY_JSON = json.dumps([
+    {"title": f"영상 {index}", "subtitles": [{"name": f"채널 {index % 3}"}], "time": f"2025-02-13T13:{index:02d}:46Z"}
+    for index in range(40)
+], ensure_ascii=False).encode("utf-8")
+HISTORY_MEMBER = "Takeout/YouTube 및 YouTube Music/기록/watch-history.json"
+
+
+class MemoryUpload:
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    async def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+
+def expected_hash(*files):
+    """업로드 해시 형식: 파일마다 내용 + 크기 경계 표시, 올리지 않은 파일은 0 바이트 하나"""
+    digest = hashlib.sha256()
+    for data in files:
+        if data is None:
+            digest.update(b"\x00")
+        else:
+            digest.update(data + b"\x01" + len(data).to_bytes(8, "big"))
+    return digest.hexdigest()
+
+
+def make_tgz(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    monkeypatch.setattr(analysis_service, "get_history_store", lambda: store)
+    return store
+
+
+def test_upload_hash_covers_every_byte_of_each_upload(store):
+    subscriptions = json.dumps([{"channel": "채널 1"}], ensure_ascii=False).encode("utf-8")
+    # tgz는 필요한 항목을 찾은 뒤 나머지를 읽지 않고, zip은 필요한 항목만 골라 읽어도 해시는 파일 전체의 것
+    tgz = make_tgz([
+        (HISTORY_MEMBER, HISTORY_JSON),
+        ("Takeout/YouTube 및 YouTube Music/구독정보/구독정보.csv", "채널 ID,채널 URL,채널 제목\nUC1,,채널 1\n".encode("utf-8")),
+        ("Takeout/archive_browser.html", b"<html></html>" * 1000),
+    ])
+    zip_data = make_zip([("Takeout/archive_browser.html", b"<html></html>"), (HISTORY_MEMBER, HISTORY_JSON)])
+
+    cases = [
+        (HISTORY_JSON, subscriptions),
+        (HISTORY_JSON, None),
+        (tgz, None),
+        (zip_data, subscriptions),
+    ]
+    for history_data, subscriptions_data in cases:
+        history, _, upload_hash = asyncio.run(preprocess_uploads(
+            MemoryUpload(history_data), MemoryUpload(subscriptions_data) if subscriptions_data is not None else None
+        ))
+        assert len(history) == 40
+        assert upload_hash == expected_hash(history_data, subscriptions_data)
+
+
+def test_history_hash_reads_the_parse_saved_under_the_upload_hash(store):
+    subscriptions = [{"channel": "채널 1"}]
+    parsed = asyncio.run(preprocess_uploads(
+        MemoryUpload(HISTORY_JSON), MemoryUpload(json.dumps(subscriptions, ensure_ascii=False).encode("utf-8"))
+    ))
+    assert store_files(store) == [parsed.upload_hash + ".hist"]
+
+    loaded = asyncio.run(preprocess_uploads(None, history_hash=parsed.upload_hash))
+    assert list(loaded.history) == list(parsed.history)
+    assert loaded.subscriptions == parsed.subscriptions
+    assert loaded.upload_hash == parsed.upload_hash
+
+    with pytest.raises(StoredHistoryNotFound):
+        asyncio.run(preprocess_uploads(None, history_hash=KEY_A))
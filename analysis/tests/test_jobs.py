@@ -0,0 +1,90 @@
+# tests/test_jobs.py
+"""작업 모드: 업로드를 임시 파일로 옮겨 두고 워커가 파싱하는지, 파싱 오류와 임시 파일 정리 테스트"""
+import asyncio
+import io
+import json
+import os
+
+import pytest
+
+from app.services import analysis_service
+from app.services.analysis_service import submit_analysis_job
+from app.services.jobs import JOB_FAILED, JOB_SUCCEEDED, JobManager
+from app.services import jobs
+from app.services.takeout import spool_upload
+
+HISTORY_JSON = json.dumps([
+    {"title": "영상", "subtitles": [{"name": "채널"}], "time": "2025-02-13T13:52:46Z"}
+], ensure_ascii=False).encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def analyzed(monkeypatch):
+    """분석 대신 워커가 넘긴 시청 기록만 기록 (LLM 호출 없음)"""
+    histories = []
+
+    async def fake_events(history, subscriptions, **options):
+        histories.append(history)
+        yield {"function": "completion", "status": "success", "message": "분석이 완료되었습니다."}
+
+    monkeypatch.setattr(analysis_service, "iter_analysis_events", fake_events)
+    return histories
+
+
+class FakeUploadFile:
+    """UploadFile처럼 file 속성으로 내용을 읽을 수 있는 업로드"""
+
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+
+async def run_job(data: bytes):
+    manager = JobManager(workers=1, queue_size=2)
+    jobs._manager = manager
+    try:
+        job = manager.reserve("사용자")
+        upload = await spool_upload(FakeUploadFile(data))
+        with open(upload.path, "rb") as file:
+            assert file.read() == data
+        submit_analysis_job(job, upload)
+        events = [event async for event in job.follow()]
+        return job, upload, events
+    finally:
+        await manager.close()
+        jobs._manager = None
+
+
+def test_job_parses_spooled_upload_and_removes_it(analyzed):
+    job, upload, events = asyncio.run(run_job(HISTORY_JSON))
+    assert job.status == JOB_SUCCEEDED
+    assert events[-1]["function"] == "completion"
+    assert [list(history) for history in analyzed] == [[(1739454766000, "채널", "영상")]]
+    assert job.upload_hash is not None
+    assert not os.path.exists(upload.path)
+
+
+def test_invalid_upload_fails_the_job(analyzed):
+    job, upload, events = asyncio.run(run_job(b"[{"))
+    assert job.status == JOB_FAILED
+    assert events == [{
+        "function": "error", "status": "error", "message": "업로드된 파일 중 하나의 JSON 형식이 올바르지 않습니다."
+    }]
+    assert not os.path.exists(upload.path)
+    assert analyzed == []
+
+
+def test_spooled_upload_is_removed_when_job_never_runs():
+    async def cancel_queued_job():
+        manager = JobManager(workers=1, queue_size=2)
+        jobs._manager = manager
+        job = manager.reserve("사용자")
+        upload = await spool_upload(FakeUploadFile(HISTORY_JSON))
+        submit_analysis_job(job, upload)
+        # 워커가 작업을 꺼내기 전에 종료
+        await manager.close()
+        jobs._manager = None
+        return job, upload
+
+    job, upload = asyncio.run(cancel_queued_job())
+    assert job.status == JOB_FAILED
+    assert not os.path.exists(upload.path)
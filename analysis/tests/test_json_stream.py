@@ -0,0 +1,111 @@
+# tests/test_json_stream.py
+"""청크 경계가 어디에 걸려도 JsonArrayParser가 json.loads와 같은 항목을 돌려주는지 확인하는 테스트"""
+import asyncio
+import codecs
+import io
+import json
+
+import pytest
+
+from app.services.json_stream import JsonArrayParser, iter_json_array
+
+ENTRIES = [
+    {
+        "header": "YouTube",
+        "title": "아형 최장신 서장훈 \"키\" 놀리며 하극상을(를) 시청했습니다.",
+        "titleUrl": "https://www.youtube.com/watch?v=abc\\u0026t=1",
+        "subtitles": [{"name": "JTBC Voyage", "url": "https://www.youtube.com/channel/UC1"}],
+        "time": "2025-02-13T13:52:46.874Z",
+    },
+    {"title": "escapes \\ \" \n \t é 😀 😀", "time": "2025-02-13T13:52:46Z", "n": -12.5e3},
+    {"title": "ad without subtitles", "time": "2025-02-12T01:00:00Z", "flags": [True, False, None]},
+    12345,
+    6.5,
+    "plain string",
+]
+
+
+def parse_chunks(chunks):
+    parser = JsonArrayParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items
+
+
+def split_at(data: bytes, *cuts: int):
+    bounds = [0, *cuts, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("bom", [b"", codecs.BOM_UTF8])
+def test_every_single_split_point(bom):
+    data = bom + json.dumps(ENTRIES, ensure_ascii=False, indent=1).encode("utf-8")
+    for cut in range(len(data) + 1):
+        assert parse_chunks(split_at(data, cut)) == ENTRIES, cut
+
+
+def test_byte_by_byte():
+    data = codecs.BOM_UTF8 + json.dumps(ENTRIES, ensure_ascii=False).encode("utf-8")
+    assert parse_chunks([data[index:index + 1] for index in range(len(data))]) == ENTRIES
+
+
+def test_numbers_split_across_chunks_are_not_truncated():
+    assert parse_chunks([b"[12", b"3, 6.", b"5, 7", b"e2]"]) == [123, 6.5, 700.0]
+
+
+def test_value_spanning_many_chunks():
+    entries = [{"title": "가" * 50_000, "time": "2025-02-13T13:52:46Z"}, {"title": "다음"}]
+    data = json.dumps(entries, ensure_ascii=False).encode("utf-8")
+    assert parse_chunks(data[start:start + 1000] for start in range(0, len(data), 1000)) == entries
+
+
+def test_empty_array_and_whitespace():
+    assert parse_chunks([b"  \n[", b" ", b"]\n "]) == []
+
+
+@pytest.mark.parametrize("chunks", [
+    [b'[{"title": "a"}, {"title": '],  # 배열이 닫히지 않음
+    [b'{"title": "a"}'],  # 최상위가 배열이 아님
+    [b'[{"title": "a"} {"title": "b"}]'],  # 구분자 없음
+    [b'[1, 2] 3'],  # 배열 뒤에 다른 값
+    [b'[1, 2, ]'],  # 마지막 쉼표
+    [b''],  # 빈 파일
+])
+def test_malformed_documents_raise(chunks):
+    with pytest.raises(json.JSONDecodeError):
+        parse_chunks(chunks)
+
+
+def test_oversized_value_raises_before_the_end():
+    parser = JsonArrayParser(max_value_size=1000)
+    parser.feed(b'[{"title": "')
+    with pytest.raises(json.JSONDecodeError):
+        for _ in range(10):
+            parser.feed(b"x" * 200)
+
+
+def test_items_are_returned_as_soon_as_they_are_complete():
+    parser = JsonArrayParser()
+    assert parser.feed(b'[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(b': 2}') == [{"b": 2}]
+    assert parser.feed(b" ]") == []
+    assert parser.close() == []
+
+
+class MemoryUpload:
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+
+def test_iter_json_array_reads_upload_in_chunks():
+    data = json.dumps(ENTRIES, ensure_ascii=False).encode("utf-8")
+
+    async def collect():
+        return [item async for item in iter_json_array(MemoryUpload(data), chunk_size=7)]
+
+    assert asyncio.run(collect()) == ENTRIES
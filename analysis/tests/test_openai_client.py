@@ -0,0 +1,142 @@
+# tests/test_openai_client.py
+"""OpenAIClient 호출 경로의 실패 분류, 취소 처리, 진행 중 호출 메트릭 테스트 (HTTP는 httpx.MockTransport로 응답)"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app import metrics
+from app.api import openai as openai_api
+from app.api.openai import OpenAIClient, get_client_pool
+from app.api.resilience import CIRCUIT_CLOSED, DEGRADED_QUOTA_EXHAUSTED, LLMUnavailableError
+
+MODEL = "test-model"
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    # 공유 클라이언트 풀을 만들 때 필요 (실제 호출은 use_transport의 클라이언트로)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+
+def completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": MODEL,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+    })
+
+
+def use_transport(handler) -> None:
+    """현재 이벤트 루프의 공유 클라이언트 풀이 handler로 응답하도록 바꿉니다."""
+    pool = get_client_pool()
+    pool.client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        max_retries=0
+    )
+
+
+def call(client: OpenAIClient):
+    return client.create_chat_completion(MODEL, "system", {"q": 1}, use_cache=False)
+
+
+def requests_total(status: str) -> float:
+    return metrics.LLM_REQUESTS.get(model=MODEL, mode="create", status=status)
+
+
+def test_successful_call():
+    async def scenario():
+        use_transport(lambda request: completion("안녕"))
+        return await call(OpenAIClient())
+
+    before = requests_total("success")
+    assert asyncio.run(scenario()) == "안녕"
+    assert requests_total("success") == before + 1
+    assert metrics.LLM_IN_FLIGHT.get() == 0
+
+
+def test_insufficient_quota_is_not_retried_and_does_not_open_breaker():
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(429, json={"error": {
+            "message": "You exceeded your current quota", "type": "insufficient_quota", "code": "insufficient_quota"
+        }})
+
+    async def scenario():
+        use_transport(handler)
+        client = OpenAIClient()
+        reasons = []
+        for _ in range(openai_api.OPENAI_CIRCUIT_FAILURES + 2):
+            with pytest.raises(LLMUnavailableError) as raised:
+                await call(client)
+            reasons.append(raised.value.reason)
+        return reasons, get_client_pool().breaker.state
+
+    reasons, state = asyncio.run(scenario())
+    assert reasons == [DEGRADED_QUOTA_EXHAUSTED] * (openai_api.OPENAI_CIRCUIT_FAILURES + 2)
+    assert state == CIRCUIT_CLOSED
+    assert calls == openai_api.OPENAI_CIRCUIT_FAILURES + 2
+
+
+def test_cancel_while_waiting_for_quota_is_not_recorded():
+    async def scenario():
+        use_transport(lambda request: completion("안녕"))
+        get_client_pool().limiter.pause(30)
+        task = asyncio.create_task(call(OpenAIClient()))
+        await asyncio.sleep(0.05)
+        in_flight = metrics.LLM_IN_FLIGHT.get()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return in_flight
+
+    errors, cancelled = requests_total("error"), requests_total("cancelled")
+    assert asyncio.run(scenario()) == 0
+    assert metrics.LLM_IN_FLIGHT.get() == 0
+    assert (requests_total("error"), requests_total("cancelled")) == (errors, cancelled)
+
+
+def test_cancel_during_call_is_recorded_as_cancelled():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def handler(request):
+            started.set()
+            await asyncio.sleep(30)
+            return completion("늦은 응답")
+
+        use_transport(handler)
+        task = asyncio.create_task(call(OpenAIClient()))
+        await started.wait()
+        in_flight = metrics.LLM_IN_FLIGHT.get()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        pool = get_client_pool()
+        return in_flight, pool.breaker.state, pool.breaker.failures
+
+    errors, cancelled = requests_total("error"), requests_total("cancelled")
+    assert asyncio.run(scenario()) == (1, CIRCUIT_CLOSED, 0)
+    assert metrics.LLM_IN_FLIGHT.get() == 0
+    assert requests_total("cancelled") == cancelled + 1
+    assert requests_total("error") == errors
+
+
+def test_server_errors_are_retried_then_reported(monkeypatch):
+    monkeypatch.setattr(openai_api, "OPENAI_MAX_RETRIES", 2)
+    monkeypatch.setattr(openai_api, "OPENAI_RETRY_BASE_DELAY", 0.001)
+    responses = [httpx.Response(503, json={"error": {"message": "overloaded"}})] * 2 + [completion("복구")]
+
+    async def scenario():
+        use_transport(lambda request: responses.pop(0))
+        return await call(OpenAIClient()), get_client_pool().breaker.failures
+
+    assert asyncio.run(scenario()) == ("복구", 0)
+    assert not responses
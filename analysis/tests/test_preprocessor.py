@@ -0,0 +1,73 @@
+# tests/test_preprocessor.py
+"""DataPreprocessor의 세 입력 경로(리스트, 업로드 스트림, 바이트 청크)가 같은 WatchHistory와 같은 오류를 내는지 확인하는 테스트"""
+import asyncio
+import io
+import json
+
+import pytest
+
+from app.services.preprocessor import DataPreprocessor
+from app.services.takeout import iter_history_upload
+
+ENTRIES = [
+    {"title": "첫 영상을(를) 시청했습니다.", "subtitles": [{"name": "채널 A"}], "time": "2025-02-13T13:52:46.874Z"},
+    {"title": "광고", "time": "2025-02-13T13:50:00Z"},  # 채널 없음 (광고)
+    {"title": "두 번째 영상", "subtitles": [{"name": "채널 B"}], "time": "2025-02-13T22:52:46+09:00"},
+    {"title": "시각 없음", "subtitles": [{"name": "채널 B"}], "time": "not a time"},
+    {"title": "첫 영상을(를) 시청했습니다.", "subtitles": [{"name": "채널 A"}], "time": "2025-02-12T00:00:00Z"},
+]
+EXPECTED = [
+    (1739454766874, "채널 A", "첫 영상"),
+    (1739454766000, "채널 B", "두 번째 영상"),
+    (1739318400000, "채널 A", "첫 영상"),
+]
+
+
+class MemoryUpload:
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+
+def test_list_input():
+    history = asyncio.run(DataPreprocessor().preprocess_history(ENTRIES))
+    assert list(history) == EXPECTED
+    assert history.channels == ["채널 A", "채널 B"]
+    assert history.titles == ["첫 영상", "두 번째 영상"]
+
+
+def test_stream_and_chunk_inputs_match_list_input():
+    data = json.dumps(ENTRIES, ensure_ascii=False).encode("utf-8")
+    preprocessor = DataPreprocessor()
+
+    streamed = asyncio.run(preprocessor.preprocess_history_stream(iter_history_upload(MemoryUpload(data), chunk_size=16)))
+    chunked = preprocessor.preprocess_history_chunks(data[start:start + 16] for start in range(0, len(data), 16))
+    assert list(streamed) == EXPECTED
+    assert list(chunked) == EXPECTED
+
+
+def test_empty_inputs():
+    preprocessor = DataPreprocessor()
+    assert len(asyncio.run(preprocessor.preprocess_history([]))) == 0
+    assert len(preprocessor.preprocess_history_chunks([b"[]"])) == 0
+
+
+def test_errors_are_reported_the_same_way_for_every_input():
+    preprocessor = DataPreprocessor()
+    broken = [{"subtitles": [{"name": "채널 A"}], "time": "2025-02-13T13:52:46Z"}]  # 제목 없음
+    data = json.dumps(broken, ensure_ascii=False).encode("utf-8")
+
+    for preprocess in (
+        lambda: asyncio.run(preprocessor.preprocess_history(broken)),
+        lambda: asyncio.run(preprocessor.preprocess_history_stream(iter_history_upload(MemoryUpload(data)))),
+        lambda: preprocessor.preprocess_history_chunks([data]),
+    ):
+        with pytest.raises(Exception, match="History preprocessing failed"):
+            preprocess()
+
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(preprocessor.preprocess_history_stream(iter_history_upload(MemoryUpload(b'[{"title": '))))
+    with pytest.raises(json.JSONDecodeError):
+        preprocessor.preprocess_history_chunks([b'[{"title": '])
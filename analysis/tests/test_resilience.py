@@ -0,0 +1,177 @@
+# tests/test_resilience.py
+"""LLM 호출 실패 처리(CircuitBreaker, Retry-After, QuotaLimiter) 테스트"""
+import asyncio
+import email.utils
+import time
+
+import pytest
+
+from app.api import rate_limit, resilience
+from app.api.rate_limit import QuotaLimiter, RateBudget, parse_duration
+from app.api.resilience import (
+    CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker, parse_retry_after, retry_delay
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # 성공하면 연속 실패 수 초기화
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert not breaker.allow()  # 확인 중인 호출이 있으면 다른 호출은 막음
+
+    breaker.record_failure()  # 확인 실패 -> 다시 열리고 대기 시간 새로 시작
+    assert breaker.state == CIRCUIT_OPEN
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_released_probe_lets_next_call_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()  # 한도 초과나 취소: 서버 상태를 알 수 없음
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow()
+
+
+def test_admit_waits_for_probe_result(clock):
+    async def scenario(probe_succeeds):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+        breaker.record_failure()
+        clock.now += 30
+        assert await breaker.admit()  # 확인 호출
+        waiters = [asyncio.create_task(breaker.admit()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert not any(waiter.done() for waiter in waiters)
+        if probe_succeeds:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario(True)) == [True, True, True]
+    assert asyncio.run(scenario(False)) == [False, False, False]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    assert parse_retry_after({"retry-after": "-3"}) == 0.0
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    retry_at = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 < parse_retry_after({"retry-after": retry_at}) <= 60
+
+
+def test_retry_delay_bounds():
+    for attempt in range(6):
+        ceiling = min(8.0, 0.5 * 2 ** attempt)
+        assert ceiling / 2 <= retry_delay(attempt, None, base=0.5, cap=8.0) <= ceiling
+    assert 3.0 <= retry_delay(0, 3.0, base=0.5, cap=8.0) <= 3.5
+    assert retry_delay(0, 120.0, base=0.5, cap=8.0) == 8.0
+
+
+def test_parse_duration():
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("2") == 2.0
+    assert parse_duration("1x") is None
+    assert parse_duration(None) is None
+
+
+def test_pause_blocks_acquire_until_retry_after():
+    async def scenario():
+        limiter = QuotaLimiter()
+        limiter.pause(parse_retry_after({"retry-after-ms": "200"}))
+        assert 0.1 < limiter.paused_for <= 0.2
+        limiter.pause(0.05)  # 더 짧은 대기는 기존 대기를 줄이지 않음
+        start = time.monotonic()
+        await asyncio.gather(limiter.acquire(), limiter.acquire())
+        return time.monotonic() - start, limiter.paused_for
+
+    waited, remaining = asyncio.run(scenario())
+    assert waited >= 0.18
+    assert remaining == 0.0
+
+
+def test_pause_during_bucket_wait_is_honoured():
+    async def scenario():
+        limiter = QuotaLimiter(requests_per_minute=600)  # 초당 10, 버스트 10
+        for _ in range(10):
+            await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())  # 버킷을 기다리는 중 (약 0.1초)
+        await asyncio.sleep(0.01)
+        limiter.pause(0.3)  # 다른 호출이 429를 받음
+        start = time.monotonic()
+        await waiting
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) >= 0.25
+
+
+def test_observe_headers_pauses_only_when_exhausted():
+    limiter = QuotaLimiter()
+    limiter.observe_headers({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "10s"})
+    assert limiter.paused_for == 0.0
+    limiter.observe_headers({"x-ratelimit-remaining-tokens": "100", "x-ratelimit-reset-tokens": "6m0s"}, tokens=500)
+    assert 359 < limiter.paused_for <= 360
+    limiter = QuotaLimiter()
+    limiter.observe_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m"}, max_pause=5)
+    assert 4 < limiter.paused_for <= 5
+
+
+def test_token_budget_settles_estimates(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    limiter = QuotaLimiter(tokens_per_minute=6000)  # 초당 100, 버스트 100
+    asyncio.run(limiter.acquire(tokens=100))
+    assert limiter.tokens._tokens == 0
+    limiter.settle(estimated=100, actual=40)
+    assert limiter.tokens._tokens == 60
+    limiter.settle(estimated=100, actual=None)
+    assert limiter.tokens._tokens == 60
+
+
+def test_rate_budget_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        RateBudget(0)
@@ -0,0 +1,139 @@
+# tests/test_sketch.py
+"""근사 채널 집계(SpaceSaving, TimeAggregation 근사 모드)를 정확한 집계와 비교하는 테스트"""
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from app.services.history import WatchHistory
+from app.services.sketch import SpaceSaving
+from app.services.time_stats import TimeAggregation
+
+START_MS = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+HOUR_MS = 3_600_000
+
+
+def zipf_stream(seed: int, count: int, distinct: int, skew: float) -> list:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(distinct)]
+    return rng.choices(range(distinct), weights=weights, k=count)
+
+
+def skewed_history(count: int = 20_000, distinct: int = 2_000, seed: int = 0) -> WatchHistory:
+    """채널이 Zipf 분포(긴 꼬리)이고 시각이 한 달에 고르게 퍼진 시청 기록"""
+    rng = random.Random(seed)
+    history = WatchHistory()
+    for channel in zipf_stream(seed, count, distinct, 1.2):
+        history.append(START_MS + rng.randrange(30 * 24) * HOUR_MS, f"channel-{channel}", "")
+    return history
+
+
+def assert_within_bounds(sketch: SpaceSaving, exact: Counter) -> None:
+    """Space-Saving 보장: 실제 빈도 <= 추정치 <= 실제 빈도 + error, error <= total / capacity, 큰 항목은 빠지지 않음"""
+    assert sketch.total == sum(exact.values())
+    bound = sketch.total / sketch.capacity
+    assert sketch.error_bound <= bound
+    for item, count, error in sketch.top(len(sketch)):
+        assert exact[item] <= count <= exact[item] + error
+        assert error <= bound
+    kept = set(sketch)
+    for item, true_count in exact.items():
+        if true_count > sketch.error_bound:
+            assert item in kept
+
+
+@pytest.mark.parametrize("capacity", [4, 16, 64])
+@pytest.mark.parametrize("skew", [0.6, 1.0, 1.5])
+def test_error_bound_holds_for_single_updates(capacity, skew):
+    stream = zipf_stream(capacity, 10_000, 3_000, skew)
+    sketch = SpaceSaving(capacity)
+    for item in stream:
+        sketch.update(item)
+    assert len(sketch) == capacity
+    assert_within_bounds(sketch, Counter(stream))
+
+
+def test_error_bound_holds_for_weighted_updates():
+    stream = zipf_stream(1, 10_000, 3_000, 1.0)
+    sketch = SpaceSaving(32)
+    for start in range(0, len(stream), 1_000):
+        sketch.update_counts(Counter(stream[start:start + 1_000]))
+    assert_within_bounds(sketch, Counter(stream))
+
+
+def test_exact_until_capacity_is_reached():
+    sketch = SpaceSaving(8)
+    sketch.update_counts({"a": 5, "b": 3, "c": 1})
+    assert sketch.error_bound == 0
+    assert sketch.top(3) == [("a", 5, 0), ("b", 3, 0), ("c", 1, 0)]
+
+
+def test_merge_keeps_error_bound():
+    streams = [zipf_stream(seed, 5_000, 2_000, 1.0) for seed in range(4)]
+    merged = SpaceSaving(32)
+    for stream in streams:
+        part = SpaceSaving(32)
+        for item in stream:
+            part.update(item)
+        merged.merge(part)
+    assert len(merged) <= 32
+    assert_within_bounds(merged, Counter(item for stream in streams for item in stream))
+
+
+def test_state_round_trip_continues_identically():
+    stream = zipf_stream(2, 6_000, 1_000, 1.0)
+    original = SpaceSaving(16)
+    for item in stream[:3_000]:
+        original.update(item)
+
+    restored = SpaceSaving.from_state(json.loads(json.dumps(original.to_state())))
+    assert restored.to_state() == original.to_state()
+    for sketch in (original, restored):
+        for item in stream[3_000:]:
+            sketch.update(item)
+    assert restored.top(16) == original.top(16)
+    assert_within_bounds(restored, Counter(stream))
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
+
+
+def test_approximate_top_channels_match_exact_on_skewed_data():
+    history = skewed_history()
+    exact = TimeAggregation.from_history(history, "Asia/Seoul")
+    approximate = TimeAggregation.from_history(history, "Asia/Seoul", sketch_capacity=64)
+
+    exact_channels = exact.time_stats(top_channels=10)["channels"]
+    approximate_channels = approximate.time_stats(top_channels=10)["channels"]
+    assert [entry["name"] for entry in approximate_channels] == [entry["name"] for entry in exact_channels]
+    exact_views = {entry["name"]: entry["views"] for entry in exact_channels}
+    for entry in approximate_channels:
+        assert exact_views[entry["name"]] <= entry["views"] <= exact_views[entry["name"]] + entry["error"]
+
+    for exact_hour, approximate_hour in zip(exact.hourly_stats(), approximate.hourly_stats()):
+        assert approximate_hour["totalViews"] == exact_hour["totalViews"]
+        assert [c["name"] for c in approximate_hour["categories"]] == [c["name"] for c in exact_hour["categories"]]
+
+
+def test_approximate_time_statistics_are_exact():
+    history = skewed_history(count=5_000)
+    exact = TimeAggregation.from_history(history, "America/New_York").time_stats()
+    approximate = TimeAggregation.from_history(history, "America/New_York", sketch_capacity=8).time_stats()
+    for key in ("totalViews", "weekdayHourly", "daily", "monthly"):
+        assert approximate[key] == exact[key]
+
+
+def test_approximate_aggregation_state_round_trip():
+    first, second = WatchHistory(), WatchHistory()
+    for index, entry in enumerate(skewed_history(count=8_000)):
+        (first if index < 4_000 else second).append(*entry)
+    aggregation = TimeAggregation.from_history(first, "Asia/Seoul", sketch_capacity=32)
+
+    restored = TimeAggregation.from_state(json.loads(json.dumps(aggregation.to_state())))
+    restored.update(second)
+    aggregation.update(second)
+    assert restored.time_stats() == aggregation.time_stats()
+    assert restored.hourly_stats() == aggregation.hourly_stats()
@@ -0,0 +1,189 @@
+# tests/test_takeout.py
+"""Takeout HTML 시청 기록 파서, 시각 해석(TakeoutTimes), 압축 파일 항목 선택 테스트"""
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from app.services.preprocessor import DataPreprocessor
+from app.services.takeout import (
+    FORMAT_HTML, FORMAT_JSON, FORMAT_TGZ, FORMAT_ZIP,
+    TakeoutArchiveError, TakeoutHtmlParser, TakeoutTimes, detect_format, iter_history_entries, read_takeout_archive
+)
+
+
+def content_cell(body: str) -> str:
+    """실제 Takeout watch-history.html의 항목 하나 (제목 셀 + 빈 오른쪽 셀 + 캡션 셀)"""
+    return (
+        '<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">'
+        '<div class="header-cell mdl-cell mdl-cell--12-col"><p class="mdl-typography--title">YouTube<br></p></div>'
+        f'<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">{body}</div>'
+        '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1 mdl-typography--text-right"></div>'
+        '<div class="content-cell mdl-cell mdl-cell--12-col mdl-typography--caption">'
+        '<b>제품:</b><br>&emsp;YouTube<br><b>이유:</b><br>&emsp;Google 광고에서 본 동영상<br></div>'
+        '</div></div>'
+    )
+
+
+HTML = (
+    '<html><head><meta charset="utf-8"><title>시청 기록</title></head><body>'
+    '<div class="mdl-grid">'
+    + content_cell(
+        '<a href="https://www.youtube.com/watch?v=aaa">첫 영상 &amp; 자막</a>을(를) 시청했습니다.<br>'
+        '<a href="https://www.youtube.com/channel/UCaaa">채널 A</a><br>2025. 2. 13. 오후 1:52:46 KST<br>'
+    )
+    + content_cell(
+        'Watched <a href="https://www.youtube.com/watch?v=bbb">Second video</a><br>'
+        '<a href="https://www.youtube.com/@channelb">Channel B</a><br>Feb 13, 2025, 1:52:46 PM EST<br>'
+    )
+    + content_cell(  # 채널 링크가 없는 광고
+        '<a href="https://www.youtube.com/watch?v=ccc">광고 영상</a>을(를) 시청했습니다.<br>13 Feb 2025, 09:00:00 GMT<br>'
+    )
+    + content_cell('삭제된 동영상을 시청했습니다.<br>2025. 2. 12. 오전 9:00:00 KST<br>')  # 동영상 링크 없음
+    + '</div></body></html>'
+).encode("utf-8")
+
+EXPECTED_ENTRIES = [
+    {"title": "첫 영상 & 자막", "time": "2025-02-13T13:52:46+09:00", "subtitles": [{"name": "채널 A"}]},
+    {"title": "Second video", "time": "2025-02-13T13:52:46-05:00", "subtitles": [{"name": "Channel B"}]},
+    {"title": "광고 영상", "time": "2025-02-13T09:00:00+00:00"},
+]
+
+JSON_HISTORY = json.dumps([
+    {"title": "JSON 영상", "subtitles": [{"name": "JSON 채널"}], "time": "2025-02-13T13:52:46Z"}
+], ensure_ascii=False).encode("utf-8")
+SUBSCRIPTIONS_CSV = "채널 ID,채널 URL,채널 제목\nUCaaa,http://www.youtube.com/channel/UCaaa,채널 A\n".encode("utf-8")
+
+
+def test_detect_format():
+    assert detect_format(b"PK\x03\x04") == FORMAT_ZIP
+    assert detect_format(b"\x1f\x8b\x08\x00") == FORMAT_TGZ
+    assert detect_format(b"\xef\xbb\xbf  <html>") == FORMAT_HTML
+    assert detect_format(b"\n[{") == FORMAT_JSON
+    assert detect_format(b"") == FORMAT_JSON
+
+
+def test_html_parser_reads_content_cells():
+    parser = TakeoutHtmlParser()
+    assert parser.feed(HTML) + parser.close() == EXPECTED_ENTRIES
+    assert (parser.times.parsed, parser.times.unparsed) == (3, 0)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_html_parser_across_chunk_boundaries(chunk_size):
+    # 한글(3바이트 UTF-8)과 태그가 청크 경계에서 잘려도 같은 결과
+    chunks = (HTML[start:start + chunk_size] for start in range(0, len(HTML), chunk_size))
+    assert list(iter_history_entries(chunks)) == EXPECTED_ENTRIES
+
+
+def test_html_history_preprocesses_like_json():
+    history = DataPreprocessor().preprocess_history_chunks([HTML])
+    assert list(history) == [
+        (1739422366000, "채널 A", "첫 영상 & 자막"),
+        (1739472766000, "Channel B", "Second video"),
+    ]
+
+
+@pytest.mark.parametrize("fallback, expected", [
+    (None, "2024-07-01T10:00:00-06:00"),  # 후보의 첫 번째 (미국 중부 표준시)
+    ("Asia/Shanghai", "2024-07-01T10:00:00+08:00"),
+    ("America/Chicago", "2024-07-01T10:00:00-05:00"),  # 그 시각 시카고의 오프셋과 같은 후보
+    ("Asia/Seoul", "2024-07-01T10:00:00-06:00"),  # 맞는 후보가 없으면 첫 번째
+])
+def test_ambiguous_abbreviation_follows_request_timezone(fallback, expected):
+    times = TakeoutTimes(fallback)
+    assert times.parse("Jul 1, 2024, 10:00:00 AM CST") == expected
+    assert times.parsed == 1
+    assert times.depends_on_timezone == (fallback is not None)
+
+
+def test_unknown_zone_uses_fallback_timezone():
+    times = TakeoutTimes("Asia/Seoul")
+    assert times.parse("2025. 2. 13. 오후 1:52:46 XYZT") == "2025-02-13T13:52:46+09:00"
+    assert times.parse("2025. 2. 13. 오후 1:52:46 GMT+05:30") == "2025-02-13T13:52:46+05:30"
+    assert (times.parsed, times.fallback, times.unparsed) == (1, 1, 0)
+    assert times.unknown_zones == {"XYZT": 1}
+    assert times.depends_on_timezone
+    times.verify()
+
+
+def test_unparsed_times_without_fallback_raise_on_verify():
+    times = TakeoutTimes()
+    assert times.parse("2025. 2. 13. 오후 1:52:46 XYZT") is None
+    assert times.parse("어제") is None
+    assert times.parse("Feb 30, 2025, 1:00:00 PM KST") is None  # 없는 날짜
+    assert (times.parsed, times.fallback, times.unparsed) == (0, 0, 3)
+    assert times.samples == ["2025. 2. 13. 오후 1:52:46 XYZT", "어제", "Feb 30, 2025, 1:00:00 PM KST"]
+    with pytest.raises(TakeoutArchiveError):
+        times.verify()
+
+
+def test_merge_adds_worker_counts():
+    times, other = TakeoutTimes("Asia/Seoul"), TakeoutTimes("Asia/Seoul")
+    times.parse("2025. 2. 13. 오후 1:52:46 KST")
+    other.parse("2025. 2. 13. 오후 1:52:46 XYZT")
+    other.parse("Jul 1, 2024, 10:00:00 AM IST")
+    times.merge(other)
+    assert (times.parsed, times.fallback, times.ambiguous) == (2, 1, 1)
+    assert times.unknown_zones == {"XYZT": 1}
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def make_tgz(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def test_zip_prefers_json_history_over_html():
+    archive = make_zip([
+        ("Takeout/YouTube 및 YouTube Music/기록/시청 기록.html", HTML),
+        ("Takeout/YouTube 및 YouTube Music/기록/watch-history.json", JSON_HISTORY),
+        ("Takeout/YouTube 및 YouTube Music/구독정보/구독정보.csv", SUBSCRIPTIONS_CSV),
+        ("Takeout/archive_browser.html", b"<html></html>"),
+    ])
+    contents = read_takeout_archive(archive, FORMAT_ZIP, DataPreprocessor())
+    assert list(contents.history) == [(1739454766000, "JSON 채널", "JSON 영상")]
+    assert contents.subscriptions == [
+        {"채널 ID": "UCaaa", "채널 URL": "http://www.youtube.com/channel/UCaaa", "채널 제목": "채널 A"}
+    ]
+
+
+def test_tgz_uses_first_history_member_in_stream_order():
+    archive = make_tgz([
+        ("Takeout/YouTube/history/Watch-History.html", HTML),
+        ("Takeout/YouTube/history/watch-history.json", JSON_HISTORY),
+    ])
+    times = TakeoutTimes()
+    contents = read_takeout_archive(archive, FORMAT_TGZ, DataPreprocessor(), times)
+    assert [title for _, _, title in contents.history] == ["첫 영상 & 자막", "Second video"]
+    assert contents.subscriptions is None
+    assert times.parsed == 3
+
+
+@pytest.mark.parametrize("make_archive, archive_format", [(make_zip, FORMAT_ZIP), (make_tgz, FORMAT_TGZ)])
+def test_archive_without_history_raises(make_archive, archive_format):
+    archive = make_archive([("Takeout/YouTube/구독정보/subscriptions.csv", SUBSCRIPTIONS_CSV)])
+    with pytest.raises(TakeoutArchiveError):
+        read_takeout_archive(archive, archive_format, DataPreprocessor())
+
+
+@pytest.mark.parametrize("archive_format", [FORMAT_ZIP, FORMAT_TGZ])
+def test_corrupt_archive_raises(archive_format):
+    with pytest.raises(TakeoutArchiveError):
+        read_takeout_archive(io.BytesIO(b"PK\x03\x04 not really an archive"), archive_format, DataPreprocessor())
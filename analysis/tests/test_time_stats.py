@@ -0,0 +1,127 @@
+# tests/test_time_stats.py
+"""서머타임 전환 구간의 현지 시간 번호와 TimeAggregation 통계를 항목별 astimezone 계산과 비교하는 테스트"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.history import WatchHistory
+from app.services.time_stats import MS_PER_HOUR, TimeAggregation, _span_offset_ms, local_hour_indexes, resolve_timezone
+
+STEP_MS = 7 * 60 * 1000 + 13_001  # 시간 경계와 어긋나는 간격
+
+# (시간대, 전환이 있는 날의 UTC 자정)
+TRANSITIONS = [
+    ("America/New_York", "2024-03-10"),  # 02:00 -> 03:00
+    ("America/New_York", "2024-11-03"),  # 02:00 -> 01:00 (01시대가 두 번)
+    ("Europe/Berlin", "2024-03-31"),
+    ("Europe/Berlin", "2024-10-27"),
+    ("Australia/Lord_Howe", "2024-04-06"),  # 30분 서머타임 종료
+    ("Australia/Lord_Howe", "2024-10-05"),  # 30분 서머타임 시작 (UTC 15:30, 시간 구간 안에서 전환)
+    ("Asia/Kathmandu", "2024-06-01"),  # 전환 없음, 45분 오프셋
+    ("UTC", "2024-06-01"),
+]
+
+
+def times_around(day: str, days: int = 3):
+    start = datetime.fromisoformat(day).replace(tzinfo=timezone.utc) - timedelta(days=1)
+    start_ms = int(start.timestamp() * 1000)
+    return list(range(start_ms, start_ms + days * 24 * MS_PER_HOUR, STEP_MS))
+
+
+def reference_local_hour(time_ms: int, tz) -> int:
+    local = datetime.fromtimestamp(time_ms / 1000, timezone.utc).astimezone(tz)
+    return (time_ms + local.utcoffset() // timedelta(milliseconds=1)) // MS_PER_HOUR
+
+
+def reference_local(time_ms: int, tz) -> datetime:
+    return datetime.fromtimestamp(time_ms / 1000, timezone.utc).astimezone(tz)
+
+
+def make_history(times):
+    history = WatchHistory()
+    for index, time_ms in enumerate(times):
+        history.append(time_ms, f"채널 {index % 5}", f"영상 {index}")
+    return history
+
+
+@pytest.mark.parametrize("timezone_name, day", TRANSITIONS)
+def test_local_hour_indexes_match_per_entry_conversion(timezone_name, day):
+    tz = resolve_timezone(timezone_name)
+    times = times_around(day)
+    assert local_hour_indexes(times, tz) == [reference_local_hour(time_ms, tz) for time_ms in times]
+
+
+@pytest.mark.parametrize("timezone_name, day", TRANSITIONS)
+def test_time_stats_match_per_entry_conversion(timezone_name, day):
+    tz = resolve_timezone(timezone_name)
+    times = times_around(day)
+    stats = TimeAggregation.from_history(make_history(times), timezone_name).time_stats()
+
+    locals_ = [reference_local(time_ms, tz) for time_ms in times]
+    weekday_hourly = [[0] * 24 for _ in range(7)]
+    for local in locals_:
+        weekday_hourly[local.weekday()][local.hour] += 1
+    daily = Counter(local.date().isoformat() for local in locals_)
+    monthly = Counter(local.strftime("%Y-%m") for local in locals_)
+
+    assert stats["totalViews"] == len(times)
+    assert stats["weekdayHourly"] == weekday_hourly
+    assert stats["daily"] == [{"date": date, "views": views} for date, views in sorted(daily.items())]
+    assert stats["monthly"] == [{"month": month, "views": views} for month, views in sorted(monthly.items())]
+    assert sum(channel["views"] for channel in stats["channels"]) == len(times)
+
+
+def test_transition_inside_an_hour_is_resolved_per_entry():
+    tz = resolve_timezone("Australia/Lord_Howe")
+    start_ms = int(datetime(2024, 10, 5, 15, tzinfo=timezone.utc).timestamp() * 1000)
+    assert _span_offset_ms(tz, start_ms, MS_PER_HOUR) is None
+    times = [start_ms + minute * 60 * 1000 for minute in range(0, 60, 10)]
+    assert local_hour_indexes(times, tz) == [reference_local_hour(time_ms, tz) for time_ms in times]
+
+
+def test_fall_back_hour_is_counted_twice():
+    # 2024-11-03 뉴욕 01:00~02:00은 EDT와 EST로 두 번 지나감
+    tz = resolve_timezone("America/New_York")
+    start_ms = int(datetime(2024, 11, 3, 4, tzinfo=timezone.utc).timestamp() * 1000)  # 00:00 EDT
+    times = [start_ms + hour * MS_PER_HOUR for hour in range(4)]
+    hourly = TimeAggregation.from_history(make_history(times), "America/New_York").hourly_stats()
+    assert [hourly[hour]["totalViews"] for hour in range(4)] == [1, 2, 1, 0]
+    assert [reference_local(time_ms, tz).hour for time_ms in times] == [0, 1, 1, 2]
+
+
+def test_hourly_stats_top_channels():
+    base_ms = int(datetime(2024, 6, 1, 12, tzinfo=timezone.utc).timestamp() * 1000)
+    history = WatchHistory()
+    for channel, views in (("A", 3), ("B", 5), ("C", 1), ("D", 5)):
+        for _ in range(views):
+            history.append(base_ms, channel, "영상")
+    hourly = TimeAggregation.from_history(history, "Asia/Seoul").hourly_stats(top_k=3)
+    assert hourly[21] == {
+        "hour": 21,
+        "totalViews": 14,
+        # 동점이면 먼저 집계된 채널 우선
+        "categories": [{"name": "B", "views": 5}, {"name": "D", "views": 5}, {"name": "A", "views": 3}]
+    }
+    assert all(hourly[hour]["totalViews"] == 0 for hour in range(24) if hour != 21)
+
+
+def test_state_round_trip_then_update_matches_single_pass():
+    times = times_around("2024-03-10")
+    history = make_history(times)
+    half = len(times) // 2
+    first, second = WatchHistory(), WatchHistory()
+    for index, entry in enumerate(history):
+        (first if index < half else second).append(*entry)
+
+    aggregation = TimeAggregation.from_history(first, "America/New_York")
+    restored = TimeAggregation.from_state(aggregation.to_state())
+    restored.update(second)
+    single = TimeAggregation.from_history(history, "America/New_York")
+    assert restored.time_stats() == single.time_stats()
+    assert restored.hourly_stats() == single.hourly_stats()
+
+
+def test_unknown_timezone_raises():
+    with pytest.raises(ValueError):
+        resolve_timezone("Mars/Olympus_Mons")
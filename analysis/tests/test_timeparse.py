@@ -0,0 +1,36 @@
+# tests/test_timeparse.py
+"""Takeout 시청 시각 파싱(parse_timestamp) 테스트"""
+import pytest
+
+from app.services.timeparse import parse_timestamp
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-02-13T13:52:46Z", 1739454766000),
+    ("2025-02-13T13:52:46.874Z", 1739454766874),
+    ("2025-02-13T13:52:46.874123Z", 1739454766874),
+    ("2025-02-13T22:52:46+09:00", 1739454766000),
+    ("2025-02-13T08:52:46.5-05:00", 1739454766500),
+    ("2025-02-13T13:52:46", 1739454766000),  # 시간대가 없으면 UTC
+    ("1969-12-31T23:59:59.999Z", -1),
+])
+def test_takeout_forms(value, expected):
+    assert parse_timestamp(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    "2025-02-13",  # 날짜만
+    "20250213T135246Z",  # 기본 형식
+    "2025-W07-4T13:52:46",  # 주 날짜
+    "2025-044T13:52:46Z",  # 서수 날짜
+    "2025-02-13 13:52:46Z",  # 공백 구분
+    "2025-02-13T13:52Z",  # 초 없음
+    "2025-02-13T13:52:4Z",
+    "2025-02-30T13:52:46Z",  # 없는 날짜
+    "2025-02-13T13:52:46+25:00",
+    "not a time",
+    "",
+    None,
+])
+def test_rejects_non_takeout_forms(value):
+    assert parse_timestamp(value) is None